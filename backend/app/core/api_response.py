@@ -4,15 +4,52 @@ Consistent response formats for all API endpoints
 """
 
 from datetime import datetime
+from decimal import Decimal
 from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
+import orjson
 from pydantic import BaseModel
 from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import logging
 
 logger = logging.getLogger(__name__)
 
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def orjson_default(obj: Any) -> Any:
+    """Encode types orjson does not handle natively"""
+    if isinstance(obj, BaseModel):
+        # Let pydantic's serializer emit JSON directly instead of building dicts
+        return orjson.Fragment(obj.model_dump_json())
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content with the app-wide JSON settings"""
+    return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    App-wide JSON response class backed by orjson.
+
+    datetime/date/UUID/Enum/dataclasses are encoded natively; Pydantic models,
+    Decimal and sets go through `orjson_default`. Returning this directly from
+    an endpoint bypasses FastAPI's response_model re-validation, which is how
+    hot list endpoints avoid validating every row twice.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
 
 class ApiResponse(BaseModel):
     """Standard API response model"""
@@ -46,18 +83,20 @@ class ResponseBuilder:
         message: str = "Success",
         status_code: int = status.HTTP_200_OK,
         request_id: Optional[str] = None,
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create a successful API response"""
 
-        response_data = ApiResponse(
-            success=True,
-            data=data,
-            message=message,
-            timestamp=datetime.utcnow().isoformat(),
-            request_id=request_id or str(uuid4()),
-        )
+        # Build the envelope directly: ApiResponse(...).dict() would deep-copy
+        # `data`, which dominates the cost for large payloads
+        response_data = {
+            "success": True,
+            "data": data,
+            "message": message,
+            "timestamp": datetime.utcnow().isoformat(),
+            "request_id": request_id or str(uuid4()),
+        }
 
-        return JSONResponse(status_code=status_code, content=response_data.dict())
+        return FastJSONResponse(status_code=status_code, content=response_data)
 
     @staticmethod
     def error(
@@ -66,25 +105,25 @@ class ResponseBuilder:
         details: Optional[Any] = None,
         status_code: int = status.HTTP_400_BAD_REQUEST,
         request_id: Optional[str] = None,
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create an error API response"""
 
-        error_data = ApiError(
-            success=False,
-            error={"code": error_code, "message": error_message, "details": details},
-            message=error_message,
-            timestamp=datetime.utcnow().isoformat(),
-            request_id=request_id or str(uuid4()),
-        )
+        error_data = {
+            "success": False,
+            "error": {"code": error_code, "message": error_message, "details": details},
+            "message": error_message,
+            "timestamp": datetime.utcnow().isoformat(),
+            "request_id": request_id or str(uuid4()),
+        }
 
-        return JSONResponse(status_code=status_code, content=error_data.dict())
+        return FastJSONResponse(status_code=status_code, content=error_data)
 
     @staticmethod
     def validation_error(
         validation_errors: List[Dict],
         message: str = "Validation failed",
         request_id: Optional[str] = None,
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create a validation error response"""
 
         return ResponseBuilder.error(
@@ -100,7 +139,7 @@ class ResponseBuilder:
         resource: str = "Resource",
         resource_id: Optional[str] = None,
         request_id: Optional[str] = None,
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create a not found error response"""
 
         message = f"{resource} not found"
@@ -118,7 +157,7 @@ class ResponseBuilder:
     @staticmethod
     def unauthorized(
         message: str = "Authentication required", request_id: Optional[str] = None
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create an unauthorized error response"""
 
         return ResponseBuilder.error(
@@ -131,7 +170,7 @@ class ResponseBuilder:
     @staticmethod
     def forbidden(
         message: str = "Access denied", request_id: Optional[str] = None
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create a forbidden error response"""
 
         return ResponseBuilder.error(
@@ -146,7 +185,7 @@ class ResponseBuilder:
         message: str = "Internal server error",
         error_details: Optional[str] = None,
         request_id: Optional[str] = None,
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create an internal server error response"""
 
         # Log the error details for debugging
@@ -166,7 +205,7 @@ class ResponseBuilder:
         data: Any,
         message: str = "Resource created successfully",
         request_id: Optional[str] = None,
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create a resource created response"""
 
         return ResponseBuilder.success(
@@ -180,7 +219,7 @@ class ResponseBuilder:
     def no_content(
         message: str = "Operation completed successfully",
         request_id: Optional[str] = None,
-    ) -> JSONResponse:
+    ) -> FastJSONResponse:
         """Create a no content response"""
 
         return ResponseBuilder.success(
@@ -194,7 +233,7 @@ class ResponseBuilder:
 # Convenience functions for common response types
 def success_response(
     data: Any = None, message: str = "Success", status_code: int = status.HTTP_200_OK
-) -> JSONResponse:
+) -> FastJSONResponse:
     """Quick success response"""
     return ResponseBuilder.success(data, message, status_code)
 
@@ -204,7 +243,7 @@ def error_response(
     message: str,
     details: Any = None,
     status_code: int = status.HTTP_400_BAD_REQUEST,
-) -> JSONResponse:
+) -> FastJSONResponse:
     """Quick error response"""
     return ResponseBuilder.error(error_code, message, details, status_code)
 
@@ -215,7 +254,7 @@ def paginated_response(
     page: int = 1,
     per_page: int = 10,
     message: str = "Success",
-) -> JSONResponse:
+) -> FastJSONResponse:
     """Create a paginated response"""
 
     total_pages = (total + per_page - 1) // per_page
@@ -0,0 +1,264 @@
+"""
+Auth Principal Layer
+Cached JWT verification and slim user principals so authentication skips the users table
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import logging
+
+from jose import jwt
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.smart_cache import smart_cache
+
+logger = logging.getLogger(__name__)
+
+# User columns mirrored in the principal; changing any of them invalidates it
+PRINCIPAL_FIELDS = ("username", "user_type", "is_active", "is_premium", "level")
+
+
+def token_hash(token: str) -> str:
+    """Stable, non-reversible cache key for a bearer token"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+class TokenClaimsCache:
+    """
+    Verified JWT claims keyed by token hash, kept until the token expires.
+
+    Verification is pure CPU, so this stays in-process: a Redis round trip
+    would cost more than the HMAC check it replaces. Callers get a copy of
+    the claims and may mutate it.
+    """
+
+    def __init__(self, max_entries: int = 10000, default_ttl: int = 300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def verify(self, token: str, secret: str, algorithms: Iterable[str]) -> Dict[str, Any]:
+        """jwt.decode with memoization; raises JWTError like jwt.decode"""
+        # The secret is part of the key so managers with different keys never share entries
+        key = token_hash(f"{hashlib.sha256(secret.encode()).hexdigest()[:8]}:{token}")
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[key]
+
+        claims = jwt.decode(token, secret, algorithms=list(algorithms))
+        self.stats["misses"] += 1
+        expires_at = float(claims["exp"]) if isinstance(claims.get("exp"), (int, float)) else now + self.default_ttl
+
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(claims)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": f"{self.stats['hits'] / lookups:.2%}" if lookups else "0.00%",
+        }
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The slice of a user that authentication and authorization need"""
+    id: int
+    username: str
+    user_type: str
+    is_active: bool
+    is_premium: bool
+    level: int
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            user_type=user.user_type or "user",
+            is_active=bool(user.is_active),
+            is_premium=bool(user.is_premium),
+            level=user.level or 1,
+        )
+
+    @property
+    def is_admin(self) -> bool:
+        return self.user_type in ("admin", "moderator")
+
+
+class PrincipalCache:
+    """
+    Two-tier principal store: a short-lived in-process map in front of Redis.
+
+    Invalidation deletes both tiers on this instance and the Redis copy;
+    other instances drop their local copy within `local_ttl` seconds.
+    """
+
+    def __init__(self, ttl: int = 300, local_ttl: int = 15, max_local_entries: int = 10000):
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.max_local_entries = max_local_entries
+        self.prefix = "principal:"
+        self._local: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._local.move_to_end(user_id)
+                self.stats["local_hits"] += 1
+                return entry[1]
+
+        data = smart_cache.get(str(user_id), prefix=self.prefix)
+        if isinstance(data, dict):
+            try:
+                principal = Principal(**data)
+            except TypeError:
+                principal = None
+            if principal is not None:
+                self._store_local(principal)
+                self.stats["redis_hits"] += 1
+                return principal
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, principal: Principal):
+        self._store_local(principal)
+        smart_cache.set(str(principal.id), asdict(principal), self.ttl, prefix=self.prefix)
+
+    def _store_local(self, principal: Principal):
+        with self._lock:
+            self._local[principal.id] = (time.time() + self.local_ttl, principal)
+            self._local.move_to_end(principal.id)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._local.pop(user_id, None)
+        smart_cache.delete(str(user_id), prefix=self.prefix)
+        self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "local_entries": len(self._local)}
+
+
+# Global auth caches
+token_claims_cache = TokenClaimsCache()
+principal_cache = PrincipalCache(
+    ttl=int(os.getenv("PRINCIPAL_CACHE_TTL", "300")),
+    local_ttl=int(os.getenv("PRINCIPAL_LOCAL_TTL", "15")),
+)
+
+
+def invalidate_principal(user_id: int):
+    """Drop a user's cached principal (profile, role or moderation change)"""
+    principal_cache.invalidate(user_id)
+
+
+class AuthenticatedUser:
+    """
+    The current user, backed by a cached Principal.
+
+    Principal fields are served without touching the database; any other
+    attribute loads the ORM User from the request's session on first use
+    and forwards to it, so handlers can keep treating this as a User.
+    Pass `load()` where a mapped instance is required (db.refresh etc.).
+    """
+
+    __slots__ = ("_principal", "_loader", "_user")
+
+    def __init__(self, principal: Principal, loader: Callable[[], Any], user: Any = None):
+        object.__setattr__(self, "_principal", principal)
+        object.__setattr__(self, "_loader", loader)
+        object.__setattr__(self, "_user", user)
+
+    @property
+    def principal(self) -> Principal:
+        return self._principal
+
+    def load(self):
+        """The ORM User, loaded on first call"""
+        if self._user is None:
+            user = self._loader()
+            if user is None:
+                raise LookupError(f"User {self._principal.id} no longer exists")
+            object.__setattr__(self, "_user", user)
+        return self._user
+
+    def _field(self, name: str):
+        # Once loaded, the ORM object is authoritative (the handler may have changed it)
+        return getattr(self._user if self._user is not None else self._principal, name)
+
+    id = property(lambda self: self._principal.id)
+    username = property(lambda self: self._field("username"))
+    user_type = property(lambda self: self._field("user_type"))
+    is_active = property(lambda self: self._field("is_active"))
+    is_premium = property(lambda self: self._field("is_premium"))
+    level = property(lambda self: self._field("level"))
+
+    def __getattr__(self, name: str):
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.load(), name, value)
+
+    def __repr__(self) -> str:
+        return f"<AuthenticatedUser id={self._principal.id} loaded={self._user is not None}>"
+
+
+# === Invalidation on ORM changes ===
+
+
+def _changed_principal_ids(session: Session) -> Iterable[int]:
+    from app.models.user import User
+
+    for obj in session.deleted:
+        if isinstance(obj, User) and obj.id is not None:
+            yield obj.id
+    for obj in session.dirty:
+        if isinstance(obj, User) and obj.id is not None:
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS):
+                yield obj.id
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context):
+    changed = set(_changed_principal_ids(session))
+    if changed:
+        session.info.setdefault("principal_invalidations", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session):
+    for user_id in session.info.pop("principal_invalidations", ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_principal_changes(session, previous_transaction):
+    session.info.pop("principal_invalidations", None)
@@ -0,0 +1,172 @@
+"""
+Cache Access Tracking
+Count-min sketch + top-K heavy hitters driving adaptive cache warming
+"""
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CountMinSketch:
+    """Fixed-memory approximate frequency counter (never under-counts)"""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.tables = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return [
+            int.from_bytes(digest[i * 8:(i + 1) * 8], "little") % self.width
+            for i in range(self.depth)
+        ]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Add occurrences of key and return its new estimated count"""
+        estimate = None
+        for row, index in zip(self.tables, self._indexes(key)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate or 0
+
+    def estimate(self, key: str) -> int:
+        """Estimated count for key"""
+        return min(row[index] for row, index in zip(self.tables, self._indexes(key)))
+
+    def decay(self):
+        """Halve all counters so the sketch follows current traffic"""
+        for row in self.tables:
+            for i in range(self.width):
+                row[i] >>= 1
+
+
+@dataclass
+class WarmableKey:
+    """How to recompute a hot cache key"""
+    key: str
+    prefix: Optional[str]
+    loader: Callable[[], Any]
+    ttl: Optional[int] = None
+    stale_ttl: Optional[int] = None
+
+
+class CacheAccessTracker:
+    """Tracks the hot set of warmable cache keys and warming effectiveness"""
+
+    def __init__(
+        self,
+        top_k: int = 200,
+        width: int = 2048,
+        depth: int = 4,
+        decay_every: int = 50000
+    ):
+        self.top_k = top_k
+        self.decay_every = decay_every
+        self.sketch = CountMinSketch(width, depth)
+        self.heavy_hitters: Dict[str, int] = {}  # cache_key -> estimated count
+        self.warmable: Dict[str, WarmableKey] = {}  # only for heavy hitters
+        self.warmed_at: Dict[str, float] = {}  # cache_key -> last warmed timestamp
+        self._floor = 0  # smallest count currently in heavy_hitters
+        self._lock = threading.Lock()
+        self.stats = {
+            "accesses": 0,
+            "hits": 0,
+            "warmed_hits": 0,
+            "keys_warmed": 0,
+            "decays": 0,
+        }
+
+    def record_access(self, cache_key: str, warmable: WarmableKey, hit: bool):
+        """Record a read of a warmable key and update the heavy-hitter set"""
+        with self._lock:
+            self.stats["accesses"] += 1
+            count = self.sketch.add(cache_key)
+
+            if hit:
+                self.stats["hits"] += 1
+                if cache_key in self.warmed_at:
+                    self.stats["warmed_hits"] += 1
+            else:
+                # Loaded on the request path, so no longer the warmed value
+                self.warmed_at.pop(cache_key, None)
+
+            if cache_key in self.heavy_hitters:
+                self.heavy_hitters[cache_key] = count
+                self.warmable[cache_key] = warmable
+            elif len(self.heavy_hitters) < self.top_k:
+                self.heavy_hitters[cache_key] = count
+                self.warmable[cache_key] = warmable
+                self._floor = min(self.heavy_hitters.values())
+            elif count > self._floor:
+                coldest = min(self.heavy_hitters, key=self.heavy_hitters.get)
+                if count > self.heavy_hitters[coldest]:
+                    self._evict(coldest)
+                    self.heavy_hitters[cache_key] = count
+                    self.warmable[cache_key] = warmable
+                self._floor = min(self.heavy_hitters.values())
+
+            if self.stats["accesses"] % self.decay_every == 0:
+                self._decay()
+
+    def _evict(self, cache_key: str):
+        self.heavy_hitters.pop(cache_key, None)
+        self.warmable.pop(cache_key, None)
+        self.warmed_at.pop(cache_key, None)
+
+    def _decay(self):
+        self.sketch.decay()
+        for cache_key in self.heavy_hitters:
+            self.heavy_hitters[cache_key] >>= 1
+        self._floor = min(self.heavy_hitters.values()) if self.heavy_hitters else 0
+        self.stats["decays"] += 1
+
+    def mark_warmed(self, cache_key: str):
+        """Record that the warmer refreshed a key"""
+        with self._lock:
+            if cache_key in self.heavy_hitters:
+                self.warmed_at[cache_key] = time.time()
+                self.stats["keys_warmed"] += 1
+
+    def clear_warmed(self, cache_key: str):
+        """Record that a key was refreshed outside the warmer"""
+        with self._lock:
+            self.warmed_at.pop(cache_key, None)
+
+    def hot_keys(self, limit: int = None) -> List[Dict[str, Any]]:
+        """Heavy hitters ordered by estimated frequency"""
+        with self._lock:
+            ranked = sorted(self.heavy_hitters.items(), key=lambda item: item[1], reverse=True)
+            return [
+                {"cache_key": cache_key, "estimated_count": count, "warmable": self.warmable[cache_key]}
+                for cache_key, count in ranked[:limit]
+            ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Warming effectiveness and hot-set statistics"""
+        with self._lock:
+            hits = self.stats["hits"]
+            return {
+                **self.stats,
+                "tracked_hot_keys": len(self.heavy_hitters),
+                "currently_warmed_keys": len(self.warmed_at),
+                "warmed_hit_share": f"{self.stats['warmed_hits'] / hits:.2%}" if hits else "0.00%",
+                "top_keys": [
+                    {"cache_key": cache_key, "estimated_count": count}
+                    for cache_key, count in sorted(
+                        self.heavy_hitters.items(), key=lambda item: item[1], reverse=True
+                    )[:10]
+                ],
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+
+
+# Global access tracker
+cache_access_tracker = CacheAccessTracker()
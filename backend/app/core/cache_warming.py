@@ -4,8 +4,8 @@ Proactive cache population and maintenance
 """
 
 import asyncio
+import functools
 import time
-import schedule
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Callable
 from concurrent.futures import ThreadPoolExecutor, Future
@@ -17,8 +17,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.core.database_production import db_config
-from app.core.smart_cache import UserCache, GameCache, LocationCache, smart_cache
-from app.core.query_cache import advanced_query_cache, get_user_count, get_active_users
+from app.core.smart_cache import GameCache, LocationCache, smart_cache
+from app.core.query_cache import advanced_query_cache, get_user_count
+from app.core.cache_access import cache_access_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +55,7 @@ class WarmingTask:
 class CacheWarmingManager:
     """Advanced cache warming and maintenance system"""
     
-    def __init__(self):
+    def __init__(self, hot_key_budget: int = 50, hot_key_interval_minutes: int = 5):
         self.tasks: Dict[str, WarmingTask] = {}
         self.executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="warmer_")
         self.running_tasks: Dict[str, Future] = {}
@@ -67,19 +68,31 @@ class CacheWarmingManager:
             "last_warming_cycle": None
         }
         
+        # Adaptive hot-key warming: max DB reloads per cycle, and how far
+        # ahead of soft expiry a hot key is refreshed (one cycle + margin)
+        self.hot_key_budget = hot_key_budget
+        self.hot_key_interval_minutes = hot_key_interval_minutes
+        self.warm_ahead_seconds = hot_key_interval_minutes * 60 + 60
+        self.hot_key_stats = {
+            "cycles": 0,
+            "candidates_last_cycle": 0,
+            "scheduled_last_cycle": 0,
+            "budget_exhausted_cycles": 0
+        }
+        
         # Register default warming tasks
         self._register_default_tasks()
     
     def _register_default_tasks(self):
         """Register default cache warming tasks"""
         
-        # Critical: User authentication data
+        # Critical: Observed hot set (count-min sketch heavy hitters)
         self.register_task(
-            "warm_active_users",
-            self._warm_active_users,
+            "warm_hot_keys",
+            self._warm_hot_keys,
             WarmingPriority.CRITICAL,
-            ttl=600,  # 10 minutes
-            interval_minutes=15
+            ttl=0,  # Each key keeps its own TTL
+            interval_minutes=self.hot_key_interval_minutes
         )
         
         # High: Frequently accessed locations
@@ -108,15 +121,6 @@ class CacheWarmingManager:
             ttl=300,  # 5 minutes
             interval_minutes=30
         )
-        
-        # Low: Game session history
-        self.register_task(
-            "warm_recent_games",
-            self._warm_recent_games,
-            WarmingPriority.LOW,
-            ttl=1200,  # 20 minutes
-            interval_minutes=90
-        )
     
     def register_task(
         self,
@@ -141,31 +145,37 @@ class CacheWarmingManager:
         self.tasks[name] = task
         logger.info(f"Registered warming task: {name} ({priority.value} priority)")
     
+    def register_jobs(self, scheduler):
+        """Register every warming task as a job, so one instance warms the shared cache"""
+        for task_name, task in self.tasks.items():
+            interval = task.interval_minutes
+            if task.priority == WarmingPriority.CRITICAL:
+                interval = max(5, interval)
+            scheduler.register(
+                f"cache_warming.{task_name}",
+                functools.partial(self._run_scheduled_task, task_name),
+                f"@every {interval}m",
+                timeout=task.max_execution_time,
+            )
+
+    def _run_scheduled_task(self, task_name: str):
+        """Job body: run a warming task inline, raising on failure for the job metrics"""
+        result = self._execute_task(self.tasks[task_name])
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        return result["result"]
+
     async def start_background_warming(self):
-        """Start background cache warming scheduler"""
+        """Start background cache warming on the shared job scheduler"""
+        from app.core.job_scheduler import job_scheduler
+
         self.is_running = True
         logger.info("🔥 Starting background cache warming system")
-        
-        # Schedule tasks based on priority
-        for task_name, task in self.tasks.items():
-            if task.priority == WarmingPriority.CRITICAL:
-                schedule.every(max(5, task.interval_minutes)).minutes.do(self._run_task_sync, task_name)
-            elif task.priority == WarmingPriority.HIGH:
-                schedule.every(task.interval_minutes).minutes.do(self._run_task_sync, task_name)
-            else:
-                schedule.every(task.interval_minutes).minutes.do(self._run_task_sync, task_name)
-        
+        self.register_jobs(job_scheduler)
+
         # Run initial warming
         await self.run_full_warming_cycle()
-        
-        # Background scheduler loop
-        while self.is_running:
-            schedule.run_pending()
-            await asyncio.sleep(30)  # Check every 30 seconds
-    
-    def _run_task_sync(self, task_name: str):
-        """Synchronous wrapper for scheduler"""
-        asyncio.create_task(self.run_task(task_name))
+        job_scheduler.start()
     
     async def run_task(self, task_name: str) -> bool:
         """Run a specific warming task"""
@@ -200,7 +210,7 @@ class CacheWarmingManager:
         
         try:
             # Execute the warming function
-            with db_config.get_session() as db:
+            with db_config.session_scope() as db:
                 result = task.function(db)
             
             duration = time.time() - start_time
@@ -279,49 +289,57 @@ class CacheWarmingManager:
         }
     
     # Warming task implementations
-    def _warm_active_users(self, db: Session) -> int:
-        """Warm active users cache"""
-        from sqlalchemy import text
+    def _warm_hot_keys(self, db: Session) -> int:
+        """
+        Refresh the observed hot set before it expires.
+
+        Candidates are heavy hitters whose soft expiry falls before the next
+        cycle (or that have already been evicted). They are ordered by
+        estimated access frequency per second of remaining freshness, and at
+        most `hot_key_budget` reloads are scheduled per cycle.
+        """
+        now = time.time()
+        candidates = []
+        
+        for hot_key in cache_access_tracker.hot_keys():
+            warmable = hot_key["warmable"]
+            entry = smart_cache.get_entry(warmable.key, prefix=warmable.prefix)
+            expires_in = entry.soft_expires_at - now if entry else 0.0
+            
+            if expires_in > self.warm_ahead_seconds:
+                continue
+            
+            priority = hot_key["estimated_count"] / max(1.0, expires_in)
+            candidates.append((priority, hot_key["cache_key"], warmable))
         
-        users = db.execute(text("SELECT * FROM users WHERE is_active = true LIMIT 50")).fetchall()
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
         
-        warmed = 0
-        for user in users:
-            user_data = {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "full_name": getattr(user, "full_name", user.username),
-                "is_active": user.is_active,
-                "created_at": str(user.created_at) if user.created_at else None,
-                "cached_at": datetime.utcnow().isoformat()
-            }
+        scheduled = 0
+        for _, cache_key, warmable in candidates:
+            if scheduled >= self.hot_key_budget:
+                self.hot_key_stats["budget_exhausted_cycles"] += 1
+                break
             
-            if UserCache.set_user(user.id, user_data, ttl=600):
-                warmed += 1
-        
-        logger.debug(f"Warmed {warmed} active user caches")
-        return warmed
+            if smart_cache.schedule_refresh(
+                warmable.key,
+                warmable.loader,
+                warmable.ttl,
+                warmable.stale_ttl,
+                prefix=warmable.prefix,
+                on_refreshed=lambda cache_key=cache_key: cache_access_tracker.mark_warmed(cache_key)
+            ):
+                scheduled += 1
+        
+        self.hot_key_stats["cycles"] += 1
+        self.hot_key_stats["candidates_last_cycle"] = len(candidates)
+        self.hot_key_stats["scheduled_last_cycle"] = scheduled
+        
+        logger.debug(f"Scheduled {scheduled}/{len(candidates)} hot key refreshes")
+        return scheduled
     
     def _warm_locations(self, db: Session) -> int:
-        """Warm locations cache"""
-        from sqlalchemy import text
-        
-        locations = db.execute(text("SELECT * FROM locations")).fetchall()
-        
-        locations_data = []
-        for location in locations:
-            location_data = {
-                "id": location.id,
-                "name": location.name,
-                "address": getattr(location, "address", ""),
-                "latitude": getattr(location, "latitude", None),
-                "longitude": getattr(location, "longitude", None),
-                "created_at": str(location.created_at) if location.created_at else None
-            }
-            locations_data.append(location_data)
-        
-        LocationCache.set_locations(locations_data, ttl=1800)
+        """Warm locations cache (stale entries refresh in the background)"""
+        locations_data = LocationCache.get_or_load_locations()
         
         logger.debug(f"Warmed {len(locations_data)} location caches")
         return len(locations_data)
@@ -369,30 +387,6 @@ class CacheWarmingManager:
         logger.debug("Warmed system statistics cache")
         return 1
     
-    def _warm_recent_games(self, db: Session) -> int:
-        """Warm recent game sessions cache"""
-        from sqlalchemy import text
-        
-        sessions = db.execute(
-            text("SELECT * FROM game_sessions WHERE created_at > NOW() - INTERVAL '7 days' LIMIT 30")
-        ).fetchall()
-        
-        warmed = 0
-        for session in sessions:
-            session_data = {
-                "id": session.id,
-                "location_id": getattr(session, "location_id", None),
-                "status": getattr(session, "status", "unknown"),
-                "created_at": str(session.created_at) if session.created_at else None,
-                "players": getattr(session, "players", [])
-            }
-            
-            if GameCache.set_game_session(str(session.id), session_data, ttl=1200):
-                warmed += 1
-        
-        logger.debug(f"Warmed {warmed} recent game session caches")
-        return warmed
-    
     def get_warming_stats(self) -> Dict[str, Any]:
         """Get comprehensive warming statistics"""
         task_stats = {}
@@ -411,6 +405,12 @@ class CacheWarmingManager:
         return {
             "global_stats": self.stats,
             "task_stats": task_stats,
+            "adaptive_warming": {
+                "hot_key_budget": self.hot_key_budget,
+                "warm_ahead_seconds": self.warm_ahead_seconds,
+                **self.hot_key_stats,
+                "effectiveness": cache_access_tracker.get_stats()
+            },
             "active_tasks": len([f for f in self.running_tasks.values() if not f.done()]),
             "is_running": self.is_running,
             "timestamp": datetime.utcnow().isoformat()
@@ -420,7 +420,6 @@ class CacheWarmingManager:
         """Stop the warming manager"""
         self.is_running = False
         self.executor.shutdown(wait=True)
-        schedule.clear()
         logger.info("🔥 Cache warming system stopped")
 
 
@@ -0,0 +1,371 @@
+"""
+Database Engine Registry
+One set of connection pools per process, sized against the server's connection limit
+"""
+
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import logging
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+POOL_MODES = ("direct", "pgbouncer")
+
+# Session defaults sent as startup parameters instead of per-connection SETs
+SERVER_SETTINGS = {
+    "timezone": "utc",
+    "statement_timeout": "30s",
+    "lock_timeout": "10s",
+    "idle_in_transaction_session_timeout": "60s",
+}
+APPLICATION_NAME = "lfa_legacy_go"
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver"""
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+@dataclass
+class PoolSettings:
+    """
+    Connection budget for one database server.
+
+    Every process opens one sync and one async pool per server, and every
+    worker of every instance does the same, so the per-pool share is
+
+        (max_connections - reserved) / (instances * workers * engines_per_process)
+
+    split between persistent connections and overflow. DB_POOL_SIZE and
+    DB_MAX_OVERFLOW override the computed values.
+    """
+    mode: str = "direct"
+    max_connections: int = 100
+    reserved_connections: int = 10  # superuser slots, Cloud SQL admin, migrations, cron
+    max_instances: int = 10
+    workers: int = 1
+    engines_per_process: int = 2
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    connect_timeout: int = 10
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        mode = os.getenv("DB_POOL_MODE", "direct").lower()
+        if mode not in POOL_MODES:
+            logger.warning(f"⚠️ Unknown DB_POOL_MODE={mode!r}, using 'direct'")
+            mode = "direct"
+        return cls(
+            mode=mode,
+            max_connections=_env_int("DB_MAX_CONNECTIONS", 100),
+            reserved_connections=_env_int("DB_RESERVED_CONNECTIONS", 10),
+            max_instances=_env_int("DB_MAX_INSTANCES", 10),
+            workers=_env_int("WEB_CONCURRENCY", 1),
+            engines_per_process=_env_int("DB_ENGINES_PER_PROCESS", 2),
+            pool_size=_env_int("DB_POOL_SIZE", None),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", None),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+            connect_timeout=_env_int("DB_CONNECT_TIMEOUT", 10),
+        )
+
+    @property
+    def pgbouncer(self) -> bool:
+        return self.mode == "pgbouncer"
+
+    @property
+    def connections_per_pool(self) -> int:
+        """Most connections one pool may hold without overrunning the server"""
+        usable = max(self.max_connections - self.reserved_connections, 1)
+        pools = max(self.max_instances * self.workers * self.engines_per_process, 1)
+        return max(usable // pools, 1)
+
+    def __post_init__(self):
+        sizing = self.sizing()
+        if not self.pgbouncer and sizing["pool_size"] + sizing["max_overflow"] > self.connections_per_pool:
+            logger.warning(
+                f"⚠️ DB pool {sizing['pool_size']}+{sizing['max_overflow']} exceeds the per-pool budget "
+                f"of {self.connections_per_pool} ({self.max_connections} max_connections across "
+                f"{self.max_instances} instances x {self.workers} workers)"
+            )
+
+    def sizing(self) -> Dict[str, int]:
+        """Resolved pool_size / max_overflow for one pool"""
+        budget = self.connections_per_pool
+        pool_size = self.pool_size if self.pool_size is not None else max((budget + 1) // 2, 1)
+        max_overflow = (
+            self.max_overflow if self.max_overflow is not None else max(budget - pool_size, 0)
+        )
+        return {"pool_size": pool_size, "max_overflow": max_overflow}
+
+    def describe(self) -> str:
+        if self.pgbouncer:
+            return "pgbouncer (NullPool, statement caches off)"
+        sizing = self.sizing()
+        return (
+            f"direct, {sizing['pool_size']}+{sizing['max_overflow']} per pool "
+            f"(budget {self.connections_per_pool})"
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_connections": self.max_connections,
+            "reserved_connections": self.reserved_connections,
+            "max_instances": self.max_instances,
+            "workers": self.workers,
+            "engines_per_process": self.engines_per_process,
+            "connections_per_pool": self.connections_per_pool,
+            **({} if self.pgbouncer else self.sizing()),
+        }
+
+
+class PoolCounters:
+    """Cumulative pool events for one engine"""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+
+    def attach(self, engine: Engine):
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.checkouts += 1
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "invalidations": self.invalidations,
+        }
+
+
+class EngineRegistry:
+    """
+    Lazily built sync and async engines keyed by database name.
+
+    All session factories in the app are bound to these engines, so a
+    process holds exactly one sync and one async pool per database server.
+
+    In "pgbouncer" mode PgBouncer (transaction pooling) owns the server
+    connections: the app uses NullPool, sends no startup parameters (set
+    statement_timeout etc. on the role instead) and disables asyncpg's
+    prepared statement caches, which do not survive a transaction moving
+    to another server connection.
+    """
+
+    def __init__(self, settings: Optional[PoolSettings] = None):
+        self.settings = settings or PoolSettings.from_env()
+        self._urls: Dict[str, Dict[str, str]] = {}
+        self._engines: Dict[str, Engine] = {}
+        self._async_engines: Dict[str, AsyncEngine] = {}
+        self._session_factories: Dict[str, sessionmaker] = {}
+        self._async_session_factories: Dict[str, async_sessionmaker] = {}
+        self._counters: Dict[str, PoolCounters] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, url: str, async_url: Optional[str] = None):
+        """Declare a database; engines are created on first use"""
+        self._urls[name] = {"sync": url, "async": async_url or to_async_url(url)}
+
+    def url(self, name: str = "primary") -> str:
+        return self._urls[name]["sync"]
+
+    def async_url(self, name: str = "primary") -> str:
+        return self._urls[name]["async"]
+
+    def _pool_options(self, url: str) -> Dict[str, Any]:
+        if url.startswith("sqlite"):
+            return {}
+        if self.settings.pgbouncer:
+            return {"poolclass": NullPool}
+        return {
+            **self.settings.sizing(),
+            "pool_timeout": self.settings.pool_timeout,
+            "pool_recycle": self.settings.pool_recycle,
+            "pool_pre_ping": True,
+        }
+
+    def _sync_connect_args(self, url: str) -> Dict[str, Any]:
+        if url.startswith("sqlite"):
+            return {"check_same_thread": False}
+        connect_args = {
+            "connect_timeout": self.settings.connect_timeout,
+            "application_name": APPLICATION_NAME,
+        }
+        if not self.settings.pgbouncer:
+            connect_args["options"] = " ".join(f"-c {key}={value}" for key, value in SERVER_SETTINGS.items())
+        return connect_args
+
+    def _async_connect_args(self, url: str) -> Dict[str, Any]:
+        if url.startswith("sqlite"):
+            return {}
+        if self.settings.pgbouncer:
+            return {
+                "timeout": self.settings.connect_timeout,
+                "server_settings": {"application_name": APPLICATION_NAME},
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                # Unique names so a statement prepared on one server connection
+                # never collides with another client's on the next transaction
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        return {
+            "timeout": self.settings.connect_timeout,
+            "server_settings": {"application_name": APPLICATION_NAME, **SERVER_SETTINGS},
+        }
+
+    def _track(self, key: str, engine: Engine):
+        counters = PoolCounters()
+        counters.attach(engine)
+        self._counters[key] = counters
+
+    def engine(self, name: str = "primary") -> Engine:
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            if name not in self._engines:
+                url = self.url(name)
+                engine = create_engine(
+                    url,
+                    connect_args=self._sync_connect_args(url),
+                    **self._pool_options(url),
+                )
+                self._track(f"{name}:sync", engine)
+                self._engines[name] = engine
+                logger.info(f"🗄️ Engine '{name}' ready ({self._describe(engine)})")
+            return self._engines[name]
+
+    def async_engine(self, name: str = "primary") -> AsyncEngine:
+        engine = self._async_engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            if name not in self._async_engines:
+                url = self.async_url(name)
+                engine = create_async_engine(
+                    url,
+                    connect_args=self._async_connect_args(url),
+                    **self._pool_options(url),
+                )
+                self._track(f"{name}:async", engine.sync_engine)
+                self._async_engines[name] = engine
+                logger.info(f"🗄️ Async engine '{name}' ready ({self._describe(engine.sync_engine)})")
+            return self._async_engines[name]
+
+    def session_factory(self, name: str = "primary") -> sessionmaker:
+        if name not in self._session_factories:
+            self._session_factories[name] = sessionmaker(
+                autocommit=False, autoflush=False, bind=self.engine(name)
+            )
+        return self._session_factories[name]
+
+    def async_session_factory(self, name: str = "primary") -> async_sessionmaker:
+        if name not in self._async_session_factories:
+            # expire_on_commit=False: attribute access after commit must not
+            # trigger an implicit (sync) refresh, which AsyncSession cannot do
+            self._async_session_factories[name] = async_sessionmaker(
+                self.async_engine(name), class_=AsyncSession, autoflush=False, expire_on_commit=False
+            )
+        return self._async_session_factories[name]
+
+    @staticmethod
+    def _describe(engine: Engine) -> str:
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            return f"pool {pool.size()}+{pool._max_overflow}"
+        return type(pool).__name__
+
+    @staticmethod
+    def _pool_state(engine: Engine) -> Dict[str, Any]:
+        pool = engine.pool
+        state: Dict[str, Any] = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            checked_out = pool.checkedout()
+            state.update(
+                pool_size=pool.size(),
+                max_overflow=pool._max_overflow,
+                checked_out=checked_out,
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+                utilization=f"{checked_out / capacity:.2%}" if capacity else "0.00%",
+            )
+        return state
+
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Pool state and cumulative counters for every engine created so far"""
+        pools = {}
+        for name, engine in list(self._engines.items()):
+            pools[f"{name}:sync"] = {**self._pool_state(engine), **self._counters[f"{name}:sync"].as_dict()}
+        for name, engine in list(self._async_engines.items()):
+            pools[f"{name}:async"] = {
+                **self._pool_state(engine.sync_engine),
+                **self._counters[f"{name}:async"].as_dict(),
+            }
+        return {"settings": self.settings.as_dict(), "pools": pools}
+
+    def health_check(self, name: str = "primary") -> Dict[str, Any]:
+        try:
+            with self.engine(name).connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return {"status": "healthy", "mode": self.settings.mode}
+        except Exception as e:
+            logger.error(f"❌ Database health check failed for '{name}': {e}")
+            return {"status": "unhealthy", "mode": self.settings.mode, "error": str(e)}
+
+    def dispose(self):
+        """Close pooled sync connections"""
+        for engine in self._engines.values():
+            engine.dispose()
+
+    async def dispose_async(self):
+        """Close pooled async connections; must run on the serving event loop"""
+        for engine in self._async_engines.values():
+            await engine.dispose()
+
+
+# Global engine registry
+engine_registry = EngineRegistry()
+engine_registry.register(
+    "primary",
+    # PRIMARY_DATABASE_URL targets the primary separately; otherwise the app-wide DATABASE_URL
+    os.getenv("PRIMARY_DATABASE_URL") or settings.DATABASE_URL,
+    os.getenv("ASYNC_DATABASE_URL"),
+)
@@ -6,9 +6,8 @@ import time
 import asyncio
 from typing import Dict, List, Any, Optional
 from contextlib import contextmanager, asynccontextmanager
-from sqlalchemy import event, Engine, create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy import event, Engine, text
+from sqlalchemy.orm import Session
 from concurrent.futures import ThreadPoolExecutor
 from app.core.config import settings
 from app.core.logging import get_logger
@@ -116,40 +115,13 @@ def receive_close(dbapi_connection, connection_record):
 
 
 def create_optimized_engine():
-    """Create SQLAlchemy engine with performance optimizations"""
-
-    # Connection pool configuration
-    if settings.DATABASE_URL.startswith("sqlite"):
-        # SQLite specific optimizations
-        engine = create_engine(
-            settings.DATABASE_URL,
-            echo=False,
-            pool_pre_ping=True,
-            pool_recycle=3600,
-            connect_args={
-                "check_same_thread": False,
-                "timeout": 20,
-                # SQLite performance optimizations
-                "isolation_level": None,  # Enable autocommit mode
-            },
-        )
-    else:
-        # PostgreSQL/MySQL optimizations
-        engine = create_engine(
-            settings.DATABASE_URL,
-            echo=False,
-            poolclass=QueuePool,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,
-            pool_recycle=3600,
-            pool_timeout=30,
-            connect_args={
-                "connect_timeout": 10,
-            },
-        )
-
-    return engine
+    """Shared engine for settings.DATABASE_URL from the engine registry"""
+    from app.core.database_engines import engine_registry
+
+    if settings.DATABASE_URL != engine_registry.url():
+        engine_registry.register("settings", settings.DATABASE_URL)
+        return engine_registry.engine("settings")
+    return engine_registry.engine()
 
 
 class OptimizedSession:
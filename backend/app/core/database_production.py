@@ -3,54 +3,25 @@ FORCED PostgreSQL Configuration for Cloud Run
 """
 import os
 import logging
-from sqlalchemy import create_engine, event, pool, text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.engine import Engine
-from typing import Generator
+from sqlalchemy import text
+from typing import Generator, Dict, Any
 from contextlib import contextmanager
 
+from app.core.database_engines import engine_registry
+
 logger = logging.getLogger(__name__)
 
 class ProductionDatabaseConfig:
     def __init__(self):
-        # KÉNYSZERÍTETT POSTGRESQL URL
-        self.database_url = "postgresql://lfa_user:NVI29jPjzKO68kJi8SMcp4cT@/lfa_legacy_go?host=/cloudsql/lfa-legacy-go:europe-west1:lfa-legacy-go-postgres"
-        
-        print(f"🔗 FORCED PostgreSQL: {self.database_url[:50]}...")
-        
-        # PostgreSQL Connection Pool Settings
-        self.pool_size = 10
-        self.max_overflow = 20
-        self.pool_timeout = 30
-        self.pool_recycle = 3600
-        self.pool_pre_ping = True
-        
+        # Engine and pool are owned by the shared registry
+        self.database_url = engine_registry.url()
         self.setup_database()
 
     def setup_database(self):
-        """Setup PostgreSQL engine"""
-        logger.info("🐘 Configuring FORCED PostgreSQL database")
-        self.engine = create_engine(
-            self.database_url,
-            poolclass=pool.QueuePool,
-            pool_size=self.pool_size,
-            max_overflow=self.max_overflow,
-            pool_timeout=self.pool_timeout,
-            pool_recycle=self.pool_recycle,
-            pool_pre_ping=self.pool_pre_ping,
-            echo=False,
-            connect_args={
-                "sslmode": "disable",
-                "connect_timeout": 10,
-                "options": "-c timezone=utc",
-            },
-            execution_options={"isolation_level": "READ_COMMITTED"},
-        )
-        
-        self.session_local = sessionmaker(
-            autocommit=False, autoflush=False, bind=self.engine
-        )
+        """Bind to the registry's PostgreSQL engine"""
+        logger.info("🐘 Configuring PostgreSQL database from engine registry")
+        self.engine = engine_registry.engine()
+        self.session_local = engine_registry.session_factory()
 
     def get_session(self) -> Generator:
         """Get database session"""
@@ -64,6 +35,36 @@ class ProductionDatabaseConfig:
         finally:
             session.close()
 
+    @contextmanager
+    def session_scope(self):
+        """Session for background work outside a request (closed on exit)"""
+        yield from self.get_session()
+
+    @contextmanager
+    def get_connection(self):
+        """Raw pooled connection for probes and maintenance"""
+        with self.engine.connect() as connection:
+            yield connection
+
+    def health_check(self) -> Dict[str, Any]:
+        """Database, cache and connection pool health"""
+        from app.core.smart_cache import smart_cache
+
+        pools = engine_registry.pool_metrics()
+        return {
+            "database": engine_registry.health_check(),
+            "redis": {"status": "healthy" if smart_cache.redis_client else "disabled"},
+            "connection_pool": pools["pools"].get("primary:sync", {}),
+        }
+
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """Pool sizing, utilization and event counters for every engine"""
+        return engine_registry.pool_metrics()
+
+    def close_connections(self):
+        engine_registry.dispose()
+        logger.info("🔌 Database connection pools disposed")
+
 # Global instance
 db_config = ProductionDatabaseConfig()
 
@@ -74,3 +75,26 @@ def get_db():
 # For backward compatibility
 engine = db_config.engine
 SessionLocal = db_config.session_local
+
+_redis_client = None
+
+def get_redis():
+    """Shared Redis client for caching (None when Redis is unavailable)"""
+    global _redis_client
+    if _redis_client is None:
+        try:
+            import redis
+
+            redis_url = os.getenv(
+                "REDIS_URL",
+                f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/0",
+            )
+            client = redis.Redis.from_url(
+                redis_url, socket_timeout=2, socket_connect_timeout=2, health_check_interval=30
+            )
+            client.ping()
+            _redis_client = client
+        except Exception as e:
+            logger.warning(f"⚠️ Redis unavailable, caching disabled: {e}")
+            return None
+    return _redis_client
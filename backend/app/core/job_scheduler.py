@@ -0,0 +1,449 @@
+"""
+Job Scheduler
+Cron-style periodic jobs with a Redis lease per run, so each run happens on exactly one instance
+"""
+
+import asyncio
+import calendar
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+import logging
+
+from app.core.database_production import get_redis
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_MODES = ("auto", "redis", "local", "off")
+LEASE_PREFIX = "jobs:lease:"
+LAST_RUN_PREFIX = "jobs:last:"
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# KEYS: lease, last run; ARGV: owner, fire timestamp, lease ms, last-run ttl seconds
+ACQUIRE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+local last = tonumber(redis.call('GET', KEYS[2]) or '0')
+if last >= tonumber(ARGV[2]) then return 0 end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[3])
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[4])
+return 1
+"""
+
+# KEYS: lease; ARGV: owner, lease ms (0 = release)
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then return 0 end
+if tonumber(ARGV[2]) == 0 then return redis.call('DEL', KEYS[1]) end
+return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+"""
+
+
+class CronSpec:
+    """
+    When a job fires, in UTC.
+
+    Accepts five-field cron expressions (minute hour day-of-month month
+    day-of-week, with `*`, `a-b`, `*/n`, `a-b/n` and lists), the @hourly /
+    @daily / @weekly / @monthly aliases, and `@every 90s|5m|2h|1d`.
+    Interval specs fire on multiples of the interval since the epoch, so
+    every instance computes the same fire times.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        self.interval: Optional[int] = None
+        spec = CRON_ALIASES.get(self.expression, self.expression)
+
+        if spec.startswith("@every "):
+            amount = spec[len("@every "):].strip()
+            unit = _INTERVAL_UNITS.get(amount[-1:])
+            if unit is None or not amount[:-1].isdigit() or int(amount[:-1]) <= 0:
+                raise ValueError(f"Invalid interval spec: {expression!r}")
+            self.interval = int(amount[:-1]) * unit
+            return
+
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec needs 5 fields: {expression!r}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse_field(value, low, high) for value, (low, high) in zip(fields, _FIELD_RANGES)
+        )
+        self.weekdays = {day % 7 for day in weekdays}  # 0 and 7 are both Sunday
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(value: str, low: int, high: int) -> Set[int]:
+        allowed = set()
+        for part in value.split(","):
+            span, _, step = part.partition("/")
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(bound) for bound in span.split("-", 1))
+            else:
+                start = end = int(span)
+            if not (low <= start <= end <= high) or (step and int(step) <= 0):
+                raise ValueError(f"Cron field {value!r} is outside {low}-{high}")
+            allowed.update(range(start, end + 1, int(step) if step else 1))
+        return allowed
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_month = moment.day in self.days
+        in_week = (moment.weekday() + 1) % 7 in self.weekdays
+        # Cron semantics: when both day fields are restricted, either may match
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First fire time strictly after `moment` (naive UTC)"""
+        if self.interval:
+            epoch = calendar.timegm(moment.utctimetuple()) + moment.microsecond / 1e6
+            return datetime.utcfromtimestamp((int(epoch) // self.interval + 1) * self.interval)
+
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron spec never fires: {self.expression!r}")
+
+    def __repr__(self) -> str:
+        return f"CronSpec({self.expression!r})"
+
+
+class MemoryLeaseBackend:
+    """Leases within this process only (tests, single instance, Redis down)"""
+
+    name = "local"
+
+    def __init__(self):
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._last_run: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, job: str, owner: str, fire_ts: int, lease_seconds: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            lease = self._leases.get(job)
+            if lease and lease[1] > now:
+                return False
+            if self._last_run.get(job, 0) >= fire_ts:
+                return False
+            self._leases[job] = (owner, now + lease_seconds)
+            self._last_run[job] = fire_ts
+            return True
+
+    def renew(self, job: str, owner: str, lease_seconds: float) -> bool:
+        with self._lock:
+            lease = self._leases.get(job)
+            if not lease or lease[0] != owner:
+                return False
+            self._leases[job] = (owner, time.monotonic() + lease_seconds)
+            return True
+
+    def release(self, job: str, owner: str):
+        with self._lock:
+            lease = self._leases.get(job)
+            if lease and lease[0] == owner:
+                del self._leases[job]
+
+
+class RedisLeaseBackend:
+    """
+    One lease key per job, shared by all instances.
+
+    Acquiring also records the fire time being claimed, so an instance
+    whose timer (plus jitter) fires after the winner has already finished
+    does not run the same occurrence again.
+    """
+
+    name = "redis"
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._acquire = redis_client.register_script(ACQUIRE_SCRIPT)
+        self._renew = redis_client.register_script(RENEW_SCRIPT)
+
+    def acquire(self, job: str, owner: str, fire_ts: int, lease_seconds: float) -> bool:
+        return bool(self._acquire(
+            keys=[f"{LEASE_PREFIX}{job}", f"{LAST_RUN_PREFIX}{job}"],
+            args=[owner, fire_ts, int(lease_seconds * 1000), 7 * 86400],
+        ))
+
+    def renew(self, job: str, owner: str, lease_seconds: float) -> bool:
+        return bool(self._renew(keys=[f"{LEASE_PREFIX}{job}"], args=[owner, int(lease_seconds * 1000)]))
+
+    def release(self, job: str, owner: str):
+        self._renew(keys=[f"{LEASE_PREFIX}{job}"], args=[owner, 0])
+
+
+@dataclass
+class ScheduledJob:
+    """A registered job with its run metrics"""
+
+    name: str
+    func: Callable
+    schedule: CronSpec
+    timeout: float
+    jitter: float
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    last_duration: Optional[float] = None
+    last_started: Optional[datetime] = None
+    last_error: Optional[str] = None
+    next_run: Optional[datetime] = None
+    running: bool = False
+    durations: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+
+    def as_dict(self) -> Dict[str, Any]:
+        durations = sorted(self.durations)
+        return {
+            "schedule": self.schedule.expression,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "running": self.running,
+            "avg_ms": round(self.total_duration / self.runs * 1000, 1) if self.runs else 0,
+            "p95_ms": round(durations[int(len(durations) * 0.95) - 1] * 1000, 1) if durations else 0,
+            "max_ms": round(self.max_duration * 1000, 1),
+            "last_ms": round(self.last_duration * 1000, 1) if self.last_duration is not None else None,
+            "last_started": self.last_started.isoformat() if self.last_started else None,
+            "last_error": self.last_error,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+        }
+
+
+class JobScheduler:
+    """
+    Runs registered jobs on their schedules.
+
+    Every instance keeps a timer per job, sleeps a random jitter after each
+    fire time and then tries to take the job's lease; only the winner runs
+    that occurrence and the others count it as skipped. The lease outlives
+    the job's timeout and is renewed while the job runs. At most
+    `max_concurrent` jobs run at once per instance; sync callables run in a
+    worker thread so they never block the event loop.
+
+    Mode "redis" (or "auto" with Redis reachable) coordinates instances;
+    "local" uses in-process leases, which is what tests and single-instance
+    deployments need. If Redis fails mid-flight the in-process lease is used
+    for that run, mirroring the token store's fallback.
+    """
+
+    def __init__(self, mode: str = "auto", max_concurrent: int = 4, default_jitter: float = 30.0):
+        self.mode = mode if mode in SCHEDULER_MODES else "auto"
+        self.max_concurrent = max_concurrent
+        self.default_jitter = default_jitter
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._backend = None
+        self._local = MemoryLeaseBackend()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats = {"runs": 0, "failures": 0, "skipped": 0, "lease_fallbacks": 0}
+
+    # === Registration ===
+
+    def register(
+        self,
+        name: str,
+        func: Callable,
+        schedule: str,
+        timeout: float = 300.0,
+        jitter: Optional[float] = None,
+    ) -> ScheduledJob:
+        """Register (or replace) a job; `func` takes no arguments and may be async"""
+        job = ScheduledJob(
+            name=name,
+            func=func,
+            schedule=CronSpec(schedule),
+            timeout=timeout,
+            jitter=self.default_jitter if jitter is None else jitter,
+        )
+        self.jobs[name] = job
+        if name in self._tasks:
+            self._tasks.pop(name).cancel()
+            self._tasks[name] = asyncio.get_running_loop().create_task(self._job_loop(job))
+        logger.info(f"🗓️ Registered job: {name} ({schedule})")
+        return job
+
+    def job(self, schedule: str, name: Optional[str] = None, **options):
+        """Decorator form of register()"""
+        def decorator(func: Callable) -> Callable:
+            self.register(name or func.__name__, func, schedule, **options)
+            return func
+        return decorator
+
+    # === Leases ===
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            redis_client = get_redis() if self.mode in ("auto", "redis") else None
+            if redis_client is not None:
+                self._backend = RedisLeaseBackend(redis_client)
+            else:
+                if self.mode == "redis":
+                    logger.warning("⚠️ Redis unavailable, job leases are local to this instance")
+                self._backend = self._local
+        return self._backend
+
+    def _lease_seconds(self, job: ScheduledJob) -> float:
+        return job.timeout + 60
+
+    def _acquire(self, job: ScheduledJob, fire_ts: int) -> Tuple[Any, bool]:
+        try:
+            backend = self.backend
+            return backend, backend.acquire(job.name, self.instance_id, fire_ts, self._lease_seconds(job))
+        except Exception as e:
+            self.stats["lease_fallbacks"] += 1
+            logger.warning(f"⚠️ Job lease for {job.name} fell back to local: {e}")
+            return self._local, self._local.acquire(job.name, self.instance_id, fire_ts, self._lease_seconds(job))
+
+    async def _keep_lease(self, backend, job: ScheduledJob):
+        interval = self._lease_seconds(job) / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not backend.renew(job.name, self.instance_id, self._lease_seconds(job)):
+                    logger.warning(f"⚠️ Lost lease for job {job.name} while it was running")
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ Could not renew lease for job {job.name}: {e}")
+
+    # === Execution ===
+
+    async def _execute(self, job: ScheduledJob):
+        if asyncio.iscoroutinefunction(job.func):
+            return await asyncio.wait_for(job.func(), job.timeout)
+        # A timed-out thread keeps running; the lease is released when it is abandoned
+        return await asyncio.wait_for(asyncio.to_thread(job.func), job.timeout)
+
+    async def run_job(self, name: str, fire_time: Optional[datetime] = None) -> bool:
+        """Run one occurrence if this instance wins its lease; True when it ran successfully"""
+        job = self.jobs[name]
+        fire_ts = calendar.timegm((fire_time or datetime.utcnow()).utctimetuple())
+        backend, acquired = self._acquire(job, fire_ts)
+        if not acquired:
+            job.skipped += 1
+            self.stats["skipped"] += 1
+            logger.debug(f"Job {name} is running elsewhere or already ran, skipping")
+            return False
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        renewer = asyncio.get_running_loop().create_task(self._keep_lease(backend, job))
+        try:
+            async with self._semaphore:
+                job.running = True
+                job.last_started = datetime.utcnow()
+                started = time.perf_counter()
+                try:
+                    await self._execute(job)
+                    job.last_error = None
+                    return True
+                except asyncio.TimeoutError:
+                    job.timeouts += 1
+                    job.failures += 1
+                    self.stats["failures"] += 1
+                    job.last_error = f"Timed out after {job.timeout:g}s"
+                    logger.error(f"❌ Job {name} timed out after {job.timeout:g}s")
+                    return False
+                except Exception as e:
+                    job.failures += 1
+                    self.stats["failures"] += 1
+                    job.last_error = str(e)
+                    logger.error(f"❌ Job {name} failed: {e}")
+                    return False
+                finally:
+                    duration = time.perf_counter() - started
+                    job.running = False
+                    job.runs += 1
+                    self.stats["runs"] += 1
+                    job.last_duration = duration
+                    job.total_duration += duration
+                    job.max_duration = max(job.max_duration, duration)
+                    job.durations.append(duration)
+                    logger.info(f"🗓️ Job {name} finished in {duration * 1000:.0f} ms")
+        finally:
+            renewer.cancel()
+            try:
+                backend.release(job.name, self.instance_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not release lease for job {job.name}: {e}")
+
+    async def _job_loop(self, job: ScheduledJob):
+        while True:
+            fire_time = job.schedule.next_after(datetime.utcnow())
+            job.next_run = fire_time
+            delay = (fire_time - datetime.utcnow()).total_seconds() + random.uniform(0, job.jitter)
+            await asyncio.sleep(max(0.0, delay))
+            try:
+                await self.run_job(job.name, fire_time)
+            except Exception as e:
+                logger.error(f"❌ Scheduling job {job.name} failed: {e}")
+
+    def start(self):
+        """Start a timer per registered job (idempotent; needs a running loop)"""
+        if self.mode == "off":
+            logger.info("🗓️ Job scheduler disabled")
+            return
+        loop = asyncio.get_running_loop()
+        for name, job in self.jobs.items():
+            if name not in self._tasks or self._tasks[name].done():
+                self._tasks[name] = loop.create_task(self._job_loop(job), name=f"job:{name}")
+        logger.info(f"🗓️ Job scheduler started: {len(self.jobs)} jobs, leases via {self.backend.name}")
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "mode": self.mode,
+            "leases": self._backend.name if self._backend else None,
+            "instance": self.instance_id,
+            "jobs": {name: job.as_dict() for name, job in self.jobs.items()},
+        }
+
+
+# Global job scheduler
+job_scheduler = JobScheduler(
+    mode=os.getenv("JOB_SCHEDULER_MODE", "auto").lower(),
+    max_concurrent=int(os.getenv("JOB_SCHEDULER_MAX_CONCURRENT", "4")),
+    default_jitter=float(os.getenv("JOB_SCHEDULER_JITTER", "30")),
+)
@@ -0,0 +1,60 @@
+"""
+Lazy Imports
+Defer heavy optional dependencies until first use to keep cold start short
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+from types import ModuleType
+from typing import Any, Optional
+
+from app.core.startup_profiler import startup_profiler
+
+
+def optional_module(name: str) -> bool:
+    """Whether a module is installed, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    The import time is recorded on the startup profiler. A missing
+    dependency raises ImportError at the point of use rather than at
+    application start.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_module: Optional[ModuleType] = None
+        self._lazy_lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    startup_profiler.record_import(self.__name__, time.perf_counter() - started)
+                    self._lazy_module = module
+        return self._lazy_module
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_lazy_"):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """`qrcode = lazy_import("qrcode")` in place of `import qrcode`"""
+    return LazyModule(name)
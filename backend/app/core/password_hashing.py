@@ -0,0 +1,228 @@
+"""
+Password Hashing Pool
+Runs argon2/bcrypt hashing and verification off the event loop in a bounded process pool
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import BrokenExecutor, Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# Argon2id parameters (OWASP: 19 MiB, 2 iterations). Hashes made with other
+# parameters, and all bcrypt hashes, are reported as needing an update.
+ARGON2_SETTINGS = {
+    "argon2__type": "ID",
+    "argon2__memory_cost": 19456,
+    "argon2__time_cost": 2,
+    "argon2__parallelism": 1,
+    "argon2__digest_size": 32,
+}
+
+_context: Optional[CryptContext] = None
+
+
+def get_crypt_context() -> CryptContext:
+    """The shared CryptContext (one per process, built on first use)"""
+    global _context
+    if _context is None:
+        _context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto", **ARGON2_SETTINGS)
+    return _context
+
+
+# === Worker functions (module level so the process pool can pickle them) ===
+
+
+def hash_password(password: str) -> str:
+    return get_crypt_context().hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return get_crypt_context().verify(password, hashed_password)
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, replacement hash when the stored one uses a legacy scheme or parameters)"""
+    return get_crypt_context().verify_and_update(password, hashed_password)
+
+
+def _warm_worker():
+    get_crypt_context()
+
+
+class PasswordHashingService:
+    """
+    Hashes and verifies passwords on a dedicated process pool.
+
+    Argon2 at 19 MiB holds a core for tens of milliseconds; run inline it
+    stalls every request on the worker. Here at most `max_workers` hashes
+    run at once and at most `max_pending` may be queued or running; beyond
+    that callers get 503 with Retry-After immediately instead of piling up
+    behind a login storm. With `max_workers=0` (or if processes cannot be
+    started) a thread pool is used: argon2-cffi and bcrypt release the GIL.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64, timeout: float = 10.0):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._uses_processes = False
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies = deque(maxlen=1000)
+        self.stats = {
+            "hashes": 0,
+            "verifications": 0,
+            "rehashed": 0,
+            "shed": 0,
+            "timeouts": 0,
+            "pool_restarts": 0,
+        }
+
+    @property
+    def mode(self) -> str:
+        if self._executor is None:
+            return "idle"
+        return "process" if self._uses_processes else "thread"
+
+    def _get_executor(self) -> Executor:
+        if self._executor is not None:
+            return self._executor
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+        return self._executor
+
+    def _create_executor(self) -> Executor:
+        self._uses_processes = False
+        if self.max_workers > 0:
+            # Imported here: multiprocessing is a noticeable share of cold start
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            try:
+                # spawn: forking a process that already runs threads can copy held locks
+                executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                )
+                self._uses_processes = True
+                logger.info(f"🔐 Password hashing pool: {self.max_workers} processes, {self.max_pending} max pending")
+                return executor
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"⚠️ Process pool unavailable for password hashing, using threads: {e}")
+        return ThreadPoolExecutor(max_workers=max(self.max_workers, 2), thread_name_prefix="password_hash")
+
+    def _reset_executor(self, broken: Executor):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self.stats["pool_restarts"] += 1
+        broken.shutdown(wait=False)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, func: Callable, *args) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.stats["shed"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication is busy, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+        started = time.perf_counter()
+        held = True
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    if not held:
+                        # The broken attempt released its slot on completion; the retry takes it back
+                        with self._lock:
+                            self._pending += 1
+                        held = True
+                    future = executor.submit(func, *args)
+                    # Freed when the job ends, not when the caller stops waiting: a timed-out job still runs
+                    held = False
+                    future.add_done_callback(self._release)
+                    return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                except BrokenExecutor:
+                    # A worker died (OOM kill); replace the pool once and retry
+                    logger.error("❌ Password hashing pool broke, restarting it")
+                    self._reset_executor(executor)
+                    if attempt:
+                        raise
+                except asyncio.TimeoutError:
+                    self.stats["timeouts"] += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail="Authentication timed out, please retry",
+                        headers={"Retry-After": "1"},
+                    )
+        finally:
+            self._latencies.append(time.perf_counter() - started)
+            if held:
+                self._release()
+
+    async def hash(self, password: str) -> str:
+        self.stats["hashes"] += 1
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        valid, _ = await self.verify_and_update(password, hashed_password)
+        return valid
+
+    async def verify_and_update(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also returns an argon2 rehash for legacy hashes"""
+        if not hashed_password:
+            return False, None
+        self.stats["verifications"] += 1
+        try:
+            valid, new_hash = await self._run(verify_and_update, password, hashed_password)
+        except ValueError:
+            # Unrecognized hash format
+            return False, None
+        if valid and new_hash:
+            self.stats["rehashed"] += 1
+        return valid, new_hash
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            **self.stats,
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "avg_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0,
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else 0,
+        }
+
+
+# Global password hashing service
+password_hasher = PasswordHashingService(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(min(2, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64")),
+    timeout=float(os.getenv("PASSWORD_HASH_TIMEOUT", "10")),
+)
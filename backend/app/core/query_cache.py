@@ -12,13 +12,13 @@ from functools import wraps
 import logging
 from dataclasses import dataclass
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 from sqlalchemy import text, event
 from sqlalchemy.orm import Session
 from sqlalchemy.engine import Engine
 
 from app.core.smart_cache import smart_cache
+from app.core.cache_access import cache_access_tracker, WarmableKey
 from app.core.database_production import db_config
 
 logger = logging.getLogger(__name__)
@@ -27,13 +27,39 @@ logger = logging.getLogger(__name__)
 @dataclass
 class QueryCacheConfig:
     """Configuration for query caching"""
-    ttl: int = 300  # 5 minutes default
-    auto_refresh: bool = False  # Auto-refresh before expiry
-    refresh_threshold: float = 0.8  # Refresh when 80% of TTL passed
+    ttl: int = 300  # 5 minutes default (soft expiry)
+    auto_refresh: bool = False  # Serve stale and refresh in background
+    stale_ttl: int = 60  # Extra seconds stale results may be served
+    beta: float = 1.0  # XFetch early-refresh aggressiveness (0 disables)
     max_result_size: int = 10000  # Max rows to cache
     compression: bool = True  # Compress large results
     
 
+def detached_loader(func: Callable, args: Tuple, kwargs: Dict) -> Callable[[], Any]:
+    """
+    Re-runnable loader for a cached query call that holds no request session.
+
+    Warmers and background refreshes run later on other threads, after the
+    request's session is closed, so every Session argument is replaced by
+    a session opened for that run.
+    """
+    session_args = {index for index, arg in enumerate(args) if isinstance(arg, Session)}
+    session_kwargs = {name for name, value in kwargs.items() if isinstance(value, Session)}
+    args = tuple(None if index in session_args else arg for index, arg in enumerate(args))
+    kwargs = {name: None if name in session_kwargs else value for name, value in kwargs.items()}
+    if not session_args and not session_kwargs:
+        return lambda: func(*args, **kwargs)
+
+    def load():
+        with db_config.session_scope() as db:
+            return func(
+                *(db if index in session_args else arg for index, arg in enumerate(args)),
+                **{name: db if name in session_kwargs else value for name, value in kwargs.items()},
+            )
+
+    return load
+
+
 @dataclass
 class QueryMetrics:
     """Query performance metrics"""
@@ -41,6 +67,7 @@ class QueryMetrics:
     execution_count: int = 0
     cache_hits: int = 0 
     cache_misses: int = 0
+    stale_hits: int = 0  # Served past soft expiry while a refresh ran
     avg_db_time: float = 0.0
     avg_cache_time: float = 0.0
     last_executed: Optional[datetime] = None
@@ -62,7 +89,6 @@ class AdvancedQueryCache:
         self.metrics: Dict[str, QueryMetrics] = {}
         self.table_dependencies: Dict[str, List[str]] = {}  # table -> query_hashes
         self.query_configs: Dict[str, QueryCacheConfig] = {}
-        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache_")
         
         # Setup database event listeners for invalidation
         self._setup_invalidation_listeners()
@@ -136,21 +162,36 @@ class AdvancedQueryCache:
                 
                 # Try cache first
                 start_time = time.time()
-                cached_result = smart_cache.get(cache_key, prefix="query_cache:")
+                cached_entry = smart_cache.get_entry(cache_key, prefix="query_cache:")
                 cache_time = time.time() - start_time
                 
-                if cached_result is not None:
+                loader = detached_loader(func, args, kwargs)
+                cache_access_tracker.record_access(
+                    f"query_cache:{cache_key}",
+                    WarmableKey(
+                        cache_key,
+                        "query_cache:",
+                        loader,
+                        query_config.ttl,
+                        query_config.stale_ttl if query_config.auto_refresh else 0
+                    ),
+                    hit=cached_entry is not None
+                )
+                
+                if cached_entry is not None:
                     # Cache hit
                     metrics.cache_hits += 1
                     metrics.avg_cache_time = (metrics.avg_cache_time * (metrics.cache_hits - 1) + cache_time * 1000) / metrics.cache_hits
                     
                     logger.debug(f"Query cache HIT: {query_hash[:8]}... ({cache_time*1000:.2f}ms)")
                     
-                    # Check if needs background refresh
-                    if query_config.auto_refresh:
-                        self._maybe_refresh_background(query_hash, query, params, func, args, kwargs)
+                    # Stale or probabilistically early: one deduplicated refresh
+                    if query_config.auto_refresh and cached_entry.should_refresh(query_config.beta):
+                        if cached_entry.is_stale():
+                            metrics.stale_hits += 1
+                        self._refresh_background(query_hash, loader, query_config)
                     
-                    return cached_result
+                    return cached_entry.value
                 
                 # Cache miss - execute query
                 metrics.cache_misses += 1
@@ -167,7 +208,14 @@ class AdvancedQueryCache:
                 
                 # Cache the result if it's not too large
                 if self._should_cache_result(result, query_config):
-                    smart_cache.set(cache_key, result, query_config.ttl, prefix="query_cache:")
+                    smart_cache.set_entry(
+                        cache_key,
+                        result,
+                        query_config.ttl,
+                        query_config.stale_ttl if query_config.auto_refresh else 0,
+                        delta=db_time,
+                        prefix="query_cache:"
+                    )
                     
                     # Track table dependencies
                     tables = self._extract_table_names(query)
@@ -194,53 +242,27 @@ class AdvancedQueryCache:
         
         return True
     
-    def _maybe_refresh_background(
-        self, 
-        query_hash: str, 
-        query: str, 
-        params: Dict,
-        func: Callable,
-        args: Tuple,
-        kwargs: Dict
-    ):
-        """Maybe refresh cache in background if near expiry"""
-        cache_key = f"query:{query_hash}"
-        
-        # Check TTL remaining
-        remaining_ttl = smart_cache.redis_client.ttl(f"query_cache:{cache_key}") if smart_cache.redis_client else -1
-        config = self.query_configs.get(query_hash, QueryCacheConfig())
-        
-        if remaining_ttl > 0 and remaining_ttl < (config.ttl * (1 - config.refresh_threshold)):
-            # Submit background refresh
-            logger.debug(f"Scheduling background refresh for query {query_hash[:8]}...")
-            self.executor.submit(self._background_refresh, query_hash, func, args, kwargs, config)
-    
-    def _background_refresh(
+    def _refresh_background(
         self, 
         query_hash: str, 
-        func: Callable, 
-        args: Tuple, 
-        kwargs: Dict,
+        loader: Callable[[], Any],
         config: QueryCacheConfig
-    ):
-        """Background refresh of cache"""
-        try:
-            cache_key = f"query:{query_hash}"
-            
-            start_time = time.time()
-            result = func(*args, **kwargs)
-            execution_time = time.time() - start_time
-            
-            # Update cache
-            smart_cache.set(cache_key, result, config.ttl, prefix="query_cache:")
-            
-            logger.info(f"Background refresh completed for query {query_hash[:8]}... ({execution_time*1000:.2f}ms)")
-            
-        except Exception as e:
-            logger.error(f"Background refresh failed for query {query_hash[:8]}...: {e}")
+    ) -> bool:
+        """Schedule a single deduplicated background refresh of a query result"""
+        logger.debug(f"Scheduling background refresh for query {query_hash[:8]}...")
+        
+        return smart_cache.schedule_refresh(
+            f"query:{query_hash}",
+            loader,
+            config.ttl,
+            config.stale_ttl,
+            prefix="query_cache:"
+        )
     
     def invalidate_table_caches(self, table_name: str):
         """Invalidate all caches dependent on a table"""
+        smart_cache.invalidate_tags(table_name.lower())
+        
         if table_name in self.table_dependencies:
             query_hashes = self.table_dependencies[table_name]
             
@@ -257,6 +279,7 @@ class AdvancedQueryCache:
                 "execution_count": metrics.execution_count,
                 "cache_hits": metrics.cache_hits,
                 "cache_misses": metrics.cache_misses,
+                "stale_hits": metrics.stale_hits,
                 "hit_rate": f"{metrics.hit_rate:.2%}",
                 "avg_db_time_ms": round(metrics.avg_db_time, 2),
                 "avg_cache_time_ms": round(metrics.avg_cache_time, 2),
@@ -320,7 +343,8 @@ def cached_query(
     params: Dict = None,
     ttl: int = 300,
     auto_refresh: bool = False,
-    max_result_size: int = 10000
+    max_result_size: int = 10000,
+    stale_ttl: int = 60
 ) -> Callable:
     """
     Decorator for caching SQL query results
@@ -328,9 +352,10 @@ def cached_query(
     Args:
         query: SQL query string
         params: Query parameters
-        ttl: Cache TTL in seconds
-        auto_refresh: Enable background refresh
+        ttl: Cache TTL in seconds (soft expiry)
+        auto_refresh: Serve stale results while refreshing in background
         max_result_size: Maximum rows to cache
+        stale_ttl: Seconds past soft expiry stale results may be served
     
     Example:
         @cached_query("SELECT * FROM users WHERE is_active = true", ttl=600)
@@ -340,7 +365,8 @@ def cached_query(
     config = QueryCacheConfig(
         ttl=ttl,
         auto_refresh=auto_refresh, 
-        max_result_size=max_result_size
+        max_result_size=max_result_size,
+        stale_ttl=stale_ttl
     )
     
     return advanced_query_cache.cache_query(query, params, config)
@@ -361,7 +387,7 @@ def get_active_users(db: Session) -> List[Dict]:
     return [dict(row._mapping) for row in result]
 
 
-@cached_query("SELECT * FROM tournaments WHERE status = :status", ttl=600, auto_refresh=True)
+@cached_query("SELECT * FROM tournaments WHERE status = :status", ttl=600, auto_refresh=True, stale_ttl=120)
 def get_tournaments_by_status(db: Session, status: str = "active") -> List[Dict]:
     """Get tournaments by status with 10-minute cache and auto-refresh"""
     result = db.execute(
@@ -0,0 +1,268 @@
+"""
+Read Replica Routing
+Health-checked, lag-aware round-robin over replica engines with read-your-writes pinning
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import logging
+
+from fastapi import Request
+from sqlalchemy import text
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.auth_principal import token_hash
+from app.core.database_engines import EngineRegistry, engine_registry
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+
+# Replay lag in seconds; an idle replica that has applied everything it
+# received reports 0 rather than the age of the last replayed transaction
+POSTGRES_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@dataclass
+class ReplicaState:
+    """Last observed health of one replica"""
+    name: str
+    healthy: bool = False  # Not routed to until the first check passes
+    lag_seconds: float = 0.0
+    last_checked: float = 0.0
+    last_error: Optional[str] = None
+    selections: int = 0
+    failures: int = 0
+
+
+class ReadReplicaRouter:
+    """
+    Chooses the engine that serves a read-only session.
+
+    A daemon thread polls every replica each `check_interval` seconds and
+    records reachability and replay lag, so choosing an engine never waits
+    on the network. Replicas that failed a check or lag more than
+    `max_lag_seconds` are skipped; when none qualify reads go to the
+    primary.
+
+    Callers that just wrote are pinned to the primary for `pin_seconds`
+    so they read their own writes. Pins are keyed by a hash of the bearer
+    token and live in Redis when available, so every instance honours them.
+
+    For local testing point PRIMARY_DATABASE_URL and REPLICA_DATABASE_URLS
+    at two SQLite files or two Postgres containers; SQLite reports no lag.
+    """
+
+    def __init__(
+        self,
+        registry: EngineRegistry,
+        replica_urls: List[str],
+        max_lag_seconds: float = 5.0,
+        check_interval: float = 5.0,
+        pin_seconds: int = 10,
+    ):
+        self.registry = registry
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.pin_seconds = pin_seconds
+        self.replicas: Dict[str, ReplicaState] = {}
+        for index, url in enumerate(replica_urls, start=1):
+            name = f"replica_{index}"
+            registry.register(name, url)
+            self.replicas[name] = ReplicaState(name=name)
+
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._local_pins: Dict[str, float] = {}
+        self._checker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"replica_reads": 0, "primary_reads": 0, "pinned_reads": 0, "fallbacks": 0, "pins": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # === Health checks ===
+
+    def start(self):
+        """Start the background health checker (idempotent)"""
+        if not self.enabled or (self._checker and self._checker.is_alive()):
+            return
+        with self._lock:
+            if self._checker and self._checker.is_alive():
+                return
+            self._stop.clear()
+            self._checker = threading.Thread(target=self._check_loop, name="replica_health", daemon=True)
+            self._checker.start()
+        logger.info(f"🩺 Replica health checks started for {list(self.replicas)}")
+
+    def stop(self):
+        self._stop.set()
+
+    def _check_loop(self):
+        while not self._stop.is_set():
+            self.check_replicas()
+            self._stop.wait(self.check_interval)
+
+    def check_replicas(self):
+        for state in self.replicas.values():
+            self._check(state)
+
+    def _check(self, state: ReplicaState):
+        engine = self.registry.engine(state.name)
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == "postgresql":
+                    lag = float(connection.execute(POSTGRES_LAG_QUERY).scalar() or 0)
+                else:
+                    connection.execute(text("SELECT 1"))
+                    lag = 0.0
+            was_healthy = state.healthy
+            state.healthy, state.lag_seconds, state.last_error = True, lag, None
+            if not was_healthy:
+                logger.info(f"✅ Replica {state.name} is serving reads (lag {lag:.1f}s)")
+        except Exception as e:
+            if state.healthy or not state.last_checked:
+                logger.warning(f"⚠️ Replica {state.name} failed health check: {e}")
+            state.healthy, state.last_error = False, str(e)
+        finally:
+            state.last_checked = time.time()
+
+    def mark_failed(self, name: str, error: Exception):
+        """Take a replica out of rotation until its next successful check"""
+        state = self.replicas.get(name)
+        if state is None:
+            return
+        state.failures += 1
+        if state.healthy:
+            logger.warning(f"⚠️ Replica {name} failed a query, routing reads elsewhere: {error}")
+        state.healthy, state.last_error = False, str(error)
+
+    # === Routing ===
+
+    def _usable(self, state: ReplicaState) -> bool:
+        return state.healthy and state.lag_seconds <= self.max_lag_seconds
+
+    def choose(self, pin_key: Optional[str] = None) -> str:
+        """Name of the engine that should serve the next read"""
+        if not self.enabled:
+            self.stats["primary_reads"] += 1
+            return PRIMARY
+        self.start()
+
+        if pin_key and self.is_pinned(pin_key):
+            self.stats["pinned_reads"] += 1
+            return PRIMARY
+
+        names = list(self.replicas)
+        with self._lock:
+            for offset in range(len(names)):
+                state = self.replicas[names[(self._cursor + offset) % len(names)]]
+                if self._usable(state):
+                    self._cursor = (self._cursor + offset + 1) % len(names)
+                    state.selections += 1
+                    self.stats["replica_reads"] += 1
+                    return state.name
+
+        self.stats["fallbacks"] += 1
+        return PRIMARY
+
+    # === Read-your-writes pinning ===
+
+    @staticmethod
+    def pin_key_for(request: Request) -> Optional[str]:
+        """Stable per-caller key: a hash of the bearer token"""
+        authorization = request.headers.get("authorization", "")
+        if not authorization.lower().startswith("bearer "):
+            return None
+        return token_hash(authorization[7:].strip())
+
+    def pin(self, pin_key: str):
+        """Send this caller's reads to the primary for `pin_seconds`"""
+        if not self.enabled:
+            return
+        from app.core.smart_cache import smart_cache
+
+        self.stats["pins"] += 1
+        with self._lock:
+            self._local_pins[pin_key] = time.time() + self.pin_seconds
+            if len(self._local_pins) > 10000:
+                now = time.time()
+                self._local_pins = {key: until for key, until in self._local_pins.items() if until > now}
+        if smart_cache.redis_client:
+            try:
+                smart_cache.redis_client.setex(f"read_pin:{pin_key}", self.pin_seconds, 1)
+            except Exception as e:
+                logger.warning(f"Read pin write failed: {e}")
+
+    def is_pinned(self, pin_key: str) -> bool:
+        from app.core.smart_cache import smart_cache
+
+        if self._local_pins.get(pin_key, 0) > time.time():
+            return True
+        if smart_cache.redis_client:
+            try:
+                return bool(smart_cache.redis_client.exists(f"read_pin:{pin_key}"))
+            except Exception as e:
+                logger.warning(f"Read pin lookup failed: {e}")
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "max_lag_seconds": self.max_lag_seconds,
+            "replicas": {
+                name: {
+                    "healthy": state.healthy,
+                    "lag_seconds": round(state.lag_seconds, 3),
+                    "usable": self._usable(state),
+                    "selections": state.selections,
+                    "failures": state.failures,
+                    "last_error": state.last_error,
+                }
+                for name, state in self.replicas.items()
+            },
+        }
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Pin callers to the primary after a successful write request"""
+
+    def __init__(self, app, router: ReadReplicaRouter = None):
+        super().__init__(app)
+        self.router = router or read_router
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if (
+            self.router.enabled
+            and request.method in UNSAFE_METHODS
+            and response.status_code < 400
+        ):
+            pin_key = self.router.pin_key_for(request)
+            if pin_key:
+                self.router.pin(pin_key)
+        return response
+
+
+# Global read replica router
+read_router = ReadReplicaRouter(
+    engine_registry,
+    [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()],
+    max_lag_seconds=float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5")),
+    check_interval=float(os.getenv("REPLICA_CHECK_INTERVAL", "5")),
+    pin_seconds=int(os.getenv("READ_YOUR_WRITES_SECONDS", "10")),
+)
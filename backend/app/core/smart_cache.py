@@ -4,20 +4,54 @@ Implements intelligent caching with automatic invalidation
 """
 
 import json
+import math
 import pickle
+import random
 import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Optional, Dict, List, Callable, Union
+from typing import Any, Optional, Dict, List, Callable, Set, Union
 from functools import wraps
 import asyncio
 import logging
 
 from app.core.database_production import get_redis
 from app.core.config import get_settings
+from app.core.cache_access import cache_access_tracker, WarmableKey
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Marker key identifying stale-while-revalidate envelopes in Redis
+SWR_MARKER = "_swr"
+
+
+@dataclass
+class CacheEntry:
+    """Cached value with soft (fresh) and hard (stale) expiry"""
+    value: Any
+    soft_expires_at: float
+    delta: float = 0.0  # Seconds the last recomputation took
+
+    def is_stale(self, now: float = None) -> bool:
+        return (now or time.time()) >= self.soft_expires_at
+
+    def should_refresh(self, beta: float = 1.0, now: float = None) -> bool:
+        """
+        XFetch probabilistic early expiration.
+
+        Returns True once the entry is stale, and with increasing probability
+        as the soft expiry approaches, weighted by how expensive the value is
+        to recompute, so concurrent readers don't all refresh at once.
+        """
+        now = now or time.time()
+        if self.delta <= 0 or beta <= 0:
+            return self.is_stale(now)
+        return now - self.delta * beta * math.log(1.0 - random.random()) >= self.soft_expires_at
+
 
 class SmartCache:
     """Intelligent caching layer with automatic invalidation"""
@@ -25,8 +59,24 @@ class SmartCache:
     def __init__(self):
         self.redis_client = get_redis()
         self.default_ttl = 300  # 5 minutes default
+        self.default_stale_ttl = 60  # Serve stale for 1 minute past soft expiry
         self.key_prefix = "lfa_cache:"
         
+        # Stale-while-revalidate refresh state
+        self._refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="swr_")
+        self._refresh_lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        
+        # Listeners notified when dependent data changes (e.g. HTTP response cache)
+        self._tag_listeners: List[Callable[[List[str]], Any]] = []
+        self.swr_stats = {
+            "stale_hits": 0,
+            "early_refreshes": 0,
+            "refreshes_scheduled": 0,
+            "refreshes_deduplicated": 0,
+            "refresh_failures": 0,
+        }
+        
     def _generate_key(self, key: str, prefix: str = None) -> str:
         """Generate cache key with prefix"""
         prefix = prefix or self.key_prefix
@@ -107,6 +157,37 @@ class SmartCache:
             logger.error(f"Cache GET failed for key {key}: {e}")
             return None
     
+    def get_many(self, keys: List[str], prefix: str = None) -> Dict[str, Any]:
+        """Get several values with one MGET; missing keys are left out"""
+        if not self.redis_client or not keys:
+            return {}
+
+        try:
+            values = self.redis_client.mget([self._generate_key(key, prefix) for key in keys])
+            return {
+                key: self._deserialize_data(value)
+                for key, value in zip(keys, values)
+                if value is not None
+            }
+        except Exception as e:
+            logger.error(f"Cache MGET failed for {len(keys)} keys: {e}")
+            return {}
+
+    def set_many(self, items: Dict[str, Any], ttl: int = None, prefix: str = None) -> bool:
+        """Set several values in one pipeline (no per-key metadata)"""
+        if not self.redis_client or not items:
+            return False
+
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipeline.setex(self._generate_key(key, prefix), ttl or self.default_ttl, self._serialize_data(value))
+            pipeline.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Cache pipeline SET failed for {len(items)} keys: {e}")
+            return False
+
     def delete(self, key: str, prefix: str = None) -> bool:
         """Delete cache key"""
         if not self.redis_client:
@@ -127,13 +208,188 @@ class SmartCache:
             logger.error(f"Cache DELETE failed for key {key}: {e}")
             return False
     
-    def invalidate_pattern(self, pattern: str) -> int:
+    def set_entry(
+        self,
+        key: str,
+        value: Any,
+        ttl: int = None,
+        stale_ttl: int = None,
+        delta: float = 0.0,
+        prefix: str = None
+    ) -> bool:
+        """
+        Set a stale-while-revalidate entry.
+
+        The value is fresh for `ttl` seconds (soft expiry) and kept in Redis
+        for a further `stale_ttl` seconds (hard expiry) so readers can be
+        served stale data while a single refresh recomputes it.
+        """
+        ttl = ttl or self.default_ttl
+        stale_ttl = self.default_stale_ttl if stale_ttl is None else stale_ttl
+        
+        envelope = {
+            SWR_MARKER: 1,
+            "value": value,
+            "soft_expires_at": time.time() + ttl,
+            "delta": round(delta, 4),
+        }
+        return self.set(key, envelope, ttl + stale_ttl, prefix=prefix)
+    
+    def get_entry(self, key: str, prefix: str = None) -> Optional[CacheEntry]:
+        """Get a cache entry with its soft expiry (plain values never go stale)"""
+        cached = self.get(key, prefix=prefix)
+        if cached is None:
+            return None
+        
+        if isinstance(cached, dict) and cached.get(SWR_MARKER):
+            return CacheEntry(
+                value=cached.get("value"),
+                soft_expires_at=float(cached.get("soft_expires_at", 0)),
+                delta=float(cached.get("delta", 0.0)),
+            )
+        
+        return CacheEntry(value=cached, soft_expires_at=float("inf"))
+    
+    def get_or_refresh(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: int = None,
+        stale_ttl: int = None,
+        prefix: str = None,
+        beta: float = 1.0
+    ) -> Any:
+        """
+        Read-through get with stale-while-revalidate semantics.
+
+        - Miss (past hard expiry): load synchronously and cache.
+        - Stale or XFetch early hit: return the cached value and schedule
+          exactly one deduplicated background refresh.
+        - Fresh hit: return the cached value.
+        """
+        entry = self.get_entry(key, prefix=prefix)
+        cache_access_tracker.record_access(
+            self._generate_key(key, prefix),
+            WarmableKey(key, prefix, loader, ttl, stale_ttl),
+            hit=entry is not None
+        )
+        
+        if entry is None:
+            start_time = time.time()
+            value = loader()
+            self.set_entry(key, value, ttl, stale_ttl, time.time() - start_time, prefix)
+            return value
+        
+        now = time.time()
+        if entry.should_refresh(beta, now):
+            if entry.is_stale(now):
+                self.swr_stats["stale_hits"] += 1
+            else:
+                self.swr_stats["early_refreshes"] += 1
+            self.schedule_refresh(key, loader, ttl, stale_ttl, prefix, lock_ttl=max(5, int(entry.delta * 4) + 1))
+        
+        return entry.value
+    
+    def schedule_refresh(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: int = None,
+        stale_ttl: int = None,
+        prefix: str = None,
+        lock_ttl: int = 30,
+        on_refreshed: Callable[[], Any] = None
+    ) -> bool:
+        """
+        Schedule a background refresh of `key` unless one is already running.
+
+        Deduplicates within the process via an in-flight set and across
+        instances via a short-lived Redis SET NX lock. `on_refreshed` runs
+        after the new value has been stored.
+        """
+        cache_key = self._generate_key(key, prefix)
+        
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                self.swr_stats["refreshes_deduplicated"] += 1
+                return False
+            self._refreshing.add(cache_key)
+        
+        lock_key = f"{cache_key}:refresh_lock"
+        try:
+            acquired = self.redis_client.set(lock_key, "1", nx=True, ex=lock_ttl) if self.redis_client else True
+        except Exception as e:
+            logger.warning(f"Cache refresh lock failed for key {key}: {e}")
+            acquired = True
+        
+        if not acquired:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+            self.swr_stats["refreshes_deduplicated"] += 1
+            return False
+        
+        self.swr_stats["refreshes_scheduled"] += 1
+        self._refresh_executor.submit(
+            self._run_refresh, key, cache_key, lock_key, loader, ttl, stale_ttl, prefix, on_refreshed
+        )
+        return True
+    
+    def _run_refresh(
+        self,
+        key: str,
+        cache_key: str,
+        lock_key: str,
+        loader: Callable[[], Any],
+        ttl: int,
+        stale_ttl: int,
+        prefix: str,
+        on_refreshed: Callable[[], Any] = None
+    ):
+        """Recompute a value in the background and release the refresh guards"""
+        try:
+            start_time = time.time()
+            value = loader()
+            delta = time.time() - start_time
+            
+            self.set_entry(key, value, ttl, stale_ttl, delta, prefix)
+            logger.debug(f"Cache REFRESH: {cache_key} ({delta*1000:.2f}ms)")
+            
+            if on_refreshed:
+                on_refreshed()
+            else:
+                cache_access_tracker.clear_warmed(cache_key)
+            
+        except Exception as e:
+            self.swr_stats["refresh_failures"] += 1
+            logger.error(f"Cache REFRESH failed for key {key}: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+            try:
+                if self.redis_client:
+                    self.redis_client.delete(lock_key)
+            except Exception:
+                pass
+    
+    def add_tag_listener(self, listener: Callable[[List[str]], Any]):
+        """Register a callback invoked with the tags passed to invalidate_tags()"""
+        self._tag_listeners.append(listener)
+    
+    def invalidate_tags(self, *tags: str):
+        """Notify dependent caches that data behind the given tags changed"""
+        for listener in self._tag_listeners:
+            try:
+                listener(list(tags))
+            except Exception as e:
+                logger.error(f"Cache tag listener failed for {tags}: {e}")
+    
+    def invalidate_pattern(self, pattern: str, prefix: str = None) -> int:
         """Invalidate all keys matching pattern"""
         if not self.redis_client:
             return 0
             
         try:
-            pattern_key = self._generate_key(pattern)
+            pattern_key = self._generate_key(pattern, prefix)
             keys = self.redis_client.keys(pattern_key)
             
             if keys:
@@ -165,7 +421,11 @@ class SmartCache:
                 "hit_rate": info.get("keyspace_hits", 0) / max(1, 
                     info.get("keyspace_hits", 0) + info.get("keyspace_misses", 0)),
                 "connected_clients": info.get("connected_clients", 0),
-                "uptime_seconds": info.get("uptime_in_seconds", 0)
+                "uptime_seconds": info.get("uptime_in_seconds", 0),
+                "stale_while_revalidate": {
+                    **self.swr_stats,
+                    "refreshes_in_flight": len(self._refreshing)
+                }
             }
             
         except Exception as e:
@@ -280,13 +540,49 @@ class LocationCache:
     
     @staticmethod
     def get_locations() -> Optional[List[Dict]]:
-        """Get all cached locations"""
-        return smart_cache.get("all_locations", prefix="locations:")
+        """Get all cached locations (stale values included)"""
+        entry = smart_cache.get_entry("all_locations", prefix="locations:")
+        return entry.value if entry else None
     
     @staticmethod
-    def set_locations(locations_data: List[Dict], ttl: int = 1800):
-        """Cache all locations for 30 minutes"""
-        return smart_cache.set("all_locations", locations_data, ttl, prefix="locations:")
+    def set_locations(locations_data: List[Dict], ttl: int = 1800, stale_ttl: int = 600):
+        """Cache all locations for 30 minutes, servable stale for 10 more"""
+        return smart_cache.set_entry(
+            "all_locations", locations_data, ttl, stale_ttl, prefix="locations:"
+        )
+    
+    @staticmethod
+    def load_locations() -> List[Dict]:
+        """Load location summaries from the database"""
+        from sqlalchemy import text
+
+        # Background refreshes outlive the caller, so use a fresh session
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return [
+                {
+                    "id": location.id,
+                    "name": location.name,
+                    "address": getattr(location, "address", ""),
+                    "latitude": getattr(location, "latitude", None),
+                    "longitude": getattr(location, "longitude", None),
+                    "created_at": str(location.created_at) if location.created_at else None,
+                }
+                for location in db.execute(text("SELECT * FROM locations")).fetchall()
+            ]
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_or_load_locations(
+        loader: Optional[Callable[[], List[Dict]]] = None, ttl: int = 1800, stale_ttl: int = 600
+    ) -> List[Dict]:
+        """Get all locations, refreshing in the background once stale"""
+        return smart_cache.get_or_refresh(
+            "all_locations", loader or LocationCache.load_locations, ttl, stale_ttl, prefix="locations:"
+        )
     
     @staticmethod
     def get_location(location_id: int) -> Optional[Dict]:
@@ -299,6 +595,29 @@ class LocationCache:
         return smart_cache.set(f"location:{location_id}", location_data, ttl, prefix="locations:")
 
 
+class LeaderboardCache:
+    """Specialized caching for leaderboards (hot, expensive to rebuild)"""
+    
+    @staticmethod
+    def get_or_load(
+        category: str,
+        limit: int,
+        loader: Callable[[], List[Dict]],
+        ttl: int = 300,
+        stale_ttl: int = 120
+    ) -> List[Dict]:
+        """Get a leaderboard, refreshing in the background once stale"""
+        return smart_cache.get_or_refresh(
+            f"{category}:{limit}", loader, ttl, stale_ttl, prefix="leaderboards:"
+        )
+    
+    @staticmethod
+    def invalidate_all():
+        """Invalidate all cached leaderboards"""
+        smart_cache.invalidate_tags("leaderboards")
+        return smart_cache.invalidate_pattern("*", prefix="leaderboards:")
+
+
 # Cache warming functions
 def warm_essential_caches(db):
     """Warm up essential caches with frequently accessed data"""
@@ -317,12 +636,8 @@ def warm_essential_caches(db):
         
         logger.info(f"✅ Warmed {len(users)} user caches")
         
-        # Warm location cache
-        locations_query = text("SELECT * FROM locations")
-        result = db.execute(locations_query)
-        locations = [dict(row._mapping) for row in result]
-        
-        LocationCache.set_locations(locations, ttl=3600)  # 1 hour
+        # Warm location cache (loads on a miss, refreshes in the background once stale)
+        locations = LocationCache.get_or_load_locations()
         logger.info(f"✅ Warmed {len(locations)} location caches")
         
         return True
@@ -0,0 +1,152 @@
+"""
+Startup Profiler
+Cold-start phase timings (router imports and registration, deferred imports) and an import-time report
+
+Usage:
+    python -m app.core.startup_profiler [--top 25] [--budget-ms 3000] [--json]
+
+Imports app.main_production in a fresh interpreter with `-X importtime`,
+then prints the slowest modules, time per top-level package and the
+per-router phases recorded below. With --budget-ms the exit status is 1
+when the cold import exceeds the budget, so CI can guard startup time.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+_PROCESS_STARTED = time.perf_counter()
+
+
+class StartupProfiler:
+    """Named startup phases (and deferred imports) with their durations"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.deferred_imports: Dict[str, float] = {}
+        self.checkpoints: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def record_import(self, module: str, seconds: float):
+        with self._lock:
+            self.deferred_imports[module] = seconds
+
+    def checkpoint(self, name: str):
+        """Record how long after this module was first imported `name` was reached"""
+        self.checkpoints[name] = time.perf_counter() - _PROCESS_STARTED
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkpoints_ms": {name: round(seconds * 1000, 1) for name, seconds in self.checkpoints.items()},
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "deferred_imports_ms": {
+                module: round(seconds * 1000, 1) for module, seconds in self.deferred_imports.items()
+            },
+        }
+
+
+# Global startup profiler
+startup_profiler = StartupProfiler()
+
+
+# === Cold-start report ===
+
+_PROBE = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "import app.main_production\n"
+    "elapsed = time.perf_counter() - started\n"
+    "from app.core.startup_profiler import startup_profiler\n"
+    "sys.stdout.write('\\n@@' + json.dumps({'import_ms': elapsed * 1000, **startup_profiler.as_dict()}))\n"
+)
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of `-X importtime` output: module, self and cumulative microseconds, depth"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+
+def profile_cold_start(cwd: str) -> Dict[str, Any]:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    if "@@" not in result.stdout:
+        raise RuntimeError(f"Importing app.main_production failed:\n{result.stderr[-2000:]}")
+    report = json.loads(result.stdout.rsplit("@@", 1)[1])
+
+    modules = parse_importtime(result.stderr)
+    packages = defaultdict(float)
+    for row in modules:
+        packages[row["module"].split(".")[0]] += row["self_ms"]
+    report["slowest_modules"] = sorted(modules, key=lambda row: row["cumulative_ms"], reverse=True)
+    report["packages_ms"] = dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the cold-start breakdown of the production app")
+    parser.add_argument("--top", type=int, default=25, help="Modules and packages to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the cold import takes longer")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    report = profile_cold_start(backend_dir)
+
+    if args.json:
+        report["slowest_modules"] = report["slowest_modules"][: args.top]
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"🚀 Cold import of app.main_production: {report['import_ms']:.0f} ms")
+        print(f"\n📦 Top {args.top} packages (self time):")
+        for package, ms in list(report["packages_ms"].items())[: args.top]:
+            print(f"  {ms:>9.1f} ms  {package}")
+        print(f"\n🐢 Top {args.top} modules (cumulative):")
+        for row in report["slowest_modules"][: args.top]:
+            print(f"  {row['cumulative_ms']:>9.1f} ms  {'  ' * row['depth']}{row['module']}")
+        print("\n⏱️ Checkpoints:")
+        for name, ms in report["checkpoints_ms"].items():
+            print(f"  {ms:>9.1f} ms  {name}")
+        print("\n🧭 Startup phases:")
+        for name, ms in sorted(report["phases_ms"].items(), key=lambda item: item[1], reverse=True):
+            print(f"  {ms:>9.1f} ms  {name}")
+
+    if args.budget_ms is not None and report["import_ms"] > args.budget_ms:
+        print(f"❌ Cold start {report['import_ms']:.0f} ms exceeds budget {args.budget_ms:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Token Session Store
+Per-user session hashes in Redis with generation counters for O(1) revocation and refresh rotation
+"""
+
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from app.core.database_production import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "auth:sessions:"
+GENERATION_FIELD = "gen"
+
+# Atomically replace a session's refresh jti if the presented one is current.
+# Returns 1 on success, 0 for an unknown/revoked/stale session and -1 when an
+# already-rotated jti is replayed; the session is then revoked (likely theft).
+ROTATE_SCRIPT = """
+local record = redis.call('HGET', KEYS[1], ARGV[1])
+if not record then return 0 end
+local gen, jti, expires = string.match(record, '^(%d+)|([^|]*)|(%d+)$')
+local current = tonumber(redis.call('HGET', KEYS[1], 'gen') or '0')
+if tonumber(gen) ~= current or tonumber(expires) < tonumber(ARGV[5]) then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return 0
+end
+if jti ~= ARGV[2] then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return -1
+end
+redis.call('HSET', KEYS[1], ARGV[1], gen .. '|' .. ARGV[3] .. '|' .. ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class SessionGrant:
+    """Identifiers to embed in the tokens of one login session"""
+    user_id: str
+    session_id: str
+    generation: int
+    jti: str
+    expires_at: int
+
+
+def _encode(generation: int, jti: str, expires_at: int) -> str:
+    return f"{generation}|{jti}|{expires_at}"
+
+
+def _decode(record) -> Tuple[int, str, int]:
+    if isinstance(record, bytes):
+        record = record.decode()
+    generation, jti, expires_at = record.split("|")
+    return int(generation), jti, int(expires_at)
+
+
+class TokenStore:
+    """
+    Login sessions keyed by user, shared by every instance through Redis.
+
+    Each user has one hash, `auth:sessions:<user_id>`, holding a `gen`
+    counter and one field per session ("generation|refresh jti|expiry").
+    Tokens carry the session id and generation they were issued under:
+
+    - validating a token is a single HMGET of `gen` and the session field,
+      cached in-process for `cache_seconds`;
+    - logging out one device deletes its field;
+    - "log out everywhere" increments `gen`, which invalidates every token
+      issued before it without visiting them;
+    - refresh tokens rotate atomically (Lua), and replaying a rotated one
+      revokes its session.
+
+    A background sweep drops expired and superseded fields; the hash itself
+    expires `retention_seconds` after its last write. Without Redis the
+    same structure lives in process memory (single-instance development).
+    """
+
+    def __init__(self, retention_seconds: int = 31 * 86400, cache_seconds: float = 5.0, cleanup_interval: int = 3600):
+        self.retention_seconds = retention_seconds
+        self.cache_seconds = cache_seconds
+        self.cleanup_interval = cleanup_interval
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._memory_lock = threading.Lock()
+        self._cache: Dict[str, Dict[Optional[str], Tuple[float, Optional[int]]]] = {}
+        self._rotate = None
+        self._cleaner: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {
+            "sessions_created": 0,
+            "validations": 0,
+            "cache_hits": 0,
+            "rejected": 0,
+            "rotations": 0,
+            "reuse_detected": 0,
+            "revocations": 0,
+            "revoke_all": 0,
+            "cleaned": 0,
+        }
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return f"{KEY_PREFIX}{user_id}"
+
+    def _forget(self, user_id: str):
+        self._cache.pop(user_id, None)
+
+    # === Sessions ===
+
+    def create_session(self, user_id, ttl_seconds: int) -> SessionGrant:
+        """Register a new login session and return the ids its tokens carry"""
+        user_id = str(user_id)
+        session_id = secrets.token_urlsafe(16)
+        jti = secrets.token_urlsafe(16)
+        expires_at = int(time.time() + ttl_seconds)
+        redis_client = self.redis
+
+        if redis_client:
+            key = self._key(user_id)
+            pipeline = redis_client.pipeline()
+            pipeline.hsetnx(key, GENERATION_FIELD, 0)
+            pipeline.hget(key, GENERATION_FIELD)
+            generation = int(pipeline.execute()[1] or 0)
+            pipeline = redis_client.pipeline()
+            pipeline.hset(key, session_id, _encode(generation, jti, expires_at))
+            pipeline.expire(key, max(self.retention_seconds, ttl_seconds))
+            pipeline.execute()
+        else:
+            with self._memory_lock:
+                sessions = self._memory.setdefault(user_id, {GENERATION_FIELD: 0})
+                generation = sessions[GENERATION_FIELD]
+                sessions[session_id] = (generation, jti, expires_at)
+
+        self.stats["sessions_created"] += 1
+        return SessionGrant(user_id, session_id, generation, jti, expires_at)
+
+    def _lookup(self, user_id: str, session_id: Optional[str]) -> Tuple[int, Optional[Tuple[int, str, int]]]:
+        """(current generation, session record or None)"""
+        redis_client = self.redis
+        if redis_client:
+            generation, record = redis_client.hmget(self._key(user_id), GENERATION_FIELD, session_id or GENERATION_FIELD)
+            return int(generation or 0), (_decode(record) if session_id and record else None)
+        with self._memory_lock:
+            sessions = self._memory.get(user_id, {})
+            return sessions.get(GENERATION_FIELD, 0), sessions.get(session_id) if session_id else None
+
+    def validate(self, user_id, session_id: Optional[str], generation: int = 0) -> bool:
+        """
+        Whether a token issued for this session and generation is still live.
+
+        Tokens minted before sessions existed carry no session id; they stay
+        valid until the user's first "revoke all".
+        """
+        user_id = str(user_id)
+        self.stats["validations"] += 1
+        now = time.time()
+        cached = self._cache.get(user_id, {}).get(session_id)
+        if cached is not None and cached[0] > now:
+            self.stats["cache_hits"] += 1
+            accepted = cached[1]
+        else:
+            # The generation tokens of this session must carry, or None if revoked
+            current, record = self._lookup(user_id, session_id)
+            if session_id is None:
+                accepted = current
+            elif record is not None and record[0] == current and record[2] > now:
+                accepted = current
+            else:
+                accepted = None
+            if len(self._cache) > 50000:
+                self._cache.clear()
+            self._cache.setdefault(user_id, {})[session_id] = (now + self.cache_seconds, accepted)
+
+        valid = accepted is not None and accepted == int(generation or 0)
+        if not valid:
+            self.stats["rejected"] += 1
+        return valid
+
+    def rotate(self, user_id, session_id: str, jti: str, ttl_seconds: int) -> Optional[SessionGrant]:
+        """Swap a session's refresh jti for a new one; None if the token is not current"""
+        user_id = str(user_id)
+        new_jti = secrets.token_urlsafe(16)
+        now = int(time.time())
+        expires_at = now + ttl_seconds
+        redis_client = self.redis
+
+        if redis_client:
+            if self._rotate is None:
+                self._rotate = redis_client.register_script(ROTATE_SCRIPT)
+            result = self._rotate(
+                keys=[self._key(user_id)],
+                args=[session_id, jti, new_jti, expires_at, now, max(self.retention_seconds, ttl_seconds)],
+            )
+            generation = int(redis_client.hget(self._key(user_id), GENERATION_FIELD) or 0) if result == 1 else 0
+        else:
+            with self._memory_lock:
+                sessions = self._memory.get(user_id, {})
+                record = sessions.get(session_id)
+                generation = sessions.get(GENERATION_FIELD, 0)
+                if record is None:
+                    result = 0
+                elif record[0] != generation or record[2] < now:
+                    sessions.pop(session_id, None)
+                    result = 0
+                elif record[1] != jti:
+                    sessions.pop(session_id, None)
+                    result = -1
+                else:
+                    sessions[session_id] = (generation, new_jti, expires_at)
+                    result = 1
+
+        if result == 1:
+            self.stats["rotations"] += 1
+            return SessionGrant(user_id, session_id, generation, new_jti, expires_at)
+        if result == -1:
+            self.stats["reuse_detected"] += 1
+            self._forget(user_id)
+            logger.warning(f"🚨 Refresh token reuse for user {user_id}, session {session_id[:8]}... revoked")
+        return None
+
+    def revoke_session(self, user_id, session_id: str) -> bool:
+        """Log out one session"""
+        user_id = str(user_id)
+        redis_client = self.redis
+        if redis_client:
+            removed = bool(redis_client.hdel(self._key(user_id), session_id))
+        else:
+            with self._memory_lock:
+                removed = self._memory.get(user_id, {}).pop(session_id, None) is not None
+        self._forget(user_id)
+        self.stats["revocations"] += removed
+        return removed
+
+    def revoke_all(self, user_id) -> int:
+        """Invalidate every token the user holds; returns the new generation"""
+        user_id = str(user_id)
+        redis_client = self.redis
+        if redis_client:
+            key = self._key(user_id)
+            pipeline = redis_client.pipeline()
+            pipeline.hincrby(key, GENERATION_FIELD, 1)
+            pipeline.expire(key, self.retention_seconds)
+            generation = int(pipeline.execute()[0])
+        else:
+            with self._memory_lock:
+                sessions = self._memory.setdefault(user_id, {GENERATION_FIELD: 0})
+                sessions[GENERATION_FIELD] += 1
+                generation = sessions[GENERATION_FIELD]
+        self._forget(user_id)
+        self.stats["revoke_all"] += 1
+        logger.info(f"🔒 Revoked all sessions for user {user_id} (generation {generation})")
+        return generation
+
+    def count_sessions(self, user_id) -> int:
+        user_id = str(user_id)
+        now = time.time()
+        redis_client = self.redis
+        if redis_client:
+            entries = redis_client.hgetall(self._key(user_id))
+            current = int(entries.pop(GENERATION_FIELD.encode(), 0) or 0)
+            records = [_decode(record) for record in entries.values()]
+        else:
+            with self._memory_lock:
+                entries = dict(self._memory.get(user_id, {}))
+            current = entries.pop(GENERATION_FIELD, 0)
+            records = list(entries.values())
+        return sum(1 for generation, _, expires_at in records if generation == current and expires_at > now)
+
+    # === Cleanup ===
+
+    def cleanup_expired(self) -> int:
+        """Drop expired and superseded session fields; returns how many"""
+        now = time.time()
+        removed = 0
+        redis_client = self.redis
+        if redis_client:
+            for key in redis_client.scan_iter(match=f"{KEY_PREFIX}*", count=500):
+                entries = redis_client.hgetall(key)
+                current = int(entries.pop(GENERATION_FIELD.encode(), 0) or 0)
+                stale = [
+                    field for field, record in entries.items()
+                    if _decode(record)[0] != current or _decode(record)[2] <= now
+                ]
+                if stale:
+                    removed += redis_client.hdel(key, *stale)
+        else:
+            with self._memory_lock:
+                for sessions in self._memory.values():
+                    current = sessions.get(GENERATION_FIELD, 0)
+                    stale = [
+                        field for field, record in sessions.items()
+                        if field != GENERATION_FIELD and (record[0] != current or record[2] <= now)
+                    ]
+                    for field in stale:
+                        del sessions[field]
+                    removed += len(stale)
+
+        self._cache.clear()
+        self.stats["cleaned"] += removed
+        if removed:
+            logger.info(f"🧹 Removed {removed} expired or revoked sessions")
+        return removed
+
+    def start(self):
+        """Start the background cleanup sweep (idempotent)"""
+        if self._cleaner and self._cleaner.is_alive():
+            return
+        self._stop.clear()
+        self._cleaner = threading.Thread(target=self._cleanup_loop, name="token_store_cleanup", daemon=True)
+        self._cleaner.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _cleanup_loop(self):
+        while not self._stop.wait(self.cleanup_interval):
+            try:
+                self.cleanup_expired()
+            except Exception as e:
+                logger.warning(f"⚠️ Session cleanup failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": "redis" if self.redis else "memory",
+            "cached_users": len(self._cache),
+        }
+
+
+# Global token/session store
+token_store = TokenStore(
+    retention_seconds=int(os.getenv("AUTH_SESSION_RETENTION_DAYS", "31")) * 86400,
+    cache_seconds=float(os.getenv("AUTH_SESSION_CACHE_SECONDS", "5")),
+    cleanup_interval=int(os.getenv("AUTH_SESSION_CLEANUP_INTERVAL", "3600")),
+)
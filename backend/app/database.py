@@ -1,14 +1,15 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError, OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 
-# HARDCODED POSTGRESQL
-DATABASE_URL = "postgresql://lfa_user:NVI29jPjzKO68kJi8SMcp4cT@/lfa_legacy_go?host=/cloudsql/lfa-legacy-go:europe-west1:lfa-legacy-go-postgres"
+from .core.database_engines import engine_registry
+from .core.read_replicas import PRIMARY, read_router
 
-print(f"AUTH ROUTER PostgreSQL: {DATABASE_URL}")
+# Engines and pools live in the shared registry; see app/core/database_engines.py
+DATABASE_URL = engine_registry.url()
 
-engine = create_engine(DATABASE_URL, pool_size=10, max_overflow=20)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = engine_registry.engine()
+SessionLocal = engine_registry.session_factory()
 Base = declarative_base()
 
 def get_db():
@@ -17,3 +18,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def replica_failed(name: str, error: DBAPIError) -> bool:
+    """Whether a query error means the replica itself is unreachable"""
+    return name != PRIMARY and (isinstance(error, OperationalError) or error.connection_invalidated)
+
+
+def get_read_db(request: Request):
+    """Read-only session for lag-tolerant endpoints, served by a replica when one is healthy"""
+    name = read_router.choose(read_router.pin_key_for(request))
+    db = engine_registry.session_factory(name)()
+    db.info["database"] = name
+    try:
+        yield db
+    except DBAPIError as e:
+        if replica_failed(name, e):
+            read_router.mark_failed(name, e)
+        raise
+    finally:
+        db.close()
+
+
+def read_session_factory(request: Request):
+    """Session factory on a replica, for work that opens its own sessions (exports)"""
+    return engine_registry.session_factory(read_router.choose(read_router.pin_key_for(request)))
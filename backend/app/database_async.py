@@ -0,0 +1,41 @@
+"""
+Async database layer
+AsyncSession dependency over asyncpg (aiosqlite locally), running alongside the sync app.database
+"""
+
+import logging
+
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
+
+from .core.database_engines import engine_registry
+from .core.read_replicas import read_router
+from .database import replica_failed
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DATABASE_URL = engine_registry.async_url()
+
+
+async def get_async_db():
+    """FastAPI dependency yielding an AsyncSession for the request"""
+    # The async engine (sharing the registry's connection budget) is created on first use, not at import
+    async with engine_registry.async_session_factory()() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def get_async_read_db(request: Request):
+    """Read-only AsyncSession for lag-tolerant endpoints, served by a replica when one is healthy"""
+    name = read_router.choose(read_router.pin_key_for(request))
+    async with engine_registry.async_session_factory(name)() as session:
+        session.info["database"] = name
+        try:
+            yield session
+        except DBAPIError as e:
+            if replica_failed(name, e):
+                read_router.mark_failed(name, e)
+            raise
@@ -2,8 +2,9 @@
 # LFA Legacy GO - Production Ready with Standardized API
 # Version 3.0 with comprehensive API standards, monitoring, and production features
 
+from app.core.startup_profiler import startup_profiler
+
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware as FastAPICORSMiddleware
 import logging
 import sys
@@ -11,7 +12,7 @@ import os
 from datetime import datetime
 
 # Import production-ready components
-from app.core.api_response import ResponseBuilder, ApiException
+from app.core.api_response import ResponseBuilder, ApiException, FastJSONResponse
 from app.middleware.api_middleware import (
     RequestLoggingMiddleware,
     CORSMiddleware,
@@ -19,9 +20,24 @@ from app.middleware.api_middleware import (
     RateLimitMiddleware,
     RequestSizeMiddleware,
 )
+from app.middleware.response_cache import ResponseCacheMiddleware, response_cache
+from app.middleware.sql_budget import SQLBudgetMiddleware, default_mode as sql_budget_mode, sql_budget_monitor
 from app.core.database_production import db_config
+from app.core.database_engines import engine_registry
+from app.core.read_replicas import ReadYourWritesMiddleware, read_router
+from app.core.auth_principal import principal_cache, token_claims_cache
+from app.core.password_hashing import password_hasher
+from app.core.token_store import token_store
+from app.core.job_scheduler import job_scheduler
+from app.services.breach_check import breach_checker
+from app.services.notifications import notifications
+from app.services.tournament_live import tournament_live
+from app.services.weather_cache import weather_cache
+from app.services.weather_suitability import suitability_matrix
 from app.core.logging import setup_logging, get_logger
 
+startup_profiler.checkpoint("core_imports")
+
 # Setup production logging
 setup_logging(
     log_level=os.getenv("LOG_LEVEL", "INFO"),
@@ -56,6 +72,7 @@ app = FastAPI(
     - Request tracking with unique IDs
     """,
     version="3.0.0",
+    default_response_class=FastJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_tags=[
@@ -94,7 +111,19 @@ app.add_middleware(SecurityHeadersMiddleware)
 max_request_size = int(os.getenv("MAX_REQUEST_SIZE", str(10 * 1024 * 1024)))  # 10MB
 app.add_middleware(RequestSizeMiddleware, max_size=max_request_size)
 
-# 3. Rate limiting
+# 3. Per-request SQL tracking (inside the response cache, so cache hits skip it)
+if sql_budget_mode() != "off":
+    app.add_middleware(SQLBudgetMiddleware)
+
+# 4. HTTP response cache (ETag/304) for read-heavy public endpoints
+if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true":
+    app.add_middleware(ResponseCacheMiddleware)
+
+# 5. Read-your-writes pinning (only needed when replicas serve reads)
+if read_router.enabled:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# 6. Rate limiting
 rate_limit_requests = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
 rate_limit_window = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
 app.add_middleware(
@@ -103,7 +132,7 @@ app.add_middleware(
     window_seconds=rate_limit_window,
 )
 
-# 4. CORS middleware
+# 7. CORS middleware
 allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
     CORSMiddleware,
@@ -111,7 +140,7 @@ app.add_middleware(
     allow_credentials=True,
 )
 
-# 5. Request logging and ID tracking (last for complete request data)
+# 8. Request logging and ID tracking (last for complete request data)
 app.add_middleware(RequestLoggingMiddleware)
 
 
@@ -157,6 +186,11 @@ active_routers = 0
 
 def safe_import_router(router_path: str):
     """Safely import a router with comprehensive error handling"""
+    with startup_profiler.phase(f"import:{router_path}"):
+        return _import_router(router_path)
+
+
+def _import_router(router_path: str):
     try:
         logger.info(f"📦 Importing {router_path} router...")
 
@@ -217,53 +251,27 @@ health_router = safe_import_router("health")
 frontend_errors_router = safe_import_router("frontend_errors")
 
 # Include routers with production configuration
-if auth_router:
-    app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
-    active_routers += 1
-
-if credits_router:
-    app.include_router(credits_router, prefix="/api/credits", tags=["Credits"])
-    active_routers += 1
-
-if social_router:
-    app.include_router(social_router, prefix="/api/social", tags=["Social"])
-    active_routers += 1
-
-if locations_router:
-    app.include_router(locations_router, prefix="/api/locations", tags=["Locations"])
-    active_routers += 1
-
-if booking_router:
-    app.include_router(booking_router, prefix="/api/booking", tags=["Booking"])
-    active_routers += 1
-
-if tournaments_router:
-    app.include_router(
-        tournaments_router, prefix="/api/tournaments", tags=["Tournaments"]
-    )
-    active_routers += 1
-
-if game_results_router:
-    app.include_router(
-        game_results_router, prefix="/api/game-results", tags=["Game Results"]
-    )
+def register_router(router, name: str, **options):
+    """Include a router, timing its registration for the startup profile"""
+    global active_routers
+    if router is None:
+        return
+    with startup_profiler.phase(f"include:{name}"):
+        app.include_router(router, **options)
     active_routers += 1
 
-if weather_router:
-    app.include_router(weather_router, prefix="/api/weather", tags=["Weather"])
-    active_routers += 1
 
-if admin_router:
-    app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
-    active_routers += 1
-
-if health_router:
-    app.include_router(health_router, tags=["Health"])
-    active_routers += 1
-
-if frontend_errors_router:
-    app.include_router(frontend_errors_router, prefix="/api", tags=["Monitoring"])
-    active_routers += 1
+register_router(auth_router, "auth", prefix="/api/auth", tags=["Authentication"])
+register_router(credits_router, "credits", prefix="/api/credits", tags=["Credits"])
+register_router(social_router, "social", prefix="/api/social", tags=["Social"])
+register_router(locations_router, "locations", prefix="/api/locations", tags=["Locations"])
+register_router(booking_router, "booking", prefix="/api/booking", tags=["Booking"])
+register_router(tournaments_router, "tournaments", prefix="/api/tournaments", tags=["Tournaments"])
+register_router(game_results_router, "game_results", prefix="/api/game-results", tags=["Game Results"])
+register_router(weather_router, "weather", prefix="/api/weather", tags=["Weather"])
+register_router(admin_router, "admin", prefix="/api/admin", tags=["Admin"])
+register_router(health_router, "health", tags=["Health"])
+register_router(frontend_errors_router, "frontend_errors", prefix="/api", tags=["Monitoring"])
 
 
 # Additional production endpoints
@@ -332,12 +340,29 @@ async def performance_metrics(request: Request):
                 "timestamp": datetime.now().isoformat(),
                 "database": db_metrics,
                 "system_health": health_data,
+                "response_cache": response_cache.get_stats(),
+                "read_replicas": read_router.get_stats(),
+                "sql": sql_budget_monitor.get_report(),
+                "password_hashing": password_hasher.get_stats(),
+                "breach_check": breach_checker.get_stats(),
+                "weather_cache": weather_cache.get_stats(),
+                "weather_suitability": suitability_matrix.get_stats(),
+                "auth_sessions": token_store.get_stats(),
+                "jobs": job_scheduler.get_stats(),
+                "notifications": notifications.get_stats(),
+                "tournament_live": tournament_live.get_stats(),
+                "startup": startup_profiler.as_dict(),
+                "auth_cache": {
+                    "token_claims": token_claims_cache.get_stats(),
+                    "principals": principal_cache.get_stats(),
+                },
                 "api": {
                     "active_routers": active_routers,
                     "total_routers": len(routers_status),
                     "middleware_stack": [
                         "SecurityHeaders",
                         "RequestSize",
+                        "ResponseCache",
                         "RateLimit",
                         "CORS",
                         "RequestLogging",
@@ -367,6 +392,15 @@ async def startup_event():
     logger.info(
         f"🗄️ Database: {db_config.database_url.split('@')[1] if '@' in db_config.database_url else 'local'}"
     )
+    logger.info(f"🏊 DB pools: {engine_registry.settings.describe()}")
+    read_router.start()
+    token_store.start()
+    from app.services.scheduled_jobs import register_default_jobs
+
+    register_default_jobs(job_scheduler)
+    job_scheduler.start()
+    startup_profiler.checkpoint("ready")
+    logger.info(f"⏱️ Startup: ready {startup_profiler.as_dict()['checkpoints_ms']['ready']} ms after profiler import")
     logger.info(f"🔒 Security: Headers + Rate Limiting + CORS")
     logger.info(f"📝 Logging: Request tracking with unique IDs")
     logger.info("✅ Production API ready!")
@@ -379,7 +413,16 @@ async def shutdown_event():
     logger.info("🔄 Shutting down LFA Legacy GO API...")
 
     # Close database connections
+    read_router.stop()
+    token_store.stop()
+    await job_scheduler.stop()
+    password_hasher.shutdown()
+    await breach_checker.close()
+    from app.services.weather_service import close_weather_api_service
+
+    await close_weather_api_service()
     db_config.close_connections()
+    await engine_registry.dispose_async()
 
     logger.info("✅ Shutdown completed")
 
@@ -14,6 +14,8 @@ from jose import jwt, JWTError
 import secrets
 import logging
 
+from app.core.auth_principal import token_claims_cache
+from app.core.token_store import token_store
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -25,8 +27,7 @@ SESSION_REFRESH_THRESHOLD = timedelta(minutes=15)  # Refresh token if expiring s
 MAX_FAILED_ATTEMPTS = 5  # Max failed login attempts
 LOCKOUT_DURATION = timedelta(minutes=30)  # Account lockout duration
 
-# In-memory session store (in production, use Redis)
-active_sessions: Dict[str, Dict[str, Any]] = {}
+# Sessions live in the shared token store; failed attempts stay per instance
 failed_attempts: Dict[str, Dict[str, Any]] = {}
 
 
@@ -63,8 +64,9 @@ class EnhancedSecurityManager:
         now = datetime.utcnow()
         expire = now + timedelta(minutes=self.token_expire_minutes)
 
-        # Generate unique session ID
-        session_id = secrets.token_urlsafe(32)
+        # Register the session; its id and generation are embedded in the token
+        grant = token_store.create_session(user_id, self.token_expire_minutes * 60)
+        session_id = grant.session_id
 
         # Base claims
         claims = {
@@ -73,6 +75,7 @@ class EnhancedSecurityManager:
             "iat": now,
             "exp": expire,
             "session_id": session_id,
+            "gen": grant.generation,
             "token_type": "access",
             # Add fingerprint for security
             "fp": hashlib.sha256(f"{user_id}:{username}:{now}".encode()).hexdigest()[
@@ -87,16 +90,6 @@ class EnhancedSecurityManager:
         # Create JWT token
         token = jwt.encode(claims, self.jwt_secret, algorithm=self.jwt_algorithm)
 
-        # Store session information
-        active_sessions[session_id] = {
-            "user_id": user_id,
-            "username": username,
-            "created_at": now,
-            "last_activity": now,
-            "expires_at": expire,
-            "token_hash": hashlib.sha256(token.encode()).hexdigest(),
-        }
-
         logger.info(
             f"Access token created for user {username} (session: {session_id[:8]}...)"
         )
@@ -112,9 +105,9 @@ class EnhancedSecurityManager:
     def validate_token(self, token: str) -> Dict[str, Any]:
         """Validate JWT token with enhanced security checks."""
         try:
-            # Decode token
-            payload = jwt.decode(
-                token, self.jwt_secret, algorithms=[self.jwt_algorithm]
+            # Decode token (verified claims are cached until the token expires)
+            payload = token_claims_cache.verify(
+                token, self.jwt_secret, [self.jwt_algorithm]
             )
 
             # Extract session information
@@ -125,45 +118,29 @@ class EnhancedSecurityManager:
                     detail="Invalid token format",
                 )
 
-            # Check if session exists and is valid
-            session = active_sessions.get(session_id)
-            if not session:
+            # One generation/session lookup (cached briefly) replaces the session scan
+            if not token_store.validate(payload.get("sub"), session_id, payload.get("gen", 0)):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Session expired or invalid",
                 )
 
-            # Check session expiration
-            now = datetime.utcnow()
-            if now > session["expires_at"]:
-                # Clean up expired session
-                self._cleanup_session(session_id)
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired"
-                )
-
             # Check maximum session duration
-            if now > session["created_at"] + MAX_SESSION_DURATION:
-                self._cleanup_session(session_id)
+            created_at = datetime.utcfromtimestamp(payload.get("iat", payload["exp"]))
+            if datetime.utcnow() > created_at + MAX_SESSION_DURATION:
+                token_store.revoke_session(payload.get("sub"), session_id)
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Maximum session duration exceeded",
                 )
 
-            # Update last activity
-            session["last_activity"] = now
-
-            # Token fingerprint validation
-            token_hash = hashlib.sha256(token.encode()).hexdigest()
-            if token_hash != session["token_hash"]:
-                logger.warning(
-                    f"Token fingerprint mismatch for session {session_id[:8]}..."
-                )
-                self._cleanup_session(session_id)
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token validation failed",
-                )
+            session = {
+                "session_id": session_id,
+                "created_at": created_at,
+                "user_id": payload.get("sub"),
+                "username": payload.get("username"),
+                "expires_at": datetime.utcfromtimestamp(payload["exp"]),
+            }
 
             # Return validated payload with session info
             payload["session_info"] = session
@@ -194,7 +171,7 @@ class EnhancedSecurityManager:
                     # Cleanup old session
                     old_session_id = payload.get("session_id")
                     if old_session_id:
-                        self._cleanup_session(old_session_id)
+                        token_store.revoke_session(user_id, old_session_id)
 
                     # Create new token
                     return self.create_access_token(user_id, username)
@@ -204,29 +181,18 @@ class EnhancedSecurityManager:
         except HTTPException:
             return None
 
-    def revoke_session(self, session_id: str) -> bool:
+    def revoke_session(self, user_id: str, session_id: str) -> bool:
         """Revoke a specific session."""
-        if session_id in active_sessions:
-            del active_sessions[session_id]
+        if token_store.revoke_session(user_id, session_id):
             logger.info(f"Session revoked: {session_id[:8]}...")
             return True
         return False
 
     def revoke_user_sessions(self, user_id: str) -> int:
-        """Revoke all sessions for a specific user."""
-        revoked = 0
-        sessions_to_remove = []
-
-        for session_id, session in active_sessions.items():
-            if session["user_id"] == user_id:
-                sessions_to_remove.append(session_id)
-
-        for session_id in sessions_to_remove:
-            del active_sessions[session_id]
-            revoked += 1
-
-        logger.info(f"Revoked {revoked} sessions for user {user_id}")
-        return revoked
+        """Revoke all sessions for a specific user; returns the new generation."""
+        generation = token_store.revoke_all(user_id)
+        logger.info(f"Revoked all sessions for user {user_id}")
+        return generation
 
     def check_rate_limiting(
         self, identifier: str, max_attempts: int = MAX_FAILED_ATTEMPTS
@@ -280,34 +246,15 @@ class EnhancedSecurityManager:
         }
 
     def cleanup_expired_sessions(self):
-        """Clean up expired sessions - should be called periodically."""
-        now = datetime.utcnow()
-        expired_sessions = []
-
-        for session_id, session in active_sessions.items():
-            if (
-                now > session["expires_at"]
-                or now > session["created_at"] + MAX_SESSION_DURATION
-            ):
-                expired_sessions.append(session_id)
-
-        for session_id in expired_sessions:
-            self._cleanup_session(session_id)
-
-        if expired_sessions:
-            logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
-
-    def _cleanup_session(self, session_id: str):
-        """Internal method to clean up a session."""
-        if session_id in active_sessions:
-            del active_sessions[session_id]
+        """Clean up expired sessions (the token store also sweeps in the background)."""
+        return token_store.cleanup_expired()
 
     def get_session_stats(self) -> Dict[str, Any]:
         """Get statistics about active sessions."""
         now = datetime.utcnow()
 
         return {
-            "active_sessions": len(active_sessions),
+            "sessions": token_store.get_stats(),
             "failed_attempts": len(failed_attempts),
             "cleanup_timestamp": now.isoformat(),
         }
@@ -0,0 +1,329 @@
+"""
+HTTP Response Cache Middleware
+Caches pre-serialized GET responses with strong ETags, 304s and tag invalidation
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+import logging
+
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.smart_cache import smart_cache
+
+logger = logging.getLogger(__name__)
+
+# Query parameters clients add purely to bust caches
+IGNORED_QUERY_PARAMS = {"_", "_t", "cb", "cachebust"}
+
+
+@dataclass
+class ResponseCacheRule:
+    """Per-route response caching rule"""
+    name: str
+    path_template: str  # e.g. "/api/weather/{location_id}/current"
+    ttl: int = 60
+    tags: List[str] = field(default_factory=list)  # may reference path params
+    vary_headers: List[str] = field(default_factory=list)
+    vary_query: Optional[List[str]] = None  # None = all (minus ignored) params
+    per_user: bool = False  # Key by Authorization header for authenticated routes
+
+    def __post_init__(self):
+        pattern = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", self.path_template)
+        self._regex = re.compile(f"^{pattern}/?$")
+
+    def match(self, path: str) -> Optional[Dict[str, str]]:
+        matched = self._regex.match(path)
+        return matched.groupdict() if matched else None
+
+    @property
+    def cache_control(self) -> str:
+        scope = "private" if self.per_user else "public"
+        return f"{scope}, max-age={self.ttl}"
+
+
+DEFAULT_RESPONSE_CACHE_RULES = [
+    ResponseCacheRule("locations", "/api/locations", ttl=300, tags=["locations"]),
+    ResponseCacheRule("location_cities", "/api/locations/cities/list", ttl=600, tags=["locations"]),
+    ResponseCacheRule(
+        "current_weather",
+        "/api/weather/{location_id}/current",
+        ttl=600,  # Provider refreshes observations every ~10 minutes
+        tags=["location_weather", "weather:{location_id}"],
+    ),
+    ResponseCacheRule(
+        "leaderboards",
+        "/api/game-results/leaderboards",
+        ttl=60,
+        tags=["leaderboards"],
+        per_user=True,
+    ),
+    ResponseCacheRule(
+        "leaderboard_category",
+        "/api/game-results/leaderboards/{category}",
+        ttl=60,
+        tags=["leaderboards", "leaderboards:{category}"],
+        per_user=True,  # Includes the caller's own rank
+    ),
+    ResponseCacheRule("credit_packages", "/api/credits/packages", ttl=3600, tags=["credit_packages"]),
+    ResponseCacheRule(
+        "tournaments",
+        "/api/tournaments",
+        ttl=30,  # Participant counts may lag by this much; fill/status changes invalidate
+        tags=["tournaments"],
+    ),
+]
+
+
+class ResponseCache:
+    """
+    Two-tier store of serialized responses.
+
+    A small in-process LRU serves the hottest bodies without a Redis round
+    trip; its entries live at most `local_ttl` seconds so tag invalidations
+    on other instances propagate quickly. Redis holds the shared copy and a
+    tag -> keys index used for invalidation.
+    """
+
+    def __init__(self, max_local_entries: int = 1000, local_ttl: int = 10, max_body_size: int = 1024 * 1024):
+        self.max_local_entries = max_local_entries
+        self.local_ttl = local_ttl
+        self.max_body_size = max_body_size
+        self.prefix = "http_cache:"
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._local_tags: Dict[str, Set[str]] = {}
+        self._tag_roots: Set[str] = set()  # e.g. "weather" for "weather:{location_id}"
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "stores": 0,
+            "invalidations": 0,
+        }
+
+        smart_cache.add_tag_listener(self._on_tags_invalidated)
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        """Strong ETag over the exact response bytes"""
+        return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            local = self._local.get(key)
+            if local and local[0] > now:
+                self._local.move_to_end(key)
+                return local[1]
+            if local:
+                del self._local[key]
+
+        entry = smart_cache.get(key, prefix=self.prefix)
+        if entry is not None:
+            self._store_local(key, entry, min(self.local_ttl, max(1, int(entry["expires_at"] - now))))
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any], ttl: int, tags: List[str]):
+        self._store_local(key, entry, min(self.local_ttl, ttl))
+        with self._lock:
+            for tag in tags:
+                self._local_tags.setdefault(tag, set()).add(key)
+
+        smart_cache.set(key, entry, ttl, prefix=self.prefix)
+        if smart_cache.redis_client:
+            try:
+                pipe = smart_cache.redis_client.pipeline()
+                for tag in tags:
+                    tag_key = f"{self.prefix}tag:{tag}"
+                    pipe.sadd(tag_key, key)
+                    pipe.expire(tag_key, ttl + 60)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Response cache tag index update failed: {e}")
+        self.stats["stores"] += 1
+
+    def _store_local(self, key: str, entry: Dict[str, Any], ttl: int):
+        with self._lock:
+            self._local[key] = (time.time() + ttl, entry)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def register_tags(self, tags: List[str]):
+        """Declare tags used by cache rules so data-change events are routed here"""
+        self._tag_roots |= {tag.split(":")[0] for tag in tags}
+
+    def _on_tags_invalidated(self, tags: List[str]):
+        # Every write fires table tags; only pay for Redis lookups on ours
+        relevant = [tag for tag in tags if tag.split(":")[0] in self._tag_roots]
+        if relevant:
+            self.invalidate_tags(relevant)
+
+    def invalidate_tags(self, tags: List[str]) -> int:
+        """Drop every cached response carrying any of the tags"""
+        keys: Set[str] = set()
+        with self._lock:
+            for tag in tags:
+                keys |= self._local_tags.pop(tag, set())
+
+        if smart_cache.redis_client:
+            try:
+                for tag in tags:
+                    tag_key = f"{self.prefix}tag:{tag}"
+                    keys |= {
+                        member.decode() if isinstance(member, bytes) else member
+                        for member in smart_cache.redis_client.smembers(tag_key)
+                    }
+                    smart_cache.redis_client.delete(tag_key)
+            except Exception as e:
+                logger.warning(f"Response cache tag lookup failed for {tags}: {e}")
+
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        for key in keys:
+            smart_cache.delete(key, prefix=self.prefix)
+
+        if keys:
+            self.stats["invalidations"] += len(keys)
+            logger.info(f"Response cache invalidated {len(keys)} entries for tags {tags}")
+        return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "local_entries": len(self._local),
+            "hit_rate": f"{self.stats['hits'] / lookups:.2%}" if lookups else "0.00%",
+        }
+
+
+# Global response cache
+response_cache = ResponseCache()
+
+
+def invalidate_response_cache(*tags: str) -> int:
+    """Invalidate cached HTTP responses for the given tags"""
+    return response_cache.invalidate_tags(list(tags))
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve read-heavy GET endpoints from cached, pre-serialized bytes"""
+
+    def __init__(self, app, rules: List[ResponseCacheRule] = None, cache: ResponseCache = None):
+        super().__init__(app)
+        self.rules = rules if rules is not None else DEFAULT_RESPONSE_CACHE_RULES
+        self.cache = cache or response_cache
+        for rule in self.rules:
+            self.cache.register_tags(rule.tags)
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if request.method not in ("GET", "HEAD"):
+            return await call_next(request)
+
+        rule, path_params = self._match_rule(request.url.path)
+        if rule is None or "no-store" in request.headers.get("cache-control", ""):
+            return await call_next(request)
+
+        key = self._build_key(rule, request)
+        entry = self.cache.get(key)
+
+        if entry is not None:
+            self.cache.stats["hits"] += 1
+            if self._etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+                self.cache.stats["not_modified"] += 1
+                return Response(status_code=304, headers=self._cache_headers(rule, entry["etag"], "HIT"))
+
+            headers = {**entry["headers"], **self._cache_headers(rule, entry["etag"], "HIT")}
+            return Response(
+                content=entry["body"].encode("utf-8"),
+                status_code=entry["status_code"],
+                headers=headers,
+                media_type=entry["media_type"],
+            )
+
+        self.cache.stats["misses"] += 1
+        response = await call_next(request)
+
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or not content_type.startswith("application/json"):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = ResponseCache.make_etag(body)
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in ("content-length", "etag", "cache-control", "vary", "x-cache", "server-timing")
+        }
+
+        if len(body) <= self.cache.max_body_size:
+            self.cache.set(
+                key,
+                {
+                    "body": body.decode("utf-8"),
+                    "etag": etag,
+                    "status_code": response.status_code,
+                    "media_type": content_type,
+                    "headers": headers,
+                    "expires_at": time.time() + rule.ttl,
+                },
+                rule.ttl,
+                [tag.format(**path_params) for tag in rule.tags],
+            )
+
+        headers.update(self._cache_headers(rule, etag, "MISS"))
+        if self._etag_matches(request.headers.get("if-none-match"), etag):
+            self.cache.stats["not_modified"] += 1
+            return Response(status_code=304, headers=self._cache_headers(rule, etag, "MISS"))
+
+        return Response(content=body, status_code=response.status_code, headers=headers, media_type=content_type)
+
+    def _match_rule(self, path: str) -> Tuple[Optional[ResponseCacheRule], Dict[str, str]]:
+        for rule in self.rules:
+            path_params = rule.match(path)
+            if path_params is not None:
+                return rule, path_params
+        return None, {}
+
+    def _build_key(self, rule: ResponseCacheRule, request: Request) -> str:
+        """Key by route, normalized query, vary headers and (optionally) caller"""
+        params = sorted(
+            (name, value)
+            for name, value in request.query_params.multi_items()
+            if value != ""
+            and name not in IGNORED_QUERY_PARAMS
+            and (rule.vary_query is None or name in rule.vary_query)
+        )
+        parts = [rule.name, request.url.path.rstrip("/"), urlencode(params)]
+        parts.extend(request.headers.get(header, "") for header in rule.vary_headers)
+        if rule.per_user:
+            parts.append(request.headers.get("authorization", ""))
+
+        digest = hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+        return f"{rule.name}:{digest}"
+
+    @staticmethod
+    def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or any(
+            candidate.removeprefix("W/") == etag for candidate in candidates
+        )
+
+    @staticmethod
+    def _cache_headers(rule: ResponseCacheRule, etag: str, status: str) -> Dict[str, str]:
+        headers = {"ETag": etag, "Cache-Control": rule.cache_control, "X-Cache": status}
+        vary = list(rule.vary_headers) + (["Authorization"] if rule.per_user else [])
+        if vary:
+            headers["Vary"] = ", ".join(vary)
+        return headers
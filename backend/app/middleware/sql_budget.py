@@ -0,0 +1,270 @@
+"""
+SQL Budget Middleware
+Per-request statement counts, DB time and N+1 detection with Server-Timing and route budgets
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.api_response import ResponseBuilder
+
+logger = logging.getLogger(__name__)
+
+SQL_BUDGET_MODES = ("off", "log", "raise")
+
+# One bound parameter in any DBAPI paramstyle
+_PARAM = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+# Expanded IN lists vary in length per call; collapse them to one shape
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_request_stats: ContextVar[Optional["RequestSQLStats"]] = ContextVar("sql_request_stats", default=None)
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """Normalized statement text used to spot the same query issued in a loop"""
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())[:300]
+
+
+class RequestSQLStats:
+    """Statements executed while serving one request"""
+
+    __slots__ = ("queries", "duration", "shapes")
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.queries += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    @property
+    def db_ms(self) -> float:
+        return self.duration * 1000
+
+    def most_repeated(self) -> Tuple[Optional[str], int]:
+        if not self.shapes:
+            return None, 0
+        return self.shapes.most_common(1)[0]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_ms:.2f};desc="{self.queries} queries"'
+
+
+def current_sql_stats() -> Optional[RequestSQLStats]:
+    """Stats for the request being served, if SQL tracking is active"""
+    return _request_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats.get() is not None:
+        context._sql_budget_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    started = getattr(context, "_sql_budget_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+@dataclass
+class SQLBudget:
+    """Declared ceiling for one route"""
+    max_queries: int
+    max_repeats: Optional[int] = None  # Same statement shape; defaults to the N+1 threshold
+
+
+def sql_budget(max_queries: int, max_repeats: Optional[int] = None):
+    """Declare a route's query budget; apply below the @router decorator"""
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__sql_budget__ = SQLBudget(max_queries, max_repeats)
+        return endpoint
+
+    return decorator
+
+
+@dataclass
+class RouteSQLStats:
+    """Aggregate SQL behaviour of one route"""
+    requests: int = 0
+    queries: int = 0
+    max_queries: int = 0
+    db_ms: float = 0.0
+    max_repeats: int = 0
+    worst_shape: Optional[str] = None
+    n_plus_one: int = 0
+    violations: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "avg_queries": round(self.queries / self.requests, 2) if self.requests else 0,
+            "max_queries": self.max_queries,
+            "avg_db_ms": round(self.db_ms / self.requests, 2) if self.requests else 0,
+            "max_repeats": self.max_repeats,
+            "worst_shape": self.worst_shape,
+            "n_plus_one_requests": self.n_plus_one,
+            "budget_violations": self.violations,
+        }
+
+
+class SQLBudgetMonitor:
+    """
+    Aggregates per-route SQL stats and checks declared budgets.
+
+    A request that repeats one statement shape `repeat_threshold` times is
+    flagged as a likely N+1. Individual flagged requests are logged at
+    `sample_rate`; every `report_interval` seconds the worst routes are
+    logged regardless, so production sees offenders without per-request noise.
+    """
+
+    def __init__(
+        self,
+        repeat_threshold: int = 5,
+        sample_rate: float = 0.01,
+        report_interval: int = 300,
+        top_n: int = 5,
+    ):
+        self.repeat_threshold = repeat_threshold
+        self.sample_rate = sample_rate
+        self.report_interval = report_interval
+        self.top_n = top_n
+        self.routes: Dict[str, RouteSQLStats] = {}
+        self._lock = threading.Lock()
+        self._last_report = time.time()
+
+    def observe(self, route: str, stats: RequestSQLStats, budget: Optional[SQLBudget]) -> List[str]:
+        """Record one request; returns budget violations"""
+        shape, repeats = stats.most_repeated()
+        n_plus_one = repeats >= self.repeat_threshold
+
+        violations = []
+        if budget is not None:
+            if stats.queries > budget.max_queries:
+                violations.append(f"{stats.queries} queries > budget {budget.max_queries}")
+            max_repeats = budget.max_repeats if budget.max_repeats is not None else self.repeat_threshold - 1
+            if repeats > max_repeats:
+                violations.append(f"statement repeated {repeats}x > {max_repeats}: {shape}")
+
+        with self._lock:
+            route_stats = self.routes.setdefault(route, RouteSQLStats())
+            route_stats.requests += 1
+            route_stats.queries += stats.queries
+            route_stats.max_queries = max(route_stats.max_queries, stats.queries)
+            route_stats.db_ms += stats.db_ms
+            if repeats > route_stats.max_repeats:
+                route_stats.max_repeats, route_stats.worst_shape = repeats, shape
+            route_stats.n_plus_one += n_plus_one
+            route_stats.violations += bool(violations)
+
+        if (n_plus_one or violations) and random.random() < self.sample_rate:
+            logger.warning(
+                f"🐌 {route}: {stats.queries} queries in {stats.db_ms:.1f}ms, "
+                f"'{shape}' x{repeats}" + (f" ({'; '.join(violations)})" if violations else "")
+            )
+        self._maybe_report()
+        return violations
+
+    def worst_offenders(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(
+                self.routes.items(),
+                key=lambda item: (item[1].max_repeats, item[1].queries / max(item[1].requests, 1)),
+                reverse=True,
+            )
+        return [{"route": route, **stats.as_dict()} for route, stats in ranked[: self.top_n]]
+
+    def _maybe_report(self):
+        now = time.time()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        offenders = [o for o in self.worst_offenders() if o["max_repeats"] >= self.repeat_threshold]
+        for offender in offenders:
+            logger.warning(
+                f"📊 SQL offender {offender['route']}: avg {offender['avg_queries']} queries, "
+                f"max repeat {offender['max_repeats']}x '{offender['worst_shape']}'"
+            )
+
+    def get_report(self) -> Dict[str, Any]:
+        return {
+            "repeat_threshold": self.repeat_threshold,
+            "routes_tracked": len(self.routes),
+            "worst_offenders": self.worst_offenders(),
+        }
+
+
+def default_mode() -> str:
+    testing = os.getenv("TESTING", "false").lower() == "true"
+    mode = os.getenv("SQL_BUDGET_MODE", "raise" if testing else "log").lower()
+    return mode if mode in SQL_BUDGET_MODES else "log"
+
+
+# Global SQL budget monitor
+sql_budget_monitor = SQLBudgetMonitor(
+    repeat_threshold=int(os.getenv("SQL_REPEAT_THRESHOLD", "5")),
+    sample_rate=float(os.getenv("SQL_BUDGET_SAMPLE_RATE", "0.01")),
+    report_interval=int(os.getenv("SQL_BUDGET_REPORT_INTERVAL", "300")),
+)
+
+
+class SQLBudgetMiddleware(BaseHTTPMiddleware):
+    """
+    Track SQL per request, emit Server-Timing and enforce @sql_budget.
+
+    In "raise" mode (the default under TESTING=true) a route over budget
+    answers 500 SQL_BUDGET_EXCEEDED so the offending test fails.
+    """
+
+    def __init__(self, app, monitor: SQLBudgetMonitor = None, mode: str = None):
+        super().__init__(app)
+        self.monitor = monitor or sql_budget_monitor
+        self.mode = mode or default_mode()
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        stats = RequestSQLStats()
+        token = _request_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            _request_stats.reset(token)
+
+        route = request.scope.get("route")
+        route_name = f"{request.method} {route.path if route else request.url.path}"
+        budget = getattr(request.scope.get("endpoint"), "__sql_budget__", None)
+        violations = self.monitor.observe(route_name, stats, budget)
+
+        if violations and self.mode == "raise":
+            return ResponseBuilder.error(
+                error_code="SQL_BUDGET_EXCEEDED",
+                error_message=f"{route_name} exceeded its SQL budget",
+                details={"violations": violations, "statements": dict(stats.shapes)},
+                status_code=500,
+                request_id=getattr(request.state, "request_id", None),
+            )
+
+        if stats.queries:
+            response.headers.append("Server-Timing", stats.server_timing())
+        return response
@@ -0,0 +1,40 @@
+# === backend/app/models/credit_refund.py ===
+# Credit refund ledger - one row per refunded entry fee or booking
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from ..database import Base
+
+
+class CreditRefund(Base):
+    """
+    Ledger of credits given back on cancellation.
+
+    `refund_key` names what was refunded ("tournament:<id>:<user_id>",
+    "session:<session_id>") and is unique, so a cancellation that is
+    retried or resumed can never refund the same thing twice. Rows are
+    inserted and applied to balances per batch (`batch_id`).
+    """
+
+    __tablename__ = "credit_refunds"
+
+    id = Column(Integer, primary_key=True, index=True)
+    refund_key = Column(String(100), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    amount = Column(Integer, nullable=False)
+
+    # What was cancelled
+    source_type = Column(String(20), nullable=False)  # tournament, session
+    source_id = Column(String(50), nullable=False)
+    reason = Column(String(200), nullable=True)
+
+    batch_id = Column(String(32), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_credit_refund_user", "user_id", "created_at"),
+        Index("idx_credit_refund_source", "source_type", "source_id"),
+    )
+
+    def __repr__(self):
+        return f"<CreditRefund(key='{self.refund_key}', user={self.user_id}, amount={self.amount})>"
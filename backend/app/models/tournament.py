@@ -12,6 +12,7 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     Enum,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.sql import func
@@ -21,7 +22,6 @@ from ..database import Base
 from typing import Optional, List, Dict, Tuple
 from enum import Enum as PyEnum
 import uuid
-import math
 
 # === TOURNAMENT ENUMS ===
 
@@ -180,6 +180,12 @@ class Tournament(Base):
         "TournamentMatch", back_populates="tournament", cascade="all, delete-orphan"
     )
 
+    # Listing filters; id completes the (start_time, id) keyset order
+    __table_args__ = (
+        Index("idx_tournament_status_start", "status", "start_time", "id"),
+        Index("idx_tournament_location_game", "location_id", "game_type"),
+    )
+
     def __repr__(self):
         return f"<Tournament(id='{self.tournament_id}', name='{self.name}', status='{self.status.value}')>"
 
@@ -240,91 +246,44 @@ class Tournament(Base):
                 return True
         return False
 
-    def generate_bracket(self) -> Dict:
-        """Generate tournament bracket based on format"""
-        if self.format == TournamentFormat.SINGLE_ELIMINATION:
-            return self._generate_single_elimination_bracket()
-        elif self.format == TournamentFormat.ROUND_ROBIN:
-            return self._generate_round_robin_schedule()
-        # Add more formats as needed
-        return {}
-
-    def _generate_single_elimination_bracket(self) -> Dict:
-        """Generate single elimination bracket"""
-        participants = list(self.participants)
-        participant_count = len(participants)
-
-        # Calculate rounds needed
-        rounds_needed = math.ceil(math.log2(participant_count))
-        self.total_rounds = rounds_needed
-
-        bracket = {
-            "format": "single_elimination",
-            "total_rounds": rounds_needed,
-            "total_matches": participant_count - 1,
-            "rounds": {},
-        }
-
-        # Generate first round matches
-        first_round_matches = []
-        for i in range(0, participant_count, 2):
-            match = {
-                "match_id": f"{self.tournament_id}_r1_m{i//2+1}",
-                "round": 1,
-                "player1": participants[i].user_id if i < participant_count else None,
-                "player2": (
-                    participants[i + 1].user_id if i + 1 < participant_count else None
-                ),
-                "winner": None,
-                "completed": False,
-            }
-            first_round_matches.append(match)
-
-        bracket["rounds"]["1"] = {"matches": first_round_matches}
-
-        return bracket
-
-    def _generate_round_robin_schedule(self) -> Dict:
-        """Generate round robin schedule"""
-        participants = list(self.participants)
-        participant_count = len(participants)
-
-        total_matches = (participant_count * (participant_count - 1)) // 2
-
-        schedule = {
-            "format": "round_robin",
-            "total_rounds": participant_count - 1,
-            "total_matches": total_matches,
-            "matches": [],
-        }
-
-        match_id = 1
-        for i in range(participant_count):
-            for j in range(i + 1, participant_count):
-                match = {
-                    "match_id": f"{self.tournament_id}_rr_m{match_id}",
-                    "player1": participants[i].user_id,
-                    "player2": participants[j].user_id,
-                    "winner": None,
-                    "completed": False,
-                }
-                schedule["matches"].append(match)
-                match_id += 1
-
-        return schedule
-
-    def update_match_result(self, match_id: str, winner_id: int):
-        """Update match result in bracket"""
+    def generate_bracket(self, seeds: Optional[List[int]] = None, **options) -> Dict:
+        """
+        Generate the bracket for this tournament's format and store it compactly
+
+        `seeds` are user ids best first; by default the active participants
+        in seeding order, then registration order.
+        """
+        from ..services.tournament_brackets import build_bracket
+
+        if seeds is None:
+            active = [p for p in self.participants if p.is_active]
+            active.sort(key=lambda p: (p.seeding is None, p.seeding or 0, p.registration_time or datetime.min, p.id or 0))
+            seeds = [p.user_id for p in active]
+
+        bracket = build_bracket(self.format.value, seeds, **options)
+        self.bracket_data = bracket.to_dict()
+        self.total_rounds = bracket.total_rounds
+        self.current_round = bracket.current_round
+        return self.bracket_data
+
+    def update_match_result(self, match_id, winner_id: int) -> List[int]:
+        """
+        Record a bracket result by position or label ("R2-1", "W3-2", "GF1")
+
+        Returns the bracket positions that became playable.
+        """
+        from sqlalchemy.orm.attributes import flag_modified
+        from ..services.tournament_brackets import Bracket
+
         if not self.bracket_data:
-            return
-
-        # Find and update match in bracket
-        for round_num, round_data in self.bracket_data.get("rounds", {}).items():
-            for match in round_data.get("matches", []):
-                if match.get("match_id") == match_id:
-                    match["winner"] = winner_id
-                    match["completed"] = True
-                    break
+            raise ValueError("Bracket has not been generated")
+
+        bracket = Bracket.from_dict(self.bracket_data)
+        ready = bracket.record_result(match_id, winner_id)
+        # The match table is updated in place, which JSON columns do not detect
+        flag_modified(self, "bracket_data")
+        self.current_round = bracket.current_round
+        return ready
 
 
 # === TOURNAMENT PARTICIPANT MODEL ===
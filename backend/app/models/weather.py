@@ -8,10 +8,13 @@ from sqlalchemy import (
     String,
     Float,
     Boolean,
+    Date,
     DateTime,
     Text,
     ForeignKey,
     JSON,
+    Index,
+    UniqueConstraint,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, Session
@@ -246,55 +249,91 @@ class GameWeatherSuitability(Base):
         }
 
 
+class WeatherDailyRollup(Base):
+    """
+    Per-day, per-location session and weather aggregates for impact reports.
+
+    Refreshed incrementally by a background job; reports over long ranges
+    sum these rows instead of scanning sessions and readings. Days without
+    any activity get an empty row with location_id 0 so coverage stays
+    contiguous.
+    """
+
+    __tablename__ = "weather_daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    location_id = Column(Integer, nullable=False)  # Soft reference, 0 = day marker
+
+    # Sessions scheduled on the day
+    sessions_total = Column(Integer, default=0)
+    sessions_cancelled = Column(Integer, default=0)
+    weather_cancelled = Column(Integer, default=0)
+    weather_warnings = Column(Integer, default=0)
+    cancelled_credits = Column(Integer, default=0)
+
+    # Readings per condition: {condition: {readings, temperature_sum, temperature_count, wind_sum, wind_count}}
+    readings = Column(Integer, default=0)
+    conditions = Column(JSON, default=dict)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("day", "location_id", name="uq_weather_rollup_day_location"),
+        Index("idx_weather_rollup_day", "day"),
+    )
+
+
 # === INITIALIZATION FUNCTIONS ===
 
+# Default rules, also used for game types without a stored rule
+DEFAULT_GAME_WEATHER_RULES = [
+    {
+        "game_type": "GAME1",  # Pontossági Célzás
+        "min_temperature": -5.0,
+        "max_temperature": 30.0,
+        "max_wind_speed": 8.0,
+        "max_precipitation": 1.0,
+        "min_visibility": 5.0,
+        "allowed_conditions": ["clear", "partly_cloudy", "cloudy"],
+        "blocked_conditions": ["rain", "heavy_rain", "snow", "storm"],
+        "requires_shelter": False,
+        "indoor_alternative": True,
+        "weather_dependent": True,
+    },
+    {
+        "game_type": "GAME2",  # Gyorsasági Slalom
+        "min_temperature": 0.0,
+        "max_temperature": 35.0,
+        "max_wind_speed": 12.0,
+        "max_precipitation": 2.0,
+        "min_visibility": 8.0,
+        "allowed_conditions": ["clear", "partly_cloudy", "cloudy", "light_rain"],
+        "blocked_conditions": ["heavy_rain", "snow", "storm"],
+        "requires_shelter": False,
+        "indoor_alternative": False,
+        "weather_dependent": True,
+    },
+    {
+        "game_type": "GAME3",  # 1v1 Technikai Duel
+        "min_temperature": -2.0,
+        "max_temperature": 32.0,
+        "max_wind_speed": 10.0,
+        "max_precipitation": 1.5,
+        "min_visibility": 10.0,
+        "allowed_conditions": ["clear", "partly_cloudy", "cloudy"],
+        "blocked_conditions": ["rain", "heavy_rain", "snow", "storm", "fog"],
+        "requires_shelter": False,
+        "indoor_alternative": True,
+        "weather_dependent": True,
+    },
+]
+
 
 def initialize_game_weather_suitability(db: Session):
     """Initialize default game weather suitability rules"""
 
-    default_rules = [
-        {
-            "game_type": "GAME1",  # Pontossági Célzás
-            "min_temperature": -5.0,
-            "max_temperature": 30.0,
-            "max_wind_speed": 8.0,
-            "max_precipitation": 1.0,
-            "min_visibility": 5.0,
-            "allowed_conditions": ["clear", "partly_cloudy", "cloudy"],
-            "blocked_conditions": ["rain", "heavy_rain", "snow", "storm"],
-            "requires_shelter": False,
-            "indoor_alternative": True,
-            "weather_dependent": True,
-        },
-        {
-            "game_type": "GAME2",  # Gyorsasági Slalom
-            "min_temperature": 0.0,
-            "max_temperature": 35.0,
-            "max_wind_speed": 12.0,
-            "max_precipitation": 2.0,
-            "min_visibility": 8.0,
-            "allowed_conditions": ["clear", "partly_cloudy", "cloudy", "light_rain"],
-            "blocked_conditions": ["heavy_rain", "snow", "storm"],
-            "requires_shelter": False,
-            "indoor_alternative": False,
-            "weather_dependent": True,
-        },
-        {
-            "game_type": "GAME3",  # 1v1 Technikai Duel
-            "min_temperature": -2.0,
-            "max_temperature": 32.0,
-            "max_wind_speed": 10.0,
-            "max_precipitation": 1.5,
-            "min_visibility": 10.0,
-            "allowed_conditions": ["clear", "partly_cloudy", "cloudy"],
-            "blocked_conditions": ["rain", "heavy_rain", "snow", "storm", "fog"],
-            "requires_shelter": False,
-            "indoor_alternative": True,
-            "weather_dependent": True,
-        },
-    ]
-
-    for rule_data in default_rules:
+    for rule_data in DEFAULT_GAME_WEATHER_RULES:
         # Check if rule already exists
         existing_rule = (
             db.query(GameWeatherSuitability)
@@ -393,6 +432,88 @@ def create_sample_weather_data(db: Session, location_ids: List[int]):
 # === UTILITY FUNCTIONS ===
 
 
+# Severity a condition implies on its own; wind and temperature can only raise it
+CONDITION_SEVERITY = {
+    WeatherCondition.STORM: WeatherSeverity.EXTREME,
+    WeatherCondition.RAIN: WeatherSeverity.HIGH,
+    WeatherCondition.HEAVY_RAIN: WeatherSeverity.HIGH,
+    WeatherCondition.SNOW: WeatherSeverity.HIGH,
+    WeatherCondition.CLOUDY: WeatherSeverity.MODERATE,
+    WeatherCondition.OVERCAST: WeatherSeverity.MODERATE,
+    WeatherCondition.LIGHT_RAIN: WeatherSeverity.MODERATE,
+    WeatherCondition.FOG: WeatherSeverity.MODERATE,
+}
+SEVERITY_ORDER = list(WeatherSeverity)
+
+
+def weather_severity(
+    temperature: Optional[float], wind_kmh: Optional[float], condition: Optional[str]
+) -> WeatherSeverity:
+    """Severity of a current reading or forecast hour (temperature in °C, wind in km/h)"""
+    temperature = 20 if temperature is None else temperature
+    wind_kmh = wind_kmh or 0
+    if wind_kmh > 50 or temperature < -5 or temperature > 35:
+        measured = WeatherSeverity.EXTREME
+    elif wind_kmh > 30 or temperature < 0 or temperature > 30:
+        measured = WeatherSeverity.HIGH
+    elif wind_kmh > 15:
+        measured = WeatherSeverity.MODERATE
+    else:
+        measured = WeatherSeverity.LOW
+    return max(measured, CONDITION_SEVERITY.get(condition, WeatherSeverity.LOW), key=SEVERITY_ORDER.index)
+
+
+def weather_rule_issues(
+    rules: Dict[str, Any],
+    temperature: Optional[float] = None,
+    wind_speed: Optional[float] = None,
+    precipitation: Optional[float] = None,
+    visibility: Optional[float] = None,
+    condition: Optional[str] = None,
+) -> List[str]:
+    """Rule violations for one reading (a GameWeatherSuitability dict); unknown values are not checked"""
+    issues = []
+
+    # Temperature check
+    if temperature is not None:
+        if temperature < rules["min_temperature"]:
+            issues.append(
+                f"Temperature too low ({temperature}°C < {rules['min_temperature']}°C)"
+            )
+        elif temperature > rules["max_temperature"]:
+            issues.append(
+                f"Temperature too high ({temperature}°C > {rules['max_temperature']}°C)"
+            )
+
+    # Wind check
+    if wind_speed is not None and wind_speed > rules["max_wind_speed"]:
+        issues.append(
+            f"Wind too strong ({wind_speed} m/s > {rules['max_wind_speed']} m/s)"
+        )
+
+    # Precipitation check
+    if precipitation is not None and precipitation > rules["max_precipitation"]:
+        issues.append(
+            f"Too much precipitation ({precipitation} mm/h > {rules['max_precipitation']} mm/h)"
+        )
+
+    # Visibility check
+    if visibility is not None and visibility < rules["min_visibility"]:
+        issues.append(
+            f"Visibility too low ({visibility} km < {rules['min_visibility']} km)"
+        )
+
+    # Condition check
+    if condition is not None:
+        if rules.get("blocked_conditions") and condition in rules["blocked_conditions"]:
+            issues.append(f"Weather condition '{condition}' is blocked for this game")
+
+        if rules.get("allowed_conditions") and condition not in rules["allowed_conditions"]:
+            issues.append(f"Weather condition '{condition}' is not allowed for this game")
+
+    return issues
+
+
 def check_game_weather_suitability(
     weather: LocationWeather, game_type: str, db: Session
 ) -> Dict[str, Any]:
@@ -419,47 +540,14 @@ def check_game_weather_suitability(
             "rules_available": True,
         }
 
-    # Check each condition
-    issues = []
-
-    # Temperature check
-    if weather.temperature < rules.min_temperature:
-        issues.append(
-            f"Temperature too low ({weather.temperature}°C < {rules.min_temperature}°C)"
-        )
-    elif weather.temperature > rules.max_temperature:
-        issues.append(
-            f"Temperature too high ({weather.temperature}°C > {rules.max_temperature}°C)"
-        )
-
-    # Wind check
-    if weather.wind_speed > rules.max_wind_speed:
-        issues.append(
-            f"Wind too strong ({weather.wind_speed} m/s > {rules.max_wind_speed} m/s)"
-        )
-
-    # Precipitation check
-    if weather.precipitation > rules.max_precipitation:
-        issues.append(
-            f"Too much precipitation ({weather.precipitation} mm/h > {rules.max_precipitation} mm/h)"
-        )
-
-    # Visibility check
-    if weather.visibility < rules.min_visibility:
-        issues.append(
-            f"Visibility too low ({weather.visibility} km < {rules.min_visibility} km)"
-        )
-
-    # Condition check
-    if rules.blocked_conditions and weather.condition in rules.blocked_conditions:
-        issues.append(
-            f"Weather condition '{weather.condition}' is blocked for this game"
-        )
-
-    if rules.allowed_conditions and weather.condition not in rules.allowed_conditions:
-        issues.append(
-            f"Weather condition '{weather.condition}' is not allowed for this game"
-        )
+    issues = weather_rule_issues(
+        rules.to_dict(),
+        temperature=weather.temperature,
+        wind_speed=weather.wind_speed,
+        precipitation=weather.precipitation,
+        visibility=weather.visibility,
+        condition=weather.condition,
+    )
 
     is_suitable = len(issues) == 0
     reason = "Weather conditions are suitable" if is_suitable else "; ".join(issues)
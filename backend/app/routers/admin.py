@@ -6,13 +6,16 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi import status as http_status
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 from pydantic import BaseModel, Field
 import logging
 import json
 
-from ..database import get_db
+from ..database import get_db, get_read_db, read_session_factory
+from ..core.api_response import FastJSONResponse
+from ..core.streaming_export import EXPORT_FORMAT_PATTERN, export_response, stream_query
 from ..models.user import User
+from ..models.moderation import ModerationLog as ModerationLogRecord
 
 # Conditional imports with fallbacks
 try:
@@ -169,6 +172,30 @@ def log_admin_action(admin_id: int, action: str, details: Dict[str, Any] = None)
     logger.info(f"Admin action logged: {json.dumps(log_entry)}")
 
 
+def filter_users(query, search: Optional[str] = None, is_active: Optional[bool] = None):
+    """Apply the admin user-list filters (shared by list and export)"""
+    if search:
+        query = query.filter(
+            User.username.ilike(f"%{search}%") | User.email.ilike(f"%{search}%")
+        )
+
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+
+    return query
+
+
+def filter_moderation_logs(query, actor_id: Optional[int] = None, action: Optional[str] = None):
+    """Apply the moderation-log filters (shared by list and export)"""
+    if actor_id is not None:
+        query = query.filter(ModerationLogRecord.actor_id == actor_id)
+
+    if action:
+        query = query.filter(ModerationLogRecord.action == action)
+
+    return query
+
+
 # === HEALTH CHECK ===
 
 
@@ -202,20 +229,12 @@ async def get_all_users(
     search: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """👥 Get all users with admin details"""
 
     # Query users from database
-    query = db.query(User)
-
-    if search:
-        query = query.filter(
-            User.username.ilike(f"%{search}%") | User.email.ilike(f"%{search}%")
-        )
-
-    if is_active is not None:
-        query = query.filter(User.is_active == is_active)
+    query = filter_users(db.query(User), search, is_active)
 
     users = query.offset(skip).limit(limit).all()
 
@@ -247,7 +266,48 @@ async def get_all_users(
         details={"count": len(admin_users), "search": search},
     )
 
-    return admin_users
+    # Rows were validated on construction; skip response_model re-validation
+    return FastJSONResponse(content=admin_users)
+
+
+ADMIN_USER_EXPORT_FIELDS = [
+    "id",
+    "username",
+    "email",
+    "full_name",
+    "is_active",
+    "user_type",
+    "credits",
+    "level",
+    "games_played",
+    "created_at",
+]
+
+
+@router.get("/users/export")
+async def export_users(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    search: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    current_user: User = Depends(get_current_admin),
+):
+    """📤 Stream all users matching the list filters as NDJSON or CSV"""
+
+    def build_rows(db: Session):
+        query = filter_users(db.query(User), search, is_active).order_by(User.id)
+        for user in stream_query(query):
+            yield {field: getattr(user, field, None) for field in ADMIN_USER_EXPORT_FIELDS}
+
+    log_admin_action(
+        admin_id=current_user.id if hasattr(current_user, "id") else 1,
+        action="users_exported",
+        details={"format": export_format, "search": search, "is_active": is_active},
+    )
+
+    return export_response(
+        read_session_factory(request), build_rows, export_format, ADMIN_USER_EXPORT_FIELDS, "users"
+    )
 
 
 @router.get("/users/{user_id}", response_model=AdminUserResponse)
@@ -495,7 +555,7 @@ async def bulk_user_operations(
 
 @router.get("/stats", response_model=SystemStats)
 async def get_system_stats(
-    current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_admin), db: Session = Depends(get_read_db)
 ):
     """📊 Get system statistics"""
 
@@ -531,32 +591,71 @@ async def get_moderation_logs(
     actor_id: Optional[int] = Query(None),
     action: Optional[str] = Query(None),
     current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_read_db),
 ):
     """📝 Get moderation logs"""
 
-    # Mock moderation logs
-    logs = []
-    for i in range(min(limit, 20)):  # Generate some mock logs
-        logs.append(
-            {
-                "id": i + 1,
-                "actor_id": actor_id or 1,
-                "target_user_id": (i % 5) + 1,
-                "action": action or "user_details_accessed",
-                "details": {"mock": "data"},
-                "ip_address": "127.0.0.1",
-                "created_at": (datetime.now() - timedelta(hours=i)).isoformat(),
-            }
-        )
+    query = filter_moderation_logs(db.query(ModerationLogRecord), actor_id, action)
+    total = query.count()
+    logs = [
+        log.to_dict()
+        for log in query.order_by(ModerationLogRecord.created_at.desc(), ModerationLogRecord.id.desc())
+        .offset(skip)
+        .limit(limit)
+    ]
 
     return {
         "logs": logs,
-        "total": len(logs),
+        "total": total,
         "page": skip // limit + 1,
         "filters": {"actor_id": actor_id, "action": action},
     }
 
 
+MODERATION_LOG_EXPORT_FIELDS = [
+    "id",
+    "actor_id",
+    "target_user_id",
+    "action",
+    "details",
+    "ip_address",
+    "user_agent",
+    "created_at",
+]
+
+
+@router.get("/moderation/logs/export")
+async def export_moderation_logs(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    actor_id: Optional[int] = Query(None),
+    action: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_admin),
+):
+    """📤 Stream moderation logs matching the list filters as NDJSON or CSV"""
+
+    def build_rows(db: Session):
+        query = filter_moderation_logs(
+            db.query(ModerationLogRecord), actor_id, action
+        ).order_by(ModerationLogRecord.created_at.desc(), ModerationLogRecord.id.desc())
+        for log in stream_query(query):
+            yield log.to_dict()
+
+    log_admin_action(
+        admin_id=current_user.id if hasattr(current_user, "id") else 1,
+        action="moderation_logs_exported",
+        details={"format": export_format, "actor_id": actor_id, "action": action},
+    )
+
+    return export_response(
+        read_session_factory(request),
+        build_rows,
+        export_format,
+        MODERATION_LOG_EXPORT_FIELDS,
+        "moderation_logs",
+    )
+
+
 # === REPORTS MANAGEMENT ===
 
 
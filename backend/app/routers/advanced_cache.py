@@ -9,11 +9,13 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import logging
 import asyncio
+import time
 
 from app.core.database_production import get_db
 from app.core.smart_cache import smart_cache, UserCache, GameCache, LocationCache
 from app.core.query_cache import AdvancedQueryCache
 from app.core.cache_warming import cache_warming_manager, manual_warm_critical_caches
+from app.core.cache_access import cache_access_tracker
 from app.core.api_response import ResponseBuilder
 # Simple auth dependency - replace with proper authentication
 def simple_auth():
@@ -83,7 +85,9 @@ async def get_cache_analytics_overview(current_user: dict = Depends(simple_auth)
                     max(1, warming_stats["global_stats"]["total_warmings"])
                 ),
                 "active_tasks": warming_stats["active_tasks"],
-                "last_cycle": warming_stats["global_stats"]["last_warming_cycle"]
+                "last_cycle": warming_stats["global_stats"]["last_warming_cycle"],
+                "warmed_hits": warming_stats["adaptive_warming"]["effectiveness"]["warmed_hits"],
+                "warmed_hit_share": warming_stats["adaptive_warming"]["effectiveness"]["warmed_hit_share"]
             },
             "timestamp": datetime.utcnow().isoformat()
         }
@@ -143,6 +147,30 @@ async def get_warming_system_status(current_user: dict = Depends(simple_auth)):
     )
 
 
+@router.get("/analytics/hot-keys")
+async def get_hot_keys(limit: int = 50, current_user: dict = Depends(simple_auth)):
+    """Get the observed hot key set driving adaptive cache warming"""
+    
+    now = time.time()  # warmed_at is recorded with time.time()
+    hot_keys = []
+    for hot_key in cache_access_tracker.hot_keys(limit):
+        warmed_at = cache_access_tracker.warmed_at.get(hot_key["cache_key"])
+        hot_keys.append({
+            "cache_key": hot_key["cache_key"],
+            "estimated_count": hot_key["estimated_count"],
+            "ttl": hot_key["warmable"].ttl,
+            "warmed_seconds_ago": round(now - warmed_at, 1) if warmed_at else None
+        })
+    
+    return ResponseBuilder.success(
+        data={
+            "hot_keys": hot_keys,
+            "effectiveness": cache_access_tracker.get_stats()
+        },
+        message=f"Retrieved {len(hot_keys)} hot cache keys"
+    )
+
+
 @router.post("/management/warm-critical")
 async def manual_warm_critical(
     background_tasks: BackgroundTasks,
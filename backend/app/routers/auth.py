@@ -14,9 +14,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 from ..database import get_db
+from ..database_async import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.user import (
     User,
     UserSession,
@@ -29,6 +30,17 @@ from ..models.user import (
     UserLogin,
     UserCreateProtected,
 )
+from ..core.password_hashing import (
+    get_crypt_context,
+    password_hasher,
+)
+from ..core.token_store import token_store
+from ..core.auth_principal import (
+    AuthenticatedUser,
+    Principal,
+    principal_cache,
+    token_claims_cache,
+)
 from ..services.password_security import PasswordSecurityService
 from ..services.email_service import enhanced_email_service
 import os
@@ -55,8 +67,8 @@ SECRET_KEY = "lfa-legacy-go-jwt-secret-key-2024-production-ready"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30 days
 
-# Password hashing
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+# Password hashing (argon2id; bcrypt hashes still verify and are upgraded on login)
+pwd_context = get_crypt_context()
 
 # OAuth2 scheme - Fixed tokenUrl to match OAuth2 standard
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
@@ -66,50 +78,138 @@ router = APIRouter(tags=["Authentication"])
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash (blocking; handlers use password_hasher)"""
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
+    """Hash a password (blocking; handlers use password_hasher)"""
     return pwd_context.hash(password)
 
 
+async def authenticate_password(user: Optional[User], password: str, db: Session) -> bool:
+    """Check a login password off the event loop, upgrading legacy hashes
+
+    bcrypt (or outdated argon2) hashes are replaced with the current
+    argon2id hash as soon as the password is confirmed.
+    """
+    if user is None:
+        return False
+    valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if valid and new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+        logger.info(f"🔐 Upgraded password hash for user {user.id}")
+    return valid
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """Create JWT access token"""
+    """Create JWT access token
+
+    Login tokens are bound to a session in the token store (`sid`/`gen`
+    claims) so they can be revoked on logout from any instance. Short-lived
+    MFA-pending tokens are not.
+    """
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    if "sub" in to_encode and not to_encode.get("mfa_pending"):
+        grant = token_store.create_session(
+            to_encode["sub"], int((expire - datetime.utcnow()).total_seconds())
+        )
+        to_encode.update({"sid": grant.session_id, "gen": grant.generation})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
-    """Get current user from JWT token"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_user_id(token: str) -> int:
+    """Validate a bearer token and return the user id it was issued for
+
+    Verified claims are cached per token until it expires, so repeat calls
+    with the same token skip signature verification.
+    """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_claims_cache.verify(token, SECRET_KEY, [ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+            raise _credentials_exception()
+        if not token_store.validate(user_id, payload.get("sid"), payload.get("gen", 0)):
+            raise _credentials_exception()
+        return int(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+):
+    """Get current user from JWT token (sync session)
+
+    Declared as a plain function so FastAPI runs the blocking lookup in the
+    threadpool instead of on the event loop. Routers that modify the user
+    through the sync Session keep using this dependency.
+
+    Returns an AuthenticatedUser: identity, role and status come from the
+    principal cache, and the ORM User is only loaded from `db` when the
+    handler touches another attribute (use `.load()` for db.refresh).
+    """
+    user_id = decode_user_id(token)
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return AuthenticatedUser(principal, lambda: db.get(User, user_id))
+
+    user = db.get(User, user_id)
+    if user is None:
+        raise _credentials_exception()
+    principal = Principal.from_user(user)
+    principal_cache.set(principal)
+    return AuthenticatedUser(principal, lambda: db.get(User, user_id), user)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+):
+    """Get current user from JWT token (async session)
+
+    The user is attached to the request's AsyncSession, so routers on the
+    async data layer can modify and commit it through the same session.
+    Handlers that only need identity should depend on get_current_principal.
+    """
+    user = await db.get(User, decode_user_id(token))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Get the cached principal for the JWT's user (async session)
+
+    Only hits the database on a principal cache miss.
+    """
+    user_id = decode_user_id(token)
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            raise _credentials_exception()
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
+    return principal
+
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Get the current active user"""
     if not current_user.is_active:
@@ -639,7 +739,7 @@ async def register(
             )
 
         # Create hashed password with Argon2id
-        hashed_password = password_service.hash_password(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
 
         # Create user with enhanced security fields
         new_user = User(
@@ -712,7 +812,7 @@ async def login_for_access_token(
         # Find user by username
         user = db.query(User).filter(User.username == form_data.username).first()
 
-        if not user or not verify_password(form_data.password, user.hashed_password):
+        if not await authenticate_password(user, form_data.password, db):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -911,7 +1011,7 @@ async def login(user_data: UserLogin, request: Request, db: Session = Depends(ge
         # Find user by username
         user = db.query(User).filter(User.username == user_data.username).first()
 
-        if not user or not verify_password(user_data.password, user.hashed_password):
+        if not await authenticate_password(user, user_data.password, db):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -992,9 +1092,15 @@ async def login(user_data: UserLogin, request: Request, db: Session = Depends(ge
 
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user)):
-    """🚪 User logout"""
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+):
+    """🚪 User logout (revokes this token's session on every instance)"""
     try:
+        session_id = token_claims_cache.verify(token, SECRET_KEY, [ALGORITHM]).get("sid")
+        if session_id:
+            token_store.revoke_session(current_user.id, session_id)
         logger.info(f"✅ User logged out: {current_user.username}")
         return {"message": "Successfully logged out"}
     except Exception as e:
@@ -1004,6 +1110,14 @@ async def logout(current_user: User = Depends(get_current_user)):
         )
 
 
+@router.post("/logout-all")
+async def logout_all(current_user: User = Depends(get_current_user)):
+    """🚪 Log out every session of the current user, including this one"""
+    token_store.revoke_all(current_user.id)
+    logger.info(f"✅ User logged out everywhere: {current_user.username}")
+    return {"message": "Successfully logged out from all devices"}
+
+
 # =============================================================================
 # USER PROFILE ENDPOINTS
 # =============================================================================
@@ -1050,7 +1164,7 @@ async def update_profile(
 
         current_user.update_last_activity()
         db.commit()
-        db.refresh(current_user)
+        db.refresh(current_user.load())
 
         logger.info(f"✅ Profile updated for user: {current_user.username}")
 
@@ -1076,7 +1190,7 @@ async def change_password(
     """🔒 Change user password"""
     try:
         # Verify current password
-        if not verify_password(
+        if not await password_hasher.verify(
             password_data.current_password, current_user.hashed_password
         ):
             raise HTTPException(
@@ -1092,7 +1206,7 @@ async def change_password(
             )
 
         # Update password
-        current_user.hashed_password = get_password_hash(password_data.new_password)
+        current_user.hashed_password = await password_hasher.hash(password_data.new_password)
         current_user.update_last_activity()
         db.commit()
 
@@ -1148,7 +1262,7 @@ async def register_protected(
             )
 
         # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
 
         # ✅ JAVÍTÁS: total_credits_purchased eltávolítva itt is
         new_user = User(
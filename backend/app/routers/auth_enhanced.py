@@ -146,25 +146,25 @@ async def refresh_access_token(
     request: RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
-    """Refresh access token using refresh token"""
-    user_id = auth_service.verify_refresh_token(request.refresh_token)
+    """Refresh access token using refresh token (rotates the refresh token)"""
+    session = auth_service.rotate_refresh_token(request.refresh_token)
     
-    if not user_id:
+    if not session:
         raise HTTPException(
             status_code=401,
             detail="Invalid refresh token"
         )
     
     # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id == int(session.user_id)).first()
     if not user or not user.is_active:
         raise HTTPException(
             status_code=401,
             detail="User not found or inactive"
         )
     
-    # Create new token pair
-    token_pair = auth_service.create_token_pair(user)
+    # New token pair within the same session
+    token_pair = auth_service.create_token_pair(user, session)
     
     return TokenResponse(**token_pair)
 
@@ -176,9 +176,9 @@ async def logout_user(
     """Logout user and revoke refresh token"""
     try:
         payload = jwt.decode(refresh_token, auth_service.SECRET_KEY, algorithms=[auth_service.ALGORITHM])
-        jti = payload.get("jti")
-        if jti:
-            auth_service.revoke_refresh_token(current_user.id, jti)
+        session_id = payload.get("sid")
+        if session_id:
+            auth_service.revoke_refresh_token(current_user.id, session_id)
     except:
         pass  # Token already invalid
     
@@ -2,17 +2,24 @@
 # TELJES JAVÍTOTT BOOKING ROUTER - List import hozzáadva
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional  # ✅ List import hozzáadva
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional, Tuple  # ✅ List import hozzáadva
 from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel, Field
 import uuid
 import logging
 
-from ..database import get_db
+from ..database import SessionLocal
+from ..database_async import get_async_db
+from ..core.api_response import FastJSONResponse
+from ..core.streaming_export import EXPORT_FORMAT_PATTERN, export_response, stream_query
+from ..middleware.sql_budget import sql_budget
 from ..models.user import User
 from ..models.location import Location, GameDefinition, GameSession, GameSessionStatus
-from ..routers.auth import get_current_user
+from ..routers.auth import get_current_user_async
+from ..services.weather_suitability import suitability_matrix
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -150,35 +157,71 @@ def validate_booking_time(start_time: datetime) -> bool:
     return True
 
 
-def check_availability(
-    location_id: int, start_time: datetime, duration_minutes: int, db: Session
+ACTIVE_BOOKING_STATUSES = [GameSessionStatus.SCHEDULED, GameSessionStatus.CONFIRMED]
+
+
+async def check_availability(
+    location_id: int, start_time: datetime, duration_minutes: int, db: AsyncSession
 ) -> bool:
     """Check if time slot is available"""
     end_time = start_time + timedelta(minutes=duration_minutes)
 
     # Check for conflicting bookings
-    conflicting_sessions = (
-        db.query(GameSession)
-        .filter(
+    conflicting_sessions = await db.scalar(
+        select(func.count())
+        .select_from(GameSession)
+        .where(
             GameSession.location_id == location_id,
-            GameSession.status.in_(
-                [GameSessionStatus.SCHEDULED, GameSessionStatus.CONFIRMED]
-            ),
+            GameSession.status.in_(ACTIVE_BOOKING_STATUSES),
             GameSession.scheduled_start < end_time,
             GameSession.scheduled_end > start_time,
         )
-        .count()
     )
 
     return conflicting_sessions == 0
 
 
-def create_game_session(
+async def get_booked_intervals(
+    location_id: int, window_start: datetime, window_end: datetime, db: AsyncSession
+) -> List[Tuple[datetime, datetime]]:
+    """Active bookings overlapping a window, fetched in one query"""
+    result = await db.execute(
+        select(GameSession.scheduled_start, GameSession.scheduled_end).where(
+            GameSession.location_id == location_id,
+            GameSession.status.in_(ACTIVE_BOOKING_STATUSES),
+            GameSession.scheduled_start < window_end,
+            GameSession.scheduled_end > window_start,
+        )
+    )
+    return result.all()
+
+
+def is_slot_free(
+    booked: List[Tuple[datetime, datetime]], start_time: datetime, duration_minutes: int
+) -> bool:
+    """Check a slot against already-fetched booked intervals"""
+    end_time = start_time + timedelta(minutes=duration_minutes)
+    return not any(start < end_time and end > start_time for start, end in booked)
+
+
+async def get_suitability_matrix(location_id: int, db: AsyncSession) -> Optional[Dict[str, Any]]:
+    """The location's weather suitability matrix (None when weather data is unavailable)"""
+    matrix = suitability_matrix.get(location_id)
+    if matrix is not None:
+        return matrix
+    try:
+        return await db.run_sync(lambda session: suitability_matrix.get_or_build(session, location_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Weather suitability unavailable for location {location_id}: {e}")
+        return None
+
+
+async def create_game_session(
     booking_request: BookingRequest,
     user: User,
     location: Location,
     start_time: datetime,
-    db: Session,
+    db: AsyncSession,
 ) -> GameSession:
     """Create a new game session"""
     session_id = generate_session_id()
@@ -188,10 +231,8 @@ def create_game_session(
     )
 
     # Get game definition
-    game_definition = (
-        db.query(GameDefinition)
-        .filter(GameDefinition.game_id == booking_request.game_type)
-        .first()
+    game_definition = await db.scalar(
+        select(GameDefinition).where(GameDefinition.game_id == booking_request.game_type)
     )
 
     if not game_definition:
@@ -206,8 +247,8 @@ def create_game_session(
             base_credit_cost=cost,
         )
         db.add(game_definition)
-        db.commit()
-        db.refresh(game_definition)
+        await db.commit()
+        await db.refresh(game_definition)
 
     # Create session
     session = GameSession(
@@ -236,13 +277,13 @@ async def check_availability_simple(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
     location_id: int = Query(1, description="Location ID"),
     game_type: str = Query("GAME1", description="Game type"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """🔍 Check availability - SIMPLE VERSION"""
     try:
         # Validate location
-        location = db.query(Location).filter(Location.id == location_id).first()
+        location = await db.get(Location, location_id)
         if not location:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Location not found"
@@ -257,23 +298,40 @@ async def check_availability_simple(
                 detail="Invalid date format. Use YYYY-MM-DD",
             )
 
+        # One query for the whole day instead of one per slot
+        booked = await get_booked_intervals(
+            location_id,
+            target_date.replace(hour=6, minute=0, second=0),
+            target_date.replace(hour=22, minute=0, second=0),
+            db,
+        )
+
+        # Weather verdicts come from the precomputed matrix, not per-slot queries
+        matrix = await get_suitability_matrix(location_id, db)
+
         # Generate time slots for the day
         slots = []
         for hour in range(6, 22):  # 6:00 to 21:00
             slot_time = target_date.replace(hour=hour, minute=0, second=0)
 
             # Check availability
-            available = check_availability(location_id, slot_time, 60, db)
+            available = is_slot_free(booked, slot_time, 60)
 
             # Calculate cost
             cost = calculate_booking_cost(game_type, 60, location)
 
+            weather_warning = None
+            if matrix is not None:
+                verdict = suitability_matrix.lookup(matrix, game_type, slot_time)
+                if not verdict["is_suitable"]:
+                    weather_warning = verdict["reason"]
+
             slots.append(
                 AvailabilitySlot(
                     time=f"{hour:02d}:00",
                     available=available,
                     cost_credits=cost,
-                    weather_warning=None,
+                    weather_warning=weather_warning,
                 )
             )
 
@@ -300,17 +358,13 @@ async def check_availability_simple(
 @router.post("/book", response_model=BookingResponse)
 async def create_booking(
     booking_request: BookingRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """📅 Create a new booking"""
     try:
         # Validate location
-        location = (
-            db.query(Location)
-            .filter(Location.id == booking_request.location_id)
-            .first()
-        )
+        location = await db.get(Location, booking_request.location_id)
         if not location:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Location not found"
@@ -326,7 +380,7 @@ async def create_booking(
             )
 
         # Check availability
-        if not check_availability(
+        if not await check_availability(
             booking_request.location_id,
             start_time,
             booking_request.duration_minutes,
@@ -350,7 +404,7 @@ async def create_booking(
             )
 
         # Create game session
-        session = create_game_session(
+        session = await create_game_session(
             booking_request, current_user, location, start_time, db
         )
 
@@ -359,8 +413,8 @@ async def create_booking(
 
         # Add session to database
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        await db.refresh(session)
 
         logger.info(
             f"✅ Booking created: {session.session_id} for user {current_user.id}"
@@ -380,7 +434,7 @@ async def create_booking(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Booking creation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -389,34 +443,47 @@ async def create_booking(
 
 
 @router.get("/my-bookings", response_model=List[SessionDetails])
+@sql_budget(max_queries=5)
 async def get_user_bookings(
     status_filter: Optional[GameSessionStatus] = Query(
         None, description="Filter by status"
     ),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """📋 Get user's bookings"""
     try:
-        query = db.query(GameSession).filter(GameSession.user_id == current_user.id)
+        query = select(GameSession).where(GameSession.user_id == current_user.id)
 
         if status_filter:
-            query = query.filter(GameSession.status == status_filter)
+            query = query.where(GameSession.status == status_filter)
 
-        sessions = query.order_by(GameSession.scheduled_start.desc()).limit(limit).all()
+        sessions = (
+            await db.scalars(query.order_by(GameSession.scheduled_start.desc()).limit(limit))
+        ).all()
+
+        # Load locations and game definitions for the page in two queries
+        location_ids = {session.location_id for session in sessions}
+        game_def_ids = {session.game_definition_id for session in sessions}
+        locations = {
+            location.id: location
+            for location in await db.scalars(
+                select(Location).where(Location.id.in_(location_ids))
+            )
+        } if location_ids else {}
+        game_defs = {
+            game_def.id: game_def
+            for game_def in await db.scalars(
+                select(GameDefinition).where(GameDefinition.id.in_(game_def_ids))
+            )
+        } if game_def_ids else {}
 
         session_details = []
         for session in sessions:
             # Get location and game info
-            location = (
-                db.query(Location).filter(Location.id == session.location_id).first()
-            )
-            game_def = (
-                db.query(GameDefinition)
-                .filter(GameDefinition.id == session.game_definition_id)
-                .first()
-            )
+            location = locations.get(session.location_id)
+            game_def = game_defs.get(session.game_definition_id)
 
             session_details.append(
                 SessionDetails(
@@ -438,7 +505,8 @@ async def get_user_bookings(
                 )
             )
 
-        return session_details
+        # Rows were validated on construction; skip response_model re-validation
+        return FastJSONResponse(content=session_details)
 
     except Exception as e:
         logger.error(f"❌ Get user bookings error: {e}")
@@ -451,13 +519,13 @@ async def get_user_bookings(
 @router.get("/booking/{session_id}", response_model=SessionDetails)
 async def get_booking_details(
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """🔍 Get booking details"""
     try:
-        session = (
-            db.query(GameSession).filter(GameSession.session_id == session_id).first()
+        session = await db.scalar(
+            select(GameSession).where(GameSession.session_id == session_id)
         )
 
         if not session:
@@ -475,12 +543,8 @@ async def get_booking_details(
             )
 
         # Get location and game info
-        location = db.query(Location).filter(Location.id == session.location_id).first()
-        game_def = (
-            db.query(GameDefinition)
-            .filter(GameDefinition.id == session.game_definition_id)
-            .first()
-        )
+        location = await db.get(Location, session.location_id)
+        game_def = await db.get(GameDefinition, session.game_definition_id)
 
         return SessionDetails(
             id=session.id,
@@ -514,13 +578,13 @@ async def get_booking_details(
 async def update_booking(
     session_id: str,
     update_data: BookingUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """✏️ Update booking details"""
     try:
-        session = (
-            db.query(GameSession).filter(GameSession.session_id == session_id).first()
+        session = await db.scalar(
+            select(GameSession).where(GameSession.session_id == session_id)
         )
 
         if not session:
@@ -553,7 +617,7 @@ async def update_booking(
 
         session.updated_at = datetime.utcnow()
 
-        db.commit()
+        await db.commit()
 
         logger.info(f"✅ Booking updated: {session_id} by user {current_user.id}")
 
@@ -566,7 +630,7 @@ async def update_booking(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Update booking error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -577,13 +641,13 @@ async def update_booking(
 @router.delete("/booking/{session_id}")
 async def cancel_booking(
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """❌ Cancel a booking"""
     try:
-        session = (
-            db.query(GameSession).filter(GameSession.session_id == session_id).first()
+        session = await db.scalar(
+            select(GameSession).where(GameSession.session_id == session_id)
         )
 
         if not session:
@@ -627,7 +691,7 @@ async def cancel_booking(
         session.refund_amount = refund_amount
         session.refund_reason = "User cancellation"
 
-        db.commit()
+        await db.commit()
 
         logger.info(
             f"✅ Booking cancelled: {session_id} by user {current_user.id}, refund: {refund_amount}"
@@ -644,7 +708,7 @@ async def cancel_booking(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Cancel booking error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -660,8 +724,8 @@ async def get_all_bookings(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     status_filter: Optional[GameSessionStatus] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """👥 Get all bookings (admin only)"""
     if current_user.user_type not in ["admin", "moderator"]:
@@ -670,17 +734,16 @@ async def get_all_bookings(
         )
 
     try:
-        query = db.query(GameSession)
+        query = select(GameSession)
 
         if status_filter:
-            query = query.filter(GameSession.status == status_filter)
+            query = query.where(GameSession.status == status_filter)
 
         sessions = (
-            query.order_by(GameSession.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+            await db.scalars(
+                query.order_by(GameSession.created_at.desc()).offset(skip).limit(limit)
+            )
+        ).all()
 
         return {
             "bookings": [
@@ -706,6 +769,47 @@ async def get_all_bookings(
         )
 
 
+BOOKING_EXPORT_FIELDS = [
+    "session_id",
+    "user_id",
+    "location_id",
+    "game_definition_id",
+    "status",
+    "scheduled_start",
+    "scheduled_end",
+    "duration_minutes",
+    "cost_credits",
+    "created_at",
+]
+
+
+@router.get("/admin/all-bookings/export")
+async def export_all_bookings(
+    export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    status_filter: Optional[GameSessionStatus] = Query(None),
+    current_user: User = Depends(get_current_user_async),
+):
+    """📤 Stream all bookings matching the list filters as NDJSON or CSV (admin only)"""
+    if current_user.user_type not in ["admin", "moderator"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+
+    def build_rows(db: Session):
+        query = db.query(GameSession)
+
+        if status_filter:
+            query = query.filter(GameSession.status == status_filter)
+
+        query = query.order_by(GameSession.created_at.desc(), GameSession.id.desc())
+        for session in stream_query(query):
+            yield {field: getattr(session, field, None) for field in BOOKING_EXPORT_FIELDS}
+
+    return export_response(
+        SessionLocal, build_rows, export_format, BOOKING_EXPORT_FIELDS, "bookings"
+    )
+
+
 # === HEALTH CHECK ===
 
 
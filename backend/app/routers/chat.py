@@ -1,18 +1,30 @@
 # chat.py
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Callable, List, Dict, Optional
 from pydantic import BaseModel, Field
 import logging
-from ..database import get_db
+from ..database_async import get_async_db, get_async_read_db
 from ..services.chat_service import ChatService
-from ..routers.auth import get_current_user
-from ..models.user import User
+from ..middleware.sql_budget import sql_budget
+from ..core.auth_principal import Principal
+from ..routers.auth import get_current_principal
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+
+async def run_chat_service(db: AsyncSession, operation: Callable[[ChatService], Any]) -> Any:
+    """Run a ChatService operation on the request's AsyncSession
+
+    ChatService is shared with the Socket.IO handlers, which use the sync
+    session. run_sync hands it a sync facade over the async connection, so
+    its queries do not block the event loop.
+    """
+    return await db.run_sync(lambda session: operation(ChatService(session)))
+
 # Pydantic models for request validation
 class ChatRoomCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -25,19 +37,19 @@ class MessageCreate(BaseModel):
     message_type: str = Field(default="text")
 
 @router.get("/rooms")
+@sql_budget(max_queries=6)
 async def get_chat_rooms(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """Get all chat rooms with real data"""
     try:
-        service = ChatService(db)
-        
         # Get rooms user is already a member of
-        user_rooms = service.get_user_rooms(current_user.id)
+        user_rooms = await run_chat_service(
+            db, lambda service: service.get_user_rooms(current_user.id)
+        )
         
         # Also get all public rooms available to join
-        from sqlalchemy import text
         public_rooms_sql = text("""
             SELECT cr.id, cr.name, cr.room_type, cr.description, cr.is_active,
                    cr.max_users, cr.created_by, cr.created_at,
@@ -46,13 +58,13 @@ async def get_chat_rooms(
             FROM chat_rooms cr
             LEFT JOIN users u ON cr.created_by = u.id
             LEFT JOIN chat_room_memberships crm ON cr.id = crm.room_id
-            WHERE cr.is_active = 1 AND cr.room_type = 'public'
+            WHERE cr.is_active = :is_active AND cr.room_type = 'public'
             GROUP BY cr.id, cr.name, cr.room_type, cr.description, cr.is_active,
                      cr.max_users, cr.created_by, cr.created_at, u.username
             ORDER BY cr.created_at DESC
         """)
         
-        result = db.execute(public_rooms_sql).fetchall()
+        result = (await db.execute(public_rooms_sql, {"is_active": True})).fetchall()
         
         public_rooms = []
         user_room_ids = [room["id"] for room in user_rooms]
@@ -86,14 +98,16 @@ async def get_room_messages(
     room_id: int,
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get messages from a room"""
     
     try:
-        service = ChatService(db)
-        messages = service.get_room_messages(room_id, current_user.id, limit, offset)
+        messages = await run_chat_service(
+            db,
+            lambda service: service.get_room_messages(room_id, current_user.id, limit, offset),
+        )
         
         return {
             "success": True,
@@ -112,14 +126,15 @@ async def get_room_messages(
 @router.post("/rooms/{room_id}/join")
 async def join_room(
     room_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Join a chat room"""
     
     try:
-        service = ChatService(db)
-        success = service.join_room(room_id, current_user.id)
+        success = await run_chat_service(
+            db, lambda service: service.join_room(room_id, current_user.id)
+        )
         
         if success:
             return {
@@ -135,18 +150,20 @@ async def join_room(
 @router.post("/rooms", response_model=Dict)
 async def create_chat_room(
     room_data: ChatRoomCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new chat room"""
     try:
-        service = ChatService(db)
-        room = service.create_room(
-            name=room_data.name,
-            room_type=room_data.room_type,
-            description=room_data.description,
-            created_by=current_user.id,
-            max_users=room_data.max_users or 100
+        room = await run_chat_service(
+            db,
+            lambda service: service.create_room(
+                name=room_data.name,
+                room_type=room_data.room_type,
+                description=room_data.description,
+                created_by=current_user.id,
+                max_users=room_data.max_users or 100
+            ),
         )
         
         return {
@@ -164,26 +181,29 @@ async def create_chat_room(
 async def send_message(
     room_id: int,
     message_data: MessageCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Send a message to a chat room"""
     try:
-        service = ChatService(db)
-        
-        # Check if user is member of the room
-        try:
-            service.get_room_messages(room_id, current_user.id, limit=1)
-        except ValueError:
-            # User is not a member, try to join them automatically
-            service.join_room(room_id, current_user.id)
-        
-        message = service.send_message(
-            room_id=room_id,
-            user_id=current_user.id,
-            message=message_data.message,
-            message_type=message_data.message_type
-        )
+        user_id = current_user.id
+
+        def ensure_member_and_send(service: ChatService) -> Dict:
+            # Check if user is member of the room
+            try:
+                service.get_room_messages(room_id, user_id, limit=1)
+            except ValueError:
+                # User is not a member, try to join them automatically
+                service.join_room(room_id, user_id)
+
+            return service.send_message(
+                room_id=room_id,
+                user_id=user_id,
+                message=message_data.message,
+                message_type=message_data.message_type
+            )
+
+        message = await run_chat_service(db, ensure_member_and_send)
         
         # Broadcast message via WebSocket
         try:
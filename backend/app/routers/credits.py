@@ -1,7 +1,7 @@
 # === backend/app/routers/credits.py ===
 # TELJES JAVÍTOTT CREDITS ROUTER - List import hozzáadva
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from typing import List, Dict, Any, Optional  # ✅ List import hozzáadva
@@ -13,7 +13,8 @@ import logging
 import redis
 from collections import defaultdict
 
-from ..database import get_db, redis_client
+from ..database import get_db, redis_client, SessionLocal
+from ..core.streaming_export import EXPORT_FORMAT_PATTERN, export_response, stream_query
 from ..models.user import User
 from ..models.coupon import (
     Coupon,
@@ -503,7 +504,7 @@ async def purchase_credits(
         current_user.transaction_history.append(transaction.dict())
 
         db.commit()
-        db.refresh(current_user)
+        db.refresh(current_user.load())
 
         logger.info(
             f"✅ Credit purchase successful: User {current_user.id} bought {total_credits} credits"
@@ -628,6 +629,52 @@ async def get_all_transactions(
         )
 
 
+TRANSACTION_EXPORT_FIELDS = [
+    "transaction_id",
+    "user_id",
+    "username",
+    "package_id",
+    "credits_purchased",
+    "bonus_credits",
+    "total_credits",
+    "price_paid",
+    "currency",
+    "payment_method",
+    "status",
+    "created_at",
+]
+
+
+@router.get("/admin/transactions/export")
+async def export_all_transactions(
+    export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    current_user: User = Depends(get_current_user),
+):
+    """📤 Stream all credit transactions as NDJSON or CSV (admin only)
+
+    Transactions live in each user's transaction_history, so rows are emitted
+    grouped by user (ordered by user id) rather than globally by date.
+    """
+    if current_user.user_type not in ["admin", "moderator"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+
+    def build_rows(db: Session):
+        query = (
+            db.query(User)
+            .filter(User.transaction_history.isnot(None))
+            .order_by(User.id)
+        )
+        for user in stream_query(query):
+            for transaction in user.transaction_history or []:
+                yield {**transaction, "username": user.username}
+
+    return export_response(
+        SessionLocal, build_rows, export_format, TRANSACTION_EXPORT_FIELDS, "credit_transactions"
+    )
+
+
 # === SECURE COUPON ENDPOINTS ===
 
 
@@ -693,7 +740,7 @@ async def redeem_coupon_secure(
         # Save to database
         db.add(usage_record)
         db.commit()
-        db.refresh(current_user)
+        db.refresh(current_user.load())
 
         # Log successful redemption
         log_coupon_attempt(
@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 import logging
 import json
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.user import User
 from ..routers.auth import get_current_user
 
@@ -213,7 +213,7 @@ def get_mock_leaderboard_data(category: str, limit: int = 50) -> List[Dict]:
 async def get_all_leaderboards(
     limit: int = Query(default=10, le=50),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     🏆 Get all leaderboard categories - JAVÍTOTT VERZIÓ
@@ -281,7 +281,7 @@ async def get_leaderboard(
     ),
     limit: int = Query(default=50, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     🏆 Get leaderboard for specific category - JAVÍTOTT VERZIÓ
@@ -330,7 +330,7 @@ async def get_leaderboard(
 async def get_user_statistics(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     📊 Get comprehensive statistics for a specific user - JAVÍTOTT
@@ -406,7 +406,7 @@ async def get_user_statistics(
 
 @router.get("/my-statistics")
 async def get_my_statistics(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user), db: Session = Depends(get_read_db)
 ):
     """
     👤 Get current user's statistics
@@ -502,7 +502,7 @@ async def submit_game_result(
 async def get_user_achievements(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     🏅 Get user's game-related achievements
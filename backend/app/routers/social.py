@@ -2,16 +2,20 @@
 # TELJES JAVÍTOTT SOCIAL ROUTER - List import hozzáadva
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, not_
+from sqlalchemy import or_, and_, not_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any, Optional  # ✅ List import hozzáadva
 from datetime import datetime
 from pydantic import BaseModel, Field
 import logging
 
-from ..database import get_db
+from ..database_async import get_async_db, get_async_read_db
+from ..core.api_response import FastJSONResponse
+from ..middleware.sql_budget import sql_budget
 from ..models.user import User
-from ..routers.auth import get_current_user
+from ..models.friends import Friendship, FriendRequest as FriendRequestRecord, FriendRequestStatus
+from ..core.auth_principal import Principal
+from ..routers.auth import get_current_principal, get_current_user_async
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -112,54 +116,118 @@ def get_user_public_data(user: User) -> Dict[str, Any]:
     }
 
 
-def check_friendship_status(user1_id: int, user2_id: int, db: Session) -> Optional[str]:
+def pending_request_between(user1_id: int, user2_id: int):
+    """Condition for a pending friend request in either direction"""
+    return and_(
+        or_(
+            and_(FriendRequestRecord.sender_id == user1_id, FriendRequestRecord.receiver_id == user2_id),
+            and_(FriendRequestRecord.sender_id == user2_id, FriendRequestRecord.receiver_id == user1_id),
+        ),
+        FriendRequestRecord.status == FriendRequestStatus.PENDING,
+    )
+
+
+async def check_friendship_status(
+    user1_id: int, user2_id: int, db: AsyncSession
+) -> Optional[str]:
     """Check friendship status between two users"""
-    from ..models.friends import Friendship, FriendRequest, FriendRequestStatus
-    
     # Check if they are friends
-    if Friendship.are_friends(db, user1_id, user2_id):
+    friendship = await db.scalar(
+        select(Friendship.id).where(
+            or_(
+                and_(Friendship.user1_id == user1_id, Friendship.user2_id == user2_id),
+                and_(Friendship.user1_id == user2_id, Friendship.user2_id == user1_id),
+            ),
+            Friendship.status == "active",
+        ).limit(1)
+    )
+    if friendship:
         return "friends"
-    
+
     # Check for pending friend request
-    pending_request = db.query(FriendRequest).filter(
-        or_(
-            and_(FriendRequest.sender_id == user1_id, FriendRequest.receiver_id == user2_id),
-            and_(FriendRequest.sender_id == user2_id, FriendRequest.receiver_id == user1_id)
-        ),
-        FriendRequest.status == FriendRequestStatus.PENDING
-    ).first()
-    
+    pending_request = await db.scalar(
+        select(FriendRequestRecord.id).where(pending_request_between(user1_id, user2_id)).limit(1)
+    )
+
     if pending_request:
         return "pending"
-    
+
     return None
 
 
-def get_friend_requests_for_user(
-    user_id: int, db: Session, request_type: str = "all"
+async def get_friendship_statuses(
+    user_id: int, other_ids: List[int], db: AsyncSession
+) -> Dict[int, str]:
+    """Friendship status of one user against many, in two queries"""
+    if not other_ids:
+        return {}
+
+    statuses: Dict[int, str] = {}
+    pending = await db.execute(
+        select(FriendRequestRecord.sender_id, FriendRequestRecord.receiver_id).where(
+            or_(
+                and_(FriendRequestRecord.sender_id == user_id, FriendRequestRecord.receiver_id.in_(other_ids)),
+                and_(FriendRequestRecord.receiver_id == user_id, FriendRequestRecord.sender_id.in_(other_ids)),
+            ),
+            FriendRequestRecord.status == FriendRequestStatus.PENDING,
+        )
+    )
+    for sender_id, receiver_id in pending:
+        statuses[receiver_id if sender_id == user_id else sender_id] = "pending"
+
+    # Friendship wins over a pending request, as in check_friendship_status
+    friends = await db.execute(
+        select(Friendship.user1_id, Friendship.user2_id).where(
+            or_(
+                and_(Friendship.user1_id == user_id, Friendship.user2_id.in_(other_ids)),
+                and_(Friendship.user2_id == user_id, Friendship.user1_id.in_(other_ids)),
+            ),
+            Friendship.status == "active",
+        )
+    )
+    for user1_id, user2_id in friends:
+        statuses[user2_id if user1_id == user_id else user1_id] = "friends"
+
+    return statuses
+
+
+async def get_users_by_id(user_ids: set, db: AsyncSession) -> Dict[int, User]:
+    """Load users for a set of ids in one query"""
+    if not user_ids:
+        return {}
+    users = await db.scalars(select(User).where(User.id.in_(user_ids)))
+    return {user.id: user for user in users}
+
+
+async def get_friend_requests_for_user(
+    user_id: int, db: AsyncSession, request_type: str = "all"
 ) -> List[Dict]:
     """Get friend requests for a user (sent or received)"""
-    from ..models.friends import FriendRequest, FriendRequestStatus
-    
-    query = db.query(FriendRequest)
-    
+    query = select(FriendRequestRecord)
+
     if request_type == "received":
-        query = query.filter(FriendRequest.receiver_id == user_id)
+        query = query.where(FriendRequestRecord.receiver_id == user_id)
     elif request_type == "sent":
-        query = query.filter(FriendRequest.sender_id == user_id)
+        query = query.where(FriendRequestRecord.sender_id == user_id)
     else:  # all
-        query = query.filter(
-            or_(FriendRequest.sender_id == user_id, FriendRequest.receiver_id == user_id)
+        query = query.where(
+            or_(FriendRequestRecord.sender_id == user_id, FriendRequestRecord.receiver_id == user_id)
         )
-    
-    requests = query.filter(FriendRequest.status == FriendRequestStatus.PENDING).all()
-    
+
+    requests = (
+        await db.scalars(query.where(FriendRequestRecord.status == FriendRequestStatus.PENDING))
+    ).all()
+
+    # Get sender and receiver info
+    users = await get_users_by_id(
+        {req.sender_id for req in requests} | {req.receiver_id for req in requests}, db
+    )
+
     result = []
     for req in requests:
-        # Get sender and receiver info
-        sender = db.query(User).filter(User.id == req.sender_id).first()
-        receiver = db.query(User).filter(User.id == req.receiver_id).first()
-        
+        sender = users.get(req.sender_id)
+        receiver = users.get(req.receiver_id)
+
         result.append({
             "id": req.id,
             "from_user_id": req.sender_id,
@@ -169,57 +237,58 @@ def get_friend_requests_for_user(
             "from_user": get_user_public_data(sender) if sender else {},
             "to_user": get_user_public_data(receiver) if receiver else {}
         })
-    
+
     return result
 
 
-def get_user_friends(user_id: int, db: Session) -> List[Dict]:
+async def get_user_friends(user_id: int, db: AsyncSession) -> List[Dict]:
     """Get user's friends list"""
-    from ..models.friends import Friendship
-    
-    friendships = Friendship.get_friends_of_user(db, user_id)
-    
+    friendships = (
+        await db.scalars(
+            select(Friendship).where(
+                or_(Friendship.user1_id == user_id, Friendship.user2_id == user_id),
+                Friendship.status == "active",
+            )
+        )
+    ).all()
+
+    friends = await get_users_by_id(
+        {friendship.get_friend_of(user_id) for friendship in friendships}, db
+    )
+
     result = []
     for friendship in friendships:
         # Get the friend's ID
-        friend_id = friendship.get_friend_of(user_id)
-        if friend_id:
-            friend = db.query(User).filter(User.id == friend_id).first()
-            if friend:
-                friend_data = get_user_public_data(friend)
-                friend_data["friendship_since"] = friendship.created_at
-                result.append(friend_data)
-    
+        friend = friends.get(friendship.get_friend_of(user_id))
+        if friend:
+            friend_data = get_user_public_data(friend)
+            friend_data["friendship_since"] = friendship.created_at
+            result.append(friend_data)
+
     return result
 
 
-def create_friend_request(from_user_id: int, to_user_id: int, db: Session) -> Dict:
+async def create_friend_request(from_user_id: int, to_user_id: int, db: AsyncSession) -> Dict:
     """Create a new friend request"""
-    from ..models.friends import FriendRequest, FriendRequestStatus
-    
     # Check if request already exists
-    existing_request = db.query(FriendRequest).filter(
-        or_(
-            and_(FriendRequest.sender_id == from_user_id, FriendRequest.receiver_id == to_user_id),
-            and_(FriendRequest.sender_id == to_user_id, FriendRequest.receiver_id == from_user_id)
-        ),
-        FriendRequest.status == FriendRequestStatus.PENDING
-    ).first()
-    
+    existing_request = await db.scalar(
+        select(FriendRequestRecord.id).where(pending_request_between(from_user_id, to_user_id)).limit(1)
+    )
+
     if existing_request:
         raise ValueError("Friend request already exists")
-    
+
     # Create new friend request
-    new_request = FriendRequest(
+    new_request = FriendRequestRecord(
         sender_id=from_user_id,
         receiver_id=to_user_id,
         status=FriendRequestStatus.PENDING
     )
-    
+
     db.add(new_request)
-    db.commit()
-    db.refresh(new_request)
-    
+    await db.commit()
+    await db.refresh(new_request)
+
     request_data = {
         "id": new_request.id,
         "from_user_id": new_request.sender_id,
@@ -232,35 +301,32 @@ def create_friend_request(from_user_id: int, to_user_id: int, db: Session) -> Di
     return request_data
 
 
-def respond_to_friend_request(request_id: int, accept: bool, db: Session) -> bool:
+async def respond_to_friend_request(request_id: int, accept: bool, db: AsyncSession) -> bool:
     """Respond to a friend request"""
-    from ..models.friends import FriendRequest, FriendRequestStatus, Friendship
-    
     # Get the friend request
-    friend_request = db.query(FriendRequest).filter(
-        FriendRequest.id == request_id,
-        FriendRequest.status == FriendRequestStatus.PENDING
-    ).first()
-    
+    friend_request = await db.scalar(
+        select(FriendRequestRecord).where(
+            FriendRequestRecord.id == request_id,
+            FriendRequestRecord.status == FriendRequestStatus.PENDING
+        )
+    )
+
     if not friend_request:
         return False
-    
+
     if accept:
         # Accept the request
         friend_request.accept()
-        
-        # Create friendship
-        Friendship.create_friendship(
-            db=db, 
-            user1_id=friend_request.sender_id, 
-            user2_id=friend_request.receiver_id
-        )
+
+        # Create friendship (smaller ID first, as Friendship.create_friendship)
+        user1_id, user2_id = sorted((friend_request.sender_id, friend_request.receiver_id))
+        db.add(Friendship(user1_id=user1_id, user2_id=user2_id, status="active"))
     else:
         # Decline the request
         friend_request.decline()
-    
-    db.commit()
-    
+
+    await db.commit()
+
     logger.info(
         f"✅ Friend request {request_id} {'accepted' if accept else 'declined'}"
     )
@@ -271,11 +337,12 @@ def respond_to_friend_request(request_id: int, accept: bool, db: Session) -> boo
 
 
 @router.get("/search-users", response_model=List[UserSearchResult])
+@sql_budget(max_queries=5)
 async def search_users(
     q: str = Query(..., min_length=2, description="Search query"),
     limit: int = Query(10, le=50),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """🔍 Search for users by username or full name"""
     try:
@@ -283,19 +350,25 @@ async def search_users(
         search_term = f"%{q.lower()}%"
 
         users = (
-            db.query(User)
-            .filter(
-                and_(
-                    User.id != current_user.id,  # Exclude current user
-                    User.is_active == True,
-                    or_(
-                        User.username.ilike(search_term),
-                        User.full_name.ilike(search_term),
-                    ),
+            await db.scalars(
+                select(User)
+                .where(
+                    and_(
+                        User.id != current_user.id,  # Exclude current user
+                        User.is_active == True,
+                        or_(
+                            User.username.ilike(search_term),
+                            User.full_name.ilike(search_term),
+                        ),
+                    )
                 )
+                .limit(limit)
             )
-            .limit(limit)
-            .all()
+        ).all()
+
+        # One lookup for the whole page instead of two queries per result
+        statuses = await get_friendship_statuses(
+            current_user.id, [user.id for user in users], db
         )
 
         results = []
@@ -305,7 +378,7 @@ async def search_users(
                 if user.games_played > 0
                 else 0
             )
-            friendship_status = check_friendship_status(current_user.id, user.id, db)
+            friendship_status = statuses.get(user.id)
 
             results.append(
                 UserSearchResult(
@@ -321,7 +394,8 @@ async def search_users(
                 )
             )
 
-        return results
+        # Rows were validated on construction; skip response_model re-validation
+        return FastJSONResponse(content=results)
 
     except Exception as e:
         logger.error(f"❌ User search error: {e}")
@@ -333,13 +407,13 @@ async def search_users(
 @router.post("/friend-request/{user_id}")
 async def send_friend_request(
     user_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """👋 Send a friend request to another user"""
     try:
         # Validate target user exists
-        target_user = db.query(User).filter(User.id == user_id).first()
+        target_user = await db.get(User, user_id)
         if not target_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -352,7 +426,7 @@ async def send_friend_request(
             )
 
         # Check if friendship already exists
-        friendship_status = check_friendship_status(current_user.id, target_user.id, db)
+        friendship_status = await check_friendship_status(current_user.id, target_user.id, db)
         if friendship_status:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -360,7 +434,7 @@ async def send_friend_request(
             )
 
         # Create friend request
-        request_data = create_friend_request(current_user.id, target_user.id, db)
+        request_data = await create_friend_request(current_user.id, target_user.id, db)
 
         return {
             "success": True,
@@ -382,13 +456,13 @@ async def send_friend_request(
 async def respond_friend_request(
     request_id: int,
     response_data: FriendRequestResponse,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """✅ Respond to a friend request (accept/decline)"""
     try:
         # Respond to friend request
-        success = respond_to_friend_request(request_id, response_data.accept, db)
+        success = await respond_to_friend_request(request_id, response_data.accept, db)
 
         if not success:
             raise HTTPException(
@@ -413,14 +487,15 @@ async def respond_friend_request(
 
 
 @router.get("/friend-requests", response_model=List[Dict])
+@sql_budget(max_queries=5)
 async def get_friend_requests(
     type: str = Query("received", pattern="^(sent|received|all)$"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """📨 Get friend requests (sent or received)"""
     try:
-        requests = get_friend_requests_for_user(current_user.id, db, type)
+        requests = await get_friend_requests_for_user(current_user.id, db, type)
         return requests
 
     except Exception as e:
@@ -432,12 +507,14 @@ async def get_friend_requests(
 
 
 @router.get("/friends", response_model=List[Friend])
+@sql_budget(max_queries=4)
 async def get_friends(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """👥 Get user's friends list"""
     try:
-        friends_data = get_user_friends(current_user.id, db)
+        friends_data = await get_user_friends(current_user.id, db)
 
         friends = []
         for friend_data in friends_data:
@@ -453,7 +530,7 @@ async def get_friends(
 
             friends.append(
                 Friend(
-                    user_id=friend_data["user_id"],
+                    user_id=friend_data["id"],
                     username=friend_data["username"],
                     full_name=friend_data["full_name"],
                     level=friend_data["level"],
@@ -478,8 +555,8 @@ async def get_friends(
 @router.delete("/friends/{user_id}")
 async def remove_friend(
     user_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """💔 Remove a friend"""
     try:
@@ -500,15 +577,13 @@ async def remove_friend(
 @router.post("/challenge")
 async def send_challenge(
     challenge_data: ChallengeCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """⚔️ Send a game challenge to another user"""
     try:
         # Validate target user
-        target_user = (
-            db.query(User).filter(User.id == challenge_data.challenged_user_id).first()
-        )
+        target_user = await db.get(User, challenge_data.challenged_user_id)
         if not target_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -558,8 +633,8 @@ async def send_challenge(
 @router.get("/challenges")
 async def get_challenges(
     type: str = Query("received", pattern="^(sent|received|all)$"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """⚔️ Get challenges (sent or received)"""
     try:
@@ -579,8 +654,8 @@ async def get_challenges(
 async def respond_challenge(
     challenge_id: int,
     response_data: ChallengeResponse,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """✅ Respond to a challenge (accept/decline)"""
     try:
@@ -606,13 +681,13 @@ async def respond_challenge(
 @router.post("/block/{user_id}")
 async def block_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """🚫 Block a user"""
     try:
         # Validate target user
-        target_user = db.query(User).filter(User.id == user_id).first()
+        target_user = await db.get(User, user_id)
         if not target_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -644,7 +719,8 @@ async def block_user(
 
 @router.get("/stats")
 async def get_social_stats(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """📊 Get user's social statistics"""
     try:
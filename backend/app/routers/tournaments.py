@@ -1,7 +1,7 @@
 # === backend/app/routers/tournaments.py ===
 # TELJES JAVÍTOTT TOURNAMENTS ROUTER - List import hozzáadva
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Response, Header
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional  # ✅ List import hozzáadva
 from datetime import datetime, timedelta
@@ -9,11 +9,20 @@ from pydantic import BaseModel, Field, validator, ConfigDict
 from enum import Enum
 import uuid
 import logging
+import orjson
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.user import User
+from ..models.tournament import TournamentFormat as StoredTournamentFormat
+from ..models.tournament import TournamentStatus as StoredTournamentStatus
+from ..models.tournament import TournamentType as StoredTournamentType
+from ..models.tournament import Tournament as StoredTournament, TournamentMatch
 from ..routers.auth import get_current_user
 from ..core.api_response import ResponseBuilder
+from ..services.tournament_service import BracketService, TournamentLifecycleManager, TournamentService
+from ..services.tournament_registration import RegistrationError
+from ..services.bulk_cancellation import BulkCancellationService
+from ..services.tournament_live import tournament_live
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -103,9 +112,9 @@ class Tournament(BaseModel):
     tournament_id: str
     name: str
     description: Optional[str]
-    tournament_type: TournamentType
+    tournament_type: str
     game_type: str
-    format: TournamentFormat
+    format: str
     status: TournamentStatus
     location_id: int
     location_name: str
@@ -164,8 +173,49 @@ class TournamentParticipant(BaseModel):
     performance_rating: float = 0.0
 
 
+class MatchResultSubmit(BaseModel):
+    winner_id: int
+    player1_score: int = Field(..., ge=0)
+    player2_score: int = Field(..., ge=0)
+
+
 # === HELPER FUNCTIONS ===
 
+# API status filter -> stored statuses (drafts are never listed)
+STATUS_FILTERS = {
+    TournamentStatus.REGISTRATION: [StoredTournamentStatus.REGISTRATION],
+    TournamentStatus.ONGOING: [StoredTournamentStatus.REGISTRATION_CLOSED, StoredTournamentStatus.IN_PROGRESS],
+    TournamentStatus.COMPLETED: [StoredTournamentStatus.COMPLETED],
+    TournamentStatus.CANCELLED: [StoredTournamentStatus.CANCELLED],
+}
+API_STATUS = {stored: api for api, stored_statuses in STATUS_FILTERS.items() for stored in stored_statuses}
+# API tournament types describe the play style; the format carries the bracket shape
+STORED_TYPES = {
+    TournamentType.KNOCKOUT: StoredTournamentType.SPECIAL_EVENT,
+    TournamentType.LEAGUE: StoredTournamentType.LEAGUE_SEASON,
+    TournamentType.SWISS: StoredTournamentType.SPECIAL_EVENT,
+    TournamentType.ROUND_ROBIN: StoredTournamentType.SPECIAL_EVENT,
+}
+
+
+def tournament_from_summary(summary: Dict) -> Tournament:
+    """API schema for a TournamentService listing summary"""
+    return Tournament(
+        **{
+            **summary,
+            "tournament_type": getattr(summary["tournament_type"], "value", summary["tournament_type"]),
+            "format": getattr(summary["format"], "value", summary["format"]),
+            "status": API_STATUS.get(summary["status"], TournamentStatus.REGISTRATION),
+            "location_name": summary["location_name"] or "",
+            "organizer_username": summary["organizer_username"] or "",
+            "current_participants": summary["current_participants"] or 0,
+            "entry_fee_credits": summary["entry_fee_credits"] or 0,
+            "prize_pool_credits": summary["prize_pool_credits"] or 0,
+            "created_at": summary["created_at"] or summary["start_time"],
+        }
+    )
+
+
 
 def generate_tournament_id() -> str:
     """Generate unique tournament ID"""
@@ -231,118 +281,32 @@ def can_user_register(tournament_data: Dict, user: User) -> tuple[bool, str]:
     return True, "Can register"
 
 
-def create_mock_tournament_data(
-    tournament_create: TournamentCreate, organizer: User
-) -> Dict:
-    """Create mock tournament data (in real implementation, this would be stored in database)"""
-    tournament_id = generate_tournament_id()
-
-    return {
-        "id": 1,  # Would be auto-generated by database
-        "tournament_id": tournament_id,
-        "name": tournament_create.name,
-        "description": tournament_create.description,
-        "tournament_type": tournament_create.tournament_type,
-        "game_type": tournament_create.game_type,
-        "format": tournament_create.format,
-        "status": TournamentStatus.REGISTRATION,
-        "location_id": tournament_create.location_id,
-        "location_name": "Mock Location",  # Would be fetched from database
-        "start_time": tournament_create.start_time,
-        "end_time": tournament_create.end_time,
-        "registration_deadline": tournament_create.registration_deadline,
-        "min_participants": tournament_create.min_participants,
-        "max_participants": tournament_create.max_participants,
-        "current_participants": 0,
-        "entry_fee_credits": tournament_create.entry_fee_credits,
-        "prize_pool_credits": 0,
-        "min_level": tournament_create.min_level,
-        "max_level": tournament_create.max_level,
-        "organizer_id": organizer.id,
-        "organizer_username": organizer.username,
-        "winner_id": None,
-        "winner_username": None,
-        "is_registration_open": True,
-        "is_full": False,
-        "can_start": False,
-        "created_at": datetime.utcnow(),
-        "participants": [],
-        "rules": tournament_create.rules,
-    }
-
-
 # === TOURNAMENT ENDPOINTS ===
 
 
 @router.get("/", response_model=List[Tournament])
 async def get_tournaments(
-    status: Optional[TournamentStatus] = Query(None),
+    response: Response,
+    status_filter: Optional[TournamentStatus] = Query(None, alias="status"),
     game_type: Optional[str] = Query(None),
     location_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """🏆 Get all tournaments with optional filtering"""
     try:
-        # In real implementation, this would query the tournaments table
-        # For now, return mock data
-        mock_tournaments = [
-            {
-                "id": 1,
-                "tournament_id": "tournament_1755270000_abc123",
-                "name": "Weekly Championship",
-                "description": "Competitive weekly tournament",
-                "tournament_type": TournamentType.KNOCKOUT,
-                "game_type": "GAME1",
-                "format": TournamentFormat.SINGLE_ELIMINATION,
-                "status": TournamentStatus.REGISTRATION,
-                "location_id": 1,
-                "location_name": "Central Sports Complex",
-                "start_time": datetime.utcnow() + timedelta(days=2),
-                "end_time": datetime.utcnow() + timedelta(days=2, hours=4),
-                "registration_deadline": datetime.utcnow() + timedelta(days=1),
-                "min_participants": 4,
-                "max_participants": 16,
-                "current_participants": 3,
-                "entry_fee_credits": 10,
-                "prize_pool_credits": 30,
-                "min_level": 1,
-                "max_level": 50,
-                "organizer_id": 1,
-                "organizer_username": "admin",
-                "winner_id": None,
-                "winner_username": None,
-                "is_registration_open": True,
-                "is_full": False,
-                "can_start": False,
-                "created_at": datetime.utcnow() - timedelta(days=3),
-            }
-        ]
-
-        # Apply filters
-        filtered_tournaments = mock_tournaments
-
-        if status:
-            filtered_tournaments = [
-                t for t in filtered_tournaments if t["status"] == status
-            ]
-
-        if game_type:
-            filtered_tournaments = [
-                t for t in filtered_tournaments if t["game_type"] == game_type
-            ]
-
-        if location_id:
-            filtered_tournaments = [
-                t for t in filtered_tournaments if t["location_id"] == location_id
-            ]
-
-        # Apply pagination
-        paginated_tournaments = filtered_tournaments[skip : skip + limit]
-
-        return [Tournament(**t) for t in paginated_tournaments]
-
+        summaries, next_cursor = TournamentService(db).get_tournaments(
+            status=STATUS_FILTERS[status_filter] if status_filter else None,
+            game_type=game_type,
+            location_id=location_id,
+            limit=limit,
+            offset=skip,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Get tournaments error: {e}")
         raise HTTPException(
@@ -350,93 +314,48 @@ async def get_tournaments(
             detail="Failed to retrieve tournaments",
         )
 
+    # Keyset paging: the next page starts after the last row of this one
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [tournament_from_summary(summary) for summary in summaries]
+
+
+def live_headers(etag: str) -> Dict[str, str]:
+    """Pollers must revalidate every time; unchanged state costs them a 304"""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
 
 @router.get("/{tournament_id}")
 async def get_tournament_details(
     tournament_id: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
-    """🔍 Get detailed tournament information"""
+    """🔍 Tournament details from the live state snapshot (304 while If-None-Match is current)"""
+    # Rebuilds read the primary: a lagging replica could cache state older than its version
     try:
-        # Create simplified tournament details response directly as dict
-        tournament_details = {
-            "tournament": {
-                "id": tournament_id,
-                "tournament_id": f"tournament_{tournament_id}_details",
-                "name": "Weekly Championship",
-                "description": "Competitive weekly tournament for skilled players",
-                "tournament_type": "knockout",
-                "game_type": "GAME1",
-                "format": "single_elimination",
-                "status": "registration",
-                "location_id": 1,
-                "location_name": "Central Sports Complex",
-                "start_time": (datetime.utcnow() + timedelta(days=2)).isoformat(),
-                "end_time": (datetime.utcnow() + timedelta(days=2, hours=4)).isoformat(),
-                "registration_deadline": (datetime.utcnow() + timedelta(days=1)).isoformat(),
-                "min_participants": 4,
-                "max_participants": 16,
-                "current_participants": 3,
-                "entry_fee_credits": 10,
-                "prize_pool_credits": 30,
-                "min_level": 1,
-                "max_level": 50,
-                "organizer_id": 1,
-                "organizer_username": "admin",
-                "winner_id": None,
-                "winner_username": None,
-                "is_registration_open": True,
-                "is_full": False,
-                "can_start": False,
-                "created_at": (datetime.utcnow() - timedelta(days=3)).isoformat()
-            },
-            "participants": [
-                {
-                    "user_id": 1,
-                    "username": "player1",
-                    "full_name": "Player One",
-                    "level": 25,
-                    "registration_time": (datetime.utcnow() - timedelta(hours=24)).isoformat(),
-                },
-                {
-                    "user_id": 2,
-                    "username": "player2",
-                    "full_name": "Player Two",
-                    "level": 30,
-                    "registration_time": (datetime.utcnow() - timedelta(hours=12)).isoformat(),
-                }
-            ],
-            "bracket": None,
-            "current_round": 0,
-            "total_rounds": 4,
-            "user_participation": None,
-            "can_register": False,
-            "can_withdraw": False,
-            "upcoming_matches": [],
-            "completed_matches": [],
-            "tournament_rules": {
-                "format": "Single Elimination",
-                "match_duration": "30 minutes",
-                "late_policy": "10 minutes grace period"
-            }
-        }
-        
-        return ResponseBuilder.success(
-            data=tournament_details,
-            message="Tournament details retrieved successfully"
-        )
-
-    except HTTPException:
-        raise
+        state = tournament_live.get(db, tournament_id, "details", if_none_match)
     except Exception as e:
         logger.error(f"❌ Get tournament details error: {e}")
-        import traceback
-        logger.error(f"Full traceback: {traceback.format_exc()}")
         return ResponseBuilder.error(
             error_code="TOURNAMENT_DETAILS_ERROR",
             error_message=f"Failed to retrieve tournament details: {str(e)}",
             status_code=500
         )
+    if state is None:
+        return ResponseBuilder.error(
+            error_code="TOURNAMENT_NOT_FOUND", error_message="Tournament not found", status_code=404
+        )
+
+    etag, body = state
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=live_headers(etag))
+    response = ResponseBuilder.success(
+        data=orjson.Fragment(body),
+        message="Tournament details retrieved successfully"
+    )
+    response.headers.update(live_headers(etag))
+    return response
 
 
 @router.post("/", response_model=Tournament)
@@ -465,14 +384,23 @@ async def create_tournament(
                 detail="Tournament must start at least 24 hours from now",
             )
 
-        # Create tournament (mock implementation)
-        tournament_dict = create_mock_tournament_data(tournament_data, current_user)
+        # Stored through the service, which also drops the cached listing pages
+        data = tournament_data.model_dump()
+        data["tournament_type"] = STORED_TYPES[tournament_data.tournament_type]
+        data["format"] = StoredTournamentFormat(tournament_data.format.value)
+        data["settings"] = data.pop("rules") or {}
+        service = TournamentService(db)
+        try:
+            tournament = service.create_tournament(data, current_user.id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
         logger.info(
-            f"✅ Tournament created: {tournament_dict['name']} by user {current_user.id}"
+            f"✅ Tournament created: {tournament.name} by user {current_user.id}"
         )
 
-        return Tournament(**tournament_dict)
+        summary = TournamentService.summary_query(db).filter(StoredTournament.id == tournament.id).one()
+        return tournament_from_summary(TournamentService._summary(summary))
 
     except HTTPException:
         raise
@@ -487,51 +415,31 @@ async def create_tournament(
 @router.post("/{tournament_id}/register")
 async def register_for_tournament(
     tournament_id: int,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """👥 Register for a tournament"""
+    """👥 Register for a tournament (retries with the same Idempotency-Key replay the first result)"""
     try:
-        # In real implementation, fetch tournament from database
-        # For now, create mock tournament data
-        mock_tournament = {
-            "id": tournament_id,
-            "name": "Weekly Championship",
-            "registration_deadline": datetime.utcnow() + timedelta(days=1),
-            "start_time": datetime.utcnow() + timedelta(days=2),
-            "current_participants": 3,
-            "max_participants": 16,
-            "min_level": 1,
-            "max_level": 50,
-            "entry_fee_credits": 10,
-            "status": TournamentStatus.REGISTRATION,
-        }
-
-        # Check if user can register
-        can_register, reason = can_user_register(mock_tournament, current_user)
-        if not can_register:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=reason)
-
-        # Deduct entry fee
-        current_user.credits -= mock_tournament["entry_fee_credits"]
-
-        # Register user (in real implementation, add to participants table)
-        db.commit()
+        result = TournamentService(db).register_participant(tournament_id, current_user.id, idempotency_key)
 
         logger.info(
             f"✅ User {current_user.id} registered for tournament {tournament_id}"
+            + (" (replayed)" if result.get("replayed") else "")
         )
 
         return {
             "success": True,
             "message": f"Successfully registered for tournament",
             "tournament_id": tournament_id,
-            "entry_fee_charged": mock_tournament["entry_fee_credits"],
-            "remaining_credits": current_user.credits,
+            "entry_fee_charged": result["amount"],
+            "remaining_credits": result["credits"],
+            "current_participants": result["current_participants"],
+            "replayed": result.get("replayed", False),
         }
 
-    except HTTPException:
-        raise
+    except RegistrationError as e:
+        raise HTTPException(status_code=e.status_code, detail={"code": e.code, "message": str(e)})
     except Exception as e:
         db.rollback()
         logger.error(f"❌ Tournament registration error: {e}")
@@ -549,38 +457,19 @@ async def withdraw_from_tournament(
 ):
     """🚪 Withdraw from a tournament"""
     try:
-        # In real implementation, check if user is registered and tournament allows withdrawal
-
-        # Mock tournament data
-        mock_tournament = {
-            "id": tournament_id,
-            "name": "Weekly Championship",
-            "registration_deadline": datetime.utcnow() + timedelta(days=1),
-            "start_time": datetime.utcnow() + timedelta(days=2),
-            "entry_fee_credits": 10,
-            "status": TournamentStatus.REGISTRATION,
-        }
+        service = TournamentService(db)
+        tournament = service.get_tournament(tournament_id)
+        if not tournament:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tournament not found")
 
         # Check if withdrawal is allowed
-        now = datetime.utcnow()
-        if now >= mock_tournament["registration_deadline"]:
+        if datetime.utcnow() >= tournament.registration_deadline:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot withdraw after registration deadline",
             )
 
-        if mock_tournament["status"] != TournamentStatus.REGISTRATION:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot withdraw from tournament in current status",
-            )
-
-        # Refund entry fee
-        refund_amount = mock_tournament["entry_fee_credits"]
-        current_user.credits += refund_amount
-
-        # Remove user from tournament (in real implementation)
-        db.commit()
+        result = service.withdraw_participant(tournament_id, current_user.id)
 
         logger.info(
             f"✅ User {current_user.id} withdrew from tournament {tournament_id}"
@@ -590,12 +479,14 @@ async def withdraw_from_tournament(
             "success": True,
             "message": "Successfully withdrew from tournament",
             "tournament_id": tournament_id,
-            "refund_amount": refund_amount,
-            "new_balance": current_user.credits,
+            "refund_amount": result["amount"],
+            "new_balance": result["credits"],
         }
 
     except HTTPException:
         raise
+    except RegistrationError as e:
+        raise HTTPException(status_code=e.status_code, detail={"code": e.code, "message": str(e)})
     except Exception as e:
         db.rollback()
         logger.error(f"❌ Tournament withdrawal error: {e}")
@@ -605,6 +496,82 @@ async def withdraw_from_tournament(
         )
 
 
+@router.get("/{tournament_id}/bracket")
+async def get_tournament_bracket(
+    tournament_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """🗂️ Tournament bracket as a compact match table (see `fields` for the row layout), from the live state"""
+    state = tournament_live.get(db, tournament_id, "bracket", if_none_match)
+    if state is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tournament not found")
+
+    etag, body = state
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=live_headers(etag))
+    return Response(content=body, media_type="application/json", headers=live_headers(etag))
+
+
+@router.post("/{tournament_id}/bracket")
+async def generate_tournament_bracket(
+    tournament_id: int,
+    randomize: bool = Query(False, description="Shuffle instead of seeding by ranking and registration order"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """🗂️ Generate the bracket and schedule the first matches (admin only)"""
+    if current_user.user_type not in ["admin", "moderator"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+
+    try:
+        result = BracketService(db).generate_bracket(tournament_id, randomize=randomize)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Bracket generation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate bracket",
+        )
+
+    return {"success": True, "tournament_id": tournament_id, **result}
+
+
+@router.post("/matches/{match_id}/result")
+async def submit_match_result(
+    match_id: int,
+    result: MatchResultSubmit,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """🎯 Submit a match result (a player in the match or an admin) and advance the bracket"""
+    players = (
+        db.query(TournamentMatch.player1_id, TournamentMatch.player2_id)
+        .filter(TournamentMatch.id == match_id)
+        .first()
+    )
+    if players is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found")
+    if current_user.id not in players and current_user.user_type not in ["admin", "moderator"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Only the match players can submit results"
+        )
+
+    try:
+        TournamentLifecycleManager(db).submit_match_result(
+            match_id, result.winner_id, result.player1_score, result.player2_score, current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    logger.info(f"✅ Result submitted for match {match_id} by user {current_user.id}")
+    return {"success": True, "match_id": match_id, "winner_id": result.winner_id}
+
+
 @router.get("/my-tournaments")
 async def get_user_tournaments(
     status_filter: Optional[TournamentStatus] = Query(None),
@@ -686,6 +653,36 @@ async def update_tournament_status(
         )
 
 
+@router.post("/{tournament_id}/cancel")
+async def cancel_tournament(
+    tournament_id: int,
+    reason: str = Query(..., min_length=3, max_length=200),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """🚫 Cancel a tournament and refund every participant (admin only, safe to repeat)"""
+    if current_user.user_type not in ["admin", "moderator"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+
+    try:
+        result = BulkCancellationService(db).cancel_tournament(tournament_id, reason)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Tournament cancellation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to cancel tournament",
+        )
+
+    await BulkCancellationService.notify(result)
+    logger.info(f"✅ Tournament {tournament_id} cancelled by user {current_user.id}")
+    return {"success": True, **{key: value for key, value in result.items() if key != "notifications"}}
+
+
 # === HEALTH CHECK ===
 
 
@@ -10,9 +10,16 @@ from pydantic import BaseModel
 import random
 import logging
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.user import User
 from ..models.location import Location
+from ..services.weather_cache import weather_cache
+from ..services.weather_service import (
+    WeatherAnalyticsService,
+    WeatherAPIService,
+    get_weather_api_service,
+    weather_api_key,
+)
 
 # Conditional imports - csak akkor importáljuk, ha léteznek
 try:
@@ -33,6 +40,8 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Weather"], prefix="/api/weather")
 
+MAX_BATCH_LOCATIONS = 500
+
 # === PYDANTIC MODELS ===
 
 
@@ -132,6 +141,100 @@ def generate_mock_weather(location_id: int) -> Dict[str, Any]:
     }
 
 
+CONDITION_EMOJI = {
+    "clear": "☀️",
+    "partly_cloudy": "⛅",
+    "cloudy": "☁️",
+    "overcast": "☁️",
+    "light_rain": "🌦️",
+    "rain": "🌧️",
+    "heavy_rain": "🌧️",
+    "snow": "❄️",
+    "fog": "🌫️",
+    "storm": "⛈️",
+}
+
+
+async def mock_current_payload(lat: float, lon: float) -> Dict[str, Any]:
+    """OpenWeather-shaped current reading used when no API key is configured"""
+    return {
+        "coord": {"lat": lat, "lon": lon},
+        "weather": [{"main": random.choice(["Clear", "Clouds", "Rain", "Mist"]), "description": "mock"}],
+        "main": {
+            "temp": round(random.uniform(-5, 25), 1),
+            "feels_like": round(random.uniform(-8, 27), 1),
+            "humidity": random.randint(30, 90),
+        },
+        "wind": {"speed": round(random.uniform(0, 15), 1), "deg": random.randint(0, 359)},
+        "visibility": random.randint(2000, 15000),
+        "dt": int(datetime.utcnow().timestamp()),
+    }
+
+
+async def mock_forecast_payload(lat: float, lon: float) -> Dict[str, Any]:
+    """OpenWeather-shaped 3-hourly forecast used when no API key is configured"""
+    now = int(datetime.utcnow().timestamp())
+    return {
+        "list": [
+            {
+                "dt": now + step * 10800,
+                "main": {"temp": round(15 + random.uniform(-10, 15), 1)},
+                "weather": [{"main": random.choice(["Clear", "Clouds", "Rain"])}],
+                "wind": {"speed": round(random.uniform(0, 12), 1)},
+                "pop": round(random.uniform(0, 0.8), 2),
+            }
+            for step in range(1, 9)
+        ]
+    }
+
+
+async def _provider_fetchers():
+    """(current, forecast) fetchers: the provider when configured, otherwise mock data"""
+    api_service = await get_weather_api_service()
+    if api_service is None:
+        return mock_current_payload, mock_forecast_payload
+    return (
+        lambda lat, lon: api_service._request_json("weather", lat, lon),
+        lambda lat, lon: api_service._request_json("forecast", lat, lon),
+    )
+
+
+def format_current_weather(location_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """WeatherResponse fields from an OpenWeather current reading (wind in m/s)"""
+    main = payload.get("main", {})
+    weather = payload.get("weather", [{}])[0]
+    wind = payload.get("wind", {})
+    condition = WeatherAPIService._map_weather_condition(weather.get("main", "")).value
+    severity = WeatherAPIService._calculate_severity(main, weather, wind).value
+    observed = payload.get("dt")
+
+    return {
+        "location_id": location_id,
+        "temperature": round(main.get("temp", 0), 1),
+        "feels_like": round(main.get("feels_like", main.get("temp", 0)), 1),
+        "condition": condition,
+        "description": weather.get("description") or condition.replace("_", " ").title(),
+        "emoji": CONDITION_EMOJI.get(condition, "🌤️"),
+        "humidity": int(main.get("humidity", 0)),
+        "wind_speed": round(wind.get("speed", 0), 1),
+        "visibility": round(payload.get("visibility", 10000) / 1000, 1),
+        "severity": severity,
+        "is_game_suitable": severity in ("low", "moderate"),
+        "updated_at": (datetime.utcfromtimestamp(observed) if observed else datetime.utcnow()).isoformat(),
+    }
+
+
+async def get_location_weather(location: Location) -> Dict[str, Any]:
+    """Current weather for a location from the shared geohash cache"""
+    fetch_current, _ = await _provider_fetchers()
+    try:
+        payload = await weather_cache.get("current", location.latitude, location.longitude, fetch_current)
+    except Exception as e:
+        logger.error(f"Weather lookup failed for location {location.id}: {e}")
+        raise HTTPException(status_code=503, detail="Weather data temporarily unavailable")
+    return format_current_weather(location.id, payload)
+
+
 def determine_game_suitability(
     weather: Dict[str, Any], game_type: str
 ) -> Dict[str, Any]:
@@ -215,9 +318,10 @@ async def weather_system_health():
             "forecasts": "active",
             "game_suitability": "active",
             "alerts": "active",
-            "analytics": "mock_data",
+            "analytics": "active",
         },
-        "data_source": "mock_weather_service",
+        "data_source": "openweathermap" if weather_api_key() else "mock_weather_service",
+        "cache": weather_cache.get_stats(),
         "auth_available": AUTH_AVAILABLE,
     }
 
@@ -231,8 +335,7 @@ async def get_current_weather(location_id: int, db: Session = Depends(get_db)):
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
 
-    # Generate mock weather
-    weather_data = generate_mock_weather(location_id)
+    weather_data = await get_location_weather(location)
 
     return WeatherResponse(**weather_data)
 
@@ -306,7 +409,7 @@ async def check_game_suitability(
         )
 
     # Get current weather
-    current_weather = generate_mock_weather(location_id)
+    current_weather = await get_location_weather(location)
 
     # Determine suitability
     suitability_result = determine_game_suitability(current_weather, game_type)
@@ -377,28 +480,18 @@ async def update_user_weather_preferences(
 
 @router.get("/analytics/summary")
 async def get_weather_analytics_summary(
+    days: int = Query(30, ge=1, le=366),
     current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_read_db),
 ):
     """📊 Get weather impact analytics summary"""
 
+    end_date = datetime.utcnow()
+    report = WeatherAnalyticsService(db).get_weather_impact_report(end_date - timedelta(days=days), end_date)
     return {
-        "report_period": "last_30_days",
-        "total_weather_checks": random.randint(1000, 5000),
-        "game_cancellations": {
-            "weather_related": random.randint(50, 200),
-            "percentage": random.uniform(5, 15),
-        },
-        "most_affected_locations": [
-            {"location_id": 1, "cancellations": random.randint(10, 50)},
-            {"location_id": 2, "cancellations": random.randint(5, 30)},
-            {"location_id": 3, "cancellations": random.randint(3, 20)},
-        ],
-        "weather_patterns": {
-            "clear_days": random.randint(15, 25),
-            "rainy_days": random.randint(3, 8),
-            "windy_days": random.randint(5, 12),
-        },
-        "generated_at": datetime.now().isoformat(),
+        "report_period": f"last_{days}_days",
+        **report,
+        "generated_at": end_date.isoformat(),
     }
 
 
@@ -406,9 +499,10 @@ async def get_weather_analytics_summary(
 async def refresh_weather_cache(current_user: User = Depends(get_current_admin)):
     """🔄 Refresh weather data cache (Admin only)"""
 
+    # Drops this instance's copies; shared entries expire with their time bucket
     return {
         "message": "Weather cache refreshed successfully",
-        "cache_entries": random.randint(10, 50),
+        "cache_entries": weather_cache.clear_local(),
         "last_refresh": datetime.now().isoformat(),
         "next_refresh": (datetime.now() + timedelta(minutes=30)).isoformat(),
     }
@@ -419,39 +513,59 @@ async def refresh_weather_cache(current_user: User = Depends(get_current_admin))
 
 @router.get("/batch/multiple-locations")
 async def get_weather_for_multiple_locations(
-    location_ids: List[int] = Query(...), include_forecast: bool = Query(False)
+    location_ids: List[int] = Query(...),
+    include_forecast: bool = Query(False),
+    db: Session = Depends(get_db),
 ):
     """🗺️ Get weather data for multiple locations at once"""
 
-    if len(location_ids) > 10:
+    location_ids = list(dict.fromkeys(location_ids))
+    if len(location_ids) > MAX_BATCH_LOCATIONS:
         raise HTTPException(
-            status_code=400, detail="Maximum 10 locations allowed per batch request"
+            status_code=400,
+            detail=f"Maximum {MAX_BATCH_LOCATIONS} locations allowed per batch request",
         )
 
-    results = []
+    coordinates = {
+        location_id: (latitude, longitude)
+        for location_id, latitude, longitude in db.query(
+            Location.id, Location.latitude, Location.longitude
+        ).filter(Location.id.in_(location_ids))
+    }
 
-    for location_id in location_ids:
-        weather_data = generate_mock_weather(location_id)
+    # Venues sharing a geohash cell share one entry: one MGET, then one fetch per missing cell
+    fetch_current, fetch_forecast = await _provider_fetchers()
+    current = await weather_cache.get_many("current", coordinates, fetch_current)
+    forecasts = (
+        await weather_cache.get_many("forecast", coordinates, fetch_forecast)
+        if include_forecast
+        else {}
+    )
 
-        location_result = {"location_id": location_id, "current_weather": weather_data}
+    results = []
+    for location_id in location_ids:
+        if location_id not in coordinates:
+            results.append({"location_id": location_id, "error": "Location not found"})
+            continue
+        payload = current.get(location_id)
+        location_result = {
+            "location_id": location_id,
+            "current_weather": format_current_weather(location_id, payload) if payload else None,
+        }
 
         if include_forecast:
-            # Generate short forecast
-            forecast_items = []
-            for hour in range(6):  # 6-hour forecast
-                forecast_time = datetime.now() + timedelta(hours=hour + 1)
-                forecast_items.append(
-                    {
-                        "datetime": forecast_time.isoformat(),
-                        "temperature": weather_data["temperature"]
-                        + random.uniform(-3, 3),
-                        "condition": random.choice(
-                            ["clear", "partly_cloudy", "cloudy"]
-                        ),
-                    }
-                )
-
-            location_result["forecast"] = forecast_items
+            # Next 6 hours of 3-hourly steps
+            forecast = forecasts.get(location_id) or {}
+            location_result["forecast"] = [
+                {
+                    "datetime": datetime.utcfromtimestamp(item["dt"]).isoformat(),
+                    "temperature": item.get("main", {}).get("temp"),
+                    "condition": WeatherAPIService._map_weather_condition(
+                        item.get("weather", [{}])[0].get("main", "")
+                    ).value,
+                }
+                for item in forecast.get("list", [])[:2]
+            ]
 
         results.append(location_result)
 
@@ -2,22 +2,29 @@
 """
 LFA Legacy GO - Services Package
 Business logic and external service integrations
-"""
 
-from .weather_service import WeatherService, WeatherAPIService, WeatherAnalyticsService
-from .booking_service import EnhancedBookingService
+Exports resolve on first access, so importing one service module does not
+import every other service (and its client libraries) with it.
+"""
 
-# === NEW: Game Results Services ===
-from .game_result_service import GameResultService, LeaderboardService
+import importlib
 
-__all__ = [
+_EXPORTS = {
     # Weather services
-    "WeatherService",
-    "WeatherAPIService",
-    "WeatherAnalyticsService",
+    "WeatherService": "weather_service",
+    "WeatherAPIService": "weather_service",
+    "WeatherAnalyticsService": "weather_service",
     # Booking services
-    "EnhancedBookingService",
+    "EnhancedBookingService": "booking_service",
     # === NEW: Game Results Services ===
-    "GameResultService",
-    "LeaderboardService",
-]
+    "GameResultService": "game_result_service",
+    "LeaderboardService": "game_result_service",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
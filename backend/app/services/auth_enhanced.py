@@ -3,11 +3,9 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-import secrets
-import hashlib
 from ..models.user import User
 from ..database import SessionLocal
-from ..cache_redis import redis_manager
+from ..core.token_store import SessionGrant, token_store
 import logging
 import os
 
@@ -32,40 +30,36 @@ class EnhancedAuthService:
         })
         return jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
     
-    def create_refresh_token(self, user_id: int) -> str:
-        """Create long-lived refresh token"""
-        jti = secrets.token_urlsafe(32)  # Unique token ID
-        expire = datetime.utcnow() + timedelta(days=self.REFRESH_TOKEN_EXPIRE_DAYS)
-        
+    def create_refresh_token(self, session: SessionGrant) -> str:
+        """Create long-lived refresh token for a session's current jti"""
         token_data = {
-            "sub": str(user_id),
-            "exp": expire,
+            "sub": session.user_id,
+            "exp": datetime.utcfromtimestamp(session.expires_at),
             "iat": datetime.utcnow(),
             "type": "refresh",
-            "jti": jti
+            "sid": session.session_id,
+            "gen": session.generation,
+            "jti": session.jti
         }
         
-        refresh_token = jwt.encode(token_data, self.SECRET_KEY, algorithm=self.ALGORITHM)
-        
-        # Store token hash in Redis for validation
-        token_hash = hashlib.sha256(refresh_token.encode()).hexdigest()
-        redis_manager.set(
-            f"refresh_token:{user_id}:{jti}", 
-            token_hash, 
-            expire=int(timedelta(days=self.REFRESH_TOKEN_EXPIRE_DAYS).total_seconds())
-        )
-        
-        return refresh_token
+        return jwt.encode(token_data, self.SECRET_KEY, algorithm=self.ALGORITHM)
     
-    def create_token_pair(self, user: User) -> Dict[str, Any]:
-        """Create access and refresh token pair"""
+    def create_token_pair(self, user: User, session: Optional[SessionGrant] = None) -> Dict[str, Any]:
+        """Create access and refresh token pair (a new session unless one is given)"""
+        if session is None:
+            session = token_store.create_session(
+                user.id, int(timedelta(days=self.REFRESH_TOKEN_EXPIRE_DAYS).total_seconds())
+            )
+        
         access_token = self.create_access_token({
             "sub": str(user.id),
             "username": user.username,
-            "user_type": user.user_type
+            "user_type": user.user_type,
+            "sid": session.session_id,
+            "gen": session.generation
         })
         
-        refresh_token = self.create_refresh_token(user.id)
+        refresh_token = self.create_refresh_token(session)
         
         return {
             "access_token": access_token,
@@ -82,37 +76,48 @@ class EnhancedAuthService:
             }
         }
     
-    def verify_refresh_token(self, token: str) -> Optional[int]:
-        """Verify refresh token and return user_id"""
+    def _decode_refresh_token(self, token: str) -> Optional[Dict[str, Any]]:
         try:
             payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            
-            if payload.get("type") != "refresh":
-                return None
-            
-            user_id = int(payload.get("sub"))
-            jti = payload.get("jti")
-            
-            # Check if token exists in Redis
-            token_hash = hashlib.sha256(token.encode()).hexdigest()
-            stored_hash = redis_manager.get(f"refresh_token:{user_id}:{jti}")
-            
-            if stored_hash != token_hash:
-                logger.warning(f"Invalid refresh token for user {user_id}")
-                return None
-            
-            return user_id
-            
         except JWTError as e:
             logger.error(f"JWT verification failed: {e}")
             return None
+        if payload.get("type") != "refresh" or not payload.get("sid"):
+            return None
+        return payload
+    
+    def verify_refresh_token(self, token: str) -> Optional[int]:
+        """Check a refresh token without consuming it; returns user_id"""
+        payload = self._decode_refresh_token(token)
+        if payload is None:
+            return None
+        user_id = int(payload["sub"])
+        if not token_store.validate(user_id, payload["sid"], payload.get("gen", 0)):
+            logger.warning(f"Invalid refresh token for user {user_id}")
+            return None
+        return user_id
+    
+    def rotate_refresh_token(self, token: str) -> Optional[SessionGrant]:
+        """Consume a refresh token; returns its session with a fresh jti
+
+        Presenting an already-rotated token revokes the whole session.
+        """
+        payload = self._decode_refresh_token(token)
+        if payload is None:
+            return None
+        return token_store.rotate(
+            payload["sub"],
+            payload["sid"],
+            payload.get("jti", ""),
+            int(timedelta(days=self.REFRESH_TOKEN_EXPIRE_DAYS).total_seconds()),
+        )
     
-    def revoke_refresh_token(self, user_id: int, jti: str):
-        """Revoke specific refresh token"""
-        redis_manager.delete(f"refresh_token:{user_id}:{jti}")
+    def revoke_refresh_token(self, user_id: int, session_id: str):
+        """Revoke the session a refresh token belongs to"""
+        token_store.revoke_session(user_id, session_id)
     
     def revoke_all_user_tokens(self, user_id: int):
-        """Revoke all refresh tokens for user"""
-        redis_manager.flush_pattern(f"refresh_token:{user_id}:*")
+        """Revoke all access and refresh tokens for user (O(1) generation bump)"""
+        token_store.revoke_all(user_id)
 
 auth_service = EnhancedAuthService()
\ No newline at end of file
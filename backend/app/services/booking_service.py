@@ -1,21 +1,29 @@
 # === backend/app/services/booking_service.py ===
 # Enhanced Booking Service with Weather Integration
+from sqlalchemy import insert, or_, update
 from sqlalchemy.orm import Session
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 try:
     from ..models.location import GameSession, Location, GameDefinition, SessionStatus
     from ..models.user import User
-    from ..models.weather import LocationWeather, WeatherSeverity
+    from ..models.weather import LocationWeather, WeatherAlert, WeatherSeverity
     from ..services.weather_service import WeatherService, weather_api_service
+    from ..services.weather_suitability import suitability_matrix
+    from ..services.bulk_cancellation import ACTIVE_SESSION_STATUSES, BulkCancellationService, prepend_note
 except ImportError:
     from models.location import GameSession, Location, GameDefinition, SessionStatus
     from models.user import User
-    from models.weather import LocationWeather, WeatherSeverity
+    from models.weather import LocationWeather, WeatherAlert, WeatherSeverity
     from services.weather_service import WeatherService, weather_api_service
+    from services.weather_suitability import suitability_matrix
+    from services.bulk_cancellation import ACTIVE_SESSION_STATUSES, BulkCancellationService, prepend_note
 
+import asyncio
 import logging
+import time
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -269,151 +277,195 @@ class EnhancedBookingService:
         self.db.add(session)
         return session
 
-    async def check_upcoming_bookings_weather(self):
-        """Check weather for all upcoming bookings and send warnings"""
-        try:
-            # Get bookings in next 24 hours
-            start_time = datetime.utcnow()
-            end_time = start_time + timedelta(hours=24)
+    async def check_upcoming_bookings_weather(self, hours_ahead: int = 24) -> Dict:
+        """
+        Check weather for all upcoming bookings, warning or cancelling as needed.
+
+        Runs as a grouped pipeline: sessions are loaded with their game
+        definitions in one query, weather is evaluated once per
+        (location, hour) from the suitability matrix, and warnings,
+        cancellations, refunds and alerts are written with set-based
+        statements. Extreme weather cancels with a full refund to the booker,
+        recorded in the refund ledger so a rerun never refunds twice.
+        """
+        timings: Dict[str, float] = {}
+        clock = [time.perf_counter()]
+
+        def phase(name: str):
+            now = time.perf_counter()
+            timings[name] = round((now - clock[0]) * 1000, 2)
+            clock[0] = now
 
-            upcoming_sessions = (
-                self.db.query(GameSession)
-                .filter(
-                    GameSession.start_time >= start_time,
-                    GameSession.start_time <= end_time,
-                    GameSession.status.in_(["scheduled", "confirmed"]),
-                )
-                .all()
+        try:
+            # The database phases run in a worker thread; only the notifications go out on the event loop
+            sessions, groups, warnings, alerts, cancellation = await asyncio.to_thread(
+                self._apply_upcoming_weather, hours_ahead, phase
             )
+            await BulkCancellationService.notify(cancellation)
+            phase("notify")
 
-            processed_count = 0
-            warned_count = 0
-            cancelled_count = 0
-
-            for session in upcoming_sessions:
-                # Check weather suitability for the game type
-                suitable, reason = self.weather_service.is_game_suitable_for_weather(
-                    session.game_definition.game_type, session.location_id
-                )
-
-                if not suitable:
-                    # Check severity - extreme weather = auto-cancel
-                    current_weather = self.weather_service.get_current_weather(
-                        session.location_id
-                    )
-
-                    if (
-                        current_weather
-                        and current_weather.severity == WeatherSeverity.EXTREME
-                    ):
-                        await self._auto_cancel_session(session, reason)
-                        cancelled_count += 1
-                    else:
-                        await self._create_session_weather_alert(session, reason)
-                        warned_count += 1
-
-                processed_count += 1
-
+            warned = sum(len(ids) for ids in warnings.values())
+            cancelled = cancellation["cancelled"]
+            refunded = cancellation["refunded_credits"]
             logger.info(
-                f"Weather check completed: {processed_count} sessions processed, {warned_count} warned, {cancelled_count} cancelled"
+                f"🌦️ Weather check completed: {len(sessions)} sessions in {len(groups)} affected location-hours, "
+                f"{warned} warned, {cancelled} cancelled ({sum(timings.values()):.0f}ms)"
             )
             return {
-                "processed": processed_count,
-                "warned": warned_count,
-                "cancelled": cancelled_count,
+                "processed": len(sessions),
+                "warned": warned,
+                "cancelled": cancelled,
+                "refunded_credits": refunded,
+                "affected_groups": len(groups),
+                "alerts_created": alerts,
+                "timings_ms": timings,
             }
 
         except Exception as e:
             logger.error(f"Error checking upcoming bookings weather: {str(e)}")
-            return {"error": str(e)}
-
-    async def _auto_cancel_session(self, session: GameSession, reason: str):
-        """Automatically cancel session due to extreme weather"""
-        try:
-            # Update session status
-            session.status = SessionStatus.CANCELLED
-            session.cancellation_reason = f"Extreme weather: {reason}"
-            session.cancelled_at = datetime.utcnow()
-            session.weather_cancelled = True
-
-            # Full refund for weather cancellations
-            refund_amount = session.total_cost_credits
-
-            for player_data in session.players:
-                user = (
-                    self.db.query(User)
-                    .filter(User.id == player_data["user_id"])
-                    .first()
-                )
-                if user:
-                    user.credits += refund_amount
-
-                    # Add refund transaction
-                    if not user.transaction_history:
-                        user.transaction_history = []
-
-                    refund_transaction = {
-                        "transaction_id": f"weather_refund_{session.session_id}_{datetime.utcnow().timestamp()}",
-                        "type": "weather_refund",
-                        "amount": refund_amount,
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "description": f"Weather cancellation refund for session {session.session_id}",
-                        "reason": reason,
-                        "session_id": session.session_id,
-                    }
-                    user.transaction_history.append(refund_transaction)
-
-            # Release reserved equipment
-            if session.equipment_set and session.reserved_equipment:
-                session.location.release_equipment_set(
-                    session.equipment_set
-                )  # JAVÍTÁS: release_equipment_set()
-
-            self.db.commit()
-            logger.info(
-                f"Auto-cancelled session {session.session_id} due to extreme weather: {reason}"
+            self.db.rollback()
+            return {"error": str(e), "timings_ms": timings}
+
+    def _apply_upcoming_weather(self, hours_ahead: int, phase: Callable[[str], None]) -> Tuple:
+        """Load, evaluate, warn and cancel (committed batch by batch); returns what the sweep reports on"""
+        start_time = datetime.utcnow()
+        sessions = self._load_upcoming_sessions(start_time, start_time + timedelta(hours=hours_ahead))
+        phase("load")
+
+        groups = self._evaluate_session_weather(sessions)
+        phase("evaluate")
+
+        warnings: Dict[str, List[int]] = defaultdict(list)
+        cancellations: Dict[str, List[int]] = defaultdict(list)
+        for group in groups:
+            for session in group["sessions"]:
+                if group["cancel"]:
+                    cancellations[group["reason"]].append(session.id)
+                else:
+                    warnings[group["reason"]].append(session.id)
+
+        for reason, session_ids in warnings.items():
+            self._bulk_warn_sessions(session_ids, reason)
+        alerts = self._insert_session_alerts(groups)
+        self.db.commit()
+        phase("apply")
+
+        # Cancellations and refunds commit batch by batch through the pipeline
+        cancellation = BulkCancellationService(self.db).cancel_sessions(cancellations)
+        phase("cancel")
+        return sessions, groups, warnings, alerts, cancellation
+
+    def _load_upcoming_sessions(self, start_time: datetime, end_time: datetime) -> List:
+        """Active sessions in the window with their game type (one joined query, no lazy loads)"""
+        return (
+            self.db.query(
+                GameSession.id,
+                GameSession.session_id,
+                GameSession.location_id,
+                GameSession.user_id,
+                GameSession.scheduled_start,
+                GameSession.cost_credits,
+                GameDefinition.game_id.label("game_type"),
+                GameDefinition.weather_dependent,
             )
-
-            # TODO: Send notifications to all players
-            # notification_service.send_weather_cancellation(session, reason)
-
-        except Exception as e:
-            logger.error(
-                f"Error auto-cancelling session {session.session_id}: {str(e)}"
+            .join(GameDefinition, GameSession.game_definition_id == GameDefinition.id)
+            .filter(
+                GameSession.scheduled_start >= start_time,
+                GameSession.scheduled_start <= end_time,
+                GameSession.status.in_(ACTIVE_SESSION_STATUSES),
             )
-            self.db.rollback()
-
-    async def _create_session_weather_alert(self, session: GameSession, reason: str):
-        """Create weather alert for specific session"""
-        try:
-            # Update session with weather warning
-            current_notes = session.booking_notes or ""
-            weather_alert = f"WEATHER ALERT: {reason}. Game may be affected."
-
-            if "WEATHER ALERT" not in current_notes:
-                session.booking_notes = f"{weather_alert} | {current_notes}".strip(
-                    " | "
-                )
-
-            # TODO: Send push notifications to all players
-            for player_data in session.players:
-                # notification_service.send_weather_alert(
-                #     user_id=player_data["user_id"],
-                #     session_id=session.session_id,
-                #     message=weather_alert
-                # )
-                pass
+            .all()
+        )
 
-            self.db.commit()
-            logger.info(
-                f"Weather alert created for session {session.session_id}: {reason}"
+    def _evaluate_session_weather(self, sessions: List) -> List[Dict]:
+        """
+        Unsuitable (location, hour, game type) groups with their sessions.
+
+        Each group carries the reason, the hour's severity and whether it
+        calls for cancellation (extreme weather) rather than a warning.
+        """
+        by_slot: Dict[Tuple[int, datetime, str], List] = defaultdict(list)
+        for session in sessions:
+            if session.weather_dependent is False:
+                continue
+            hour = session.scheduled_start.replace(minute=0, second=0, microsecond=0)
+            by_slot[(session.location_id, hour, session.game_type)].append(session)
+
+        matrices = suitability_matrix.get_or_build_many(
+            self.db, {location_id for location_id, _, _ in by_slot}
+        )
+        groups = []
+        for (location_id, hour, game_type), slot_sessions in by_slot.items():
+            verdict = suitability_matrix.lookup(matrices[location_id], game_type, hour)
+            if verdict["is_suitable"]:
+                continue
+            severity = verdict["weather"].get("severity")
+            groups.append({
+                "location_id": location_id,
+                "hour": hour,
+                "game_type": game_type,
+                "reason": verdict["reason"],
+                "severity": severity,
+                "cancel": severity == WeatherSeverity.EXTREME.value,
+                "sessions": slot_sessions,
+            })
+        return groups
+
+    def _bulk_warn_sessions(self, session_ids: List[int], reason: str):
+        """Prepend one weather alert note to every session not already warned"""
+        weather_alert = f"WEATHER ALERT: {reason}. Game may be affected."
+        self.db.execute(
+            update(GameSession)
+            .where(
+                GameSession.id.in_(session_ids),
+                or_(GameSession.notes.is_(None), ~GameSession.notes.contains("WEATHER ALERT")),
             )
+            .values(notes=prepend_note(weather_alert))
+            .execution_options(synchronize_session=False)
+        )
 
-        except Exception as e:
-            logger.error(
-                f"Error creating weather alert for session {session.session_id}: {str(e)}"
-            )
-            self.db.rollback()
+    def _insert_session_alerts(self, groups: List[Dict]) -> int:
+        """One alert per affected location-hour, inserted in a single statement (reruns skip existing)"""
+        alerts = {}
+        for group in groups:
+            alert_id = f"sessions_{group['location_id']}_{group['hour']:%Y%m%d%H}"
+            alert = alerts.setdefault(alert_id, {
+                "alert_id": alert_id,
+                "alert_type": "session_weather",
+                "severity": group["severity"],
+                "title": "Weather may affect booked sessions",
+                "description": group["reason"],
+                "start_time": group["hour"],
+                "end_time": group["hour"] + timedelta(hours=1),
+                "affected_locations": [group["location_id"]],
+                "sessions": 0,
+            })
+            alert["sessions"] += len(group["sessions"])
+            if group["cancel"]:
+                alert["severity"] = group["severity"]
+
+        if not alerts:
+            return 0
+        existing = {
+            alert_id
+            for (alert_id,) in self.db.query(WeatherAlert.alert_id).filter(WeatherAlert.alert_id.in_(list(alerts)))
+        }
+        rows = []
+        now = datetime.utcnow()
+        for alert_id, alert in alerts.items():
+            if alert_id in existing:
+                continue
+            sessions = alert.pop("sessions")
+            rows.append({
+                **alert,
+                "title": f"Weather may affect {sessions} booked session{'s' if sessions != 1 else ''}",
+                "issued_at": now,
+                "created_at": now,
+                "updated_at": now,
+            })
+        if rows:
+            self.db.execute(insert(WeatherAlert), rows)
+        return len(rows)
 
     def cancel_booking_with_weather_refund(
         self, session_id: str, user_id: int, reason: str
@@ -453,9 +505,12 @@ class EnhancedBookingService:
         self, session_id: str, user_id: int
     ) -> Tuple[bool, ...]:
         """Validate cancellation request and return session if valid"""
+        # Locked until commit so a concurrent weather sweep can't claim and refund it as well
         session = (
             self.db.query(GameSession)
             .filter(GameSession.session_id == session_id)
+            .populate_existing()
+            .with_for_update()
             .first()
         )
         if not session:
@@ -507,8 +562,14 @@ class EnhancedBookingService:
         session.cancellation_reason = reason
         session.cancelled_at = datetime.utcnow()
 
-        # Process refund
-        user = self.db.query(User).filter(User.id == user_id).first()
+        # Process refund (user row locked so concurrent transaction_history appends aren't lost)
+        user = (
+            self.db.query(User)
+            .filter(User.id == user_id)
+            .populate_existing()
+            .with_for_update()
+            .first()
+        )
         if user and refund_amount > 0:
             user.credits += refund_amount
             self._create_refund_transaction(user, session, refund_amount, reason)
@@ -539,65 +600,10 @@ class EnhancedBookingService:
     ) -> List[Dict]:
         """Get time slots that are suitable based on weather forecast"""
         try:
-            # Get base time slots (every hour from 8 AM to 8 PM)
-            base_slots = []
+            # Hourly slots from 8 AM to 8 PM, joined with the precomputed matrix
             start_of_day = date.replace(hour=8, minute=0, second=0, microsecond=0)
-
-            for hour in range(12):  # 8 AM to 8 PM (12 hours)
-                slot_time = start_of_day + timedelta(hours=hour)
-                base_slots.append(slot_time)
-
-            # Check weather suitability for each slot
-            suitable_slots = []
-
-            for slot_time in base_slots:
-                # For current day, check current weather
-                if slot_time.date() == datetime.now().date():
-                    suitable, reason = (
-                        self.weather_service.is_game_suitable_for_weather(
-                            game_type, location_id
-                        )
-                    )
-                    current_weather = self.weather_service.get_current_weather(
-                        location_id
-                    )
-
-                    slot_info = {
-                        "time": slot_time.isoformat(),
-                        "is_suitable": suitable,
-                        "reason": reason,
-                        "weather": {
-                            "condition": (
-                                current_weather.condition.value
-                                if current_weather
-                                else "unknown"
-                            ),
-                            "temperature": (
-                                current_weather.temperature if current_weather else None
-                            ),
-                            "severity": (
-                                current_weather.severity.value
-                                if current_weather
-                                else "unknown"
-                            ),
-                        },
-                    }
-                else:
-                    # For future dates, assume suitable (would need detailed forecast integration)
-                    slot_info = {
-                        "time": slot_time.isoformat(),
-                        "is_suitable": True,
-                        "reason": "Future booking - weather check at booking time",
-                        "weather": {
-                            "condition": "forecast_needed",
-                            "temperature": None,
-                            "severity": "unknown",
-                        },
-                    }
-
-                suitable_slots.append(slot_info)
-
-            return suitable_slots
+            matrix = suitability_matrix.get_or_build(self.db, location_id)
+            return suitability_matrix.slots(matrix, game_type, start_of_day, 12)
 
         except Exception as e:
             logger.error(f"Error getting weather suitable time slots: {str(e)}")
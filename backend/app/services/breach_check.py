@@ -0,0 +1,243 @@
+"""
+Password Breach Check
+k-anonymity lookups against Pwned Passwords with cached range buckets and an offline hash file
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional
+import logging
+
+from app.core.lazy_imports import lazy_import
+from app.core.smart_cache import smart_cache
+
+aiohttp = lazy_import("aiohttp")
+
+logger = logging.getLogger(__name__)
+
+BREACH_CHECK_MODES = ("online", "offline", "off")
+RANGE_API_URL = "https://api.pwnedpasswords.com/range/{prefix}"
+PREFIX_LENGTH = 5
+SUFFIX_LENGTH = 35
+DIGEST_SIZE = 20  # Bytes per SHA-1 record in the offline hash file
+
+
+def parse_range_response(body: str) -> FrozenSet[str]:
+    """Suffixes from a range response ("SUFFIX:COUNT" lines); padding rows have count 0"""
+    suffixes = set()
+    for line in body.splitlines():
+        suffix, _, count = line.partition(":")
+        if len(suffix) == SUFFIX_LENGTH and count.strip() not in ("", "0"):
+            suffixes.add(suffix.upper())
+    return frozenset(suffixes)
+
+
+class SortedHashFile:
+    """
+    Memory-mapped file of sorted, fixed-width binary SHA-1 digests.
+
+    Lookups binary-search the mapping, so only the touched pages are read
+    and the full Pwned Passwords corpus (~20 GB as binary) needs no RAM of
+    its own. Build one with scripts/build_breach_hash_file.py.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size % DIGEST_SIZE:
+            self._file.close()
+            raise ValueError(f"{path} is not a file of {DIGEST_SIZE}-byte digests")
+        self.count = size // DIGEST_SIZE
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __contains__(self, digest: bytes) -> bool:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = middle * DIGEST_SIZE
+            record = self._map[offset : offset + DIGEST_SIZE]
+            if record == digest:
+                return True
+            if record < digest:
+                low = middle + 1
+            else:
+                high = middle
+        return False
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class BreachChecker:
+    """
+    Answers "does this password appear in a known breach?".
+
+    Online mode sends only the first five hex characters of the password's
+    SHA-1 to the range API (k-anonymity) over one shared, pooled client
+    with strict timeouts. Each fetched bucket is parsed into a set of
+    suffixes and cached in-process and in Redis, and concurrent checks of
+    the same prefix share one request. Offline mode looks the full digest
+    up in a local SortedHashFile and never touches the network.
+
+    Lookups fail open: if the API cannot be reached the password is not
+    reported as breached, and the failure is counted.
+    """
+
+    def __init__(
+        self,
+        mode: str = "online",
+        hash_file: Optional[str] = None,
+        timeout: float = 2.0,
+        cache_ttl: int = 86400,
+        max_local_buckets: int = 2048,
+    ):
+        self.mode = mode if mode in BREACH_CHECK_MODES else "online"
+        self.hash_file_path = hash_file
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.max_local_buckets = max_local_buckets
+        self.prefix = "hibp_range:"
+        self._buckets: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._hash_file: Optional[SortedHashFile] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "checks": 0,
+            "breached": 0,
+            "local_hits": 0,
+            "redis_hits": 0,
+            "fetches": 0,
+            "shared_fetches": 0,
+            "errors": 0,
+        }
+
+    # === Offline ===
+
+    def _get_hash_file(self) -> SortedHashFile:
+        if self._hash_file is None:
+            with self._lock:
+                if self._hash_file is None:
+                    if not self.hash_file_path:
+                        raise RuntimeError("PASSWORD_BREACH_FILE is required in offline mode")
+                    self._hash_file = SortedHashFile(self.hash_file_path)
+                    logger.info(f"📚 Breach hash file loaded: {self._hash_file.count:,} hashes")
+        return self._hash_file
+
+    # === Online ===
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=min(1.0, self.timeout)),
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+                headers={"Add-Padding": "true", "User-Agent": "lfa-legacy-go-breach-check"},
+            )
+        return self._session
+
+    def _remember(self, prefix: str, suffixes: FrozenSet[str]):
+        self._buckets[prefix] = suffixes
+        self._buckets.move_to_end(prefix)
+        while len(self._buckets) > self.max_local_buckets:
+            self._buckets.popitem(last=False)
+
+    async def _fetch_bucket(self, prefix: str) -> FrozenSet[str]:
+        self.stats["fetches"] += 1
+        session = self._get_session()
+        async with session.get(RANGE_API_URL.format(prefix=prefix)) as response:
+            response.raise_for_status()
+            suffixes = parse_range_response(await response.text())
+        smart_cache.set(prefix, "".join(sorted(suffixes)), self.cache_ttl, prefix=self.prefix)
+        return suffixes
+
+    async def get_bucket(self, prefix: str) -> FrozenSet[str]:
+        """All breached suffixes for a 5-character SHA-1 prefix"""
+        suffixes = self._buckets.get(prefix)
+        if suffixes is not None:
+            self._buckets.move_to_end(prefix)
+            self.stats["local_hits"] += 1
+            return suffixes
+
+        cached = smart_cache.get(prefix, prefix=self.prefix)
+        if isinstance(cached, str):
+            suffixes = frozenset(cached[i : i + SUFFIX_LENGTH] for i in range(0, len(cached), SUFFIX_LENGTH))
+            self._remember(prefix, suffixes)
+            self.stats["redis_hits"] += 1
+            return suffixes
+
+        inflight = self._inflight.get(prefix)
+        if inflight is not None:
+            self.stats["shared_fetches"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[prefix] = future
+        try:
+            suffixes = await self._fetch_bucket(prefix)
+            self._remember(prefix, suffixes)
+            future.set_result(suffixes)
+            return suffixes
+        except asyncio.CancelledError:
+            future.set_exception(RuntimeError(f"Range fetch for {prefix} was cancelled"))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark as retrieved: with no concurrent waiters asyncio would log it as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(prefix, None)
+
+    # === API ===
+
+    async def is_breached(self, password: str) -> bool:
+        if self.mode == "off":
+            return False
+        self.stats["checks"] += 1
+        digest = hashlib.sha1(password.encode()).digest()
+
+        try:
+            if self.mode == "offline":
+                breached = digest in self._get_hash_file()
+            else:
+                sha1 = digest.hex().upper()
+                breached = sha1[PREFIX_LENGTH:] in await self.get_bucket(sha1[:PREFIX_LENGTH])
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ Breach check failed ({self.mode}): {e}")
+            return False
+
+        self.stats["breached"] += breached
+        return breached
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._hash_file is not None:
+            self._hash_file.close()
+            self._hash_file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "mode": self.mode,
+            "cached_buckets": len(self._buckets),
+            "hash_file_entries": self._hash_file.count if self._hash_file else None,
+        }
+
+
+# Global breach checker
+breach_checker = BreachChecker(
+    mode=os.getenv("PASSWORD_BREACH_MODE", "online").lower(),
+    hash_file=os.getenv("PASSWORD_BREACH_FILE"),
+    timeout=float(os.getenv("PASSWORD_BREACH_TIMEOUT", "2")),
+    cache_ttl=int(os.getenv("PASSWORD_BREACH_CACHE_TTL", "86400")),
+)
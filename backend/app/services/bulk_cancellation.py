@@ -0,0 +1,351 @@
+"""
+Bulk Cancellation
+Set-based cancellation and refund pipeline for tournaments and booked sessions
+"""
+
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+import logging
+
+from sqlalchemy import String, case, cast, exists, func, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.credit_refund import CreditRefund
+from app.models.location import GameSession, SessionStatus
+from app.models.tournament import (
+    MatchStatus,
+    ParticipantStatus,
+    Tournament,
+    TournamentMatch,
+    TournamentParticipant,
+    TournamentStatus,
+)
+from app.models.user import User
+from app.services.notifications import notifications
+from app.services.tournament_live import tournament_live
+
+logger = logging.getLogger(__name__)
+
+REFUND_BATCH_SIZE = int(os.getenv("REFUND_BATCH_SIZE", "1000"))
+
+ACTIVE_SESSION_STATUSES = (SessionStatus.SCHEDULED, SessionStatus.CONFIRMED)
+ACTIVE_PARTICIPANT_STATUSES = (ParticipantStatus.REGISTERED, ParticipantStatus.CONFIRMED)
+# Tournaments a storm can still call off
+CANCELLABLE_TOURNAMENT_STATUSES = (
+    TournamentStatus.REGISTRATION,
+    TournamentStatus.REGISTRATION_CLOSED,
+    TournamentStatus.IN_PROGRESS,
+)
+
+REFUND_COLUMNS = ["refund_key", "user_id", "amount", "source_type", "source_id", "reason", "batch_id", "created_at"]
+
+
+def prepend_note(note: str):
+    """SQL expression putting `note` in front of a session's existing notes"""
+    return case(
+        (or_(GameSession.notes.is_(None), GameSession.notes == ""), note),
+        else_=literal(f"{note} | ") + GameSession.notes,
+    )
+
+
+class BulkCancellationService:
+    """
+    Cancels tournaments and sessions in batches with set-based refunds.
+
+    Each batch is one transaction of set-based statements: the batch is
+    first claimed by marking it withdrawn/cancelled with UPDATE ...
+    RETURNING, refund ledger rows are inserted with INSERT ... SELECT for
+    the claimed rows only, and balances are credited with one UPDATE ...
+    FROM over the batch's ledger rows. Rows a user cancellation or
+    withdrawal took in the meantime are not claimed, so they are never
+    refunded twice. The ledger's unique refund key makes every step safe
+    to repeat, so an interrupted cancellation is finished by running it
+    again (see resume_pending). Notifications are queued on the result and sent as
+    one fan-out per event once the work is committed.
+    """
+
+    def __init__(self, db: Session, batch_size: int = REFUND_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+
+    # === Tournaments ===
+
+    def cancel_tournament(self, tournament_id: int, reason: str) -> Dict[str, Any]:
+        """Cancel a tournament and refund every active participant's entry fee (resumes a partial run)"""
+        started = time.perf_counter()
+        tournament = (
+            self.db.query(Tournament.id, Tournament.name, Tournament.status, Tournament.entry_fee_credits, Tournament.rules)
+            .filter(Tournament.id == tournament_id)
+            .first()
+        )
+        if tournament is None:
+            raise ValueError("Tournament not found")
+        if tournament.status == TournamentStatus.COMPLETED:
+            raise ValueError("Completed tournaments cannot be cancelled")
+
+        now = datetime.utcnow()
+        resumed = tournament.status == TournamentStatus.CANCELLED
+        if not resumed:
+            rules = {**(tournament.rules or {}), "cancellation": {"reason": reason, "cancelled_at": now.isoformat()}}
+            claimed = self.db.execute(
+                update(Tournament)
+                .where(
+                    Tournament.id == tournament_id,
+                    Tournament.status.notin_([TournamentStatus.CANCELLED, TournamentStatus.COMPLETED]),
+                )
+                .values(status=TournamentStatus.CANCELLED, rules=rules)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            resumed = not claimed
+            self.db.execute(
+                update(TournamentMatch)
+                .where(
+                    TournamentMatch.tournament_id == tournament_id,
+                    TournamentMatch.status.in_([MatchStatus.SCHEDULED, MatchStatus.IN_PROGRESS]),
+                )
+                .values(status=MatchStatus.CANCELLED)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+
+        fee = tournament.entry_fee_credits or 0
+        refund_key = literal(f"tournament:{tournament_id}:") + cast(TournamentParticipant.user_id, String)
+        user_ids: List[int] = []
+        refunded = batches = 0
+        while True:
+            batch = (
+                self.db.query(TournamentParticipant.id, TournamentParticipant.user_id)
+                .filter(
+                    TournamentParticipant.tournament_id == tournament_id,
+                    TournamentParticipant.status.in_(ACTIVE_PARTICIPANT_STATUSES),
+                )
+                .order_by(TournamentParticipant.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not batch:
+                break
+
+            try:
+                # Claim first: participants withdrawn meanwhile were refunded by their own path
+                claimed = self.db.execute(
+                    update(TournamentParticipant)
+                    .where(
+                        TournamentParticipant.id.in_([participant.id for participant in batch]),
+                        TournamentParticipant.status.in_(ACTIVE_PARTICIPANT_STATUSES),
+                    )
+                    .values(status=ParticipantStatus.WITHDREW)
+                    .returning(TournamentParticipant.id, TournamentParticipant.user_id)
+                    .execution_options(synchronize_session=False)
+                ).all()
+                if fee and claimed:
+                    batch_id = uuid.uuid4().hex
+                    self._insert_refunds(
+                        select(
+                            refund_key,
+                            TournamentParticipant.user_id,
+                            literal(fee),
+                            literal("tournament"),
+                            literal(str(tournament_id)),
+                            literal(reason[:200]),
+                            literal(batch_id),
+                            literal(now),
+                        ).where(
+                            TournamentParticipant.id.in_([participant.id for participant in claimed]),
+                            ~exists().where(CreditRefund.refund_key == refund_key),
+                        )
+                    )
+                    refunded += self._apply_refunds(batch_id)
+                self.db.commit()
+            except IntegrityError:
+                # A concurrent cancellation of this tournament refunded the batch first; it finishes the rest
+                self.db.rollback()
+                resumed = True
+                logger.warning(f"⚠️ Tournament {tournament_id} is being cancelled concurrently, leaving the rest to that run")
+                break
+            user_ids.extend(participant.user_id for participant in claimed)
+            batches += 1
+
+        self.db.execute(
+            update(Tournament)
+            .where(Tournament.id == tournament_id)
+            .values(current_participants=0, prize_pool_credits=0)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+        from app.services.tournament_service import invalidate_tournament_caches
+
+        invalidate_tournament_caches(tournament_id)
+        live_update = tournament_live.changed(self.db, tournament_id, {
+            "type": "status", "status": TournamentStatus.CANCELLED.value, "reason": reason
+        })
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"🚫 Tournament {tournament_id} {'cancellation resumed' if resumed else 'cancelled'}: "
+            f"{len(user_ids)} participants, {refunded} credits refunded in {batches} batches ({duration_ms:.0f}ms)"
+        )
+        return {
+            "tournament_id": tournament_id,
+            "resumed": resumed,
+            "participants": len(user_ids),
+            "refunded_credits": refunded,
+            "batches": batches,
+            "duration_ms": duration_ms,
+            "notifications": [live_update] + ([{
+                "event": "tournament_cancelled",
+                "payload": {"tournament_id": tournament_id, "name": tournament.name, "reason": reason, "refund": fee},
+                "user_ids": user_ids,
+            }] if user_ids else []),
+        }
+
+    def cancel_weather_tournaments(self, location_id: int, start: datetime, end: datetime, reason: str) -> List[Dict[str, Any]]:
+        """Cancel weather-dependent tournaments at a location that run within [start, end)"""
+        tournament_ids = [
+            tournament_id
+            for (tournament_id,) in self.db.query(Tournament.id).filter(
+                Tournament.location_id == location_id,
+                Tournament.weather_dependent.is_(True),
+                Tournament.status.in_(CANCELLABLE_TOURNAMENT_STATUSES),
+                Tournament.start_time < end,
+                Tournament.end_time > start,
+            )
+        ]
+        return [self.cancel_tournament(tournament_id, reason) for tournament_id in tournament_ids]
+
+    def resume_pending(self) -> int:
+        """Finish cancellations interrupted before every participant was refunded"""
+        pending = [
+            tournament_id
+            for (tournament_id,) in self.db.query(Tournament.id)
+            .filter(
+                Tournament.status == TournamentStatus.CANCELLED,
+                exists().where(
+                    TournamentParticipant.tournament_id == Tournament.id,
+                    TournamentParticipant.status.in_(ACTIVE_PARTICIPANT_STATUSES),
+                ),
+            )
+        ]
+        for tournament_id in pending:
+            self.cancel_tournament(tournament_id, "Resumed cancellation")
+        return len(pending)
+
+    # === Sessions ===
+
+    def cancel_sessions(
+        self, cancellations: Dict[str, List[int]], refund_reason: str = "weather_cancellation"
+    ) -> Dict[str, Any]:
+        """
+        Cancel sessions with a full refund to the booker ({reason: [session ids]}).
+
+        Sessions no longer scheduled or confirmed are skipped, so rerunning
+        a sweep refunds nothing twice.
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        refund_key = literal("session:") + GameSession.session_id
+        queued = []
+        cancelled = refunded = batches = 0
+
+        for reason, session_ids in cancellations.items():
+            user_ids: List[int] = []
+            for offset in range(0, len(session_ids), self.batch_size):
+                chunk = session_ids[offset:offset + self.batch_size]
+                batch_id = uuid.uuid4().hex
+
+                try:
+                    # Claim first: sessions cancelled meanwhile were refunded by their own path
+                    claimed = self.db.execute(
+                        update(GameSession)
+                        .where(GameSession.id.in_(chunk), GameSession.status.in_(ACTIVE_SESSION_STATUSES))
+                        .values(
+                            status=SessionStatus.CANCELLED,
+                            refund_amount=GameSession.cost_credits,
+                            refund_reason=refund_reason,
+                            notes=prepend_note(f"CANCELLED - extreme weather: {reason}"),
+                        )
+                        .returning(GameSession.id, GameSession.user_id)
+                        .execution_options(synchronize_session=False)
+                    ).all()
+                    if claimed:
+                        self._insert_refunds(
+                            select(
+                                refund_key,
+                                GameSession.user_id,
+                                GameSession.cost_credits,
+                                literal("session"),
+                                GameSession.session_id,
+                                literal(reason[:200]),
+                                literal(batch_id),
+                                literal(now),
+                            ).where(
+                                GameSession.id.in_([session.id for session in claimed]),
+                                GameSession.cost_credits > 0,
+                                ~exists().where(CreditRefund.refund_key == refund_key),
+                            )
+                        )
+                        refunded += self._apply_refunds(batch_id)
+                    self.db.commit()
+                except IntegrityError:
+                    # A concurrent sweep refunded these sessions first
+                    self.db.rollback()
+                    logger.warning(f"⚠️ Sessions {chunk[0]}..{chunk[-1]} are being cancelled concurrently, skipped")
+                    continue
+                cancelled += len(claimed)
+                user_ids.extend({session.user_id for session in claimed})
+                batches += 1
+
+            if user_ids:
+                queued.append({
+                    "event": "sessions_cancelled",
+                    "payload": {"reason": reason, "refund_reason": refund_reason},
+                    "user_ids": user_ids,
+                })
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        if cancelled:
+            logger.info(
+                f"🚫 {cancelled} sessions cancelled, {refunded} credits refunded in {batches} batches ({duration_ms:.0f}ms)"
+            )
+        return {
+            "cancelled": cancelled,
+            "refunded_credits": refunded,
+            "batches": batches,
+            "duration_ms": duration_ms,
+            "notifications": queued,
+        }
+
+    # === Refund ledger ===
+
+    def _insert_refunds(self, source) -> int:
+        """INSERT ... SELECT ledger rows for a batch; returns rows inserted"""
+        return self.db.execute(insert(CreditRefund).from_select(REFUND_COLUMNS, source)).rowcount
+
+    def _apply_refunds(self, batch_id: str) -> int:
+        """Credit a batch's ledger rows to balances with one UPDATE ... FROM; returns credits refunded"""
+        totals = (
+            select(CreditRefund.user_id, func.sum(CreditRefund.amount).label("amount"))
+            .where(CreditRefund.batch_id == batch_id)
+            .group_by(CreditRefund.user_id)
+            .subquery()
+        )
+        self.db.execute(
+            update(User)
+            .where(User.id == totals.c.user_id)
+            .values(credits=User.credits + totals.c.amount)
+            .execution_options(synchronize_session=False)
+        )
+        return self.db.query(func.coalesce(func.sum(CreditRefund.amount), 0)).filter(
+            CreditRefund.batch_id == batch_id
+        ).scalar()
+
+    # === Notifications ===
+
+    @staticmethod
+    async def notify(*results: Dict[str, Any]) -> int:
+        """Send the notifications queued on pipeline results"""
+        return await notifications.send_all([item for result in results for item in result.get("notifications", [])])
@@ -1,7 +1,7 @@
 # chat_service.py
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy import desc, and_, func
 from ..models.chat import ChatRoom, ChatMessage, ChatRoomMembership
 from ..models.user import User
 from datetime import datetime, timedelta
@@ -20,30 +20,46 @@ class ChatService:
             ChatRoomMembership.user_id == user_id,
             ChatRoom.is_active == True
         ).all()
+        if not rooms:
+            return []
+        room_ids = [room.id for room in rooms]
+        
+        # Last message per room in one query instead of one per room
+        ranked = self.db.query(
+            ChatMessage.room_id,
+            ChatMessage.message,
+            ChatMessage.created_at,
+            func.row_number().over(
+                partition_by=ChatMessage.room_id,
+                order_by=(desc(ChatMessage.created_at), desc(ChatMessage.id)),
+            ).label("position"),
+        ).filter(ChatMessage.room_id.in_(room_ids)).subquery()
+        last_messages = {
+            row.room_id: row
+            for row in self.db.query(ranked).filter(ranked.c.position == 1)
+        }
+        
+        # Unread count (simplified): messages from other users, grouped per room
+        unread_counts = dict(
+            self.db.query(ChatMessage.room_id, func.count(ChatMessage.id)).filter(
+                ChatMessage.room_id.in_(room_ids),
+                ChatMessage.user_id != user_id
+            ).group_by(ChatMessage.room_id).all()
+        )
         
         result = []
         for room in rooms:
-            # Get last message
-            last_message = self.db.query(ChatMessage).filter(
-                ChatMessage.room_id == room.id
-            ).order_by(desc(ChatMessage.created_at)).first()
-            
-            # Get unread count (simplified)
-            unread_count = self.db.query(ChatMessage).filter(
-                ChatMessage.room_id == room.id,
-                ChatMessage.user_id != user_id
-            ).count()
-            
+            last_message = last_messages.get(room.id)
             result.append({
                 "id": room.id,
                 "name": room.name,
                 "room_type": room.room_type,
                 "description": room.description,
                 "last_message": {
-                    "message": last_message.message if last_message else None,
-                    "created_at": last_message.created_at.isoformat() if last_message else None
+                    "message": last_message.message,
+                    "created_at": last_message.created_at.isoformat() if last_message.created_at else None
                 } if last_message else None,
-                "unread_count": unread_count
+                "unread_count": unread_counts.get(room.id, 0)
             })
         
         return result
@@ -66,13 +82,14 @@ class ChatService:
                    u.username
             FROM chat_messages cm
             LEFT JOIN users u ON cm.user_id = u.id
-            WHERE cm.room_id = :room_id AND cm.is_deleted = 0
+            WHERE cm.room_id = :room_id AND cm.is_deleted = :is_deleted
             ORDER BY cm.created_at DESC
             LIMIT :limit OFFSET :offset
         """)
         
         messages = self.db.execute(messages_sql, {
             "room_id": room_id,
+            "is_deleted": False,
             "limit": limit,
             "offset": offset
         }).fetchall()
@@ -101,6 +118,7 @@ class ChatService:
         insert_sql = text("""
             INSERT INTO chat_messages (room_id, user_id, message, message_type, is_deleted, created_at)
             VALUES (:room_id, :user_id, :message, :message_type, :is_deleted, CURRENT_TIMESTAMP)
+            RETURNING id
         """)
         
         result = self.db.execute(insert_sql, {
@@ -110,10 +128,10 @@ class ChatService:
             "message_type": message_type,
             "is_deleted": False
         })
+        # RETURNING works on PostgreSQL and SQLite; lastrowid is SQLite-only
+        message_id = result.scalar_one()
         self.db.commit()
         
-        message_id = result.lastrowid
-        
         # Get user info and message data
         select_sql = text("""
             SELECT cm.*, u.username
@@ -171,6 +189,7 @@ class ChatService:
         insert_sql = text("""
             INSERT INTO chat_rooms (name, room_type, description, is_active, max_users, created_by, created_at)
             VALUES (:name, :room_type, :description, :is_active, :max_users, :created_by, CURRENT_TIMESTAMP)
+            RETURNING id
         """)
         
         result = self.db.execute(insert_sql, {
@@ -181,10 +200,9 @@ class ChatService:
             "max_users": max_users,
             "created_by": created_by
         })
-        self.db.commit()
-        
         # Get the created room ID
-        room_id = result.lastrowid
+        room_id = result.scalar_one()
+        self.db.commit()
         
         # Get room data with a SELECT query
         select_sql = text("SELECT * FROM chat_rooms WHERE id = :room_id")
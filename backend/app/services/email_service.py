@@ -9,17 +9,15 @@ from datetime import datetime, timedelta
 from fastapi import HTTPException
 from typing import Dict, Optional, List, Any
 import logging
-from jinja2 import Template
 import os
 
 logger = logging.getLogger(__name__)
 
-try:
-    import sendgrid
-    from sendgrid.helpers.mail import Mail, From, To, Subject, PlainTextContent, HtmlContent
-    SENDGRID_AVAILABLE = True
-except ImportError:
-    SENDGRID_AVAILABLE = False
+from ..core.lazy_imports import lazy_import, optional_module
+
+# Template rendering and the SendGrid SDK are only needed when mail is sent
+jinja2 = lazy_import("jinja2")
+SENDGRID_AVAILABLE = optional_module("sendgrid")
 
 class EmailService:
     def __init__(self):
@@ -115,7 +113,7 @@ class EmailService:
         </html>
         """
         
-        template = Template(html_template)
+        template = jinja2.Template(html_template)
         html_body = template.render(username=username, reset_url=reset_url)
         
         text_body = f"""
@@ -184,7 +182,7 @@ class EmailService:
         </html>
         """
         
-        template = Template(html_template)
+        template = jinja2.Template(html_template)
         html_body = template.render(
             username=username, 
             app_url=os.getenv('FRONTEND_URL', 'http://localhost:3000')
@@ -17,6 +17,7 @@ from ..models.game_results import (
 )
 from ..models.user import User
 from ..models.location import GameSession, GameDefinition
+from ..core.smart_cache import LeaderboardCache
 
 logger = logging.getLogger(__name__)
 
@@ -322,6 +323,8 @@ class GameResultService:
         for category, metric in categories:
             self._generate_category_leaderboard(category, metric)
 
+        LeaderboardCache.invalidate_all()
+
     def _generate_category_leaderboard(self, category: str, metric: str):
         """
         Generate leaderboard for specific category
@@ -522,7 +525,24 @@ class LeaderboardService:
         self, category: str = "overall", limit: int = 10
     ) -> List[Dict]:
         """
-        Get top performers in a category with user details
+        Get top performers in a category with user details (cached, SWR)
+        """
+
+        def load() -> List[Dict]:
+            # Background refreshes outlive the request, so use a fresh session
+            from ..database import SessionLocal
+
+            db = SessionLocal()
+            try:
+                return LeaderboardService(db)._load_top_performers(category, limit)
+            finally:
+                db.close()
+
+        return LeaderboardCache.get_or_load(category, limit, load)
+
+    def _load_top_performers(self, category: str, limit: int) -> List[Dict]:
+        """
+        Load top performers in a category from the database
         """
         leaderboard_entries = (
             self.db.query(Leaderboard, User)
@@ -1,5 +1,3 @@
-import pyotp
-import qrcode
 import io
 import base64
 from datetime import datetime, timedelta
@@ -10,6 +8,12 @@ from sqlalchemy import select, update
 import secrets
 import logging
 
+from ..core.lazy_imports import lazy_import
+
+# QR rendering pulls in PIL; load both only when MFA is actually set up
+pyotp = lazy_import("pyotp")
+qrcode = lazy_import("qrcode")
+
 logger = logging.getLogger(__name__)
 
 class MFAService:
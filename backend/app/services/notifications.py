@@ -0,0 +1,125 @@
+"""
+Notification Fan-out
+One Socket.IO emit per event, addressed to every recipient's personal room at once
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from app.core.lazy_imports import lazy_import
+
+logger = logging.getLogger(__name__)
+
+# python-socketio pulls in engineio's client and with it aiohttp, so the
+# socket server is only imported when the first event is sent
+chat_manager = lazy_import("app.websocket.chat_manager")
+
+
+class NotificationFanOut:
+    """
+    Sends an event to many users with as few emits as possible.
+
+    Connected clients join the room user_<id> (see ChatManager), and one
+    emit can address a list of rooms, so a cancellation reaching thousands
+    of players is a handful of emits rather than one per player. Events for
+    everyone watching something (e.g. tournament_<id>) go to its room.
+    """
+
+    def __init__(self, rooms_per_emit: int = 1000):
+        self.rooms_per_emit = rooms_per_emit
+        self.stats = {"events": 0, "emits": 0, "recipients": 0, "skipped": 0, "errors": 0}
+        self._sio: Any = None
+        self._sio_loaded = False
+
+    def _socket_server(self) -> Any:
+        """The Socket.IO server, or None when python-socketio is not installed"""
+        if not self._sio_loaded:
+            try:
+                self._sio = chat_manager.sio
+            except ImportError:  # python-socketio is optional
+                self._sio = None
+            self._sio_loaded = True
+        return self._sio
+
+    async def send(self, event: str, payload: Dict[str, Any], user_ids: Iterable[int]) -> int:
+        """Emit `event` to every user; returns the number of recipients addressed"""
+        rooms = [f"user_{user_id}" for user_id in dict.fromkeys(user_ids)]
+        if not rooms:
+            return 0
+        self.stats["events"] += 1
+        sio = self._socket_server()
+        if sio is None:
+            self.stats["skipped"] += 1
+            logger.debug(f"Socket server unavailable, {event} not sent to {len(rooms)} users")
+            return 0
+
+        try:
+            for start in range(0, len(rooms), self.rooms_per_emit):
+                await sio.emit(event, payload, to=rooms[start:start + self.rooms_per_emit])
+                self.stats["emits"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ {event} fan-out failed: {e}")
+            return 0
+
+        self.stats["recipients"] += len(rooms)
+        logger.info(f"📣 {event} sent to {len(rooms)} users")
+        return len(rooms)
+
+    async def broadcast(self, event: str, payload: Dict[str, Any], room: str) -> bool:
+        """Emit `event` once to every client in `room`"""
+        self.stats["events"] += 1
+        sio = self._socket_server()
+        if sio is None:
+            self.stats["skipped"] += 1
+            return False
+        try:
+            await sio.emit(event, payload, room=room)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ {event} broadcast to {room} failed: {e}")
+            return False
+        self.stats["emits"] += 1
+        return True
+
+    async def send_all(self, notifications: List[Dict[str, Any]]) -> int:
+        """Send queued notifications ({"event", "payload"} and "user_ids" or a "room")"""
+        sent = 0
+        for notification in notifications:
+            if "room" in notification:
+                await self.broadcast(notification["event"], notification["payload"], notification["room"])
+                continue
+            sent += await self.send(notification["event"], notification["payload"], notification["user_ids"])
+        return sent
+
+    def dispatch(self, notifications: List[Dict[str, Any]]) -> Optional[asyncio.Task]:
+        """
+        Send queued notifications from synchronous code.
+
+        On the event loop thread the send is scheduled as a task; from a
+        FastAPI worker thread it runs on the loop via anyio; elsewhere
+        (scripts, scheduler threads) it is skipped.
+        """
+        if not notifications:
+            return None
+        try:
+            return asyncio.get_running_loop().create_task(self.send_all(notifications))
+        except RuntimeError:
+            pass
+        try:
+            import anyio.from_thread
+
+            anyio.from_thread.run(self.send_all, notifications)
+        except Exception as e:
+            self.stats["skipped"] += len(notifications)
+            logger.debug(f"No event loop to send {len(notifications)} notifications from: {e}")
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        socket_server = self._sio is not None if self._sio_loaded else None
+        return {**self.stats, "socket_server": socket_server}
+
+
+# Global notification fan-out
+notifications = NotificationFanOut()
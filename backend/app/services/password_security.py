@@ -1,19 +1,11 @@
-import aiohttp
-import hashlib
-import argon2
 from typing import Dict, List
 from fastapi import HTTPException
 import re
 
+from app.core.password_hashing import password_hasher
+from app.services.breach_check import breach_checker
+
 class PasswordSecurityService:
-    def __init__(self):
-        self.argon2_hasher = argon2.PasswordHasher(
-            memory_cost=19456,
-            time_cost=2,
-            parallelism=1,
-            hash_len=32
-        )
-    
     async def validate_password_strength(self, password: str) -> Dict:
         result = {
             "valid": False,
@@ -52,21 +44,7 @@ class PasswordSecurityService:
         return result
     
     async def check_password_breached(self, password: str) -> bool:
-        sha1_hash = hashlib.sha1(password.encode()).hexdigest().upper()
-        prefix = sha1_hash[:5]
-        suffix = sha1_hash[5:]
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(f"https://api.pwnedpasswords.com/range/{prefix}") as response:
-                    if response.status == 200:
-                        hashes = await response.text()
-                        return suffix in hashes
-            except Exception as e:
-                print(f"Breach database check failed: {e}")
-                return False
-        
-        return False
+        return await breach_checker.is_breached(password)
     
     def _has_common_patterns(self, password: str) -> bool:
         if re.search(r'(.)\1{2,}', password):
@@ -79,12 +57,9 @@ class PasswordSecurityService:
         
         return False
     
-    def hash_password(self, password: str) -> str:
-        return self.argon2_hasher.hash(password)
+    async def hash_password(self, password: str) -> str:
+        # Argon2id on the bounded hashing pool, off the event loop
+        return await password_hasher.hash(password)
     
-    def verify_password(self, password: str, hash_str: str) -> bool:
-        try:
-            self.argon2_hasher.verify(hash_str, password)
-            return True
-        except argon2.exceptions.VerifyMismatchError:
-            return False
\ No newline at end of file
+    async def verify_password(self, password: str, hash_str: str) -> bool:
+        return await password_hasher.verify(password, hash_str)
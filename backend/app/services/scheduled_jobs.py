@@ -0,0 +1,97 @@
+"""
+Scheduled Jobs
+Periodic weather checks, leaderboard rebuilds and maintenance, registered on the job scheduler
+"""
+
+import os
+import logging
+
+from app.core.cache_warming import cache_warming_manager
+from app.core.database_production import db_config
+from app.core.job_scheduler import JobScheduler
+from app.core.monitoring import cleanup_monitoring_data
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_location_weather():
+    """Pull current weather for every active location"""
+    from app.services.weather_service import WeatherAPIService, WeatherService, weather_api_key
+
+    api_key = weather_api_key()
+    if not api_key:
+        logger.debug("OPENWEATHERMAP_API_KEY not set, skipping weather refresh")
+        return 0
+
+    async with WeatherAPIService(api_key) as api_service:
+        with db_config.session_scope() as db:
+            return await WeatherService(db, api_service).update_all_locations_weather()
+
+
+async def refresh_location_forecasts():
+    """Store fresh forecasts for every active location and rebuild the suitability matrices"""
+    from app.services.weather_service import WeatherAPIService, WeatherService, weather_api_key
+
+    api_key = weather_api_key()
+    if not api_key:
+        logger.debug("OPENWEATHERMAP_API_KEY not set, skipping forecast refresh")
+        return 0
+
+    async with WeatherAPIService(api_key) as api_service:
+        with db_config.session_scope() as db:
+            return await WeatherService(db, api_service).refresh_forecasts_bulk()
+
+
+async def check_booking_weather():
+    """Warn about (or cancel) sessions in the next 24 hours with unsuitable weather"""
+    from app.services.booking_service import EnhancedBookingService
+
+    with db_config.session_scope() as db:
+        result = await EnhancedBookingService(db).check_upcoming_bookings_weather()
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result
+
+
+def refresh_weather_rollups():
+    """Roll up completed days for the weather impact reports"""
+    from app.services.weather_service import WeatherAnalyticsService
+
+    with db_config.session_scope() as db:
+        return WeatherAnalyticsService(db).refresh_daily_rollups()
+
+
+def rebuild_leaderboards():
+    """Regenerate every leaderboard category and drop the cached boards"""
+    from app.services.game_result_service import GameResultService
+
+    with db_config.session_scope() as db:
+        GameResultService(db).generate_leaderboards()
+
+
+def resume_cancellations():
+    """Finish tournament cancellations interrupted before every participant was refunded"""
+    from app.services.bulk_cancellation import BulkCancellationService
+
+    with db_config.session_scope() as db:
+        return BulkCancellationService(db).resume_pending()
+
+
+def register_default_jobs(scheduler: JobScheduler):
+    """The application's periodic work; schedules are overridable via JOB_SCHEDULE_<NAME>"""
+    jobs = [
+        ("weather_refresh", refresh_location_weather, "*/30 * * * *", 600),
+        ("forecast_refresh", refresh_location_forecasts, "20 * * * *", 900),
+        ("booking_weather_check", check_booking_weather, "*/15 * * * *", 300),
+        ("weather_rollup", refresh_weather_rollups, "10 0 * * *", 900),
+        ("leaderboard_rebuild", rebuild_leaderboards, "5 * * * *", 600),
+        ("cancellation_resume", resume_cancellations, "*/10 * * * *", 600),
+        ("monitoring_cleanup", cleanup_monitoring_data, "@every 10m", 60),
+    ]
+    for name, func, schedule, timeout in jobs:
+        schedule = os.getenv(f"JOB_SCHEDULE_{name.upper()}", schedule)
+        if schedule.lower() == "off":
+            continue
+        scheduler.register(name, func, schedule, timeout=timeout)
+
+    cache_warming_manager.register_jobs(scheduler)
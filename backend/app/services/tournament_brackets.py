@@ -0,0 +1,442 @@
+"""
+Tournament Bracket Engine
+Single/double elimination, round robin and Swiss brackets as compact match tables with O(1) advancement
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+# Match rows are plain lists in this column order, so a stored bracket is one
+# JSON array per match instead of an object with repeated keys
+FIELDS = ("label", "round", "p1", "p2", "winner", "next", "next_slot", "loser_next", "loser_slot")
+LABEL, ROUND, P1, P2, WINNER, NEXT, NEXT_SLOT, LOSER_NEXT, LOSER_SLOT = range(len(FIELDS))
+
+# A slot that will never hold a player (None is a slot still waiting for one)
+BYE = 0
+
+FORMAT_VERSION = 1
+
+SINGLE_ELIMINATION = "single_elimination"
+DOUBLE_ELIMINATION = "double_elimination"
+ROUND_ROBIN = "round_robin"
+SWISS_SYSTEM = "swiss_system"
+
+
+def seed_order(size: int) -> List[int]:
+    """Seeds in bracket-slot order for a power-of-two field: 1 v size, and top seeds meet as late as possible"""
+    order = [1]
+    while len(order) < size:
+        mirror = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, mirror - top)]
+    return order
+
+
+class Bracket:
+    """
+    A bracket as a flat match table.
+
+    Each match row holds its two slots, its winner and the position (list
+    index) and slot its winner and loser move to, so recording a result
+    writes directly into the next match instead of searching rounds.
+    Byes are BYE slots, resolved as soon as a match's slots are known:
+    a bye against a player advances the player, two byes advance a bye.
+    Labels ("R1-3", "W2-1", "L4-2", "GF1") are indexed on first lookup.
+    """
+
+    def __init__(self, format: str, seeds: List[int], matches: List[list], total_rounds: int):
+        self.format = format
+        self.seeds = seeds
+        self.matches = matches
+        self.total_rounds = total_rounds
+        self._index: Optional[Dict[str, int]] = None
+        # Undecided matches per round, kept for Swiss so a round's end is seen without a scan
+        self._open: Optional[Dict[int, int]] = None
+
+    # === Storage ===
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "v": FORMAT_VERSION,
+            "format": self.format,
+            "total_rounds": self.total_rounds,
+            "seeds": self.seeds,
+            "fields": list(FIELDS),
+            "matches": self.matches,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Bracket":
+        if not data or data.get("v") != FORMAT_VERSION:
+            raise ValueError("Unsupported bracket data")
+        return cls(data["format"], data["seeds"], data["matches"], data["total_rounds"])
+
+    # === Lookup ===
+
+    def position(self, match: Union[int, str]) -> int:
+        """Row position for a position or label"""
+        if isinstance(match, int):
+            if not 0 <= match < len(self.matches):
+                raise KeyError(f"No match at position {match}")
+            return match
+        if self._index is None:
+            self._index = {row[LABEL]: position for position, row in enumerate(self.matches)}
+        try:
+            return self._index[match]
+        except KeyError:
+            raise KeyError(f"No match {match}")
+
+    def match(self, match: Union[int, str]) -> Dict[str, Any]:
+        position = self.position(match)
+        return {"position": position, **dict(zip(FIELDS, self.matches[position]))}
+
+    def ready_matches(self) -> List[int]:
+        """Positions of undecided matches with both players known"""
+        return [position for position, row in enumerate(self.matches) if self._is_ready(row)]
+
+    @staticmethod
+    def _is_ready(row: list) -> bool:
+        return row[WINNER] is None and row[P1] not in (None, BYE) and row[P2] not in (None, BYE)
+
+    # === Results ===
+
+    def record_result(self, match: Union[int, str], winner_id: int) -> List[int]:
+        """
+        Decide a match and advance its players.
+
+        Returns the positions that became playable: the next matches of
+        the winner and loser once both their slots are filled, or a newly
+        paired Swiss round.
+        """
+        position = self.position(match)
+        row = self.matches[position]
+        if row[WINNER] is not None:
+            raise ValueError(f"Match {row[LABEL]} is already decided")
+        if not self._is_ready(row):
+            raise ValueError(f"Match {row[LABEL]} is waiting for its players")
+        if winner_id not in (row[P1], row[P2]):
+            raise ValueError(f"Player {winner_id} is not in match {row[LABEL]}")
+
+        ready: List[int] = []
+        if self.format != SWISS_SYSTEM:
+            self._advance(position, winner_id, ready)
+        else:
+            open_matches = self._open_matches()
+            self._advance(position, winner_id, ready)
+            open_matches[row[ROUND]] -= 1
+            if not open_matches[row[ROUND]]:
+                ready.extend(self.pair_swiss_round())
+        return ready
+
+    def _advance(self, position: int, winner: int, ready: List[int]):
+        """Set a winner and move both players on, settling byes as they cascade"""
+        pending = [(position, winner)]
+        while pending:
+            position, winner = pending.pop()
+            row = self.matches[position]
+            row[WINNER] = winner
+            loser = row[P2] if winner == row[P1] else row[P1]
+            # A grand final won by the unbeaten player needs no reset match
+            if row[LABEL] == "GF1" and winner == row[P1]:
+                loser = BYE
+
+            for target, slot, player in ((row[NEXT], row[NEXT_SLOT], winner), (row[LOSER_NEXT], row[LOSER_SLOT], loser)):
+                if target is None:
+                    continue
+                next_row = self.matches[target]
+                next_row[P1 + slot] = player
+                if next_row[P1] is None or next_row[P2] is None or next_row[WINNER] is not None:
+                    continue
+                if BYE in (next_row[P1], next_row[P2]):
+                    pending.append((target, next_row[P2] if next_row[P1] == BYE else next_row[P1]))
+                else:
+                    ready.append(target)
+
+    def _settle_byes(self, positions: Sequence[int]):
+        for position in positions:
+            row = self.matches[position]
+            if row[WINNER] is None and BYE in (row[P1], row[P2]) and None not in (row[P1], row[P2]):
+                self._advance(position, row[P2] if row[P1] == BYE else row[P1], [])
+
+    def _open_matches(self) -> Dict[int, int]:
+        if self._open is None:
+            self._open = {}
+            for row in self.matches:
+                self._open[row[ROUND]] = self._open.get(row[ROUND], 0) + (row[WINNER] is None)
+        return self._open
+
+    # === Standings ===
+
+    def records(self) -> Dict[int, List[int]]:
+        """{user_id: [wins, losses]}; Swiss byes count as wins, elimination byes do not"""
+        records = {seed: [0, 0] for seed in self.seeds}
+        for row in self.matches:
+            winner = row[WINNER]
+            if winner in (None, BYE):
+                continue
+            loser = row[P2] if winner == row[P1] else row[P1]
+            if loser != BYE:
+                records[winner][0] += 1
+                records[loser][1] += 1
+            elif self.format == SWISS_SYSTEM:
+                records[winner][0] += 1
+        return records
+
+    def standings(self) -> List[Dict[str, Any]]:
+        """Players by wins, then fewer losses, then seed"""
+        rank = {user_id: seed for seed, user_id in enumerate(self.seeds, 1)}
+        ordered = sorted(self.records().items(), key=lambda item: (-item[1][0], item[1][1], rank[item[0]]))
+        return [
+            {"user_id": user_id, "seed": rank[user_id], "wins": wins, "losses": losses}
+            for user_id, (wins, losses) in ordered
+        ]
+
+    def match_count(self) -> int:
+        """Matches to be played; byes not yet known (and an unplayed reset final) are still counted"""
+        if self.format == SWISS_SYSTEM:
+            return len(self.seeds) // 2 * self.total_rounds
+        return sum(1 for row in self.matches if BYE not in (row[P1], row[P2]))
+
+    @property
+    def is_complete(self) -> bool:
+        if any(row[WINNER] is None for row in self.matches):
+            return False
+        return self.format != SWISS_SYSTEM or self.matches[-1][ROUND] >= self.total_rounds
+
+    @property
+    def current_round(self) -> int:
+        """Earliest round with an undecided match (total_rounds once complete)"""
+        return min((row[ROUND] for row in self.matches if row[WINNER] is None), default=self.total_rounds)
+
+    def podium(self) -> Dict[str, Optional[int]]:
+        """Champion and runner-up once the bracket is complete"""
+        if not self.is_complete:
+            return {"champion": None, "runner_up": None}
+        if self.format in (ROUND_ROBIN, SWISS_SYSTEM):
+            table = self.standings()
+            return {"champion": table[0]["user_id"], "runner_up": table[1]["user_id"] if len(table) > 1 else None}
+
+        final = self.matches[-1]
+        if self.format == DOUBLE_ELIMINATION and BYE in (final[P1], final[P2]):
+            final = self.matches[-2]
+        runner_up = final[P2] if final[WINNER] == final[P1] else final[P1]
+        return {"champion": final[WINNER], "runner_up": runner_up if runner_up != BYE else None}
+
+    # === Swiss pairing ===
+
+    def pair_swiss_round(self) -> List[int]:
+        """
+        Pair the next Swiss round by score, then seed, avoiding rematches.
+
+        Players are taken in ranking order and matched with the highest
+        ranked opponent they have not met yet; with an odd field the lowest
+        ranked player without a bye sits out and scores the win.
+        """
+        last_round = self.matches[-1][ROUND] if self.matches else 0
+        if last_round >= self.total_rounds:
+            return []
+
+        played = set()
+        had_bye = set()
+        for row in self.matches:
+            if row[P2] == BYE:
+                had_bye.add(row[P1])
+            else:
+                played.add((row[P1], row[P2]))
+                played.add((row[P2], row[P1]))
+
+        rank = {user_id: seed for seed, user_id in enumerate(self.seeds)}
+        records = self.records()
+        order = sorted(self.seeds, key=lambda user_id: (-records[user_id][0], rank[user_id]))
+
+        round_number = last_round + 1
+        first = len(self.matches)
+        if len(order) % 2:
+            sitting_out = next((user_id for user_id in reversed(order) if user_id not in had_bye), order[-1])
+            order.remove(sitting_out)
+        else:
+            sitting_out = None
+
+        number = 0
+        while order:
+            player = order.pop(0)
+            opponent_index = next((i for i, other in enumerate(order) if (player, other) not in played), 0)
+            number += 1
+            self.matches.append([f"R{round_number}-{number}", round_number, player, order.pop(opponent_index)] + [None] * 5)
+        if sitting_out is not None:
+            number += 1
+            self.matches.append([f"R{round_number}-{number}", round_number, sitting_out, BYE, sitting_out] + [None] * 4)
+
+        if self._index is not None:
+            self._index.update({self.matches[position][LABEL]: position for position in range(first, len(self.matches))})
+        if self._open is not None:
+            self._open[round_number] = number - (sitting_out is not None)
+        return [position for position in range(first, len(self.matches)) if self._is_ready(self.matches[position])]
+
+
+# === Builders ===
+
+
+def _match(label: str, round_number: int) -> list:
+    return [label, round_number, None, None, None, None, None, None, None]
+
+
+def _field(seeds: Sequence[int]):
+    if len(seeds) < 2:
+        raise ValueError("A bracket needs at least two players")
+    if len(set(seeds)) != len(seeds) or BYE in seeds:
+        raise ValueError("Seeds must be distinct, non-zero user ids")
+    rounds = math.ceil(math.log2(len(seeds)))
+    size = 1 << rounds
+    by_seed = list(seeds) + [BYE] * (size - len(seeds))
+    return rounds, size, [by_seed[seed - 1] for seed in seed_order(size)]
+
+
+def _winners_rounds(matches: List[list], rounds: int, size: int, slots: List[int], prefix: str) -> List[int]:
+    """Lay out the main bracket; returns the first position of each round (plus the end)"""
+    starts = []
+    for round_number in range(1, rounds + 1):
+        starts.append(len(matches))
+        for number in range(size >> round_number):
+            matches.append(_match(f"{prefix}{round_number}-{number + 1}", round_number))
+    starts.append(len(matches))
+
+    for round_number in range(1, rounds):
+        for number in range(size >> round_number):
+            row = matches[starts[round_number - 1] + number]
+            row[NEXT], row[NEXT_SLOT] = starts[round_number] + number // 2, number % 2
+    for number in range(size >> 1):
+        matches[number][P1], matches[number][P2] = slots[2 * number], slots[2 * number + 1]
+    return starts
+
+
+def build_single_elimination(seeds: Sequence[int]) -> Bracket:
+    """Seeds in order (best first); the top seeds receive the byes of a non-power-of-two field"""
+    rounds, size, slots = _field(seeds)
+    matches: List[list] = []
+    _winners_rounds(matches, rounds, size, slots, "R")
+    bracket = Bracket(SINGLE_ELIMINATION, list(seeds), matches, rounds)
+    bracket._settle_byes(range(size >> 1))
+    return bracket
+
+
+def build_double_elimination(seeds: Sequence[int]) -> Bracket:
+    """
+    Winners bracket, losers bracket and a grand final with a reset match.
+
+    Round numbers are play order: losers round l runs with round l + 1 of
+    the winners side, the grand final after the losers final. Losers from
+    alternate winners rounds enter the losers bracket in reverse order to
+    delay rematches.
+    """
+    rounds, size, slots = _field(seeds)
+    matches: List[list] = []
+    winners = _winners_rounds(matches, rounds, size, slots, "W")
+
+    losers_rounds = 2 * (rounds - 1)
+    losers = []
+    for losers_round in range(1, losers_rounds + 1):
+        losers.append(len(matches))
+        count = size >> (losers_round // 2 + 1 + losers_round % 2)
+        for number in range(count):
+            matches.append(_match(f"L{losers_round}-{number + 1}", losers_round + 1))
+    grand_final = len(matches)
+    matches.append(_match("GF1", 2 * rounds))
+    matches.append(_match("GF2", 2 * rounds + 1))
+
+    def link(position: int, target: int, slot: int, loser: bool = False):
+        row = matches[position]
+        if loser:
+            row[LOSER_NEXT], row[LOSER_SLOT] = target, slot
+        else:
+            row[NEXT], row[NEXT_SLOT] = target, slot
+
+    link(winners[rounds - 1], grand_final, 0)
+    for round_number in range(1, rounds + 1):
+        count = size >> round_number
+        for number in range(count):
+            position = winners[round_number - 1] + number
+            if rounds == 1:
+                link(position, grand_final, 1, loser=True)
+            elif round_number == 1:
+                link(position, losers[0] + number // 2, number % 2, loser=True)
+            else:
+                entry = count - 1 - number if round_number % 2 == 0 else number
+                link(position, losers[2 * (round_number - 1) - 1] + entry, 1, loser=True)
+
+    for losers_round in range(1, losers_rounds + 1):
+        start = losers[losers_round - 1]
+        end = losers[losers_round] if losers_round < losers_rounds else grand_final
+        for number in range(end - start):
+            if losers_round == losers_rounds:
+                link(start + number, grand_final, 1)
+            elif losers_round % 2:
+                link(start + number, losers[losers_round] + number, 0)
+            else:
+                link(start + number, losers[losers_round] + number // 2, number % 2)
+
+    link(grand_final, grand_final + 1, 0)
+    link(grand_final, grand_final + 1, 1, loser=True)
+
+    bracket = Bracket(DOUBLE_ELIMINATION, list(seeds), matches, 2 * rounds + 1)
+    bracket._settle_byes(range(size >> 1))
+    return bracket
+
+
+def build_round_robin(seeds: Sequence[int]) -> Bracket:
+    """Every pairing once, by the circle method: n - 1 rounds (n for an odd field, each player sitting one out)"""
+    if len(seeds) < 2:
+        raise ValueError("A bracket needs at least two players")
+    players = list(seeds) + ([BYE] if len(seeds) % 2 else [])
+    count = len(players)
+    fixed, rotating = players[0], players[1:]
+
+    matches: List[list] = []
+    for round_index in range(count - 1):
+        lineup = [fixed] + rotating
+        number = 0
+        for i in range(count // 2):
+            home, away = lineup[i], lineup[count - 1 - i]
+            if BYE in (home, away):
+                continue
+            # Alternate the fixed player's side so home and away even out
+            if i == 0 and round_index % 2:
+                home, away = away, home
+            number += 1
+            row = _match(f"R{round_index + 1}-{number}", round_index + 1)
+            row[P1], row[P2] = home, away
+            matches.append(row)
+        rotating = rotating[-1:] + rotating[:-1]
+    return Bracket(ROUND_ROBIN, list(seeds), matches, count - 1)
+
+
+def build_swiss(seeds: Sequence[int], rounds: Optional[int] = None) -> Bracket:
+    """First round top half against bottom half by seed; later rounds are paired as results come in"""
+    if len(seeds) < 2:
+        raise ValueError("A bracket needs at least two players")
+    total_rounds = rounds or max(1, math.ceil(math.log2(len(seeds))))
+    bracket = Bracket(SWISS_SYSTEM, list(seeds), [], min(total_rounds, len(seeds) - 1 + len(seeds) % 2))
+
+    half = len(seeds) // 2
+    for number in range(half):
+        row = _match(f"R1-{number + 1}", 1)
+        row[P1], row[P2] = seeds[number], seeds[number + half]
+        bracket.matches.append(row)
+    if len(seeds) % 2:
+        bracket.matches.append([f"R1-{half + 1}", 1, seeds[-1], BYE, seeds[-1]] + [None] * 4)
+    return bracket
+
+
+BUILDERS = {
+    SINGLE_ELIMINATION: build_single_elimination,
+    DOUBLE_ELIMINATION: build_double_elimination,
+    ROUND_ROBIN: build_round_robin,
+    SWISS_SYSTEM: build_swiss,
+}
+
+
+def build_bracket(format: str, seeds: Sequence[int], **options) -> Bracket:
+    """Bracket for a tournament format value; leagues are played as a round robin"""
+    builder = BUILDERS.get(ROUND_ROBIN if format == "league" else format)
+    if builder is None:
+        raise ValueError(f"Unsupported tournament format: {format}")
+    return builder(seeds, **options)
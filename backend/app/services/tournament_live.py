@@ -0,0 +1,302 @@
+"""
+Tournament Live State
+One cached snapshot per tournament for pollers, kept current on every change and pushed as deltas over Socket.IO
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.api_response import dumps
+from app.core.database_production import get_redis
+from app.models.tournament import ParticipantStatus, Tournament, TournamentParticipant
+from app.models.user import User
+from app.services.notifications import notifications
+from app.services.tournament_brackets import Bracket
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on a snapshot's life; changes replace it long before this during an event
+LIVE_STATE_TTL = int(os.getenv("TOURNAMENT_LIVE_STATE_TTL", "3600"))
+# Version counters outlive snapshots so a rebuilt snapshot continues the sequence
+VERSION_TTL = 7 * 24 * 3600
+
+# Store a rebuilt snapshot only if no change was recorded while it was being built
+STORE_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then return 0 end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'etag', ARGV[2], 'details', ARGV[3], 'bracket', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class TournamentLiveState:
+    """
+    Serialized tournament views shared by every poller, with change deltas.
+
+    A snapshot holds the tournament summary, active participants, bracket
+    and standings, pre-serialized as the `details` and `bracket` views
+    under one content ETag. Polls are served from Redis (a conditional
+    poll reads only the ETag); the database is read only to rebuild.
+
+    Every committed change bumps a per-tournament version and emits a
+    `tournament_update` delta carrying it to the room tournament_<id>, so
+    clients apply deltas and refetch (with If-None-Match) on a gap.
+    Bracket and status changes rebuild the snapshot at once; registration
+    changes, which come in rushes, drop it for the next poll to rebuild.
+    A rebuild is stored only if the version did not move while it ran,
+    so a slow rebuild never overwrites newer state.
+    """
+
+    def __init__(self, ttl: int = LIVE_STATE_TTL):
+        self.ttl = ttl
+        self.prefix = "tournament_live:"
+        self._store = None
+        self._local: Dict[int, Tuple[float, int, Dict[str, Any]]] = {}
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "not_modified": 0,
+            "misses": 0,
+            "builds": 0,
+            "stale_builds": 0,
+            "changes": 0,
+            "errors": 0,
+        }
+
+    def _keys(self, tournament_id: int) -> Tuple[str, str]:
+        return f"{self.prefix}{tournament_id}", f"{self.prefix}{tournament_id}:v"
+
+    # === Reads ===
+
+    def get(
+        self, db: Session, tournament_id: int, view: str, if_none_match: Optional[str] = None
+    ) -> Optional[Tuple[str, Optional[bytes]]]:
+        """
+        (etag, serialized view) for a tournament, or (etag, None) when
+        If-None-Match still matches; None if the tournament does not exist.
+        """
+        entry = self._cached(tournament_id, view, if_none_match)
+        if entry is None:
+            self.stats["misses"] += 1
+            entry = self._rebuild(db, tournament_id)
+            if entry is None:
+                return None
+        else:
+            self.stats["hits"] += 1
+
+        if etag_matches(if_none_match, entry["etag"]):
+            self.stats["not_modified"] += 1
+            return entry["etag"], None
+        return entry["etag"], entry[view]
+
+    def _cached(self, tournament_id: int, view: str, if_none_match: Optional[str]) -> Optional[Dict[str, Any]]:
+        key, _ = self._keys(tournament_id)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                etag = redis.hget(key, "etag")
+                if etag is None:
+                    return None
+                etag = etag.decode()
+                if etag_matches(if_none_match, etag):
+                    return {"etag": etag}
+                etag, body = redis.hmget(key, "etag", view)
+                return {"etag": etag.decode(), view: body} if etag and body else None
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Tournament live state read failed: {e}")
+                return None
+
+        with self._lock:
+            cached = self._local.get(tournament_id)
+            if cached is None or cached[0] < time.time():
+                return None
+            return cached[2]
+
+    # === Writes ===
+
+    def changed(self, db: Session, tournament_id: int, change: Dict[str, Any], rebuild: bool = True) -> Dict[str, Any]:
+        """
+        Record a committed change and return its delta notification.
+
+        `change` is the delta payload ({"type": ..., ...}). With `rebuild`
+        the snapshot is rebuilt from `db` right away, otherwise it is
+        dropped and rebuilt by the next poll.
+        """
+        self.stats["changes"] += 1
+        version = self._bump(tournament_id, drop=not rebuild)
+        payload = {"tournament_id": tournament_id, "version": version, **change}
+        if rebuild:
+            entry = self._rebuild(db, tournament_id)
+            if entry is not None:
+                payload["etag"] = entry["etag"]
+        return {"event": "tournament_update", "payload": payload, "room": f"tournament_{tournament_id}"}
+
+    def publish(self, db: Session, tournament_id: int, change: Dict[str, Any], rebuild: bool = True):
+        """changed() and send the delta right away (see NotificationFanOut.dispatch)"""
+        try:
+            notifications.dispatch([self.changed(db, tournament_id, change, rebuild)])
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ Tournament {tournament_id} live update failed: {e}")
+
+    def _bump(self, tournament_id: int, drop: bool) -> int:
+        key, version_key = self._keys(tournament_id)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                pipe = redis.pipeline()
+                pipe.incr(version_key)
+                pipe.expire(version_key, VERSION_TTL)
+                if drop:
+                    pipe.delete(key)
+                return int(pipe.execute()[0])
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Tournament live state version bump failed: {e}")
+
+        with self._lock:
+            version = self._versions.get(tournament_id, 0) + 1
+            self._versions[tournament_id] = version
+            if drop:
+                self._local.pop(tournament_id, None)
+            return version
+
+    def _version(self, tournament_id: int) -> int:
+        redis = get_redis()
+        if redis is not None:
+            try:
+                return int(redis.get(self._keys(tournament_id)[1]) or 0)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Tournament live state version read failed: {e}")
+        with self._lock:
+            return self._versions.get(tournament_id, 0)
+
+    def _rebuild(self, db: Session, tournament_id: int) -> Optional[Dict[str, Any]]:
+        """Build both views from the database and store them if still current"""
+        # Read the version first: a change committed during the build bumps it and voids the store
+        version = self._version(tournament_id)
+        snapshot = self.build(db, tournament_id, version)
+        if snapshot is None:
+            return None
+        self.stats["builds"] += 1
+
+        summary = snapshot["tournament"]
+        details = dumps(snapshot)
+        entry = {
+            "etag": f'"{hashlib.blake2b(details, digest_size=16).hexdigest()}"',
+            "details": details,
+            "bracket": dumps({
+                "tournament_id": tournament_id,
+                "version": version,
+                "format": summary["format"],
+                "current_round": snapshot["current_round"],
+                "total_rounds": snapshot["total_rounds"],
+                "bracket": snapshot["bracket"],
+            }),
+        }
+        if not self._save(tournament_id, version, entry, self._expires_in(summary)):
+            self.stats["stale_builds"] += 1
+        return entry
+
+    def _save(self, tournament_id: int, version: int, entry: Dict[str, Any], ttl: int) -> bool:
+        key, version_key = self._keys(tournament_id)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                if self._store is None:
+                    self._store = redis.register_script(STORE_SCRIPT)
+                return bool(self._store(
+                    keys=[key, version_key],
+                    args=[str(version), entry["etag"], entry["details"], entry["bracket"], ttl],
+                ))
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Tournament live state store failed: {e}")
+                return False
+
+        with self._lock:
+            if self._versions.get(tournament_id, 0) != version:
+                return False
+            self._local[tournament_id] = (time.time() + ttl, version, entry)
+            return True
+
+    def _expires_in(self, summary: Dict[str, Any]) -> int:
+        """TTL that ends at the next deadline changing the time-based flags (registration open, can start)"""
+        ttl = self.ttl
+        now = datetime.utcnow()
+        for moment in (summary.get("registration_deadline"), summary.get("start_time")):
+            if moment and moment > now:
+                ttl = min(ttl, int((moment - now).total_seconds()) + 1)
+        return max(ttl, 1)
+
+    # === Building ===
+
+    @staticmethod
+    def build(db: Session, tournament_id: int, version: int = 0) -> Optional[Dict[str, Any]]:
+        """Snapshot of a tournament: summary, active participants, bracket and standings (two queries)"""
+        from app.services.tournament_service import TournamentService
+
+        row = (
+            TournamentService.summary_query(db)
+            .add_columns(Tournament.current_round, Tournament.total_rounds, Tournament.bracket_data)
+            .filter(Tournament.id == tournament_id)
+            .first()
+        )
+        if row is None:
+            return None
+        summary = TournamentService._summary(row)
+        current_round = summary.pop("current_round")
+        total_rounds = summary.pop("total_rounds")
+        bracket = summary.pop("bracket_data") or None
+
+        participants = [
+            participant._asdict()
+            for participant in db.query(
+                TournamentParticipant.user_id,
+                User.username,
+                User.level,
+                TournamentParticipant.status,
+                TournamentParticipant.seeding,
+                TournamentParticipant.registration_time,
+            )
+            .join(User, User.id == TournamentParticipant.user_id)
+            .filter(
+                TournamentParticipant.tournament_id == tournament_id,
+                TournamentParticipant.status != ParticipantStatus.WITHDREW,
+            )
+            .order_by(TournamentParticipant.registration_time, TournamentParticipant.id)
+        ]
+        return {
+            "version": version,
+            "tournament": summary,
+            "participants": participants,
+            "current_round": current_round,
+            "total_rounds": total_rounds,
+            "bracket": bracket,
+            "standings": Bracket.from_dict(bracket).standings() if bracket else [],
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "ttl": self.ttl, "local_snapshots": len(self._local)}
+
+
+# Global tournament live state
+tournament_live = TournamentLiveState()
@@ -0,0 +1,324 @@
+"""
+Tournament Registration Engine
+Seat claims and entry fees as conditional UPDATEs, safe under a registration rush without locking reads
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.database_production import get_redis
+from app.models.tournament import ParticipantStatus, Tournament, TournamentParticipant, TournamentStatus
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# How long a completed registration can be replayed by its idempotency key
+IDEMPOTENCY_TTL = int(os.getenv("TOURNAMENT_IDEMPOTENCY_TTL", str(24 * 3600)))
+# How long a claimed key blocks duplicates before the first request is presumed dead
+IDEMPOTENCY_CLAIM_SECONDS = 30
+
+
+class RegistrationError(ValueError):
+    """A refused registration or withdrawal; `code` is stable for clients, `status_code` for HTTP"""
+
+    def __init__(self, message: str, code: str, status_code: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.status_code = status_code
+
+
+class IdempotencyStore:
+    """
+    Results of completed requests by (user, key), with a claim for in-flight ones.
+
+    Redis when available, so retries landing on another instance replay
+    the same result; a small in-process map otherwise.
+    """
+
+    def __init__(self, prefix: str = "tournament_reg:idem:", max_local_entries: int = 10000):
+        self.prefix = prefix
+        self.max_local_entries = max_local_entries
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, user_id: int, key: str) -> str:
+        return f"{self.prefix}{user_id}:{key}"
+
+    def claim(self, user_id: int, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim the key for this request.
+
+        Returns None when claimed, the stored result when the request
+        already completed, or {"in_progress": True} while another attempt
+        holds the claim.
+        """
+        full_key = self._key(user_id, key)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                if redis.set(full_key, "pending", nx=True, ex=IDEMPOTENCY_CLAIM_SECONDS):
+                    return None
+                stored = redis.get(full_key)
+                if stored is None or stored in (b"pending", "pending"):
+                    return {"in_progress": True}
+                return json.loads(stored)
+            except Exception as e:
+                logger.warning(f"⚠️ Idempotency store unavailable, using local map: {e}")
+
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(full_key)
+            if entry is not None and entry[0] > now:
+                return entry[1] if entry[1] is not None else {"in_progress": True}
+            self._local[full_key] = (now + IDEMPOTENCY_CLAIM_SECONDS, None)
+            self._local.move_to_end(full_key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+        return None
+
+    def complete(self, user_id: int, key: str, result: Dict[str, Any]):
+        full_key = self._key(user_id, key)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                redis.set(full_key, json.dumps(result), ex=IDEMPOTENCY_TTL)
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Idempotency result not stored in Redis: {e}")
+        with self._lock:
+            self._local[full_key] = (time.time() + IDEMPOTENCY_TTL, result)
+
+    def release(self, user_id: int, key: str):
+        """Drop a claim after a failure so the client can retry"""
+        full_key = self._key(user_id, key)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                redis.delete(full_key)
+            except Exception:
+                pass
+        with self._lock:
+            self._local.pop(full_key, None)
+
+
+class RegistrationEngine:
+    """
+    Registers and withdraws participants without locking reads.
+
+    Every invariant is enforced by a single conditional UPDATE, so
+    concurrent requests can never overfill a tournament or overdraw a
+    balance:
+
+    - the entry fee is taken with `credits = credits - fee WHERE credits >= fee`
+      (the balance itself is the version checked);
+    - the seat is claimed with `current_participants + 1 WHERE
+      current_participants < max_participants` and registration still open;
+    - the participant row is guarded by the (tournament, user) unique
+      constraint.
+
+    A failed step rolls back the whole transaction. The seat claim runs
+    last, so the hot tournament row is locked only for the moment before
+    commit and registrations for one event queue on it as briefly as
+    possible.
+    """
+
+    def __init__(self, db: Session, idempotency: Optional[IdempotencyStore] = None):
+        self.db = db
+        self.idempotency = idempotency or idempotency_store
+
+    def register(self, tournament_id: int, user_id: int, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Register the user, charging the entry fee; replays the original result for a repeated key"""
+        if idempotency_key:
+            previous = self.idempotency.claim(user_id, f"register:{tournament_id}:{idempotency_key}")
+            if previous is not None:
+                if previous.get("in_progress"):
+                    raise RegistrationError("Registration is already being processed", "in_progress", 409)
+                return {**previous, "replayed": True}
+
+        try:
+            result = self._register(tournament_id, user_id)
+        except Exception:
+            self.db.rollback()
+            if idempotency_key:
+                self.idempotency.release(user_id, f"register:{tournament_id}:{idempotency_key}")
+            raise
+
+        if idempotency_key:
+            self.idempotency.complete(user_id, f"register:{tournament_id}:{idempotency_key}", result)
+        return result
+
+    def _register(self, tournament_id: int, user_id: int) -> Dict[str, Any]:
+        tournament = (
+            self.db.query(
+                Tournament.entry_fee_credits,
+                Tournament.min_level,
+                Tournament.max_level,
+                Tournament.current_participants,
+                Tournament.max_participants,
+            )
+            .filter(Tournament.id == tournament_id)
+            .first()
+        )
+        if tournament is None:
+            raise RegistrationError("Tournament not found", "not_found", 404)
+        fee = tournament.entry_fee_credits or 0
+
+        # Cheap early refusal once full; the seat claim below is what actually guarantees it
+        if tournament.current_participants >= tournament.max_participants:
+            raise RegistrationError("Tournament is full", "full", 409)
+
+        level = self.db.query(User.level).filter(User.id == user_id).scalar()
+        if level is None:
+            raise RegistrationError("User not found", "not_found", 404)
+        if level < (tournament.min_level or 1):
+            raise RegistrationError(f"Minimum level required: {tournament.min_level}", "level_too_low")
+        if tournament.max_level and level > tournament.max_level:
+            raise RegistrationError(f"Maximum level allowed: {tournament.max_level}", "level_too_high")
+
+        # Participant row first: the unique constraint stops a second concurrent request
+        now = datetime.utcnow()
+        reactivated = self.db.execute(
+            update(TournamentParticipant)
+            .where(
+                TournamentParticipant.tournament_id == tournament_id,
+                TournamentParticipant.user_id == user_id,
+                TournamentParticipant.status == ParticipantStatus.WITHDREW,
+            )
+            .values(status=ParticipantStatus.REGISTERED, registration_time=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not reactivated:
+            self.db.add(
+                TournamentParticipant(
+                    tournament_id=tournament_id,
+                    user_id=user_id,
+                    registration_time=now,
+                    status=ParticipantStatus.REGISTERED,
+                )
+            )
+            try:
+                self.db.flush()
+            except IntegrityError:
+                raise RegistrationError("User already registered", "already_registered", 409)
+
+        if fee:
+            charged = self.db.execute(
+                update(User)
+                .where(User.id == user_id, User.credits >= fee)
+                .values(credits=User.credits - fee)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not charged:
+                raise RegistrationError(f"Insufficient credits. Required: {fee}", "insufficient_credits")
+
+        seated = self.db.execute(
+            update(Tournament)
+            .where(
+                Tournament.id == tournament_id,
+                Tournament.status == TournamentStatus.REGISTRATION,
+                Tournament.registration_deadline > now,
+                Tournament.current_participants < Tournament.max_participants,
+            )
+            .values(
+                current_participants=Tournament.current_participants + 1,
+                prize_pool_credits=Tournament.prize_pool_credits + fee,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not seated:
+            self.db.rollback()
+            raise self._seat_refusal(tournament_id)
+
+        self.db.commit()
+        return self._result(tournament_id, user_id, fee, "registered")
+
+    def withdraw(self, tournament_id: int, user_id: int) -> Dict[str, Any]:
+        """Withdraw the user and refund the entry fee while registration is open"""
+        try:
+            status = self.db.query(Tournament.status).filter(Tournament.id == tournament_id).scalar()
+            if status is None:
+                raise RegistrationError("Tournament not found", "not_found", 404)
+            if status != TournamentStatus.REGISTRATION:
+                raise RegistrationError("Cannot withdraw after registration closes", "registration_closed")
+
+            withdrawn = self.db.execute(
+                update(TournamentParticipant)
+                .where(
+                    TournamentParticipant.tournament_id == tournament_id,
+                    TournamentParticipant.user_id == user_id,
+                    TournamentParticipant.status == ParticipantStatus.REGISTERED,
+                )
+                .values(status=ParticipantStatus.WITHDREW)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not withdrawn:
+                raise RegistrationError("Participant not found or already withdrawn", "not_registered")
+
+            fee = self.db.query(Tournament.entry_fee_credits).filter(Tournament.id == tournament_id).scalar() or 0
+            if fee:
+                self.db.execute(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(credits=User.credits + fee)
+                    .execution_options(synchronize_session=False)
+                )
+            self.db.execute(
+                update(Tournament)
+                .where(Tournament.id == tournament_id)
+                .values(
+                    current_participants=Tournament.current_participants - 1,
+                    prize_pool_credits=Tournament.prize_pool_credits - fee,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return self._result(tournament_id, user_id, fee, "withdrew")
+
+    def _seat_refusal(self, tournament_id: int) -> RegistrationError:
+        """Why the seat claim matched no row (read after rollback, for the message only)"""
+        row = (
+            self.db.query(
+                Tournament.status,
+                Tournament.registration_deadline,
+                Tournament.current_participants,
+                Tournament.max_participants,
+            )
+            .filter(Tournament.id == tournament_id)
+            .first()
+        )
+        if row.status != TournamentStatus.REGISTRATION or row.registration_deadline <= datetime.utcnow():
+            return RegistrationError("Registration is closed", "registration_closed")
+        return RegistrationError("Tournament is full", "full", 409)
+
+    def _result(self, tournament_id: int, user_id: int, fee: int, status: str) -> Dict[str, Any]:
+        participants, max_participants = (
+            self.db.query(Tournament.current_participants, Tournament.max_participants)
+            .filter(Tournament.id == tournament_id)
+            .one()
+        )
+        return {
+            "tournament_id": tournament_id,
+            "user_id": user_id,
+            "status": status,
+            "amount": fee,
+            "current_participants": participants,
+            "is_full": participants >= max_participants,
+            "credits": self.db.query(User.credits).filter(User.id == user_id).scalar(),
+        }
+
+
+# Global idempotency store
+idempotency_store = IdempotencyStore()
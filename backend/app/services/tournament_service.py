@@ -1,11 +1,13 @@
 # === backend/app/services/tournament_service.py ===
 # JAVÍTOTT Tournament Service - cancel_tournament metódussal
 
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Iterable
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
-import math
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, desc, insert, tuple_
+import base64
+import json
+import logging
 import random
 import uuid
 
@@ -21,6 +23,48 @@ from ..models.tournament import (
 )
 from ..models.user import User
 from ..models.location import Location, GameDefinition
+from ..core.smart_cache import smart_cache
+from .bulk_cancellation import BulkCancellationService
+from .notifications import notifications
+from .tournament_brackets import Bracket
+from .tournament_live import tournament_live
+from .tournament_registration import RegistrationEngine
+
+logger = logging.getLogger(__name__)
+
+# Statuses shown in public listings (drafts stay with their organizer)
+LISTED_STATUSES = [
+    TournamentStatus.REGISTRATION,
+    TournamentStatus.REGISTRATION_CLOSED,
+    TournamentStatus.IN_PROGRESS,
+    TournamentStatus.COMPLETED,
+    TournamentStatus.CANCELLED,
+]
+
+
+def encode_cursor(start_time: datetime, tournament_id: int) -> str:
+    """Opaque keyset cursor for the listing order (start_time, id)"""
+    raw = json.dumps([start_time.isoformat(), tournament_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        start_time, tournament_id = json.loads(raw)
+        return datetime.fromisoformat(start_time), int(tournament_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def invalidate_tournament_caches(tournament_id: Optional[int] = None, listing: bool = True):
+    """Drop cached listing pages and/or one tournament's cached views"""
+    tags = ["tournaments"] if listing else []
+    if tournament_id is not None:
+        tags.append(f"tournament:{tournament_id}")
+    if tags:
+        smart_cache.invalidate_tags(*tags)
 
 
 class TournamentService:
@@ -31,25 +75,35 @@ class TournamentService:
 
     def get_tournaments(
         self,
-        status: Optional[str] = None,
+        status: Optional[Iterable[str]] = None,
         tournament_type: Optional[str] = None,
+        game_type: Optional[str] = None,
         location_id: Optional[int] = None,
         date_from: Optional[str] = None,
         date_to: Optional[str] = None,
         limit: int = 20,
         offset: int = 0,
-    ) -> List[Tournament]:
-        """Get tournaments with filtering"""
-
-        query = self.db.query(Tournament)
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Listing summaries in (start_time, id) order, with the next page's cursor.
+
+        One query joins location and organizer names; participant counts are
+        the denormalized column, so no per-row counting. Paging is keyset
+        based: pass the returned cursor to continue after the last row
+        (`offset` only applies without a cursor).
+        """
+        query = self.summary_query(self.db).filter(Tournament.is_public.isnot(False))
 
         # Apply filters
-        if status:
-            query = query.filter(Tournament.status == status)
+        query = query.filter(Tournament.status.in_(list(status) if status else LISTED_STATUSES))
 
         if tournament_type:
             query = query.filter(Tournament.tournament_type == tournament_type)
 
+        if game_type:
+            query = query.filter(Tournament.game_type == game_type)
+
         if location_id:
             query = query.filter(Tournament.location_id == location_id)
 
@@ -67,7 +121,69 @@ class TournamentService:
             except:
                 pass  # Skip invalid date
 
-        return query.order_by(Tournament.start_time).offset(offset).limit(limit).all()
+        if cursor:
+            query = query.filter(tuple_(Tournament.start_time, Tournament.id) > decode_cursor(cursor))
+        elif offset:
+            query = query.offset(offset)
+
+        # One extra row tells whether another page exists
+        rows = query.order_by(Tournament.start_time, Tournament.id).limit(limit + 1).all()
+        next_cursor = encode_cursor(rows[limit - 1].start_time, rows[limit - 1].id) if len(rows) > limit else None
+        return [self._summary(row) for row in rows[:limit]], next_cursor
+
+    @staticmethod
+    def summary_query(db: Session):
+        """Tournament summaries with location, organizer and winner names in one joined query"""
+        winner = aliased(User)
+        return (
+            db.query(
+                Tournament.id,
+                Tournament.tournament_id,
+                Tournament.name,
+                Tournament.description,
+                Tournament.tournament_type,
+                Tournament.game_type,
+                Tournament.format,
+                Tournament.status,
+                Tournament.location_id,
+                Location.name.label("location_name"),
+                Tournament.start_time,
+                Tournament.end_time,
+                Tournament.registration_deadline,
+                Tournament.min_participants,
+                Tournament.max_participants,
+                Tournament.current_participants,
+                Tournament.entry_fee_credits,
+                Tournament.prize_pool_credits,
+                Tournament.min_level,
+                Tournament.max_level,
+                Tournament.organizer_id,
+                User.username.label("organizer_username"),
+                Tournament.winner_id,
+                winner.username.label("winner_username"),
+                Tournament.created_at,
+            )
+            .outerjoin(Location, Location.id == Tournament.location_id)
+            .outerjoin(User, User.id == Tournament.organizer_id)
+            .outerjoin(winner, winner.id == Tournament.winner_id)
+        )
+
+    @staticmethod
+    def _summary(row) -> Dict:
+        summary = row._asdict()
+        now = datetime.utcnow()
+        summary["is_full"] = summary["current_participants"] >= summary["max_participants"]
+        summary["is_registration_open"] = (
+            summary["status"] == TournamentStatus.REGISTRATION
+            and now < summary["registration_deadline"]
+            and not summary["is_full"]
+        )
+        summary["can_start"] = (
+            summary["current_participants"] >= summary["min_participants"]
+            and summary["status"] in (TournamentStatus.REGISTRATION, TournamentStatus.REGISTRATION_CLOSED)
+            and now >= summary["start_time"]
+        )
+        return summary
 
     def get_tournament(self, tournament_id: int) -> Optional[Tournament]:
         """Get single tournament by ID"""
@@ -117,10 +233,10 @@ class TournamentService:
             min_level=tournament_data.get("min_level", 1),
             max_level=tournament_data.get("max_level"),
             entry_fee_credits=tournament_data.get("entry_fee_credits", 0),
-            entry_requirements=tournament_data.get("entry_requirements", {}),
+            skill_requirements=tournament_data.get("entry_requirements", {}),
             prize_distribution=tournament_data.get("prize_distribution", {"1st": 100}),
             organizer_id=organizer_id,
-            settings=tournament_data.get("settings", {}),
+            rules=tournament_data.get("settings", {}),
             status=TournamentStatus.REGISTRATION,
         )
 
@@ -128,94 +244,40 @@ class TournamentService:
         self.db.add(tournament)
         self.db.commit()
         self.db.refresh(tournament)
+        invalidate_tournament_caches()
 
         return tournament
 
-    def register_participant(self, tournament_id: int, user_id: int) -> bool:
-        """Register user for tournament"""
-
-        tournament = self.get_tournament(tournament_id)
-        if not tournament:
-            raise ValueError("Tournament not found")
-
-        if not tournament.is_registration_open:
-            raise ValueError("Registration is closed")
-
-        if tournament.is_full:
-            raise ValueError("Tournament is full")
-
-        # Check if user already registered
-        existing = (
-            self.db.query(TournamentParticipant)
-            .filter(
-                and_(
-                    TournamentParticipant.tournament_id == tournament_id,
-                    TournamentParticipant.user_id == user_id,
-                    TournamentParticipant.status != ParticipantStatus.WITHDREW,
-                )
-            )
-            .first()
-        )
-
-        if existing:
-            raise ValueError("User already registered")
-
-        # Check user credits
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user.credits < tournament.entry_fee_credits:
-            raise ValueError("Insufficient credits")
-
-        # Deduct credits
-        user.credits -= tournament.entry_fee_credits
-
-        # Create participant record
-        participant = TournamentParticipant(
-            tournament_id=tournament_id,
-            user_id=user_id,
-            registration_time=datetime.now(),
-            status=ParticipantStatus.REGISTERED,
-            entry_fee_paid=tournament.entry_fee_credits,
-        )
-
-        self.db.add(participant)
-        self.db.commit()
-
-        return True
-
-    def withdraw_participant(self, tournament_id: int, user_id: int) -> bool:
-        """Withdraw user from tournament"""
-
-        participant = (
-            self.db.query(TournamentParticipant)
-            .filter(
-                and_(
-                    TournamentParticipant.tournament_id == tournament_id,
-                    TournamentParticipant.user_id == user_id,
-                    TournamentParticipant.status == ParticipantStatus.REGISTERED,
-                )
-            )
-            .first()
+    def register_participant(
+        self, tournament_id: int, user_id: int, idempotency_key: Optional[str] = None
+    ) -> Dict:
+        """Register user for tournament (see RegistrationEngine for the concurrency guarantees)"""
+        result = RegistrationEngine(self.db).register(tournament_id, user_id, idempotency_key)
+        if not result.get("replayed"):
+            # Listing pages only change visibly when the tournament fills up
+            invalidate_tournament_caches(tournament_id, listing=result["is_full"])
+            tournament_live.publish(self.db, tournament_id, {
+                "type": "participant_joined",
+                "user_id": user_id,
+                "current_participants": result["current_participants"],
+            }, rebuild=False)
+        return result
+
+    def withdraw_participant(self, tournament_id: int, user_id: int) -> Dict:
+        """Withdraw user from tournament, refunding the entry fee"""
+        result = RegistrationEngine(self.db).withdraw(tournament_id, user_id)
+        invalidate_tournament_caches(
+            tournament_id, listing=result["current_participants"] + 1 >= self._max_participants(tournament_id)
         )
+        tournament_live.publish(self.db, tournament_id, {
+            "type": "participant_left",
+            "user_id": user_id,
+            "current_participants": result["current_participants"],
+        }, rebuild=False)
+        return result
 
-        if not participant:
-            raise ValueError("Participant not found or already withdrawn")
-
-        # Check withdrawal policy
-        tournament = self.get_tournament(tournament_id)
-        if tournament.status != TournamentStatus.REGISTRATION:
-            raise ValueError("Cannot withdraw after registration closes")
-
-        # Refund credits
-        user = self.db.query(User).filter(User.id == user_id).first()
-        user.credits += participant.entry_fee_paid
-
-        # Update participant status
-        participant.status = ParticipantStatus.WITHDREW
-        participant.withdrawal_time = datetime.now()
-
-        self.db.commit()
-
-        return True
+    def _max_participants(self, tournament_id: int) -> int:
+        return self.db.query(Tournament.max_participants).filter(Tournament.id == tournament_id).scalar() or 0
 
     def get_user_tournaments(
         self, user_id: int, status: Optional[str] = None
@@ -340,71 +402,27 @@ class TournamentLifecycleManager:
 
         tournament.status = TournamentStatus.IN_PROGRESS
         self.db.commit()
+        invalidate_tournament_caches(tournament_id)
+        tournament_live.publish(self.db, tournament_id, {"type": "status", "status": TournamentStatus.IN_PROGRESS.value})
 
         return True
 
     # 🔧 JAVÍTÁS: HIÁNYZÓ cancel_tournament METÓDUS HOZZÁADÁSA
     def cancel_tournament(self, tournament_id: int, reason: str) -> bool:
-        """Cancel a tournament and process refunds"""
+        """Cancel a tournament and process refunds (see BulkCancellationService)"""
         try:
-            tournament = (
-                self.db.query(Tournament).filter(Tournament.id == tournament_id).first()
-            )
-
-            if not tournament:
-                return False
-
-            # Check if tournament can be cancelled
-            if tournament.status in [
-                TournamentStatus.COMPLETED,
-                TournamentStatus.CANCELLED,
-            ]:
-                return False
-
-            # Get all participants for refund processing
-            participants = (
-                self.db.query(TournamentParticipant)
-                .filter(
-                    and_(
-                        TournamentParticipant.tournament_id == tournament_id,
-                        TournamentParticipant.status.in_(
-                            [ParticipantStatus.REGISTERED, ParticipantStatus.CONFIRMED]
-                        ),
-                    )
-                )
-                .all()
-            )
-
-            # Process refunds
-            for participant in participants:
-                user = (
-                    self.db.query(User).filter(User.id == participant.user_id).first()
-                )
-                if user and hasattr(participant, "entry_fee_paid"):
-                    # Refund entry fee
-                    user.credits += participant.entry_fee_paid
-                    # Update participant status
-                    participant.status = ParticipantStatus.WITHDREW
-                    participant.withdrawal_time = datetime.now()
-
-            # Cancel the tournament
-            tournament.status = TournamentStatus.CANCELLED
-            tournament.updated_at = datetime.now()
-
-            # Add cancellation reason to settings
-            if not tournament.settings:
-                tournament.settings = {}
-            tournament.settings["cancellation_reason"] = reason
-            tournament.settings["cancelled_at"] = datetime.now().isoformat()
-
-            self.db.commit()
-            return True
-
+            result = BulkCancellationService(self.db).cancel_tournament(tournament_id, reason)
+        except ValueError as e:
+            logger.warning(f"⚠️ Tournament {tournament_id} not cancelled: {e}")
+            return False
         except Exception as e:
             self.db.rollback()
-            print(f"Error cancelling tournament: {e}")
+            logger.error(f"❌ Error cancelling tournament {tournament_id}: {e}")
             return False
 
+        notifications.dispatch(result["notifications"])
+        return True
+
     def complete_tournament(
         self, tournament_id: int, winner_id: int, final_standings: List[Dict]
     ) -> bool:
@@ -421,6 +439,10 @@ class TournamentLifecycleManager:
         tournament.final_standings = final_standings
 
         self.db.commit()
+        invalidate_tournament_caches(tournament_id)
+        tournament_live.publish(self.db, tournament_id, {
+            "type": "status", "status": TournamentStatus.COMPLETED.value, "winner_id": winner_id
+        })
 
         return True
 
@@ -435,15 +457,31 @@ class TournamentLifecycleManager:
     ) -> bool:
         """Submit match result"""
         try:
+            tournament_id = (
+                self.db.query(TournamentMatch.tournament_id)
+                .filter(TournamentMatch.id == match_id)
+                .scalar()
+            )
+            if tournament_id is None:
+                raise ValueError("Match not found")
+
+            # Results of one tournament rewrite its bracket JSON: lock the tournament, then the match,
+            # so concurrent results apply one after another and a match is decided only once
+            tournament = (
+                self.db.query(Tournament)
+                .filter(Tournament.id == tournament_id)
+                .populate_existing()
+                .with_for_update()
+                .one()
+            )
             match = (
                 self.db.query(TournamentMatch)
                 .filter(TournamentMatch.id == match_id)
-                .first()
+                .populate_existing()
+                .with_for_update()
+                .one()
             )
 
-            if not match:
-                raise ValueError("Match not found")
-
             if match.status != MatchStatus.SCHEDULED:
                 raise ValueError("Match cannot be updated")
 
@@ -458,7 +496,14 @@ class TournamentLifecycleManager:
             match.status = MatchStatus.COMPLETED
             match.completed_at = datetime.now()
 
+            ready = BracketService(self.db).apply_result(tournament, match, winner_id)
+            change = BracketService.result_change(tournament, match, ready)
+
             self.db.commit()
+            invalidate_tournament_caches(
+                match.tournament_id, listing=change["status"] == TournamentStatus.COMPLETED.value
+            )
+            tournament_live.publish(self.db, match.tournament_id, change)
             return True
 
         except Exception as e:
@@ -507,65 +552,137 @@ class TournamentAnalyticsService:
         }
 
 
-# === SINGLE ELIMINATION SERVICE ===
+# === BRACKET SERVICE ===
 
 
-class SingleEliminationService:
-    """Single elimination tournament bracket management"""
+class BracketService:
+    """Bracket generation and result recording for every tournament format"""
 
     def __init__(self, db: Session):
         self.db = db
 
-    def generate_bracket(self, tournament_id: int) -> bool:
-        """Generate single elimination bracket"""
+    def generate_bracket(self, tournament_id: int, randomize: bool = False) -> Dict[str, Any]:
+        """Seed the active participants, store the bracket and schedule the playable matches"""
+        # Locked so two concurrent generations can't both find the bracket empty
+        tournament = (
+            self.db.query(Tournament)
+            .filter(Tournament.id == tournament_id)
+            .populate_existing()
+            .with_for_update()
+            .first()
+        )
+        if not tournament:
+            raise ValueError("Tournament not found")
+        if tournament.bracket_data:
+            raise ValueError("Bracket already generated")
+
         participants = (
-            self.db.query(TournamentParticipant)
+            self.db.query(TournamentParticipant.id, TournamentParticipant.user_id)
             .filter(
-                and_(
-                    TournamentParticipant.tournament_id == tournament_id,
-                    TournamentParticipant.status == ParticipantStatus.REGISTERED,
-                )
+                TournamentParticipant.tournament_id == tournament_id,
+                TournamentParticipant.status.in_([ParticipantStatus.REGISTERED, ParticipantStatus.CONFIRMED]),
+            )
+            .order_by(
+                TournamentParticipant.seeding.is_(None),
+                TournamentParticipant.seeding,
+                TournamentParticipant.registration_time,
+                TournamentParticipant.id,
             )
             .all()
         )
-
         if len(participants) < 2:
-            return False
-
-        # Create bracket structure
-        bracket_data = self._create_bracket_structure(participants)
-
-        # Create bracket record
-        bracket = TournamentBracket(
-            tournament_id=tournament_id,
-            format=TournamentFormat.SINGLE_ELIMINATION,
-            structure=bracket_data,
-            current_round=1,
-            total_rounds=math.ceil(math.log2(len(participants))),
+            raise ValueError("At least two participants are needed")
+        if randomize:
+            random.shuffle(participants)
+
+        tournament.generate_bracket([participant.user_id for participant in participants])
+        bracket = Bracket.from_dict(tournament.bracket_data)
+        tournament.total_matches = bracket.match_count()
+        self.db.bulk_update_mappings(
+            TournamentParticipant,
+            [{"id": participant.id, "seeding": seed} for seed, participant in enumerate(participants, 1)],
         )
+        scheduled = self._schedule_matches(tournament, bracket, bracket.ready_matches())
 
-        self.db.add(bracket)
         self.db.commit()
-
-        return True
-
-    def _create_bracket_structure(
-        self, participants: List[TournamentParticipant]
-    ) -> Dict:
-        """Create bracket structure"""
-        # Shuffle participants for random seeding
-        shuffled = participants.copy()
-        random.shuffle(shuffled)
-
-        bracket = {
-            "participants": [
-                {"user_id": p.user_id, "seed": i + 1} for i, p in enumerate(shuffled)
-            ],
-            "rounds": [],
-            "matches": [],
+        invalidate_tournament_caches(tournament_id, listing=False)
+        tournament_live.publish(self.db, tournament_id, {
+            "type": "bracket_generated",
+            "total_rounds": bracket.total_rounds,
+            "scheduled_matches": scheduled,
+        })
+        logger.info(
+            f"🏆 {tournament.format.value} bracket generated for tournament {tournament_id}: "
+            f"{len(participants)} players, {len(bracket.matches)} matches, {scheduled} scheduled"
+        )
+        return {
+            "format": bracket.format,
+            "participants": len(participants),
+            "total_rounds": bracket.total_rounds,
+            "total_matches": tournament.total_matches,
+            "scheduled_matches": scheduled,
         }
 
-        return bracket
+    def apply_result(self, tournament: Tournament, match: TournamentMatch, winner_id: int) -> List[int]:
+        """Advance the bracket for a decided match and schedule what became playable (no commit)"""
+        if match.bracket_position is None or not tournament.bracket_data:
+            return []
+
+        ready = tournament.update_match_result(int(match.bracket_position), winner_id)
+        bracket = Bracket.from_dict(tournament.bracket_data)
+        self._schedule_matches(tournament, bracket, ready)
+        tournament.completed_matches = (tournament.completed_matches or 0) + 1
+
+        if bracket.is_complete:
+            podium = bracket.podium()
+            tournament.total_matches = tournament.completed_matches
+            tournament.winner_id = podium["champion"]
+            tournament.runner_up_id = podium["runner_up"]
+            tournament.status = TournamentStatus.COMPLETED
+            tournament.completed_at = datetime.utcnow()
+        return ready
+
+    @staticmethod
+    def result_change(tournament: Tournament, match: TournamentMatch, ready: List[int]) -> Dict[str, Any]:
+        """Live-state delta for a decided match: the match, the matches it made playable and the progress"""
+        change = {
+            "type": "match_result",
+            "match_id": match.id,
+            "winner_id": match.winner_id,
+            "status": tournament.status.value,
+            "current_round": tournament.current_round,
+        }
+        if match.bracket_position is not None and tournament.bracket_data:
+            bracket = Bracket.from_dict(tournament.bracket_data)
+            change["match"] = bracket.match(int(match.bracket_position))
+            change["ready"] = [bracket.match(position) for position in ready]
+        if tournament.status == TournamentStatus.COMPLETED:
+            change["champion_id"] = tournament.winner_id
+        return change
+
+    def _schedule_matches(self, tournament: Tournament, bracket: Bracket, positions: List[int]) -> int:
+        """Insert match rows for playable bracket positions in one statement"""
+        if not positions:
+            return 0
+        slot = timedelta(
+            minutes=(tournament.match_duration_minutes or 30) + (tournament.break_duration_minutes or 10)
+        )
+        rows = []
+        for position in positions:
+            match = bracket.match(position)
+            rows.append({
+                "match_id": f"{tournament.tournament_id}_{match['label']}",
+                "tournament_id": tournament.id,
+                "round_number": match["round"],
+                "match_number": position + 1,
+                "bracket_position": str(position),
+                "player1_id": match["p1"],
+                "player2_id": match["p2"],
+                "scheduled_time": max(tournament.start_time + slot * (match["round"] - 1), datetime.utcnow()),
+                "status": MatchStatus.SCHEDULED,
+            })
+        self.db.execute(insert(TournamentMatch), rows)
+        return len(rows)
 
 
 # === TOURNAMENT TEMPLATE SERVICE ===
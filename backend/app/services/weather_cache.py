@@ -0,0 +1,247 @@
+"""
+Weather Cache
+Provider responses cached per geohash cell and time bucket, shared by every venue in the cell and every instance
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import logging
+
+from app.core.smart_cache import smart_cache
+
+logger = logging.getLogger(__name__)
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Seconds per time bucket, following how often the provider publishes new data:
+# current conditions ~10 minutes, forecast steps hourly, alerts ~15 minutes
+BUCKET_SECONDS = {
+    "current": 600,
+    "forecast": 3600,
+    "alerts": 900,
+}
+
+Fetcher = Callable[[float, float], Awaitable[Any]]
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int) -> str:
+    """Geohash of a coordinate (precision 5 is ~4.9 km, 6 is ~1.2 km)"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        span, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def geohash_center(geohash: str) -> Tuple[float, float]:
+    """Centre (latitude, longitude) of a geohash cell"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            span = lon_range if even else lat_range
+            middle = (span[0] + span[1]) / 2
+            if (value >> shift) & 1:
+                span[0] = middle
+            else:
+                span[1] = middle
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+class WeatherCache:
+    """
+    Caches provider payloads by (kind, geohash cell, time bucket).
+
+    Every venue in a cell shares one entry and one provider call, fetched
+    at the cell centre. Buckets are aligned to wall-clock time, so all
+    instances agree on the key and an entry expires when the provider's
+    next update is due. Entries live in a small in-process LRU and in
+    Redis; concurrent misses for the same key share one fetch, and batch
+    lookups read Redis with a single MGET.
+    """
+
+    def __init__(self, precision: int = 5, max_local_entries: int = 4096):
+        self.precision = precision
+        self.max_local_entries = max_local_entries
+        self.prefix = "weather_cell:"
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "lookups": 0,
+            "local_hits": 0,
+            "redis_hits": 0,
+            "fetches": 0,
+            "coalesced": 0,
+            "errors": 0,
+        }
+
+    def cell(self, latitude: float, longitude: float) -> str:
+        return geohash_encode(latitude, longitude, self.precision)
+
+    @staticmethod
+    def _bucket(kind: str, now: float) -> Tuple[int, float]:
+        """(bucket number, seconds until the bucket ends)"""
+        seconds = BUCKET_SECONDS[kind]
+        bucket = int(now // seconds)
+        return bucket, (bucket + 1) * seconds - now
+
+    def key(self, kind: str, cell: str, now: Optional[float] = None) -> str:
+        bucket, _ = self._bucket(kind, time.time() if now is None else now)
+        return f"{kind}:{cell}:{bucket}"
+
+    # === Local layer ===
+
+    def _get_local(self, key: str) -> Any:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _remember(self, key: str, value: Any, ttl: float):
+        self._local[key] = (time.time() + ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    # === Fetching ===
+
+    async def _fetch(self, kind: str, key: str, cell: str, fetch: Fetcher, write_through: bool = True) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self.stats["fetches"] += 1
+            value = await fetch(*geohash_center(cell))
+            _, ttl = self._bucket(kind, time.time())
+            self._remember(key, value, ttl)
+            if write_through:
+                smart_cache.set(key, value, int(ttl) + 1, prefix=self.prefix)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError(f"Fetch for {key} was cancelled"))
+            # Mark as retrieved: with no concurrent waiters asyncio would log it as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, kind: str, latitude: float, longitude: float, fetch: Fetcher) -> Any:
+        """Cached payload for the cell containing the coordinate, fetching it on a miss"""
+        self.stats["lookups"] += 1
+        cell = self.cell(latitude, longitude)
+        key = self.key(kind, cell)
+
+        value = self._get_local(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+
+        value = smart_cache.get(key, prefix=self.prefix)
+        if value is not None:
+            self.stats["redis_hits"] += 1
+            self._remember(key, value, self._bucket(kind, time.time())[1])
+            return value
+
+        try:
+            return await self._fetch(kind, key, cell, fetch)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+
+    async def get_many(
+        self, kind: str, coordinates: Dict[Hashable, Tuple[float, float]], fetch: Fetcher
+    ) -> Dict[Hashable, Any]:
+        """
+        Payloads for many locations ({id: (lat, lon)} -> {id: payload or None}).
+
+        Locations are reduced to distinct cells first; cells not held locally
+        are read with one MGET, and the rest are fetched concurrently and
+        written back in one pipeline. A failed fetch yields None for the
+        locations in that cell.
+        """
+        self.stats["lookups"] += len(coordinates)
+        now = time.time()
+        cells = {location: self.cell(lat, lon) for location, (lat, lon) in coordinates.items()}
+        keys = {cell: self.key(kind, cell, now) for cell in set(cells.values())}
+
+        values: Dict[str, Any] = {}
+        for cell, key in keys.items():
+            value = self._get_local(key)
+            if value is not None:
+                values[cell] = value
+        self.stats["local_hits"] += sum(1 for location_cell in cells.values() if location_cell in values)
+
+        missing = [cell for cell in keys if cell not in values]
+        if missing:
+            cached = smart_cache.get_many([keys[cell] for cell in missing], prefix=self.prefix)
+            _, ttl = self._bucket(kind, now)
+            for cell in missing:
+                value = cached.get(keys[cell])
+                if value is not None:
+                    values[cell] = value
+                    self._remember(keys[cell], value, ttl)
+                    self.stats["redis_hits"] += 1
+
+        to_fetch = [cell for cell in keys if cell not in values]
+        if to_fetch:
+            results = await asyncio.gather(
+                *(self._fetch(kind, keys[cell], cell, fetch, write_through=False) for cell in to_fetch),
+                return_exceptions=True,
+            )
+            fetched = {}
+            for cell, result in zip(to_fetch, results):
+                if isinstance(result, Exception):
+                    self.stats["errors"] += 1
+                    logger.warning(f"⚠️ Weather fetch for cell {cell} failed: {result}")
+                    continue
+                values[cell] = fetched[keys[cell]] = result
+            if fetched:
+                smart_cache.set_many(fetched, int(self._bucket(kind, time.time())[1]) + 1, prefix=self.prefix)
+
+        return {location: values.get(cell) for location, cell in cells.items()}
+
+    def clear_local(self) -> int:
+        cleared = len(self._local)
+        self._local.clear()
+        return cleared
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["lookups"]
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0,
+            "precision": self.precision,
+            "local_entries": len(self._local),
+        }
+
+
+# Global weather cache
+weather_cache = WeatherCache(precision=int(os.getenv("WEATHER_GEOHASH_PRECISION", "5")))
@@ -1,12 +1,14 @@
 # === backend/app/services/weather_service.py ===
 # Weather Integration Service for LFA Legacy GO
 
-import aiohttp
 import asyncio
 import logging
 import os
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, time as dt_time, timedelta
+from sqlalchemy import and_, case, func, insert
 from sqlalchemy.orm import Session
 
 try:
@@ -17,9 +19,13 @@ try:
         GameWeatherSuitability,
         WeatherCondition,
         WeatherSeverity,
+        WeatherDailyRollup,
+        weather_rule_issues,
+        weather_severity,
     )
-    from ..models.location import Location, GameSession
+    from ..models.location import Location, GameDefinition, GameSession, GameSessionStatus
     from ..models.user import User
+    from ..services.bulk_cancellation import ACTIVE_SESSION_STATUSES, BulkCancellationService
 except ImportError:
     from models.weather import (
         LocationWeather,
@@ -28,106 +34,158 @@ except ImportError:
         GameWeatherSuitability,
         WeatherCondition,
         WeatherSeverity,
+        WeatherDailyRollup,
+        weather_rule_issues,
+        weather_severity,
     )
-    from models.location import Location, GameSession
+    from models.location import Location, GameDefinition, GameSession, GameSessionStatus
     from models.user import User
+    from services.bulk_cancellation import ACTIVE_SESSION_STATUSES, BulkCancellationService
+
+from ..core.smart_cache import smart_cache
+from ..core.lazy_imports import lazy_import
+from .weather_cache import weather_cache
+
+aiohttp = lazy_import("aiohttp")
 
 logger = logging.getLogger(__name__)
 
+# Point at a local mock (scripts/mock_openweather_server.py) for load tests
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5")
+
+# Bulk refresh tuning: in-flight requests and provider quota
+WEATHER_API_CONCURRENCY = int(os.getenv("WEATHER_API_CONCURRENCY", "8"))
+WEATHER_API_RATE_PER_MINUTE = float(os.getenv("WEATHER_API_RATE_PER_MINUTE", "60"))
+WEATHER_API_RETRIES = int(os.getenv("WEATHER_API_RETRY_COUNT", "3"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Impact report rollups: initial backfill and how many rolled-up days each refresh recomputes
+WEATHER_ROLLUP_BACKFILL_DAYS = int(os.getenv("WEATHER_ROLLUP_BACKFILL_DAYS", "90"))
+WEATHER_ROLLUP_REFRESH_DAYS = int(os.getenv("WEATHER_ROLLUP_REFRESH_DAYS", "2"))
+
+SESSION_ROLLUP_FIELDS = ("sessions_total", "sessions_cancelled", "weather_cancelled", "weather_warnings", "cancelled_credits")
+CONDITION_ROLLUP_FIELDS = ("readings", "temperature_sum", "temperature_count", "wind_sum", "wind_count")
+
+
+class WeatherAPIError(Exception):
+    """A failed provider call; `retry_after` is set when the provider asked for a pause"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status in RETRYABLE_STATUSES
+
+
+class TokenBucket:
+    """Paces calls to `rate` per second, allowing bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 
 class WeatherAPIService:
     """Weather API integration service"""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: Optional[str] = None, max_connections: int = WEATHER_API_CONCURRENCY):
         self.api_key = api_key
-        self.base_url = "http://api.openweathermap.org/data/2.5"
-        self.forecast_url = "http://api.openweathermap.org/data/2.5/forecast"
+        self.base_url = (base_url or OPENWEATHER_BASE_URL).rstrip("/")
+        self.forecast_url = f"{self.base_url}/forecast"
+        self.max_connections = max_connections
         self.session = None
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
 
-    async def get_current_weather(self, lat: float, lon: float) -> Optional[Dict]:
-        """Get current weather for coordinates"""
-        url = f"{self.base_url}/weather"
+    async def _request_json(self, path: str, lat: float, lon: float, **extra) -> Any:
+        """One provider call; raises WeatherAPIError so callers can retry"""
         params = {
             "lat": lat,
             "lon": lon,
             "appid": self.api_key,
             "units": "metric",
             "lang": "hu",  # Hungarian language
+            **extra,
         }
-
         try:
-            timeout = aiohttp.ClientTimeout(total=10)
             async with self.session.get(
-                url, params=params, timeout=timeout
+                f"{self.base_url}/{path}", params=params, timeout=aiohttp.ClientTimeout(total=10)
             ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_current_weather(data)
-                else:
-                    logger.error(f"Weather API error: {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Weather API request failed: {str(e)}")
+                if response.status != 200:
+                    retry_after = response.headers.get("Retry-After")
+                    raise WeatherAPIError(
+                        f"Weather API error: {response.status}",
+                        status=response.status,
+                        retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+                    )
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise WeatherAPIError(f"Weather API request failed: {e!r}")
+
+    async def fetch_current_weather(self, lat: float, lon: float) -> Dict:
+        """Current weather for coordinates (shared per geohash cell); raises WeatherAPIError"""
+        data = await weather_cache.get(
+            "current", lat, lon, lambda cell_lat, cell_lon: self._request_json("weather", cell_lat, cell_lon)
+        )
+        return self._parse_current_weather(data)
+
+    async def get_current_weather(self, lat: float, lon: float) -> Optional[Dict]:
+        """Get current weather for coordinates"""
+        try:
+            return await self.fetch_current_weather(lat, lon)
+        except WeatherAPIError as e:
+            logger.error(str(e))
             return None
 
     async def get_hourly_forecast(
         self, lat: float, lon: float, hours: int = 24
     ) -> List[Dict]:
         """Get hourly forecast for next N hours"""
-        url = self.forecast_url
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": self.api_key,
-            "units": "metric",
-            "lang": "hu",
-        }
-
         try:
-            timeout = aiohttp.ClientTimeout(total=15)
-            async with self.session.get(
-                url, params=params, timeout=timeout
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_forecast(data, hours)
-                else:
-                    logger.error(f"Forecast API error: {response.status}")
-                    return []
-        except Exception as e:
+            data = await weather_cache.get(
+                "forecast", lat, lon, lambda cell_lat, cell_lon: self._request_json("forecast", cell_lat, cell_lon)
+            )
+            return self._parse_forecast(data, hours)
+        except WeatherAPIError as e:
             logger.error(f"Forecast API request failed: {str(e)}")
             return []
 
     async def get_weather_alerts(self, lat: float, lon: float) -> List[Dict]:
         """Get weather alerts for location"""
-        url = f"{self.base_url}/onecall"
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": self.api_key,
-            "exclude": "minutely,daily",
-            "units": "metric",
-        }
+
+        async def fetch_alerts(cell_lat: float, cell_lon: float) -> List[Dict]:
+            data = await self._request_json("onecall", cell_lat, cell_lon, exclude="minutely,daily")
+            return data.get("alerts", [])
 
         try:
-            timeout = aiohttp.ClientTimeout(total=15)
-            async with self.session.get(
-                url, params=params, timeout=timeout
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get("alerts", [])
-                else:
-                    return []
-        except Exception as e:
+            return await weather_cache.get("alerts", lat, lon, fetch_alerts)
+        except WeatherAPIError as e:
             logger.error(f"Weather alerts API request failed: {str(e)}")
             return []
 
@@ -147,6 +205,7 @@ class WeatherAPIService:
             "humidity": main.get("humidity", 0),
             "wind_speed": wind.get("speed", 0) * 3.6,  # Convert m/s to km/h
             "wind_direction": wind.get("deg", 0),
+            "pressure": main.get("pressure"),
             "visibility": data.get("visibility", 10000) / 1000,  # Convert m to km
             "condition": condition,
             "description": weather.get("description", ""),
@@ -154,7 +213,7 @@ class WeatherAPIService:
             "precipitation_probability": 0,  # Not available in current weather
             "precipitation_amount": data.get("rain", {}).get("1h", 0),
             "uv_index": 0,  # Requires separate API call
-            "weather_time": datetime.utcnow(),
+            "weather_time": datetime.utcfromtimestamp(data["dt"]) if data.get("dt") else datetime.utcnow(),
             "api_response": data,
         }
 
@@ -173,9 +232,11 @@ class WeatherAPIService:
 
             forecasts.append(
                 {
-                    "forecast_time": datetime.fromtimestamp(item.get("dt", 0)),
+                    "forecast_time": datetime.utcfromtimestamp(item.get("dt", 0)),
                     "temperature": main.get("temp", 0),
                     "condition": condition,
+                    "description": weather.get("description", ""),
+                    "humidity": main.get("humidity"),
                     "precipitation_probability": item.get("pop", 0) * 100,
                     "precipitation_amount": item.get("rain", {}).get("3h", 0)
                     / 3,  # Convert to mm/h
@@ -187,14 +248,15 @@ class WeatherAPIService:
 
         return forecasts
 
-    def _map_weather_condition(self, openweather_main: str) -> WeatherCondition:
+    @staticmethod
+    def _map_weather_condition(openweather_main: str) -> WeatherCondition:
         """Map OpenWeatherMap condition to our enum"""
         mapping = {
             "Clear": WeatherCondition.CLEAR,
             "Clouds": WeatherCondition.CLOUDY,
-            "Rain": WeatherCondition.LIGHT_RAIN,
+            "Rain": WeatherCondition.RAIN,
             "Drizzle": WeatherCondition.LIGHT_RAIN,
-            "Thunderstorm": WeatherCondition.THUNDERSTORM,
+            "Thunderstorm": WeatherCondition.STORM,
             "Snow": WeatherCondition.SNOW,
             "Mist": WeatherCondition.FOG,
             "Fog": WeatherCondition.FOG,
@@ -202,27 +264,14 @@ class WeatherAPIService:
         }
         return mapping.get(openweather_main, WeatherCondition.CLEAR)
 
-    def _calculate_severity(
-        self, main: Dict, weather: Dict, wind: Dict
-    ) -> WeatherSeverity:
-        """Calculate weather severity based on conditions"""
-        temp = main.get("temp", 20)
-        wind_speed = wind.get("speed", 0) * 3.6  # km/h
-        condition = weather.get("main", "")
-
-        # Extreme conditions
-        if condition in ["Thunderstorm"] or wind_speed > 50 or temp < -5 or temp > 35:
-            return WeatherSeverity.EXTREME
-
-        # High severity
-        if condition in ["Rain", "Snow"] or wind_speed > 30 or temp < 0 or temp > 30:
-            return WeatherSeverity.HIGH
-
-        # Moderate severity
-        if condition in ["Clouds", "Drizzle", "Fog"] or wind_speed > 15:
-            return WeatherSeverity.MODERATE
-
-        return WeatherSeverity.LOW
+    @staticmethod
+    def _calculate_severity(main: Dict, weather: Dict, wind: Dict) -> WeatherSeverity:
+        """Calculate weather severity based on conditions (shared with the forecast suitability matrix)"""
+        return weather_severity(
+            main.get("temp", 20),
+            wind.get("speed", 0) * 3.6,  # km/h
+            WeatherAPIService._map_weather_condition(weather.get("main", "")),
+        )
 
 
 class WeatherService:
@@ -248,16 +297,17 @@ class WeatherService:
                 return False
 
             # Create or update weather record
-            weather_record = LocationWeather(location_id=location_id, **weather_data)
+            weather_record = LocationWeather(**self.weather_row(location_id, weather_data))
 
             self.db.add(weather_record)
             self.db.commit()
+            smart_cache.invalidate_tags(f"weather:{location_id}")
 
             # Check for weather alerts
             await self._check_weather_alerts(location, weather_record)
 
             logger.info(
-                f"Weather updated for location {location_id}: {weather_record.condition.value} {weather_record.temperature}°C"
+                f"Weather updated for location {location_id}: {weather_record.condition} {weather_record.temperature}°C"
             )
             return True
 
@@ -274,24 +324,227 @@ class WeatherService:
             logger.warning("Weather API service not available")
             return 0
 
-        locations = self.db.query(Location).filter(Location.status == "active").all()
-        updated_count = 0
+        result = await self.refresh_locations_bulk()
+        return result["updated"]
+
+    @staticmethod
+    def weather_row(location_id: int, data: Dict) -> Dict:
+        """A location_weather row from a parsed provider reading"""
+        severity = data["severity"]
+        return {
+            "location_id": location_id,
+            "temperature": data["temperature"],
+            "feels_like": data["feels_like"],
+            "condition": data["condition"].value,
+            "description": data["description"],
+            "humidity": data["humidity"],
+            "wind_speed": round(data["wind_speed"] / 3.6, 2),  # Stored in m/s
+            "wind_direction": data["wind_direction"],
+            "pressure": data.get("pressure"),
+            "visibility": data["visibility"],
+            "uv_index": data["uv_index"],
+            "precipitation": data["precipitation_amount"],
+            "severity": severity.value,
+            "is_game_suitable": severity in (WeatherSeverity.LOW, WeatherSeverity.MODERATE),
+            "data_source": "openweathermap",
+            "last_updated": data["weather_time"],
+            "created_at": datetime.utcnow(),
+        }
+
+    @staticmethod
+    def forecast_row(location_id: int, data: Dict, now: datetime) -> Dict:
+        """A weather_forecasts row from one parsed forecast step"""
+        return {
+            "location_id": location_id,
+            "forecast_time": data["forecast_time"],
+            "temperature": data["temperature"],
+            "condition": data["condition"].value,
+            "description": data.get("description", ""),
+            "precipitation_chance": int(round(data["precipitation_probability"])),
+            "wind_speed": round(data["wind_speed"] / 3.6, 2),  # Stored in m/s
+            "humidity": data.get("humidity"),
+            "forecast_type": "3h",
+            "hours_ahead": max(0, int((data["forecast_time"] - now).total_seconds() // 3600)),
+            "created_at": now,
+        }
 
-        for location in locations:
+    def _store_forecasts(self, rows_by_location: Dict[int, List[Dict]], now: datetime):
+        """Replace future forecast rows for these locations, then rebuild their suitability matrices"""
+        from .weather_suitability import suitability_matrix
+
+        location_ids = list(rows_by_location)
+        self.db.query(WeatherForecast).filter(
+            WeatherForecast.location_id.in_(location_ids),
+            WeatherForecast.forecast_time >= now,
+        ).delete(synchronize_session=False)
+        rows = [row for location_rows in rows_by_location.values() for row in location_rows]
+        if rows:
+            self.db.execute(insert(WeatherForecast), rows)
+        self.db.commit()
+        suitability_matrix.build(self.db, location_ids, now=now)
+
+    async def refresh_forecasts_bulk(self, hours: int = 120) -> Dict:
+        """
+        Refresh stored forecasts for every active location and rebuild the
+        suitability matrices.
+
+        One provider call per geohash cell (see weather_cache), paced like
+        refresh_locations_bulk; all rows are replaced in one transaction.
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        locations = await asyncio.to_thread(self._active_locations)
+
+        cells: Dict[str, List[Tuple[int, float, float]]] = {}
+        for location_id, latitude, longitude in locations:
+            if latitude is None or longitude is None:
+                continue
+            cells.setdefault(weather_cache.cell(latitude, longitude), []).append((location_id, latitude, longitude))
+
+        rate = WEATHER_API_RATE_PER_MINUTE / 60
+        bucket = TokenBucket(rate, capacity=min(WEATHER_API_CONCURRENCY, max(rate, 1)))
+        semaphore = asyncio.Semaphore(WEATHER_API_CONCURRENCY)
+
+        async def fetch_cell(members: List[Tuple[int, float, float]]) -> List[Dict]:
+            await bucket.acquire()
+            async with semaphore:
+                _, latitude, longitude = members[0]
+                return await self.api_service.get_hourly_forecast(latitude, longitude, hours)
+
+        cell_members = list(cells.values())
+        results = await asyncio.gather(*(fetch_cell(members) for members in cell_members))
+
+        rows_by_location = {
+            location_id: [self.forecast_row(location_id, step, now) for step in steps]
+            for members, steps in zip(cell_members, results)
+            if steps
+            for location_id, _, _ in members
+        }
+        if rows_by_location:
             try:
-                success = await self.update_location_weather(location.id)
-                if success:
-                    updated_count += 1
-                    # Small delay to avoid rate limiting
-                    await asyncio.sleep(0.5)
+                await asyncio.to_thread(self._store_forecasts, rows_by_location, now)
             except Exception as e:
-                logger.error(
-                    f"Error updating weather for location {location.id}: {str(e)}"
-                )
+                logger.error(f"Bulk forecast store failed: {str(e)}")
+                self.db.rollback()
+                rows_by_location = {}
+
+        stats = {
+            "locations": len(locations),
+            "cells": len(cells),
+            "failed_cells": sum(1 for steps in results if not steps),
+            "updated": len(rows_by_location),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info(
+            f"📅 Forecasts refreshed for {stats['updated']}/{stats['locations']} locations "
+            f"({stats['cells']} cells) in {stats['duration_ms']:.0f} ms"
+        )
+        return stats
+
+    async def _fetch_with_retries(
+        self, latitude: float, longitude: float, semaphore: asyncio.Semaphore, bucket: TokenBucket, stats: Dict
+    ) -> Optional[Dict]:
+        for attempt in range(WEATHER_API_RETRIES + 1):
+            await bucket.acquire()
+            try:
+                async with semaphore:
+                    return await self.api_service.fetch_current_weather(latitude, longitude)
+            except WeatherAPIError as e:
+                if not e.retryable or attempt == WEATHER_API_RETRIES:
+                    logger.warning(f"⚠️ Weather fetch for ({latitude}, {longitude}) failed: {e}")
+                    return None
+                stats["retries"] += 1
+                # Exponential backoff with full jitter, or the provider's Retry-After
+                await asyncio.sleep(e.retry_after or random.uniform(0, 0.5 * 2 ** attempt))
+
+    async def refresh_locations_bulk(self) -> Dict:
+        """
+        Refresh current weather for every active location in one pass.
+
+        Locations are grouped by geohash cell, the same buckets weather_cache
+        keys readings on, and each cell is fetched once (at its first
+        location, like refresh_forecasts_bulk). Requests run at most
+        WEATHER_API_CONCURRENCY at a time and are paced by a token bucket to
+        WEATHER_API_RATE_PER_MINUTE; retryable failures back off and retry.
+        All readings are written with a single bulk INSERT and one commit.
+        Database work runs in a worker thread, off the event loop.
+        """
+        started = time.perf_counter()
+        locations = await asyncio.to_thread(self._active_locations)
+
+        cells: Dict[str, List[Tuple[int, float, float]]] = {}
+        for location_id, latitude, longitude in locations:
+            if latitude is None or longitude is None:
                 continue
+            latitude, longitude = float(latitude), float(longitude)
+            cells.setdefault(weather_cache.cell(latitude, longitude), []).append((location_id, latitude, longitude))
+
+        stats = {"locations": len(locations), "cells": len(cells), "retries": 0}
+        rate = WEATHER_API_RATE_PER_MINUTE / 60
+        bucket = TokenBucket(rate, capacity=min(WEATHER_API_CONCURRENCY, max(rate, 1)))
+        semaphore = asyncio.Semaphore(WEATHER_API_CONCURRENCY)
+
+        cell_members = list(cells.values())
+        readings = await asyncio.gather(*(
+            self._fetch_with_retries(members[0][1], members[0][2], semaphore, bucket, stats)
+            for members in cell_members
+        ))
+
+        rows = [
+            self.weather_row(location_id, reading)
+            for members, reading in zip(cell_members, readings)
+            if reading
+            for location_id, _, _ in members
+        ]
+        if rows:
+            rows = await asyncio.to_thread(self._insert_readings, rows)
+
+        for row in rows:
+            smart_cache.invalidate_tags(f"weather:{row['location_id']}")
+        await self._alert_extreme_locations(rows)
+
+        stats.update(
+            fetched=sum(1 for reading in readings if reading),
+            failed=sum(1 for reading in readings if not reading),
+            updated=len(rows),
+            duration_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        logger.info(
+            f"🌦️ Weather refreshed for {stats['updated']}/{stats['locations']} locations "
+            f"({stats['cells']} cells, {stats['failed']} failed) in {stats['duration_ms']:.0f} ms"
+        )
+        return stats
+
+    def _active_locations(self) -> List:
+        return (
+            self.db.query(Location.id, Location.latitude, Location.longitude)
+            .filter(Location.status == "active")
+            .all()
+        )
+
+    def _insert_readings(self, rows: List[Dict]) -> List[Dict]:
+        """Bulk INSERT readings in one commit; the rows stored (none if the insert failed)"""
+        try:
+            self.db.execute(insert(LocationWeather), rows)
+            self.db.commit()
+            return rows
+        except Exception as e:
+            logger.error(f"Bulk weather insert failed: {str(e)}")
+            self.db.rollback()
+            return []
+
+    async def _alert_extreme_locations(self, rows: List[Dict]):
+        extreme = {row["location_id"]: row for row in rows if row["severity"] == WeatherSeverity.EXTREME.value}
+        if not extreme:
+            return
+
+        def raise_alerts() -> List[Dict]:
+            results = []
+            for location in self.db.query(Location).filter(Location.id.in_(extreme)).all():
+                results += self._raise_alert(location, LocationWeather(**extreme[location.id]))
+            return results
 
-        logger.info(f"Weather updated for {updated_count}/{len(locations)} locations")
-        return updated_count
+        await BulkCancellationService.notify(*await asyncio.to_thread(raise_alerts))
 
     async def get_weather_forecast(
         self, location_id: int, hours: int = 24
@@ -305,15 +558,13 @@ class WeatherService:
             forecast_data = await self.api_service.get_hourly_forecast(
                 float(location.latitude), float(location.longitude), hours
             )
+            if not forecast_data:
+                return []
 
-            forecasts = []
-            for data in forecast_data:
-                forecast = WeatherForecast(location_id=location_id, **data)
-                forecasts.append(forecast)
-                self.db.add(forecast)
-
-            self.db.commit()
-            return forecasts
+            now = datetime.utcnow()
+            rows = [self.forecast_row(location_id, data, now) for data in forecast_data]
+            self._store_forecasts({location_id: rows}, now)
+            return [WeatherForecast(**row) for row in rows]
 
         except Exception as e:
             logger.error(f"Failed to get forecast for location {location_id}: {str(e)}")
@@ -325,7 +576,7 @@ class WeatherService:
         return (
             self.db.query(LocationWeather)
             .filter(LocationWeather.location_id == location_id)
-            .order_by(LocationWeather.updated_at.desc())
+            .order_by(LocationWeather.last_updated.desc())
             .first()
         )
 
@@ -354,101 +605,98 @@ class WeatherService:
             ]
             return (
                 is_suitable,
-                f"Weather severity: {weather.severity.value} (using default rules)",
+                f"Weather severity: {weather.severity} (using default rules)",
             )
 
-        return suitability.is_suitable_for_weather(weather)
+        issues = weather_rule_issues(
+            suitability.to_dict(),
+            temperature=weather.temperature,
+            wind_speed=weather.wind_speed,
+            precipitation=weather.precipitation,
+            visibility=weather.visibility,
+            condition=weather.condition,
+        )
+        return not issues, "; ".join(issues) or "Weather conditions are suitable"
 
     async def _check_weather_alerts(self, location: Location, weather: LocationWeather):
-        """Check for weather alerts and create notifications"""
-
-        # Check for severe weather
-        if weather.severity == WeatherSeverity.EXTREME:
-            alert = WeatherAlert(
-                location_id=location.id,
-                alert_type="severe_weather",
-                severity=weather.severity,
-                title=f"Severe Weather Alert - {location.name}",
-                description=f"Extreme weather conditions detected: {weather.description}. All outdoor activities may be affected.",
-                starts_at=datetime.utcnow(),
-                ends_at=datetime.utcnow() + timedelta(hours=2),
-            )
-            self.db.add(alert)
+        """Raise a severe weather alert (once per location-hour) and act on it"""
+        results = await asyncio.to_thread(self._raise_alert, location, weather)
+        await BulkCancellationService.notify(*results)
+
+    def _raise_alert(self, location: Location, weather: LocationWeather) -> List[Dict]:
+        """Record the location-hour's severe weather alert and cancel what it rules out; pipeline results to notify"""
+        if weather.severity != WeatherSeverity.EXTREME:
+            return []
+
+        now = datetime.utcnow()
+        alert_id = f"severe_{location.id}_{now:%Y%m%d%H}"
+        if self.db.query(WeatherAlert.id).filter(WeatherAlert.alert_id == alert_id).first():
+            return []
+        alert = WeatherAlert(
+            alert_id=alert_id,
+            alert_type="severe_weather",
+            severity=WeatherSeverity.EXTREME.value,
+            title=f"Severe Weather Alert - {location.name}",
+            description=f"Extreme weather conditions detected: {weather.description}. All outdoor activities may be affected.",
+            start_time=now,
+            end_time=now + timedelta(hours=2),
+            affected_locations=[location.id],
+        )
+        self.db.add(alert)
+        self.db.commit()
 
-            # Handle weather alert (cancel sessions, notify users)
-            await self._handle_weather_alert(alert)
+        # Handle weather alert (cancel sessions and tournaments; the caller notifies users)
+        return self._handle_weather_alert(alert, location.id)
 
-    async def _handle_weather_alert(self, alert: WeatherAlert):
-        """Handle weather alert by notifying users and adjusting sessions"""
+    def _handle_weather_alert(self, alert: WeatherAlert, location_id: int) -> List[Dict]:
+        """
+        Cancel what the alert rules out in the next 4 hours, with full refunds.
 
+        Each game type is judged once, and unsuitable sessions and
+        weather-dependent tournaments go through the bulk cancellation
+        pipeline. Returns the pipeline results, whose notifications the
+        caller sends (one per event) from the event loop.
+        """
         try:
-            # Get affected sessions in next 4 hours
             start_time = datetime.utcnow()
             end_time = start_time + timedelta(hours=4)
 
-            try:
-                from ..models.location import GameSession, SessionStatus
-            except ImportError:
-                from models.location import GameSession, SessionStatus
-
-            affected_sessions = (
-                self.db.query(GameSession)
+            sessions = (
+                self.db.query(GameSession.id, GameDefinition.game_id)
+                .join(GameDefinition, GameSession.game_definition_id == GameDefinition.id)
                 .filter(
-                    GameSession.location_id == alert.location_id,
-                    GameSession.start_time >= start_time,
-                    GameSession.start_time <= end_time,
-                    GameSession.status.in_(["scheduled", "confirmed"]),
+                    GameSession.location_id == location_id,
+                    GameSession.scheduled_start >= start_time,
+                    GameSession.scheduled_start <= end_time,
+                    GameSession.status.in_(ACTIVE_SESSION_STATUSES),
+                    GameDefinition.weather_dependent.isnot(False),
                 )
                 .all()
             )
 
-            alert.sessions_affected = len(affected_sessions)
-
-            for session in affected_sessions:
-                # Check if game is suitable for weather
-                suitable, reason = self.is_game_suitable_for_weather(
-                    session.game_definition.game_type, session.location_id
-                )
-
+            verdicts: Dict[str, Tuple[bool, str]] = {}
+            cancellations: Dict[str, List[int]] = {}
+            for session_id, game_type in sessions:
+                if game_type not in verdicts:
+                    verdicts[game_type] = self.is_game_suitable_for_weather(game_type, location_id)
+                suitable, reason = verdicts[game_type]
                 if not suitable:
-                    # Auto-cancel with full refund
-                    session.status = SessionStatus.CANCELLED
-                    session.cancellation_reason = f"Weather: {reason}"
-                    session.cancelled_at = datetime.utcnow()
-
-                    # Refund credits to all players
-                    for player_data in session.players:
-                        user = (
-                            self.db.query(User)
-                            .filter(User.id == player_data["user_id"])
-                            .first()
-                        )
-                        if user:
-                            user.credits += session.total_cost_credits
-
-                            # Add to transaction history
-                            if not user.transaction_history:
-                                user.transaction_history = []
-
-                            refund_transaction = {
-                                "transaction_id": f"weather_refund_{session.session_id}_{datetime.utcnow().timestamp()}",
-                                "type": "refund",
-                                "amount": session.total_cost_credits,
-                                "timestamp": datetime.utcnow().isoformat(),
-                                "description": f"Weather cancellation refund for session {session.session_id}",
-                                "reason": "weather_cancellation",
-                            }
-                            user.transaction_history.append(refund_transaction)
-
-                    logger.info(
-                        f"Auto-cancelled session {session.session_id} due to weather: {reason}"
-                    )
+                    cancellations.setdefault(reason, []).append(session_id)
 
-            self.db.commit()
+            pipeline = BulkCancellationService(self.db)
+            results = [pipeline.cancel_sessions(cancellations)]
+            results += pipeline.cancel_weather_tournaments(location_id, start_time, end_time, alert.title)
+
+            logger.info(
+                f"⛈️ Alert {alert.alert_id}: {results[0]['cancelled']} sessions and "
+                f"{len(results) - 1} tournaments cancelled at location {location_id}"
+            )
+            return results
 
         except Exception as e:
-            logger.error(f"Error handling weather alert {alert.id}: {str(e)}")
+            logger.error(f"Error handling weather alert {alert.alert_id}: {str(e)}")
             self.db.rollback()
+            return []
 
 
 class WeatherAnalyticsService:
@@ -458,76 +706,62 @@ class WeatherAnalyticsService:
         self.db = db
 
     def get_weather_impact_report(
-        self, start_date: datetime, end_date: datetime
+        self, start_date: datetime, end_date: datetime, use_rollups: bool = True
     ) -> Dict:
-        """Generate weather impact report for date range"""
-
-        # Get all sessions in date range
-        try:
-            from ..models.location import GameSession, SessionStatus
-        except ImportError:
-            from models.location import GameSession, SessionStatus
-
-        sessions = (
-            self.db.query(GameSession)
-            .filter(
-                GameSession.start_time >= start_date, GameSession.start_time <= end_date
-            )
-            .all()
-        )
-
-        # Get weather data for the same period
-        weather_data = (
-            self.db.query(LocationWeather)
-            .filter(
-                LocationWeather.weather_time >= start_date,
-                LocationWeather.weather_time <= end_date,
-            )
-            .all()
-        )
-
-        # Calculate statistics
-        total_sessions = len(sessions)
-        weather_cancelled = len(
-            [
-                s
-                for s in sessions
-                if s.status == SessionStatus.CANCELLED
-                and s.cancellation_reason
-                and "weather" in s.cancellation_reason.lower()
-            ]
-        )
-        weather_warnings = len(
-            [
-                s
-                for s in sessions
-                if s.booking_notes and "weather" in s.booking_notes.lower()
+        """
+        Generate weather impact report for [start_date, end_date).
+
+        Everything is aggregated in SQL. Whole days covered by the daily
+        rollup table are summed from it; the uncovered edges of the range
+        are aggregated from sessions and readings with grouped queries.
+        """
+        day_range = self._rollup_coverage(start_date, end_date) if use_rollups else None
+        raw_ranges = [(start_date, end_date)]
+        locations: Dict[int, Dict[str, int]] = {}
+        conditions: Dict[str, Dict[str, float]] = {}
+
+        if day_range:
+            first_day, stop_day = day_range
+            self._merge_rows(locations, self._rollup_location_totals(first_day, stop_day))
+            self._merge_conditions(conditions, self._rollup_condition_totals(first_day, stop_day))
+            raw_ranges = [
+                (low, high)
+                for low, high in (
+                    (start_date, datetime.combine(first_day, dt_time.min)),
+                    (datetime.combine(stop_day, dt_time.min), end_date),
+                )
+                if low < high
             ]
-        )
 
-        # Weather condition breakdown
-        condition_stats = {}
-        for weather in weather_data:
-            condition = weather.condition.value
-            if condition not in condition_stats:
-                condition_stats[condition] = {"count": 0, "avg_temp": 0, "sessions": 0}
-            condition_stats[condition]["count"] += 1
-            condition_stats[condition]["avg_temp"] += weather.temperature
-
-        # Calculate averages
-        for condition in condition_stats:
-            stats = condition_stats[condition]
-            if stats["count"] > 0:
-                stats["avg_temp"] = round(stats["avg_temp"] / stats["count"], 1)
-
-        # Revenue impact
-        cancelled_revenue = sum(
-            s.total_cost_credits
-            for s in sessions
-            if s.status == SessionStatus.CANCELLED
-            and s.cancellation_reason
-            and "weather" in s.cancellation_reason.lower()
-        )
+        for low, high in raw_ranges:
+            self._merge_rows(locations, self._session_aggregates(low, high, GameSession.location_id))
+            self._merge_conditions(conditions, self._condition_aggregates(low, high, LocationWeather.condition))
+
+        locations.pop(0, None)
+        totals = {field: sum(row[field] for row in locations.values()) for field in SESSION_ROLLUP_FIELDS}
+        total_sessions = totals["sessions_total"]
+        weather_cancelled = totals["weather_cancelled"]
+        readings = sum(stats["readings"] for stats in conditions.values())
+
+        condition_stats = {
+            condition: {
+                "count": stats["readings"],
+                "share": round(stats["readings"] / readings * 100, 2) if readings else 0,
+                "avg_temp": round(stats["temperature_sum"] / stats["temperature_count"], 1)
+                if stats["temperature_count"]
+                else 0,
+                "avg_wind_speed": round(stats["wind_sum"] / stats["wind_count"], 1) if stats["wind_count"] else 0,
+            }
+            for condition, stats in sorted(conditions.items(), key=lambda item: -item[1]["readings"])
+        }
+        most_affected = sorted(
+            (
+                {"location_id": location_id, "cancellations": row["weather_cancelled"], "sessions": row["sessions_total"]}
+                for location_id, row in locations.items()
+                if row["weather_cancelled"]
+            ),
+            key=lambda item: -item["cancellations"],
+        )[:5]
 
         return {
             "period": {
@@ -537,29 +771,192 @@ class WeatherAnalyticsService:
             },
             "session_impact": {
                 "total_sessions": total_sessions,
+                "cancelled": totals["sessions_cancelled"],
                 "weather_cancelled": weather_cancelled,
-                "weather_warnings": weather_warnings,
+                "weather_warnings": totals["weather_warnings"],
                 "cancellation_rate": round(
-                    (
-                        (weather_cancelled / total_sessions * 100)
-                        if total_sessions > 0
-                        else 0
-                    ),
-                    2,
+                    (weather_cancelled / total_sessions * 100) if total_sessions > 0 else 0, 2
+                ),
+                "weather_share_of_cancellations": round(
+                    (weather_cancelled / totals["sessions_cancelled"] * 100) if totals["sessions_cancelled"] else 0, 2
                 ),
             },
             "revenue_impact": {
-                "cancelled_credits": cancelled_revenue,
+                "cancelled_credits": totals["cancelled_credits"],
                 "estimated_loss": round(
-                    cancelled_revenue * 0.2, 2
+                    totals["cancelled_credits"] * 0.2, 2
                 ),  # Assuming 20% don't rebook
             },
+            "weather_readings": readings,
             "weather_conditions": condition_stats,
+            "most_affected_locations": most_affected,
             "recommendations": self._generate_weather_recommendations(
                 condition_stats, weather_cancelled, total_sessions
             ),
+            "sources": {
+                "rollup_days": (day_range[1] - day_range[0]).days if day_range else 0,
+                "raw_ranges": [[low.isoformat(), high.isoformat()] for low, high in raw_ranges],
+            },
         }
 
+    # === SQL aggregates ===
+
+    def _session_aggregates(self, start: datetime, end: datetime, *group_by) -> List[Dict]:
+        """Session counts and cancelled credits for [start, end), grouped by the given expressions"""
+        weather_cancel = and_(
+            GameSession.status == GameSessionStatus.CANCELLED,
+            GameSession.refund_reason.ilike("%weather%"),
+        )
+        rows = (
+            self.db.query(
+                *group_by,
+                func.count(GameSession.id).label("sessions_total"),
+                func.sum(case((GameSession.status == GameSessionStatus.CANCELLED, 1), else_=0)).label(
+                    "sessions_cancelled"
+                ),
+                func.sum(case((weather_cancel, 1), else_=0)).label("weather_cancelled"),
+                func.sum(case((GameSession.notes.ilike("%weather alert%"), 1), else_=0)).label("weather_warnings"),
+                func.sum(case((weather_cancel, GameSession.cost_credits), else_=0)).label("cancelled_credits"),
+            )
+            .filter(GameSession.scheduled_start >= start, GameSession.scheduled_start < end)
+            .group_by(*group_by)
+            .all()
+        )
+        return [row._asdict() for row in rows]
+
+    def _condition_aggregates(self, start: datetime, end: datetime, *group_by) -> List[Dict]:
+        """Reading counts and temperature/wind sums for [start, end), grouped by the given expressions"""
+        rows = (
+            self.db.query(
+                *group_by,
+                func.count(LocationWeather.id).label("readings"),
+                func.sum(LocationWeather.temperature).label("temperature_sum"),
+                func.count(LocationWeather.temperature).label("temperature_count"),
+                func.sum(LocationWeather.wind_speed).label("wind_sum"),
+                func.count(LocationWeather.wind_speed).label("wind_count"),
+            )
+            .filter(LocationWeather.last_updated >= start, LocationWeather.last_updated < end)
+            .group_by(*group_by)
+            .all()
+        )
+        return [row._asdict() for row in rows]
+
+    def _rollup_coverage(self, start_date: datetime, end_date: datetime) -> Optional[Tuple[date, date]]:
+        """[first, stop) days fully inside the range that the rollup table covers"""
+        first_rolled, last_rolled = self.db.query(
+            func.min(WeatherDailyRollup.day), func.max(WeatherDailyRollup.day)
+        ).one()
+        if first_rolled is None:
+            return None
+        first_day = start_date.date() if start_date.time() == dt_time.min else start_date.date() + timedelta(days=1)
+        first_day = max(first_day, first_rolled)
+        stop_day = min(end_date.date(), last_rolled + timedelta(days=1))
+        return (first_day, stop_day) if first_day < stop_day else None
+
+    def _rollup_location_totals(self, first_day: date, stop_day: date) -> List[Dict]:
+        rows = (
+            self.db.query(
+                WeatherDailyRollup.location_id,
+                *(func.sum(getattr(WeatherDailyRollup, field)).label(field) for field in SESSION_ROLLUP_FIELDS),
+            )
+            .filter(WeatherDailyRollup.day >= first_day, WeatherDailyRollup.day < stop_day)
+            .group_by(WeatherDailyRollup.location_id)
+            .all()
+        )
+        return [row._asdict() for row in rows]
+
+    def _rollup_condition_totals(self, first_day: date, stop_day: date) -> List[Dict]:
+        """Condition breakdowns of the covered days (stored as JSON, so summed here)"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for (breakdown,) in self.db.query(WeatherDailyRollup.conditions).filter(
+            WeatherDailyRollup.day >= first_day,
+            WeatherDailyRollup.day < stop_day,
+            WeatherDailyRollup.readings > 0,
+        ):
+            for condition, stats in (breakdown or {}).items():
+                self._merge_conditions(totals, [{"condition": condition, **stats}])
+        return [{"condition": condition, **stats} for condition, stats in totals.items()]
+
+    @staticmethod
+    def _merge_rows(target: Dict[int, Dict[str, int]], rows: List[Dict]):
+        for row in rows:
+            merged = target.setdefault(row["location_id"], dict.fromkeys(SESSION_ROLLUP_FIELDS, 0))
+            for field in SESSION_ROLLUP_FIELDS:
+                merged[field] += row[field] or 0
+
+    @staticmethod
+    def _merge_conditions(target: Dict[str, Dict[str, float]], rows: List[Dict]):
+        for row in rows:
+            merged = target.setdefault(row["condition"] or "unknown", dict.fromkeys(CONDITION_ROLLUP_FIELDS, 0))
+            for field in CONDITION_ROLLUP_FIELDS:
+                merged[field] += row[field] or 0
+
+    # === Daily rollups ===
+
+    def refresh_daily_rollups(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Recompute rollups for complete days not yet rolled up.
+
+        The last WEATHER_ROLLUP_REFRESH_DAYS rolled-up days are recomputed
+        too, picking up late cancellations; an empty table is backfilled
+        for WEATHER_ROLLUP_BACKFILL_DAYS. Each pass is two grouped queries,
+        one delete and one bulk insert.
+        """
+        today = (now or datetime.utcnow()).date()
+        last_rolled = self.db.query(func.max(WeatherDailyRollup.day)).scalar()
+        if last_rolled is None:
+            first_day = today - timedelta(days=WEATHER_ROLLUP_BACKFILL_DAYS)
+        else:
+            first_day = min(last_rolled + timedelta(days=1), today) - timedelta(days=WEATHER_ROLLUP_REFRESH_DAYS)
+        if first_day >= today:
+            return {"days": 0, "rows": 0}
+
+        start = datetime.combine(first_day, dt_time.min)
+        end = datetime.combine(today, dt_time.min)
+        rows: Dict[Tuple[date, int], Dict[str, Any]] = {}
+
+        def rollup_row(day_value, location_id) -> Dict[str, Any]:
+            day = day_value if isinstance(day_value, date) else date.fromisoformat(str(day_value)[:10])
+            return rows.setdefault((day, location_id or 0), {
+                "day": day,
+                "location_id": location_id or 0,
+                **dict.fromkeys(SESSION_ROLLUP_FIELDS, 0),
+                "readings": 0,
+                "conditions": {},
+                "refreshed_at": datetime.utcnow(),
+            })
+
+        session_day = func.date(GameSession.scheduled_start).label("day")
+        for aggregate in self._session_aggregates(start, end, session_day, GameSession.location_id):
+            row = rollup_row(aggregate["day"], aggregate["location_id"])
+            for field in SESSION_ROLLUP_FIELDS:
+                row[field] = aggregate[field] or 0
+
+        reading_day = func.date(LocationWeather.last_updated).label("day")
+        for aggregate in self._condition_aggregates(
+            start, end, reading_day, LocationWeather.location_id, LocationWeather.condition
+        ):
+            row = rollup_row(aggregate["day"], aggregate["location_id"])
+            row["readings"] += aggregate["readings"]
+            row["conditions"][aggregate["condition"] or "unknown"] = {
+                field: aggregate[field] or 0 for field in CONDITION_ROLLUP_FIELDS
+            }
+
+        days = (today - first_day).days
+        active_days = {day for day, _ in rows}
+        for offset in range(days):
+            if first_day + timedelta(days=offset) not in active_days:
+                rollup_row(first_day + timedelta(days=offset), 0)
+
+        self.db.query(WeatherDailyRollup).filter(
+            WeatherDailyRollup.day >= first_day, WeatherDailyRollup.day < today
+        ).delete(synchronize_session=False)
+        self.db.execute(insert(WeatherDailyRollup), list(rows.values()))
+        self.db.commit()
+
+        logger.info(f"📊 Weather rollups refreshed: {days} days from {first_day}, {len(rows)} rows")
+        return {"days": days, "rows": len(rows), "first_day": first_day.isoformat()}
+
     def _generate_weather_recommendations(
         self, condition_stats: Dict, cancelled_count: int, total_sessions: int
     ) -> List[str]:
@@ -604,3 +1001,31 @@ class WeatherAnalyticsService:
 
 # Global weather service instance (will be initialized in main.py)
 weather_api_service = None
+
+_shared_api_service: Optional[WeatherAPIService] = None
+
+
+def weather_api_key() -> Optional[str]:
+    """The configured OpenWeather key (None when unset or still the placeholder)"""
+    api_key = os.getenv("OPENWEATHERMAP_API_KEY")
+    if not api_key or api_key == "your_openweathermap_api_key_here":
+        return None
+    return api_key
+
+
+async def get_weather_api_service() -> Optional[WeatherAPIService]:
+    """Process-wide provider client on one pooled session (None without an API key)"""
+    global _shared_api_service
+    api_key = weather_api_key()
+    if not api_key:
+        return None
+    if _shared_api_service is None or _shared_api_service.session is None or _shared_api_service.session.closed:
+        _shared_api_service = await WeatherAPIService(api_key).__aenter__()
+    return _shared_api_service
+
+
+async def close_weather_api_service():
+    global _shared_api_service
+    if _shared_api_service is not None:
+        await _shared_api_service.__aexit__(None, None, None)
+        _shared_api_service = None
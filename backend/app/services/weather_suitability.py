@@ -0,0 +1,273 @@
+"""
+Weather Suitability Matrix
+Precomputed hourly suitability per location and game type, built from stored forecasts
+"""
+
+import bisect
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.smart_cache import smart_cache
+from app.models.weather import (
+    DEFAULT_GAME_WEATHER_RULES,
+    GameWeatherSuitability,
+    LocationWeather,
+    WeatherForecast,
+    weather_rule_issues,
+    weather_severity,
+)
+
+logger = logging.getLogger(__name__)
+
+# A forecast row describes the hours after it until the next row (3-hourly
+# provider steps); a current reading stands in for the hours before the first one
+FORECAST_STEP_HOURS = 3
+CURRENT_READING_HOURS = 3
+
+UNKNOWN_REASON = "No forecast available - weather check at booking time"
+
+
+def _hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def estimate_severity(temperature: Optional[float], wind_speed: Optional[float], condition: Optional[str]) -> str:
+    """Severity for a forecast hour, rated like current readings (wind in m/s)"""
+    return weather_severity(temperature, None if wind_speed is None else wind_speed * 3.6, condition).value
+
+
+class SuitabilityMatrix:
+    """
+    Hour-by-hour weather and per-game verdicts for the next `days` days.
+
+    Matrices are JSON dicts so they can be shared through Redis:
+    {"location_id", "start" (ISO hour), "built_at", "hours": [weather or None],
+     "games": {game_type: [reason or "" (suitable) or None (no data)]}}.
+    They are rebuilt in bulk whenever forecasts are refreshed; reads never
+    touch the forecast tables, so slot listings cost no per-slot queries.
+    """
+
+    def __init__(self, days: int = 5, ttl: int = 3 * 3600):
+        self.days = days
+        self.ttl = ttl
+        self.prefix = "weather_matrix:"
+        self._local: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"builds": 0, "locations_built": 0, "local_hits": 0, "redis_hits": 0, "misses": 0}
+
+    # === Building ===
+
+    @staticmethod
+    def load_rules(db: Session) -> Dict[str, Dict[str, Any]]:
+        """Rules per game type: stored rules over the defaults"""
+        rules = {rule["game_type"]: rule for rule in DEFAULT_GAME_WEATHER_RULES}
+        for rule in db.query(GameWeatherSuitability).all():
+            rules[rule.game_type] = rule.to_dict()
+        return rules
+
+    @staticmethod
+    def evaluate(rule: Dict[str, Any], weather: Optional[Dict[str, Any]]) -> Optional[str]:
+        """"" when suitable, the joined issues when not, None without weather data"""
+        if weather is None:
+            return None
+        if not rule.get("weather_dependent", True):
+            return ""
+        return "; ".join(weather_rule_issues(
+            rule,
+            temperature=weather.get("temperature"),
+            wind_speed=weather.get("wind_speed"),
+            precipitation=weather.get("precipitation"),
+            visibility=weather.get("visibility"),
+            condition=weather.get("condition"),
+        ))
+
+    def build(self, db: Session, location_ids: Optional[Iterable[int]] = None, now: Optional[datetime] = None) -> int:
+        """Rebuild matrices from stored forecasts (three queries regardless of location count)"""
+        start = _hour(now or datetime.utcnow())
+        end = start + timedelta(days=self.days)
+        hours = self.days * 24
+        ids = list(location_ids) if location_ids is not None else None
+
+        forecast_query = db.query(
+            WeatherForecast.location_id,
+            WeatherForecast.forecast_time,
+            WeatherForecast.temperature,
+            WeatherForecast.condition,
+            WeatherForecast.wind_speed,
+            WeatherForecast.precipitation_chance,
+        ).filter(
+            WeatherForecast.forecast_time >= start - timedelta(hours=FORECAST_STEP_HOURS),
+            WeatherForecast.forecast_time < end,
+        )
+        latest = db.query(
+            LocationWeather.location_id, func.max(LocationWeather.last_updated).label("last_updated")
+        ).filter(LocationWeather.last_updated >= start - timedelta(hours=CURRENT_READING_HOURS))
+        if ids is not None:
+            forecast_query = forecast_query.filter(WeatherForecast.location_id.in_(ids))
+            latest = latest.filter(LocationWeather.location_id.in_(ids))
+        latest = latest.group_by(LocationWeather.location_id).subquery()
+        current_rows = (
+            db.query(LocationWeather)
+            .join(
+                latest,
+                (LocationWeather.location_id == latest.c.location_id)
+                & (LocationWeather.last_updated == latest.c.last_updated),
+            )
+            .all()
+        )
+
+        # Later rows for the same hour (a newer refresh) win
+        forecasts: Dict[int, Dict[datetime, Dict[str, Any]]] = {}
+        for location_id, forecast_time, temperature, condition, wind_speed, chance in forecast_query.order_by(
+            WeatherForecast.created_at
+        ):
+            forecasts.setdefault(location_id, {})[forecast_time] = {
+                "temperature": temperature,
+                "condition": condition,
+                "wind_speed": wind_speed,
+                "precipitation_chance": chance,
+                "severity": estimate_severity(temperature, wind_speed, condition),
+                "source": "forecast",
+            }
+        current = {
+            row.location_id: (row.last_updated, {
+                "temperature": row.temperature,
+                "condition": row.condition,
+                "wind_speed": row.wind_speed,
+                "precipitation": row.precipitation,
+                "visibility": row.visibility,
+                "severity": row.severity,
+                "source": "current",
+            })
+            for row in current_rows
+        }
+
+        rules = self.load_rules(db)
+        built = {}
+        for location_id in set(ids if ids is not None else []) | set(forecasts) | set(current):
+            timeline = sorted(forecasts.get(location_id, {}).items())
+            times = [moment for moment, _ in timeline]
+            reading = current.get(location_id)
+
+            weather_by_hour: List[Optional[Dict[str, Any]]] = []
+            for offset in range(hours):
+                moment = start + timedelta(hours=offset)
+                index = bisect.bisect_right(times, moment) - 1
+                if index >= 0 and moment - times[index] < timedelta(hours=FORECAST_STEP_HOURS):
+                    weather_by_hour.append(timeline[index][1])
+                elif reading and moment - reading[0] < timedelta(hours=CURRENT_READING_HOURS) and (
+                    not times or moment < times[0]
+                ):
+                    weather_by_hour.append(reading[1])
+                else:
+                    weather_by_hour.append(None)
+
+            built[location_id] = {
+                "location_id": location_id,
+                "start": start.isoformat(),
+                "built_at": datetime.utcnow().isoformat(),
+                "hours": weather_by_hour,
+                "games": {
+                    game_type: [self.evaluate(rule, weather) for weather in weather_by_hour]
+                    for game_type, rule in rules.items()
+                },
+            }
+
+        with self._lock:
+            self._local.update(built)
+        smart_cache.set_many({str(location_id): matrix for location_id, matrix in built.items()}, self.ttl, prefix=self.prefix)
+        self.stats["builds"] += 1
+        self.stats["locations_built"] += len(built)
+        logger.info(f"🧮 Weather suitability matrix built for {len(built)} locations ({hours} hours)")
+        return len(built)
+
+    # === Reading ===
+
+    def get(self, location_id: int) -> Optional[Dict[str, Any]]:
+        matrix = self._local.get(location_id)
+        if matrix is not None and self._is_current(matrix):
+            self.stats["local_hits"] += 1
+            return matrix
+
+        matrix = smart_cache.get(str(location_id), prefix=self.prefix)
+        if isinstance(matrix, dict) and self._is_current(matrix):
+            self.stats["redis_hits"] += 1
+            with self._lock:
+                self._local[location_id] = matrix
+            return matrix
+
+        self.stats["misses"] += 1
+        return None
+
+    def get_or_build(self, db: Session, location_id: int) -> Dict[str, Any]:
+        matrix = self.get(location_id)
+        if matrix is None:
+            self.build(db, [location_id])
+            matrix = self._local[location_id]
+        return matrix
+
+    def get_or_build_many(self, db: Session, location_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Matrices for many locations, building all missing ones in a single pass"""
+        matrices = {location_id: self.get(location_id) for location_id in set(location_ids)}
+        missing = [location_id for location_id, matrix in matrices.items() if matrix is None]
+        if missing:
+            self.build(db, missing)
+            with self._lock:
+                matrices.update({location_id: self._local[location_id] for location_id in missing})
+        return matrices
+
+    def _is_current(self, matrix: Dict[str, Any]) -> bool:
+        """Still covers the current hour and was built within the TTL"""
+        built_at = datetime.fromisoformat(matrix["built_at"])
+        return datetime.fromisoformat(matrix["start"]) <= _hour(datetime.utcnow()) and (
+            datetime.utcnow() - built_at
+        ).total_seconds() < self.ttl
+
+    @staticmethod
+    def lookup(matrix: Dict[str, Any], game_type: str, moment: datetime) -> Dict[str, Any]:
+        """Verdict and weather for the hour containing `moment`"""
+        offset = int((_hour(moment) - datetime.fromisoformat(matrix["start"])).total_seconds() // 3600)
+        verdicts = matrix["games"].get(game_type) or matrix["games"].get("GAME1", [])
+        in_range = 0 <= offset < len(matrix["hours"])
+        weather = matrix["hours"][offset] if in_range else None
+        reason = verdicts[offset] if in_range and offset < len(verdicts) else None
+
+        if reason is None:
+            return {
+                "is_suitable": True,
+                "reason": UNKNOWN_REASON,
+                "weather": {"condition": "forecast_needed", "temperature": None, "severity": "unknown"},
+            }
+        return {
+            "is_suitable": reason == "",
+            "reason": reason or "Weather conditions are suitable",
+            "weather": {
+                "condition": weather.get("condition"),
+                "temperature": weather.get("temperature"),
+                "severity": weather.get("severity", "unknown"),
+                "source": weather.get("source"),
+            },
+        }
+
+    def slots(self, matrix: Dict[str, Any], game_type: str, first_slot: datetime, count: int) -> List[Dict[str, Any]]:
+        """Hourly slots starting at `first_slot`, joined with their verdicts"""
+        return [
+            {"time": slot.isoformat(), **self.lookup(matrix, game_type, slot)}
+            for slot in (first_slot + timedelta(hours=hour) for hour in range(count))
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "days": self.days, "local_matrices": len(self._local)}
+
+
+# Global suitability matrix
+suitability_matrix = SuitabilityMatrix(
+    days=int(os.getenv("WEATHER_MATRIX_DAYS", "5")),
+    ttl=int(os.getenv("WEATHER_MATRIX_TTL", str(3 * 3600))),
+)
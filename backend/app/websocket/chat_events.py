@@ -1,6 +1,7 @@
 # backend/app/websocket/chat_events.py
 import logging
 from typing import List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
 from .chat_manager import sio, chat_manager
 from ..models.chat import ChatMessage, ChatRoom, ChatRoomMembership
 from ..schemas.chat import WSMessageEvent, ChatMessageResponse
@@ -21,7 +22,11 @@ class ChatEventBroadcaster:
                 WHERE crm.room_id = :room_id
             """)
             
-            participants = db_session.execute(participants_sql, {"room_id": room_id}).fetchall()
+            if isinstance(db_session, AsyncSession):
+                result = await db_session.execute(participants_sql, {"room_id": room_id})
+            else:
+                result = db_session.execute(participants_sql, {"room_id": room_id})
+            participants = result.fetchall()
             
             # Create message response schema
             message_response = ChatMessageResponse(
@@ -314,6 +314,27 @@ async def join_room(sid, data):
         logger.error(f"Join room error: {e}")
         await sio.emit('error', {'message': 'Failed to join room'}, to=sid)
 
+@sio.event
+async def watch_tournament(sid, data):
+    """Receive a tournament's live `tournament_update` deltas (no membership broadcast, unlike join_room)"""
+    try:
+        tournament_id = int(data.get('tournament_id'))
+    except (AttributeError, TypeError, ValueError):
+        await sio.emit('error', {'message': 'tournament_id required'}, to=sid)
+        return
+
+    room_id = f"tournament_{tournament_id}"
+    sio.enter_room(sid, room_id)
+    await sio.emit('watching_tournament', {'tournament_id': tournament_id, 'room': room_id}, to=sid)
+
+@sio.event
+async def unwatch_tournament(sid, data):
+    """Stop receiving a tournament's live updates"""
+    try:
+        sio.leave_room(sid, f"tournament_{int(data.get('tournament_id'))}")
+    except (AttributeError, TypeError, ValueError):
+        await sio.emit('error', {'message': 'tournament_id required'}, to=sid)
+
 @sio.event
 async def get_online_users(sid, data):
     """Get list of online users in a room"""
@@ -0,0 +1,27 @@
+-- Migration 008: Tournament listing indexes and participant count backfill
+-- Created: 2026-10-18
+-- Purpose: Index the listing filters and resync the denormalized participant counts
+
+BEGIN;
+
+-- Status listings in (start_time, id) keyset order
+CREATE INDEX IF NOT EXISTS idx_tournament_status_start ON tournaments(status, start_time, id);
+
+-- Per-venue, per-game listings
+CREATE INDEX IF NOT EXISTS idx_tournament_location_game ON tournaments(location_id, game_type);
+
+-- current_participants and prize_pool_credits are now maintained on register/withdraw;
+-- every row is reset, including tournaments whose participants all withdrew
+UPDATE tournaments t
+SET current_participants = COALESCE(counts.active, 0),
+    prize_pool_credits = COALESCE(counts.active, 0) * COALESCE(t.entry_fee_credits, 0)
+FROM tournaments base
+LEFT JOIN (
+    SELECT tournament_id, COUNT(*) AS active
+    FROM tournament_participants
+    WHERE status IN ('REGISTERED', 'CONFIRMED')
+    GROUP BY tournament_id
+) counts ON counts.tournament_id = base.id
+WHERE base.id = t.id;
+
+COMMIT;
@@ -0,0 +1,23 @@
+-- Migration 009: Credit refund ledger
+-- Created: 2026-10-18
+-- Purpose: Record cancellation refunds so bulk cancellations are idempotent and resumable
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS credit_refunds (
+    id SERIAL PRIMARY KEY,
+    refund_key VARCHAR(100) NOT NULL UNIQUE,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    amount INTEGER NOT NULL,
+    source_type VARCHAR(20) NOT NULL,
+    source_id VARCHAR(50) NOT NULL,
+    reason VARCHAR(200),
+    batch_id VARCHAR(32) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_credit_refunds_batch_id ON credit_refunds(batch_id);
+CREATE INDEX IF NOT EXISTS idx_credit_refund_user ON credit_refunds(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_credit_refund_source ON credit_refunds(source_type, source_id);
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- Migration 010: Weather daily rollups
+-- Created: 2026-10-18
+-- Purpose: Per-day, per-location aggregates behind the weather impact reports and the nightly rollup job
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS weather_daily_rollups (
+    id SERIAL PRIMARY KEY,
+    day DATE NOT NULL,
+    location_id INTEGER NOT NULL,
+    sessions_total INTEGER DEFAULT 0,
+    sessions_cancelled INTEGER DEFAULT 0,
+    weather_cancelled INTEGER DEFAULT 0,
+    weather_warnings INTEGER DEFAULT 0,
+    cancelled_credits INTEGER DEFAULT 0,
+    readings INTEGER DEFAULT 0,
+    conditions JSON,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- One row per (day, location); location_id 0 marks a day without activity
+CREATE UNIQUE INDEX IF NOT EXISTS uq_weather_rollup_day_location ON weather_daily_rollups(day, location_id);
+CREATE INDEX IF NOT EXISTS idx_weather_rollup_day ON weather_daily_rollups(day);
+
+COMMIT;
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Async vs sync database load benchmark for LFA Legacy GO Backend
+Measures request throughput of a single worker (one event loop) for an
+`async def` handler using the sync Session (before) versus AsyncSession (after)
+
+Usage:
+    python scripts/benchmark_async_db.py --database-url postgresql://... \\
+        [--requests 1000] [--concurrency 25] [--latency-ms 5]
+
+Each request issues one query that takes --latency-ms on the server
+(pg_sleep on PostgreSQL, a sleep function on SQLite) to model the network
+round trip of a real lookup. No tables are created or read.
+
+Keep --concurrency at or below pool size + overflow: beyond that the sync
+handler blocks the event loop waiting for a pooled connection that can only
+be returned by dependency teardown on that same loop, so the worker stalls
+until --pool-timeout and requests fail.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database_engines import to_async_url
+
+
+def build_app(
+    database_url: str, latency_ms: float, pool_size: int, max_overflow: int, pool_timeout: float
+) -> FastAPI:
+    is_sqlite = database_url.startswith("sqlite")
+    pool_options = {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": pool_timeout}
+
+    sync_engine = create_engine(database_url, **pool_options)
+    # aiosqlite runs on NullPool, which takes no sizing options
+    async_engine = create_async_engine(to_async_url(database_url), **({} if is_sqlite else pool_options))
+
+    if is_sqlite:
+        def sleep_ms(ms):
+            time.sleep(ms / 1000)
+            return 0
+
+        @event.listens_for(sync_engine, "connect")
+        def register_sync_sleep(dbapi_connection, connection_record):
+            dbapi_connection.create_function("sleep_ms", 1, sleep_ms)
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def register_async_sleep(dbapi_connection, connection_record):
+            dbapi_connection.run_async(
+                lambda connection: connection.create_function("sleep_ms", 1, sleep_ms)
+            )
+
+        query = text("SELECT sleep_ms(:ms), :id")
+        params = {"ms": latency_ms}
+    else:
+        query = text("SELECT pg_sleep(:seconds), CAST(:id AS integer)")
+        params = {"seconds": latency_ms / 1000}
+
+    SyncSessionLocal = sessionmaker(bind=sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SyncSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as session:
+            yield session
+
+    app = FastAPI()
+
+    @app.get("/sync/{item_id}")
+    async def sync_lookup(item_id: int, db: Session = Depends(get_sync_db)):
+        # The pre-migration pattern: async handler, blocking Session call
+        row = db.execute(query, {**params, "id": item_id}).fetchone()
+        return {"id": row[1]}
+
+    @app.get("/async/{item_id}")
+    async def async_lookup(item_id: int, db: AsyncSession = Depends(get_async_db)):
+        row = (await db.execute(query, {**params, "id": item_id})).fetchone()
+        return {"id": row[1]}
+
+    app.state.engines = (sync_engine, async_engine)
+    return app
+
+
+async def run_load(app: FastAPI, path: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://bench") as client:
+        async def one(i: int):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(f"{path}/{i}")
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        # Warm up pools before timing
+        await asyncio.gather(*(one(i) for i in range(min(concurrency, requests))))
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+async def main_async(args) -> Dict[str, Any]:
+    app = build_app(
+        args.database_url, args.latency_ms, args.pool_size, args.max_overflow, args.pool_timeout
+    )
+    try:
+        return {
+            "sync_session": await run_load(app, "/sync", args.requests, args.concurrency),
+            "async_session": await run_load(app, "/async", args.requests, args.concurrency),
+        }
+    finally:
+        sync_engine, async_engine = app.state.engines
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+
+def main():
+    default_url = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(tempfile.gettempdir(), 'lfa_async_bench.db')}"
+
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async DB access per worker")
+    parser.add_argument("--database-url", default=default_url)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Server-side time per query")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--max-overflow", type=int, default=20)
+    parser.add_argument("--pool-timeout", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"📊 DB load benchmark (single worker): {args.requests} requests, "
+        f"concurrency {args.concurrency}, {args.latency_ms} ms per query"
+    )
+    for name, stats in results.items():
+        print(
+            f"  {name:<14} {stats['throughput_rps']:>8.1f} req/s  "
+            f"p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  errors {stats['errors']}"
+        )
+    speedup = results["async_session"]["throughput_rps"] / results["sync_session"]["throughput_rps"]
+    print(f"  async/sync throughput: x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
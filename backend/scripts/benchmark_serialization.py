@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark for LFA Legacy GO Backend
+Compares FastAPI's default JSON path with FastJSONResponse on 1k-row payloads
+
+Usage: python scripts/benchmark_serialization.py [--rows 1000] [--iterations 50]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.api_response import FastJSONResponse, ResponseBuilder
+from app.models.location import GameSessionStatus
+from app.routers.admin import AdminUserResponse
+from app.routers.booking import SessionDetails
+from app.routers.social import UserSearchResult
+
+
+def build_session_rows(rows: int) -> List[SessionDetails]:
+    start = datetime(2025, 1, 1, 9, 0)
+    return [
+        SessionDetails(
+            id=i,
+            session_id=f"session_{i:06d}",
+            location_id=i % 12,
+            location_name=f"Budapest Training Center {i % 12}",
+            game_type="GAME1",
+            game_name="Football Training",
+            scheduled_start=start + timedelta(hours=i),
+            scheduled_end=start + timedelta(hours=i, minutes=90),
+            duration_minutes=90,
+            status=GameSessionStatus.SCHEDULED,
+            cost_credits=15,
+            participants=[{"user_id": i, "username": f"player{i}", "joined_at": "2025-01-01T08:00:00"}],
+            notes=None,
+            weather_conditions={"temperature": 18.5, "condition": "clear", "wind_speed": 3.2},
+            created_at=start,
+        )
+        for i in range(rows)
+    ]
+
+
+def build_search_rows(rows: int) -> List[UserSearchResult]:
+    return [
+        UserSearchResult(
+            id=i,
+            username=f"player{i}",
+            full_name=f"Player Number {i}",
+            level=i % 50,
+            games_played=i * 3,
+            win_rate=round((i % 100) * 0.9, 1),
+            friendship_status=None,
+        )
+        for i in range(rows)
+    ]
+
+
+def build_admin_rows(rows: int) -> List[AdminUserResponse]:
+    return [
+        AdminUserResponse(
+            id=i,
+            username=f"player{i}",
+            email=f"player{i}@example.com",
+            full_name=f"Player Number {i}",
+            is_active=True,
+            user_type="user",
+            credits=i % 500,
+            created_at=datetime(2025, 1, 1).isoformat(),
+        )
+        for i in range(rows)
+    ]
+
+
+def fastapi_default(model_type: Any) -> Callable[[List[Any]], bytes]:
+    """What FastAPI does for `return rows` with response_model and JSONResponse"""
+    adapter = TypeAdapter(List[model_type])
+
+    def render(rows: List[Any]) -> bytes:
+        validated = adapter.validate_python(rows, from_attributes=True)
+        content = adapter.dump_python(validated, mode="json")
+        return JSONResponse(content=content).body
+
+    return render
+
+
+def fastapi_default_no_model(rows: List[Any]) -> bytes:
+    """`return rows` without response_model: jsonable_encoder + stdlib json"""
+    return JSONResponse(content=jsonable_encoder(rows)).body
+
+
+def fast_json_response(rows: List[Any]) -> bytes:
+    """Endpoint returns FastJSONResponse directly (no re-validation)"""
+    return FastJSONResponse(content=rows).body
+
+
+def response_builder(rows: List[Any]) -> bytes:
+    """Standard envelope via ResponseBuilder.success"""
+    return ResponseBuilder.success(data=rows).body
+
+
+def measure(render: Callable[[List[Any]], bytes], rows: List[Any], iterations: int) -> Dict[str, Any]:
+    render(rows)  # warm up
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        size = len(render(rows))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "mean_ms": round(statistics.mean(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    payloads = {
+        "SessionDetails": (SessionDetails, build_session_rows(args.rows)),
+        "UserSearchResult": (UserSearchResult, build_search_rows(args.rows)),
+        "AdminUserResponse": (AdminUserResponse, build_admin_rows(args.rows)),
+    }
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, (model_type, rows) in payloads.items():
+        strategies = {
+            "fastapi_default": fastapi_default(model_type),
+            "jsonable_encoder": fastapi_default_no_model,
+            "fast_json_response": fast_json_response,
+            "response_builder": response_builder,
+        }
+        results[name] = {
+            strategy: measure(render, rows, args.iterations)
+            for strategy, render in strategies.items()
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 Serialization benchmark: {args.rows} rows x {args.iterations} iterations")
+    for name, strategies in results.items():
+        baseline = strategies["fastapi_default"]["median_ms"]
+        print(f"\n{name}")
+        for strategy, stats in strategies.items():
+            speedup = baseline / stats["median_ms"] if stats["median_ms"] else 0
+            print(
+                f"  {strategy:<20} median {stats['median_ms']:>8.3f} ms  "
+                f"p95 {stats['p95_ms']:>8.3f} ms  {stats['bytes']:>8} B  x{speedup:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Build the offline breach hash file for LFA Legacy GO Backend
+Converts a Pwned Passwords SHA-1 dump ("HASH:COUNT" lines) into the sorted
+binary file read by PASSWORD_BREACH_MODE=offline
+
+Usage:
+    python scripts/build_breach_hash_file.py pwned-passwords-sha1-ordered-by-hash.txt \\
+        breach_hashes.bin [--min-count 1] [--sort]
+
+The ordered-by-hash dump is streamed and written as it is read. Pass --sort
+for unordered input; that sorts in memory (20 bytes per hash), which is fine
+for excerpts and test lists but not the full corpus.
+
+Check a password against the result without the API:
+    python scripts/build_breach_hash_file.py breach_hashes.bin --check 'P@ssw0rd'
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.breach_check import DIGEST_SIZE, SortedHashFile
+
+
+def iter_digests(path: str, min_count: int):
+    with open(path, "r", encoding="ascii", errors="ignore") as source:
+        for line_number, line in enumerate(source, start=1):
+            sha1, _, count = line.strip().partition(":")
+            if not sha1:
+                continue
+            if count and int(count) < min_count:
+                continue
+            try:
+                digest = bytes.fromhex(sha1)
+            except ValueError:
+                raise SystemExit(f"❌ Line {line_number}: not a SHA-1 hash: {sha1[:50]!r}")
+            if len(digest) != DIGEST_SIZE:
+                raise SystemExit(f"❌ Line {line_number}: expected 40 hex characters")
+            yield digest
+
+
+def build(source: str, target: str, min_count: int, sort: bool) -> int:
+    digests = iter_digests(source, min_count)
+    if sort:
+        digests = iter(sorted(set(digests)))
+
+    written = 0
+    previous = b""
+    with open(target + ".tmp", "wb") as output:
+        for digest in digests:
+            if digest < previous:
+                os.unlink(target + ".tmp")
+                raise SystemExit("❌ Input is not ordered by hash; rerun with --sort")
+            if digest != previous:
+                output.write(digest)
+                written += 1
+                previous = digest
+    os.replace(target + ".tmp", target)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline Pwned Passwords hash file")
+    parser.add_argument("paths", nargs="+", help="SOURCE TARGET to build, or TARGET with --check")
+    parser.add_argument("--min-count", type=int, default=1, help="Skip hashes seen fewer times")
+    parser.add_argument("--sort", action="store_true", help="Sort unordered input in memory")
+    parser.add_argument("--check", metavar="PASSWORD", help="Look a password up in TARGET instead")
+    args = parser.parse_args()
+
+    if args.check is not None:
+        hash_file = SortedHashFile(args.paths[-1])
+        breached = hashlib.sha1(args.check.encode()).digest() in hash_file
+        print(f"{'🚨 breached' if breached else '✅ not found'} ({hash_file.count:,} hashes)")
+        return
+
+    if len(args.paths) != 2:
+        parser.error("building needs SOURCE and TARGET")
+    source, target = args.paths
+    written = build(source, target, args.min_count, args.sort)
+    print(f"✅ Wrote {written:,} hashes ({written * DIGEST_SIZE / 1024 / 1024:.1f} MiB) to {target}")
+
+
+if __name__ == "__main__":
+    main()
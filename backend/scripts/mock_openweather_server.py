@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Mock OpenWeather server for LFA Legacy GO Backend
+Serves /data/2.5/weather with configurable latency, rate limit and error rate,
+so the bulk weather refresh can be exercised and timed without the real API
+
+Usage:
+    python scripts/mock_openweather_server.py [--port 8099] [--latency-ms 150] \\
+        [--rate-per-second 20] [--error-rate 0.05]
+
+Then point the backend at it:
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8099/data/2.5 OPENWEATHERMAP_API_KEY=mock ...
+
+Or time one refresh of every active location directly:
+    python scripts/mock_openweather_server.py --refresh
+
+Requests over the rate limit get 429 with Retry-After; --error-rate of them
+get 503. Counters are printed on exit and served at /stats.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+
+def build_app(latency_ms: float, rate_per_second: float, error_rate: float) -> web.Application:
+    counters = Counter()
+    window = {"second": 0, "count": 0}
+
+    async def current_weather(request: web.Request) -> web.Response:
+        counters["requests"] += 1
+        second = int(time.time())
+        if window["second"] != second:
+            window.update(second=second, count=0)
+        window["count"] += 1
+        if rate_per_second and window["count"] > rate_per_second:
+            counters["throttled"] += 1
+            return web.json_response({"cod": 429, "message": "rate limited"}, status=429, headers={"Retry-After": "1"})
+
+        await asyncio.sleep(latency_ms / 1000 * random.uniform(0.5, 1.5))
+        if random.random() < error_rate:
+            counters["errors"] += 1
+            return web.json_response({"cod": 503, "message": "unavailable"}, status=503)
+
+        lat = float(request.query.get("lat", 0))
+        lon = float(request.query.get("lon", 0))
+        counters["ok"] += 1
+        return web.json_response({
+            "coord": {"lat": lat, "lon": lon},
+            "weather": [{"main": random.choice(["Clear", "Clouds", "Rain"]), "description": "mock"}],
+            "main": {
+                "temp": round(random.uniform(-2, 32), 1),
+                "feels_like": round(random.uniform(-4, 34), 1),
+                "humidity": random.randint(30, 95),
+                "pressure": random.randint(995, 1030),
+            },
+            "wind": {"speed": round(random.uniform(0, 12), 1), "deg": random.randint(0, 359)},
+            "visibility": 10000,
+            "dt": int(time.time()),
+        })
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(dict(counters))
+
+    app = web.Application()
+    app.router.add_get("/data/2.5/weather", current_weather)
+    app.router.add_get("/stats", stats)
+    app["counters"] = counters
+    return app
+
+
+async def run_refresh(base_url: str):
+    from app.core.database_production import db_config
+    from app.services.weather_service import WeatherAPIService, WeatherService
+
+    async with WeatherAPIService("mock", base_url=base_url) as api_service:
+        with db_config.session_scope() as db:
+            result = await WeatherService(db, api_service).refresh_locations_bulk()
+    print(f"🌦️ Refresh: {result}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Mock OpenWeather current-weather API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--rate-per-second", type=float, default=20, help="0 disables throttling")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--refresh", action="store_true", help="Run one bulk refresh against the mock and exit")
+    args = parser.parse_args()
+
+    app = build_app(args.latency_ms, args.rate_per_second, args.error_rate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    base_url = f"http://{args.host}:{args.port}/data/2.5"
+    print(f"☁️ Mock OpenWeather listening on {base_url}")
+
+    try:
+        if args.refresh:
+            await run_refresh(base_url)
+        else:
+            await asyncio.Event().wait()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        print(f"📊 Mock counters: {dict(app['counters'])}")
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
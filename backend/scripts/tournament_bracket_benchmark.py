@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tournament bracket benchmark for LFA Legacy GO Backend
+Builds brackets for large events in every format, stores them as JSON and
+plays every match through the engine, timing each step
+
+Usage:
+    python scripts/tournament_bracket_benchmark.py [--players 4096] \\
+        [--round-robin-players 512] [--lookups 2000] [--seed 7]
+
+Round robin is run at --round-robin-players: at 4,096 players it is
+8.4 million matches, not an event anyone schedules. The lookup line
+compares finding matches by label through the bracket index against the
+per-round linear scan brackets used before.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.tournament_brackets import (
+    FIELDS,
+    LABEL,
+    P1,
+    P2,
+    Bracket,
+    DOUBLE_ELIMINATION,
+    ROUND_ROBIN,
+    SINGLE_ELIMINATION,
+    SWISS_SYSTEM,
+    build_bracket,
+)
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def play_out(bracket: Bracket, rng: random.Random) -> int:
+    """Decide every playable match at random until the bracket is complete"""
+    ready = bracket.ready_matches()
+    played = 0
+    while ready:
+        row = bracket.matches[ready.pop()]
+        ready.extend(bracket.record_result(bracket.position(row[LABEL]), row[P1] if rng.random() < 0.5 else row[P2]))
+        played += 1
+    return played
+
+
+def verbose_size(bracket: Bracket) -> int:
+    """Size of the same bracket stored as one object per match, grouped by round"""
+    rounds = {}
+    for row in bracket.matches:
+        rounds.setdefault(str(row[1]), {"matches": []})["matches"].append(dict(zip(FIELDS, row)))
+    return len(json.dumps({"format": bracket.format, "rounds": rounds}))
+
+
+def run_format(format: str, players: int, rng: random.Random):
+    seeds = rng.sample(range(1, players * 10), players)
+    bracket, build_ms = timed(build_bracket, format, seeds)
+    stored, dump_ms = timed(json.dumps, bracket.to_dict())
+    loaded, load_ms = timed(lambda: Bracket.from_dict(json.loads(stored)))
+
+    played, play_ms = timed(play_out, loaded, rng)
+    assert loaded.is_complete, f"{format} bracket did not complete"
+    podium = loaded.podium()
+    # Sizes of the finished bracket (Swiss rounds are only stored once paired)
+    compact_bytes = len(json.dumps(loaded.to_dict()))
+
+    print(
+        f"{format:<19} {players:>6} {len(loaded.matches):>9} {build_ms:>9.1f} {compact_bytes / 1024:>9.0f} "
+        f"{verbose_size(loaded) / 1024:>9.0f} {dump_ms + load_ms:>9.1f} {play_ms:>9.1f} "
+        f"{play_ms * 1000 / max(played, 1):>8.1f}   champion {podium['champion']}"
+    )
+    return loaded
+
+
+def compare_lookups(bracket: Bracket, lookups: int, rng: random.Random):
+    labels = [row[LABEL] for row in rng.sample(bracket.matches, min(lookups, len(bracket.matches)))]
+
+    def scan():
+        for label in labels:
+            next(row for row in bracket.matches if row[LABEL] == label)
+
+    def indexed():
+        for label in labels:
+            bracket.position(label)
+
+    _, scan_ms = timed(scan)
+    _, index_ms = timed(indexed)
+    print(
+        f"🔎 {len(labels)} lookups by label in {len(bracket.matches)} matches: "
+        f"linear scan {scan_ms:.1f} ms, index {index_ms:.2f} ms (including the one-time index build)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tournament bracket engine benchmark")
+    parser.add_argument("--players", type=int, default=4096)
+    parser.add_argument("--round-robin-players", type=int, default=512)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(
+        f"{'format':<19} {'players':>6} {'matches':>9} {'build ms':>9} {'json KB':>9} "
+        f"{'dict KB':>9} {'io ms':>9} {'play ms':>9} {'us/res':>8}"
+    )
+    brackets = {}
+    for format in (SINGLE_ELIMINATION, DOUBLE_ELIMINATION, SWISS_SYSTEM, ROUND_ROBIN):
+        players = args.round_robin_players if format == ROUND_ROBIN else args.players
+        brackets[format] = run_format(format, players, rng)
+
+    compare_lookups(brackets[DOUBLE_ELIMINATION], args.lookups, rng)
+
+
+if __name__ == "__main__":
+    main()
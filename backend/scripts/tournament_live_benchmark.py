@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tournament live-state benchmark for LFA Legacy GO Backend
+Plays a live event while clients poll it, comparing polls that rebuild the
+tournament details with polls served from the live snapshot
+
+Usage:
+    python scripts/tournament_live_benchmark.py [--database-url postgresql://...] \\
+        [--players 256] [--pollers 200] [--polls-per-result 3]
+
+Every poller polls --polls-per-result times between two match results, as
+clients refreshing during an event do. "rebuild" builds and serializes the
+details on every poll (the per-poll cost without a snapshot); "snapshot"
+serves them through the live state with If-None-Match, so most polls are
+304s. Without --database-url a temporary SQLite file is used and, unless
+Redis is reachable, the live state uses its in-process fallback. The tables
+are created if missing and the seeded rows are left in place.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.api_response import dumps
+from app.models.location import Location
+from app.models.tournament import (
+    MatchStatus,
+    ParticipantStatus,
+    Tournament,
+    TournamentFormat,
+    TournamentMatch,
+    TournamentParticipant,
+    TournamentStatus,
+    TournamentType,
+)
+from app.models.user import User
+from app.services.tournament_live import tournament_live as live
+from app.services.tournament_service import BracketService, TournamentLifecycleManager
+
+
+def seed(db, players: int) -> int:
+    """One in-progress tournament with its bracket generated; returns its id"""
+    run = uuid.uuid4().hex[:8]
+    now = datetime.utcnow()
+    location = Location(
+        location_id=f"LIVE-{run}", name="Benchmark Arena", address="-", city="-", latitude=47.5, longitude=19.0
+    )
+    db.add(location)
+    users = [
+        User(
+            username=f"live_{run}_{i}",
+            email=f"live_{run}_{i}@example.com",
+            hashed_password="-",
+            full_name=f"Live Player {i}",
+            credits=0,
+            level=random.randint(1, 50),
+        )
+        for i in range(players)
+    ]
+    db.add_all(users)
+    db.flush()
+
+    tournament = Tournament(
+        tournament_id=f"LIVE-{run}",
+        name="Live event",
+        tournament_type=TournamentType.DAILY_CHALLENGE,
+        game_type="GAME1",
+        format=TournamentFormat.SINGLE_ELIMINATION,
+        location_id=location.id,
+        start_time=now - timedelta(minutes=5),
+        end_time=now + timedelta(hours=6),
+        registration_deadline=now - timedelta(hours=1),
+        max_participants=players,
+        min_participants=2,
+        entry_fee_credits=0,
+        prize_pool_credits=0,
+        current_participants=players,
+        organizer_id=users[0].id,
+        status=TournamentStatus.IN_PROGRESS,
+    )
+    db.add(tournament)
+    db.flush()
+    db.add_all(
+        TournamentParticipant(
+            tournament_id=tournament.id, user_id=user.id, status=ParticipantStatus.REGISTERED, registration_time=now
+        )
+        for user in users
+    )
+    db.commit()
+    BracketService(db).generate_bracket(tournament.id)
+    return tournament.id
+
+
+def run(args):
+    engine_options = {"connect_args": {"timeout": 60}} if args.database_url.startswith("sqlite") else {}
+    engine = create_engine(args.database_url, **engine_options)
+    for model in (User, Location, Tournament, TournamentParticipant, TournamentMatch):
+        model.__table__.create(engine, checkfirst=True)
+    session_factory = sessionmaker(bind=engine)
+
+    with session_factory() as db:
+        tournament_id = seed(db, args.players)
+        etags = [None] * args.pollers
+        polls = {"rebuild": 0.0, "snapshot": 0.0}
+        served = {"200": 0, "304": 0}
+        results = 0
+
+        while True:
+            for _ in range(args.polls_per_result):
+                started = time.perf_counter()
+                for _ in range(args.pollers):
+                    dumps(live.build(db, tournament_id))
+                polls["rebuild"] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                for poller in range(args.pollers):
+                    etag, body = live.get(db, tournament_id, "details", etags[poller])
+                    served["304" if body is None else "200"] += 1
+                    etags[poller] = etag
+                polls["snapshot"] += time.perf_counter() - started
+
+            match = (
+                db.query(TournamentMatch)
+                .filter(TournamentMatch.tournament_id == tournament_id, TournamentMatch.status == MatchStatus.SCHEDULED)
+                .first()
+            )
+            if match is None:
+                break
+            winner = random.choice([match.player1_id, match.player2_id])
+            # Refreshes the live snapshot, as the result endpoint does
+            TournamentLifecycleManager(db).submit_match_result(match.id, winner, 1, 0, winner)
+            results += 1
+
+    total = sum(served.values())
+    print(f"🏁 {results} results, {args.pollers} pollers, {total} polls per strategy")
+    for name, seconds in polls.items():
+        print(f"⏱️ {name:<9} {seconds:>8.2f} s total, {seconds * 1e6 / total:>9.1f} µs per poll")
+    print(f"📊 Snapshot polls: {served['200']} full responses, {served['304']} not modified "
+          f"({served['304'] * 100 / total:.1f}%), {polls['rebuild'] / max(polls['snapshot'], 1e-9):.0f}x less poll time")
+    print(f"📈 Live state stats: {live.get_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tournament live-state polling benchmark")
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--players", type=int, default=256)
+    parser.add_argument("--pollers", type=int, default=200)
+    parser.add_argument("--polls-per-result", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="live_bench_"), "bench.db")
+        args.database_url = f"sqlite:///{path}"
+        print(f"🗄️ Using {args.database_url}")
+
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
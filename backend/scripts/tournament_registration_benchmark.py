@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tournament registration rush benchmark for LFA Legacy GO Backend
+Fires concurrent registrations at one tournament through the registration
+engine and checks that seats and credits come out exact
+
+Usage:
+    python scripts/tournament_registration_benchmark.py [--database-url postgresql://...] \\
+        [--users 1000] [--seats 64] [--fee 10] [--workers 32] [--broke-share 0.1] [--retry-share 0.1]
+
+Without --database-url a temporary SQLite file is used (writers serialize
+there, so the numbers say more about correctness than throughput). The
+users, location and tournament tables are created if missing and the
+seeded rows are left in place; point it at a scratch database.
+
+--broke-share of the users have no credits; --retry-share of the requests
+are sent twice with the same idempotency key, as a client retrying after a
+timeout would. Exits non-zero if any invariant is broken.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.models.location import Location
+from app.models.tournament import (
+    ParticipantStatus,
+    Tournament,
+    TournamentFormat,
+    TournamentParticipant,
+    TournamentStatus,
+    TournamentType,
+)
+from app.models.user import User
+from app.services.tournament_registration import IdempotencyStore, RegistrationEngine, RegistrationError
+
+
+def seed(session_factory, users: int, seats: int, fee: int, broke_share: float):
+    """Create the players and one open tournament; returns (tournament id, user ids, starting credits, eligible users)"""
+    run = uuid.uuid4().hex[:8]
+    now = datetime.utcnow()
+    with session_factory() as db:
+        location = Location(
+            location_id=f"BENCH-{run}", name="Benchmark Arena", address="-", city="-", latitude=47.5, longitude=19.0
+        )
+        db.add(location)
+        players = [
+            User(
+                username=f"bench_{run}_{i}",
+                email=f"bench_{run}_{i}@example.com",
+                hashed_password="-",
+                full_name=f"Bench Player {i}",
+                credits=0 if random.random() < broke_share else fee * 3,
+                level=5,
+            )
+            for i in range(users)
+        ]
+        db.add_all(players)
+        db.flush()
+
+        tournament = Tournament(
+            tournament_id=f"BENCH-{run}",
+            name="Registration rush",
+            tournament_type=TournamentType.DAILY_CHALLENGE,
+            game_type="GAME1",
+            format=TournamentFormat.SINGLE_ELIMINATION,
+            location_id=location.id,
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=2, hours=4),
+            registration_deadline=now + timedelta(days=1),
+            max_participants=seats,
+            min_participants=2,
+            entry_fee_credits=fee,
+            prize_pool_credits=0,
+            current_participants=0,
+            organizer_id=players[0].id,
+            status=TournamentStatus.REGISTRATION,
+        )
+        db.add(tournament)
+        db.commit()
+        return (
+            tournament.id,
+            [player.id for player in players],
+            sum(player.credits for player in players),
+            sum(1 for player in players if player.credits >= fee),
+        )
+
+
+def run(args) -> bool:
+    engine_options = {"pool_size": args.workers, "max_overflow": 0}
+    if args.database_url.startswith("sqlite"):
+        engine_options = {"connect_args": {"timeout": 60, "check_same_thread": False}}
+    engine = create_engine(args.database_url, **engine_options)
+    for model in (User, Location, Tournament, TournamentParticipant):
+        model.__table__.create(engine, checkfirst=True)
+    session_factory = sessionmaker(bind=engine)
+
+    tournament_id, user_ids, credits_before, eligible = seed(session_factory, args.users, args.seats, args.fee, args.broke_share)
+    # Local map only: the benchmark measures the database path, not Redis
+    idempotency = IdempotencyStore(prefix=f"bench_reg:{tournament_id}:")
+
+    requests = [(user_id, uuid.uuid4().hex) for user_id in user_ids]
+    requests += random.sample(requests, int(len(requests) * args.retry_share))
+    random.shuffle(requests)
+
+    def register(request):
+        user_id, key = request
+        started = time.perf_counter()
+        with session_factory() as db:
+            try:
+                result = RegistrationEngine(db, idempotency).register(tournament_id, user_id, key)
+                outcome = "replayed" if result.get("replayed") else "registered"
+            except RegistrationError as e:
+                outcome = e.code
+            except Exception as e:
+                outcome = f"error:{type(e).__name__}"
+        return outcome, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(register, requests))
+    elapsed = time.perf_counter() - started
+
+    outcomes = Counter(outcome for outcome, _ in results)
+    latencies = sorted(latency for _, latency in results)
+    print(f"🏁 {len(requests)} requests ({args.users} users, {args.seats} seats) in {elapsed:.2f}s "
+          f"-> {len(requests) / elapsed:.0f} req/s with {args.workers} workers")
+    print(f"⏱️ p50 {statistics.median(latencies):.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms, max {latencies[-1]:.1f} ms")
+    print(f"📊 Outcomes: {dict(outcomes)}")
+
+    with session_factory() as db:
+        participants = (
+            db.query(func.count(TournamentParticipant.id))
+            .filter(
+                TournamentParticipant.tournament_id == tournament_id,
+                TournamentParticipant.status == ParticipantStatus.REGISTERED,
+            )
+            .scalar()
+        )
+        current, prize_pool = (
+            db.query(Tournament.current_participants, Tournament.prize_pool_credits)
+            .filter(Tournament.id == tournament_id)
+            .one()
+        )
+        credits_after = db.query(func.sum(User.credits)).filter(User.id.in_(user_ids)).scalar()
+        negative = db.query(func.count(User.id)).filter(User.id.in_(user_ids), User.credits < 0).scalar()
+
+    checks = {
+        "participant rows == seats taken": participants == current,
+        "seats taken == registered outcomes": current == outcomes["registered"],
+        "tournament not overfilled": current <= args.seats,
+        "every seat an eligible user could take is taken": current == min(args.seats, eligible),
+        "no negative balances": not negative,
+        "credits charged == seats x fee": credits_before - credits_after == current * args.fee,
+        "prize pool == seats x fee": prize_pool == current * args.fee,
+        "no unexpected errors": not any(outcome.startswith("error:") for outcome in outcomes),
+    }
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    return all(checks.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent tournament registration benchmark")
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seats", type=int, default=64)
+    parser.add_argument("--fee", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--broke-share", type=float, default=0.1, help="Share of users with no credits")
+    parser.add_argument("--retry-share", type=float, default=0.1, help="Share of requests sent twice with one key")
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="registration_bench_"), "bench.db")
+        args.database_url = f"sqlite:///{path}"
+        print(f"🗄️ Using {args.database_url}")
+
+    sys.exit(0 if run(args) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Shared test setup
+Runs the app against a throwaway SQLite database with in-process job leases
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Set before any app module reads its configuration
+TEST_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='lfa_tests_'), 'test.db')}"
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ["PRIMARY_DATABASE_URL"] = TEST_DATABASE_URL
+os.environ["JOB_SCHEDULER_MODE"] = "local"
@@ -0,0 +1,104 @@
+"""
+Password breach check: range response parsing and offline hash file lookups
+"""
+
+import asyncio
+import hashlib
+
+import pytest
+
+from app.services.breach_check import BreachChecker, SortedHashFile, parse_range_response
+
+BREACHED = ["password", "123456", "P@ssw0rd", "qwerty", "letmein"]
+
+
+def sha1(password: str) -> bytes:
+    return hashlib.sha1(password.encode()).digest()
+
+
+@pytest.fixture
+def hash_file(tmp_path):
+    path = tmp_path / "breach_hashes.bin"
+    path.write_bytes(b"".join(sorted(sha1(password) for password in BREACHED)))
+    return str(path)
+
+
+def test_range_response_drops_padding_rows():
+    body = "\r\n".join([
+        "0018A45C4D1DEF81644B54AB7F969B88D65:10",
+        "00D4F6E8FA6EECAD2A3AA415EEC418D38EC:0",
+        "011053FD0102E94D6AE2F8B83D76FAF94F6:3",
+        "012A7CA357541F0AC487871FEEC1891C49C:0",
+    ])
+    assert parse_range_response(body) == {
+        "0018A45C4D1DEF81644B54AB7F969B88D65",
+        "011053FD0102E94D6AE2F8B83D76FAF94F6",
+    }
+
+
+def test_range_response_normalizes_case_and_skips_malformed_lines():
+    body = "\n".join([
+        "0018a45c4d1def81644b54ab7f969b88d65:2",
+        "TOOSHORT:5",
+        "011053FD0102E94D6AE2F8B83D76FAF94F6:",
+        "",
+    ])
+    assert parse_range_response(body) == {"0018A45C4D1DEF81644B54AB7F969B88D65"}
+
+
+def test_sorted_hash_file_membership(hash_file):
+    hashes = SortedHashFile(hash_file)
+    try:
+        assert hashes.count == len(BREACHED)
+        digests = sorted(sha1(password) for password in BREACHED)
+        # First, last and everything between are found by the binary search
+        assert all(digest in hashes for digest in digests)
+        assert b"\x00" * 20 not in hashes
+        assert b"\xff" * 20 not in hashes
+        assert sha1("correct horse battery staple") not in hashes
+    finally:
+        hashes.close()
+
+
+def test_sorted_hash_file_rejects_partial_records(tmp_path):
+    path = tmp_path / "truncated.bin"
+    path.write_bytes(sha1("password") + b"\x01\x02")
+    with pytest.raises(ValueError):
+        SortedHashFile(str(path))
+
+
+def test_empty_hash_file_contains_nothing(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    hashes = SortedHashFile(str(path))
+    try:
+        assert sha1("password") not in hashes
+    finally:
+        hashes.close()
+
+
+def test_offline_is_breached(hash_file):
+    checker = BreachChecker(mode="offline", hash_file=hash_file)
+
+    async def check():
+        try:
+            return [await checker.is_breached(password) for password in ("P@ssw0rd", "Unlikely-Phrase-91!")]
+        finally:
+            await checker.close()
+
+    assert asyncio.run(check()) == [True, False]
+    assert checker.stats["checks"] == 2
+    assert checker.stats["breached"] == 1
+    assert checker.stats["fetches"] == 0  # Never touches the range API
+
+
+def test_offline_without_hash_file_fails_open():
+    checker = BreachChecker(mode="offline", hash_file=None)
+    assert asyncio.run(checker.is_breached("password")) is False
+    assert checker.stats["errors"] == 1
+
+
+def test_off_mode_skips_the_check(hash_file):
+    checker = BreachChecker(mode="off", hash_file=hash_file)
+    assert asyncio.run(checker.is_breached("password")) is False
+    assert checker.stats["checks"] == 0
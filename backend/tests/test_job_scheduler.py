@@ -0,0 +1,183 @@
+"""Cron parsing, in-process leases and run metrics of the job scheduler"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app.core.job_scheduler import CronSpec, JobScheduler, MemoryLeaseBackend
+
+
+def fires(expression: str, start: datetime, count: int):
+    spec, moments = CronSpec(expression), []
+    for _ in range(count):
+        start = spec.next_after(start)
+        moments.append(start)
+    return moments
+
+
+# === Cron parsing ===
+
+
+def test_leap_day_fires_only_in_leap_years():
+    assert fires("30 6 29 2 *", datetime(2025, 3, 1), 2) == [
+        datetime(2028, 2, 29, 6, 30),
+        datetime(2032, 2, 29, 6, 30),
+    ]
+
+
+def test_restricted_day_of_month_and_weekday_match_either():
+    # The 13th or any Friday
+    moments = fires("0 9 13 * 5", datetime(2026, 10, 1), 8)
+    assert all(moment.day == 13 or moment.weekday() == 4 for moment in moments)
+    assert any(moment.day == 13 and moment.weekday() != 4 for moment in moments)
+    assert any(moment.day != 13 and moment.weekday() == 4 for moment in moments)
+    assert moments == sorted(set(moments))
+
+
+def test_unrestricted_weekday_keeps_day_of_month():
+    assert {moment.day for moment in fires("0 0 13 * *", datetime(2026, 1, 1), 6)} == {13}
+    assert {moment.weekday() for moment in fires("15 8 * * 1-5", datetime(2026, 10, 16), 10)} <= {0, 1, 2, 3, 4}
+
+
+def test_sunday_is_both_zero_and_seven():
+    assert fires("0 0 * * 0", datetime(2026, 10, 1), 3) == fires("0 0 * * 7", datetime(2026, 10, 1), 3)
+
+
+def test_steps_lists_and_aliases():
+    assert fires("*/20 3,5 * * *", datetime(2026, 10, 18, 3, 30), 3) == [
+        datetime(2026, 10, 18, 3, 40),
+        datetime(2026, 10, 18, 5, 0),
+        datetime(2026, 10, 18, 5, 20),
+    ]
+    assert fires("@daily", datetime(2026, 12, 31, 23, 59), 1) == [datetime(2027, 1, 1)]
+
+
+def test_intervals_align_to_the_epoch():
+    assert CronSpec("@every 10m").next_after(datetime(2026, 10, 18, 12, 7, 30)) == datetime(2026, 10, 18, 12, 10)
+    assert CronSpec("@every 90s").next_after(datetime(2026, 10, 18, 0, 0, 0)) == datetime(2026, 10, 18, 0, 1, 30)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "0 0 32 * *", "*/0 * * * *", "@every 0m", "@every 5x"])
+def test_invalid_specs_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronSpec(expression)
+
+
+def test_impossible_dates_never_fire():
+    with pytest.raises(ValueError):
+        CronSpec("0 0 31 2 *").next_after(datetime(2026, 1, 1))
+
+
+# === In-memory leases ===
+
+
+def test_lease_is_exclusive_until_released():
+    leases = MemoryLeaseBackend()
+    assert leases.acquire("job", "a", fire_ts=100, lease_seconds=60)
+    assert not leases.acquire("job", "b", fire_ts=101, lease_seconds=60)
+    assert not leases.renew("job", "b", 60)
+    assert leases.renew("job", "a", 60)
+
+    leases.release("job", "b")  # Not the owner: no effect
+    assert not leases.acquire("job", "b", fire_ts=101, lease_seconds=60)
+    leases.release("job", "a")
+    assert leases.acquire("job", "b", fire_ts=101, lease_seconds=60)
+
+
+def test_an_occurrence_runs_once_even_after_release():
+    leases = MemoryLeaseBackend()
+    assert leases.acquire("job", "a", fire_ts=100, lease_seconds=60)
+    leases.release("job", "a")
+    assert not leases.acquire("job", "b", fire_ts=100, lease_seconds=60)
+    assert leases.acquire("job", "b", fire_ts=160, lease_seconds=60)
+
+
+def test_expired_lease_can_be_taken_over():
+    leases = MemoryLeaseBackend()
+    assert leases.acquire("job", "a", fire_ts=100, lease_seconds=0.01)
+    time.sleep(0.02)
+    assert leases.acquire("job", "b", fire_ts=160, lease_seconds=60)
+    assert not leases.renew("job", "a", 60)
+
+
+def test_concurrent_runs_of_one_occurrence_execute_once():
+    scheduler = JobScheduler(mode="local", default_jitter=0)
+    calls = []
+
+    async def job():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+
+    scheduler.register("exclusive", job, "@every 1m")
+    fire_time = datetime(2026, 10, 18, 12, 0)
+
+    async def run_twice():
+        return await asyncio.gather(
+            scheduler.run_job("exclusive", fire_time), scheduler.run_job("exclusive", fire_time)
+        )
+
+    assert sorted(asyncio.run(run_twice())) == [False, True]
+    assert len(calls) == 1
+    stats = scheduler.get_stats()
+    assert stats["leases"] == "local"
+    assert stats["jobs"]["exclusive"]["runs"] == 1
+    assert stats["jobs"]["exclusive"]["skipped"] == 1
+
+
+# === Run metrics ===
+
+
+def test_failures_and_timeouts_are_recorded():
+    scheduler = JobScheduler(mode="local", default_jitter=0)
+
+    def broken():
+        raise RuntimeError("provider down")
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    scheduler.register("broken", broken, "@every 1m")
+    scheduler.register("slow", slow, "@every 1m", timeout=0.05)
+
+    async def run():
+        return (
+            await scheduler.run_job("broken", datetime(2026, 10, 18, 12, 0)),
+            await scheduler.run_job("slow", datetime(2026, 10, 18, 12, 0)),
+        )
+
+    assert asyncio.run(run()) == (False, False)
+    jobs = scheduler.get_stats()["jobs"]
+    assert jobs["broken"]["failures"] == 1
+    assert jobs["broken"]["timeouts"] == 0
+    assert jobs["broken"]["last_error"] == "provider down"
+    assert jobs["slow"]["failures"] == 1
+    assert jobs["slow"]["timeouts"] == 1
+    assert jobs["slow"]["last_error"].startswith("Timed out")
+    assert scheduler.stats["failures"] == 2
+    assert scheduler.stats["runs"] == 2
+
+
+def test_success_clears_the_last_error_and_sync_jobs_run_off_the_loop():
+    scheduler = JobScheduler(mode="local", default_jitter=0)
+    outcomes = iter([RuntimeError("flaky"), None])
+    threads = []
+
+    def flaky():
+        threads.append(threading.current_thread().name)
+        outcome = next(outcomes)
+        if outcome:
+            raise outcome
+
+    scheduler.register("flaky", flaky, "@every 1m")
+
+    async def run():
+        await scheduler.run_job("flaky", datetime(2026, 10, 18, 12, 0))
+        return await scheduler.run_job("flaky", datetime(2026, 10, 18, 12, 1))
+
+    assert asyncio.run(run()) is True
+    job = scheduler.get_stats()["jobs"]["flaky"]
+    assert job["runs"] == 2 and job["failures"] == 1 and job["last_error"] is None
+    assert "MainThread" not in threads
@@ -0,0 +1,136 @@
+"""
+SQL budgets of the hot list endpoints, enforced with SQL_BUDGET_MODE=raise
+
+Each endpoint is served from seeded data large enough that a per-row
+query would blow its @sql_budget and answer 500 SQL_BUDGET_EXCEEDED.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth_principal import Principal
+from app.core.database_production import db_config
+from app.database import Base, SessionLocal
+from app.database_async import get_async_db
+from app.middleware.sql_budget import SQLBudgetMiddleware, SQLBudgetMonitor, sql_budget
+from app.models.chat import ChatMessage, ChatRoom, ChatRoomMembership
+from app.models.friends import FriendRequest, FriendRequestStatus, Friendship
+from app.models.location import GameDefinition, GameSession, GameSessionStatus, Location
+from app.models.user import User
+from app.routers import booking, chat, social
+from app.routers.auth import get_current_principal, get_current_user_async
+
+ROWS = 12  # Enough that one query per row exceeds every budget below
+
+
+def seed(db):
+    users = [
+        User(
+            username=f"budget{i}", email=f"budget{i}@example.com", hashed_password="x",
+            full_name=f"Budget Player {i}", games_played=10, games_won=i % 10,
+        )
+        for i in range(ROWS + 1)
+    ]
+    db.add_all(users)
+    db.flush()
+    me, others = users[0], users[1:]
+
+    locations = [
+        Location(location_id=f"budget-loc{i}", name=f"Pitch {i}", address="Main St", latitude=47.5, longitude=19.0)
+        for i in range(ROWS)
+    ]
+    games = [GameDefinition(game_id=f"BUDGET{i}", name=f"Drill {i}") for i in range(ROWS)]
+    db.add_all(locations + games)
+    db.flush()
+
+    start = datetime.utcnow() + timedelta(days=1)
+    for i in range(ROWS):
+        db.add(GameSession(
+            session_id=f"budget-session{i}", game_definition_id=games[i].id, location_id=locations[i].id,
+            user_id=me.id, scheduled_start=start + timedelta(hours=i),
+            scheduled_end=start + timedelta(hours=i, minutes=60), duration_minutes=60,
+            status=GameSessionStatus.SCHEDULED, cost_credits=1,
+        ))
+
+    half = ROWS // 2
+    for other in others[:half]:
+        db.add(Friendship(user1_id=me.id, user2_id=other.id, status="active"))
+    for other in others[half:]:
+        db.add(FriendRequest(sender_id=other.id, receiver_id=me.id, status=FriendRequestStatus.PENDING))
+
+    for i in range(ROWS):
+        room = ChatRoom(name=f"Room {i}", room_type="public", created_by=others[i].id, is_active=True)
+        db.add(room)
+        db.flush()
+        db.add(ChatRoomMembership(room_id=room.id, user_id=me.id))
+        db.add(ChatMessage(room_id=room.id, user_id=others[i].id, message=f"hello {i}"))
+
+    db.commit()
+    return me
+
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.create_all(db_config.engine)
+    db = SessionLocal()
+    try:
+        me = seed(db)
+        principal = Principal.from_user(me)
+    finally:
+        db.close()
+
+    app = FastAPI()
+    app.add_middleware(SQLBudgetMiddleware, monitor=SQLBudgetMonitor(sample_rate=0))
+    # Mounted as in main_production
+    app.include_router(booking.router, prefix="/api/booking")
+    app.include_router(chat.router)
+    app.include_router(social.router, prefix="/api/social")
+
+    @app.get("/test/over-budget")
+    @sql_budget(max_queries=2)
+    async def over_budget(db: AsyncSession = Depends(get_async_db)):
+        for user_id in range(1, ROWS + 1):
+            await db.get(User, user_id)
+        return {"ok": True}
+
+    async def current_user_async(db: AsyncSession = Depends(get_async_db)):
+        return await db.scalar(select(User).where(User.id == principal.id))
+
+    app.dependency_overrides[get_current_principal] = lambda: principal
+    app.dependency_overrides[get_current_user_async] = current_user_async
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("SQL_BUDGET_MODE", "raise")
+        with TestClient(app) as test_client:
+            yield test_client
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/api/booking/my-bookings", ROWS),
+        ("/api/chat/rooms", None),
+        ("/api/social/search-users?q=budget&limit=50", ROWS),
+        ("/api/social/friend-requests", ROWS - ROWS // 2),
+        ("/api/social/friends", ROWS // 2),
+    ],
+)
+def test_endpoint_stays_within_budget(client, path, expected):
+    response = client.get(path)
+    assert response.status_code == 200, response.text
+    assert "Server-Timing" in response.headers
+    if expected is not None:
+        assert len(response.json()) == expected
+
+
+def test_over_budget_route_raises(client):
+    response = client.get("/test/over-budget")
+    assert response.status_code == 500
+    body = response.json()
+    assert "SQL_BUDGET_EXCEEDED" in response.text
+    assert "queries > budget 2" in str(body)
@@ -0,0 +1,225 @@
+"""
+Tournament registration under concurrency
+
+Seats, balances and the prize pool must come out exact however requests
+interleave; run against a SQLite file with one session per thread, as
+scripts/tournament_registration_benchmark.py does.
+"""
+
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.models.location import Location
+from app.models.tournament import (
+    ParticipantStatus,
+    Tournament,
+    TournamentFormat,
+    TournamentParticipant,
+    TournamentStatus,
+    TournamentType,
+)
+from app.models.user import User
+from app.services.tournament_registration import IdempotencyStore, RegistrationEngine, RegistrationError
+
+FEE = 10
+WORKERS = 16
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'registration.db'}", connect_args={"timeout": 60, "check_same_thread": False}
+    )
+    for model in (User, Location, Tournament, TournamentParticipant):
+        model.__table__.create(engine, checkfirst=True)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def idempotency():
+    # Own namespace, so a shared Redis never replays another run's results
+    return IdempotencyStore(prefix=f"test_reg:{uuid.uuid4().hex}:")
+
+
+def seed(session_factory, credits, seats):
+    """One open tournament and a player per entry in `credits`; returns (tournament id, user ids)"""
+    now = datetime.utcnow()
+    with session_factory() as db:
+        location = Location(location_id="REG-1", name="Arena", address="-", city="-", latitude=47.5, longitude=19.0)
+        db.add(location)
+        players = [
+            User(
+                username=f"player{i}", email=f"player{i}@example.com", hashed_password="-",
+                full_name=f"Player {i}", credits=balance, level=5,
+            )
+            for i, balance in enumerate(credits)
+        ]
+        db.add_all(players)
+        db.flush()
+        tournament = Tournament(
+            tournament_id="REG-1",
+            name="Registration rush",
+            tournament_type=TournamentType.DAILY_CHALLENGE,
+            game_type="GAME1",
+            format=TournamentFormat.SINGLE_ELIMINATION,
+            location_id=location.id,
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=2, hours=4),
+            registration_deadline=now + timedelta(days=1),
+            max_participants=seats,
+            min_participants=2,
+            entry_fee_credits=FEE,
+            prize_pool_credits=0,
+            current_participants=0,
+            organizer_id=players[0].id,
+            status=TournamentStatus.REGISTRATION,
+        )
+        db.add(tournament)
+        db.commit()
+        return tournament.id, [player.id for player in players]
+
+
+def run_concurrently(session_factory, idempotency, action, requests):
+    """Outcome of `action(engine, request)` per request: its status or the RegistrationError code"""
+
+    def attempt(request):
+        with session_factory() as db:
+            try:
+                result = action(RegistrationEngine(db, idempotency), request)
+            except RegistrationError as e:
+                return e.code
+            return "replayed" if result.get("replayed") else result["status"]
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        return Counter(pool.map(attempt, requests))
+
+
+def ledger(session_factory, tournament_id, user_ids):
+    with session_factory() as db:
+        registered = (
+            db.query(func.count(TournamentParticipant.id))
+            .filter(
+                TournamentParticipant.tournament_id == tournament_id,
+                TournamentParticipant.status == ParticipantStatus.REGISTERED,
+            )
+            .scalar()
+        )
+        current, prize_pool = (
+            db.query(Tournament.current_participants, Tournament.prize_pool_credits)
+            .filter(Tournament.id == tournament_id)
+            .one()
+        )
+        balances = dict(db.query(User.id, User.credits).filter(User.id.in_(user_ids)))
+    return registered, current, prize_pool, balances
+
+
+def register(engine, request):
+    tournament_id, user_id, key = request
+    return engine.register(tournament_id, user_id, key)
+
+
+def withdraw(engine, request):
+    tournament_id, user_id = request
+    return engine.withdraw(tournament_id, user_id)
+
+
+def test_rush_never_overfills_or_overdraws(session_factory, idempotency):
+    credits = [0 if i % 5 == 0 else FEE * 3 for i in range(60)]
+    seats = 16
+    tournament_id, user_ids = seed(session_factory, credits, seats)
+
+    outcomes = run_concurrently(
+        session_factory, idempotency, register, [(tournament_id, user_id, uuid.uuid4().hex) for user_id in user_ids]
+    )
+
+    registered, current, prize_pool, balances = ledger(session_factory, tournament_id, user_ids)
+    eligible = sum(1 for balance in credits if balance >= FEE)
+    assert current == registered == outcomes["registered"] == min(seats, eligible)
+    assert set(outcomes) <= {"registered", "full", "insufficient_credits"}
+    assert prize_pool == current * FEE
+    assert sum(credits) - sum(balances.values()) == current * FEE
+    assert min(balances.values()) >= 0
+
+
+def test_duplicate_requests_register_once(session_factory, idempotency):
+    tournament_id, (user_id,) = seed(session_factory, [FEE * 3], seats=8)
+
+    outcomes = run_concurrently(
+        session_factory, idempotency, register, [(tournament_id, user_id, uuid.uuid4().hex) for _ in range(12)]
+    )
+
+    assert outcomes["registered"] == 1
+    assert outcomes["already_registered"] == 11
+    registered, current, prize_pool, balances = ledger(session_factory, tournament_id, [user_id])
+    assert (registered, current, prize_pool, balances[user_id]) == (1, 1, FEE, FEE * 2)
+
+
+def test_retries_with_one_key_charge_once(session_factory, idempotency):
+    tournament_id, (user_id,) = seed(session_factory, [FEE * 3], seats=8)
+    key = uuid.uuid4().hex
+
+    outcomes = run_concurrently(session_factory, idempotency, register, [(tournament_id, user_id, key)] * 12)
+
+    assert outcomes["registered"] == 1
+    assert set(outcomes) <= {"registered", "replayed", "in_progress"}
+    registered, current, prize_pool, balances = ledger(session_factory, tournament_id, [user_id])
+    assert (registered, current, prize_pool, balances[user_id]) == (1, 1, FEE, FEE * 2)
+
+    # A late retry replays the original result rather than failing as a duplicate
+    with session_factory() as db:
+        replay = RegistrationEngine(db, idempotency).register(tournament_id, user_id, key)
+    assert replay["replayed"] is True
+    assert replay["status"] == "registered"
+    assert replay["credits"] == FEE * 2
+
+
+def test_concurrent_withdrawals_refund_once(session_factory, idempotency):
+    tournament_id, (user_id,) = seed(session_factory, [FEE * 3], seats=8)
+    with session_factory() as db:
+        RegistrationEngine(db, idempotency).register(tournament_id, user_id)
+
+    outcomes = run_concurrently(session_factory, idempotency, withdraw, [(tournament_id, user_id)] * 12)
+
+    assert outcomes == Counter({"withdrew": 1, "not_registered": 11})
+    registered, current, prize_pool, balances = ledger(session_factory, tournament_id, [user_id])
+    assert (registered, current, prize_pool, balances[user_id]) == (0, 0, 0, FEE * 3)
+
+    # The withdrawn row is reactivated on re-registration
+    with session_factory() as db:
+        result = RegistrationEngine(db, idempotency).register(tournament_id, user_id)
+    assert result["status"] == "registered"
+    assert ledger(session_factory, tournament_id, [user_id])[:3] == (1, 1, FEE)
+
+
+def test_registration_and_withdrawal_churn_balances(session_factory, idempotency):
+    credits = [FEE * 3] * 24
+    tournament_id, user_ids = seed(session_factory, credits, seats=12)
+    leaving = user_ids[:8]
+    with session_factory() as db:
+        engine = RegistrationEngine(db, idempotency)
+        for user_id in leaving:
+            engine.register(tournament_id, user_id)
+
+    def churn(engine, request):
+        action, user_id = request
+        if action == "withdraw":
+            return engine.withdraw(tournament_id, user_id)
+        return engine.register(tournament_id, user_id, uuid.uuid4().hex)
+
+    requests = [("withdraw", user_id) for user_id in leaving] + [("register", user_id) for user_id in user_ids[8:]]
+    outcomes = run_concurrently(session_factory, idempotency, churn, requests)
+
+    assert outcomes["withdrew"] == len(leaving)
+    assert set(outcomes) <= {"withdrew", "registered", "full"}
+    registered, current, prize_pool, balances = ledger(session_factory, tournament_id, user_ids)
+    assert current == registered == outcomes["registered"]
+    assert current <= 12
+    assert prize_pool == current * FEE
+    assert sum(credits) - sum(balances.values()) == current * FEE
@@ -0,0 +1,110 @@
+"""
+Bulk weather refresh against the mock OpenWeather server
+
+One provider call per geohash cell, transient 503s retried, and every
+venue in a cell written from its cell's reading in one pass.
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.location import Location
+from app.models.weather import LocationWeather
+from app.services import weather_service
+from app.services.weather_cache import weather_cache
+
+aiohttp_web = pytest.importorskip("aiohttp.web")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+from mock_openweather_server import build_app  # noqa: E402
+
+# Venue clusters a few hundred metres apart, far enough from each other to land in separate cells
+CLUSTERS = [(47.4979, 19.0402), (48.2082, 16.3738), (50.0755, 14.4378), (52.2297, 21.0122), (45.8150, 15.9819)]
+VENUES_PER_CLUSTER = 4
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'weather.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for cluster, (latitude, longitude) in enumerate(CLUSTERS):
+        for venue in range(VENUES_PER_CLUSTER):
+            session.add(Location(
+                location_id=f"wx-{cluster}-{venue}", name=f"Pitch {cluster}.{venue}", address="Main St",
+                latitude=latitude + venue * 0.002, longitude=longitude + venue * 0.002,
+            ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+async def refresh_against_mock(db, error_rate: float):
+    app = build_app(latency_ms=5, rate_per_second=0, error_rate=error_rate)
+    runner = aiohttp_web.AppRunner(app)
+    await runner.setup()
+    site = aiohttp_web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        async with weather_service.WeatherAPIService("test-key", base_url=f"http://127.0.0.1:{port}/data/2.5") as api:
+            stats = await weather_service.WeatherService(db, api).refresh_locations_bulk()
+    finally:
+        await runner.cleanup()
+    return stats, dict(app["counters"])
+
+
+@pytest.fixture(autouse=True)
+def fast_provider(monkeypatch):
+    # No pacing against the local mock; enough retries that a 503 streak cannot fail a cell
+    monkeypatch.setattr(weather_service, "WEATHER_API_RATE_PER_MINUTE", 60000)
+    monkeypatch.setattr(weather_service, "WEATHER_API_RETRIES", 8)
+    # Every test asks the provider rather than the readings an earlier one cached
+    monkeypatch.setattr(weather_cache, "prefix", f"weather_test:{uuid.uuid4().hex}:")
+    weather_cache.clear_local()
+    yield
+    weather_cache.clear_local()
+
+
+def test_one_request_per_geohash_cell(db):
+    venues = db.query(Location).all()
+    cells = {weather_cache.cell(venue.latitude, venue.longitude) for venue in venues}
+    assert len(cells) < len(venues)  # Clustered venues share cells
+
+    stats, counters = asyncio.run(refresh_against_mock(db, error_rate=0))
+
+    assert stats["locations"] == len(venues)
+    assert stats["cells"] == len(cells)
+    assert counters["requests"] == len(cells)
+    assert stats["updated"] == len(venues)
+    assert stats["failed"] == 0
+    assert db.query(LocationWeather).count() == len(venues)
+
+
+def test_venues_in_a_cell_share_its_reading(db):
+    asyncio.run(refresh_against_mock(db, error_rate=0))
+
+    readings = {}
+    for venue, reading in db.query(Location, LocationWeather).join(
+        LocationWeather, LocationWeather.location_id == Location.id
+    ):
+        observed = (reading.temperature, reading.humidity, reading.wind_direction, reading.condition)
+        readings.setdefault(weather_cache.cell(venue.latitude, venue.longitude), set()).add(observed)
+    assert all(len(observed) == 1 for observed in readings.values())
+
+
+def test_transient_errors_are_retried(db):
+    stats, counters = asyncio.run(refresh_against_mock(db, error_rate=0.3))
+
+    assert stats["failed"] == 0
+    assert stats["updated"] == len(CLUSTERS) * VENUES_PER_CLUSTER
+    assert stats["retries"] == counters.get("errors", 0)
+    assert counters["ok"] == stats["cells"]
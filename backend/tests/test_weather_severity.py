@@ -0,0 +1,30 @@
+"""Current readings and forecast hours are rated with the same severity mapping"""
+
+import itertools
+
+import pytest
+
+from app.models.weather import WeatherSeverity
+from app.services.weather_service import WeatherAPIService
+from app.services.weather_suitability import estimate_severity
+
+PROVIDER_CONDITIONS = ["Clear", "Clouds", "Drizzle", "Rain", "Thunderstorm", "Snow", "Mist", "Fog", "Haze"]
+
+
+@pytest.mark.parametrize(
+    "provider_condition,temperature,wind_ms",
+    itertools.product(PROVIDER_CONDITIONS, [-10, -2, 5, 20, 32, 40], [0, 5, 10, 15]),
+)
+def test_forecast_hours_match_current_readings(provider_condition, temperature, wind_ms):
+    live = WeatherAPIService._calculate_severity({"temp": temperature}, {"main": provider_condition}, {"speed": wind_ms})
+    # Forecast rows store the mapped condition and the wind in m/s
+    condition = WeatherAPIService._map_weather_condition(provider_condition).value
+    assert estimate_severity(temperature, wind_ms, condition) == live.value
+
+
+def test_rain_is_high_and_drizzle_moderate():
+    assert WeatherAPIService._calculate_severity({"temp": 18}, {"main": "Rain"}, {"speed": 2}) == WeatherSeverity.HIGH
+    assert estimate_severity(18, 2, "rain") == "high"
+    assert estimate_severity(18, 2, "light_rain") == "moderate"
+    assert estimate_severity(18, 2, "storm") == "extreme"
+    assert estimate_severity(None, None, None) == "low"
@@ -42,13 +42,13 @@ async def test_password_validation():
     print("=" * 30)
     
     test_password = "TestPassword123!"
-    hashed = service.hash_password(test_password)
+    hashed = await service.hash_password(test_password)
     print(f"Password: {test_password}")
     print(f"Hash: {hashed[:50]}...")
     
     # Test verification
-    is_valid = service.verify_password(test_password, hashed)
-    is_invalid = service.verify_password("wrong_password", hashed)
+    is_valid = await service.verify_password(test_password, hashed)
+    is_invalid = await service.verify_password("wrong_password", hashed)
     
     print(f"✅ Correct password verification: {is_valid}")
     print(f"❌ Wrong password verification: {is_invalid}")